@@ -1,18 +1,21 @@
 from django.contrib import admin
 from django import forms
+from django.urls import path
 from django.contrib.auth.models import User
-from .models import Asignatura, Curso, InscripcionCurso, Calificacion, HorarioClases, Asistencia, TipoExamen, Examen, PreguntaExamen
+from .models import Asignatura, Curso, InscripcionCurso, Calificacion, HorarioClases, Asistencia, TipoExamen, Examen, PreguntaExamen, LoteDocumentos
 
 # --- Inlines para facilitar asignaciones ---
 
 # Acciones personalizadas para el admin
 @admin.action(description='Marcar como presentes seleccionados')
 def marcar_presentes(modeladmin, request, queryset):
-    queryset.update(estado='presente')
+    from .services import AttendanceBatchWriter
+    AttendanceBatchWriter.cambiar_estado(queryset, 'presente')
 
 @admin.action(description='Marcar como ausentes seleccionados')
 def marcar_ausentes(modeladmin, request, queryset):
-    queryset.update(estado='ausente')
+    from .services import AttendanceBatchWriter
+    AttendanceBatchWriter.cambiar_estado(queryset, 'ausente')
 
 @admin.action(description='Enviar correo a alumnos del curso')
 def enviar_correo_curso(modeladmin, request, queryset):
@@ -65,6 +68,34 @@ def ingresar_notas_curso(modeladmin, request, queryset):
     curso = queryset.first()
     return redirect(reverse('academico:registrar_notas_curso', args=[curso.id]))
 
+def _encolar_lote_pdf(modeladmin, request, queryset, tipo):
+    """Crea un LoteDocumentos para los cursos seleccionados y lo procesa en segundo plano"""
+    from django.contrib import messages
+    from django.urls import reverse
+    from django.utils.html import format_html
+    from .services import AcademicoService, LotePDFService
+
+    lote = LoteDocumentos.objects.create(
+        tipo=tipo, año=AcademicoService.get_anio_actual(), solicitado_por=request.user
+    )
+    lote.cursos.set(queryset)
+    LotePDFService.lanzar(lote)
+
+    url = reverse('admin:academico_lotedocumentos_change', args=[lote.pk])
+    modeladmin.message_user(
+        request,
+        format_html('El lote <a href="{}">{}</a> quedó en cola de generación. Revise su avance en Lotes de Documentos PDF.', url, lote),
+        level=messages.SUCCESS,
+    )
+
+@admin.action(description='Generar informes de notas PDF (ZIP)')
+def generar_lote_informes_notas(modeladmin, request, queryset):
+    _encolar_lote_pdf(modeladmin, request, queryset, 'informe_notas')
+
+@admin.action(description='Generar certificados de alumno regular PDF (ZIP)')
+def generar_lote_alumno_regular(modeladmin, request, queryset):
+    _encolar_lote_pdf(modeladmin, request, queryset, 'alumno_regular')
+
 @admin.action(description='Duplicar bloque al siguiente horario (Bloque Doble)')
 def duplicar_bloque_siguiente(modeladmin, request, queryset):
     """Duplica el bloque seleccionado al horario inmediatamente siguiente"""
@@ -172,7 +203,7 @@ class AsignaturaAdmin(admin.ModelAdmin):
 
 @admin.register(Curso)
 class CursoAdmin(admin.ModelAdmin):
-    actions = [enviar_correo_curso, ingresar_notas_curso]
+    actions = [enviar_correo_curso, ingresar_notas_curso, generar_lote_informes_notas, generar_lote_alumno_regular]
     list_display = ('nombre', 'nivel', 'letra', 'año', 'profesor_jefe_display', 'total_alumnos', 'activo')
     list_filter = ('nivel', 'año', 'activo')
     search_fields = ('nombre', 'letra')
@@ -406,4 +437,63 @@ class PreguntaExamenAdmin(admin.ModelAdmin):
     list_filter = ('tipo_pregunta',)
     search_fields = ('examen__titulo', 'enunciado')
     autocomplete_fields = ['examen']
-    ordering = ('examen', 'orden', 'numero')
\ No newline at end of file
+    ordering = ('examen', 'orden', 'numero')
+
+@admin.register(LoteDocumentos)
+class LoteDocumentosAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'estado', 'progreso_display', 'fallidos', 'solicitado_por', 'creado', 'descarga_display')
+    list_filter = ('estado', 'tipo', 'año')
+    filter_horizontal = ('cursos',)
+    readonly_fields = ('estado', 'total', 'procesados', 'fallidos', 'errores', 'descarga_display', 'solicitado_por', 'creado', 'finalizado')
+    # El ZIP no tiene URL pública: se descarga con descargar()
+    exclude = ('archivo',)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.solicitado_por = request.user
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if not change:
+            from .services import LotePDFService
+            LotePDFService.lanzar(form.instance)
+
+    def changelist_view(self, request, extra_context=None):
+        from .services import LotePDFService
+        LotePDFService.marcar_interrumpidos()
+        return super().changelist_view(request, extra_context)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path('<int:pk>/descargar/', self.admin_site.admin_view(self.descargar), name='academico_lotedocumentos_descargar'),
+        ]
+        return my_urls + urls
+
+    def descargar(self, request, pk):
+        """El ZIP está fuera de MEDIA_ROOT: solo se entrega a quien puede ver el lote en el admin"""
+        import os
+        from django.core.exceptions import PermissionDenied
+        from django.http import FileResponse, Http404
+        from django.shortcuts import get_object_or_404
+
+        lote = get_object_or_404(LoteDocumentos, pk=pk)
+        if not self.has_view_permission(request, lote):
+            raise PermissionDenied
+        if lote.estado != 'completado' or not lote.archivo or not lote.archivo.storage.exists(lote.archivo.name):
+            raise Http404("El lote no tiene un archivo disponible.")
+        return FileResponse(lote.archivo.open('rb'), as_attachment=True, filename=os.path.basename(lote.archivo.name))
+
+    def progreso_display(self, obj):
+        return f"{obj.procesados}/{obj.total} ({obj.porcentaje}%)"
+    progreso_display.short_description = 'Progreso'
+
+    def descarga_display(self, obj):
+        from django.urls import reverse
+        from django.utils.html import format_html
+        if obj.estado == 'completado' and obj.archivo:
+            url = reverse('admin:academico_lotedocumentos_descargar', args=[obj.pk])
+            return format_html('<a href="{}">Descargar ZIP</a>', url)
+        return "-"
+    descarga_display.short_description = 'Archivo'
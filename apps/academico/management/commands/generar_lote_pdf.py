@@ -0,0 +1,82 @@
+"""
+Management command: generar_lote_pdf
+Genera en un pool de procesos los documentos PDF de uno o varios cursos (o de
+todo el liceo) y los deja en un ZIP en ARCHIVOS_PRIVADOS_ROOT/lotes_pdf/.
+
+Uso:
+    python manage.py generar_lote_pdf --lote 12                    # Procesar un lote creado desde el admin
+    python manage.py generar_lote_pdf --pendientes                 # Vaciar la cola de lotes pendientes
+    python manage.py generar_lote_pdf --tipo informe_notas --todos
+    python manage.py generar_lote_pdf --tipo alumno_regular --curso 3 --curso 4 --procesos 4
+"""
+from django.core.management.base import BaseCommand, CommandError
+from academico.models import Curso, LoteDocumentos
+from academico.services import AcademicoService, LotePDFService
+
+
+class Command(BaseCommand):
+    help = 'Genera un ZIP con los documentos PDF de los estudiantes de uno o varios cursos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help='ID de un LoteDocumentos ya creado')
+        parser.add_argument('--pendientes', action='store_true',
+                            help='Procesar uno tras otro los lotes pendientes hasta vaciar la cola')
+        parser.add_argument(
+            '--tipo',
+            choices=[tipo for tipo, _ in LoteDocumentos.TIPO_CHOICES],
+            default='informe_notas',
+            help='Documento a generar (por defecto, informe de notas)',
+        )
+        parser.add_argument(
+            '--curso',
+            type=int,
+            action='append',
+            dest='cursos',
+            help='ID de curso a incluir (repetible)',
+        )
+        parser.add_argument('--todos', action='store_true', help='Todos los cursos activos del año')
+        parser.add_argument('--anio', type=int, help='Año académico. Por defecto, el año actual')
+        parser.add_argument('--procesos', type=int, help='Procesos del pool. Por defecto, PDF_LOTE_PROCESOS')
+
+    def handle(self, *args, **options):
+        def progreso(hechos, total):
+            if hechos == total or hechos % 25 == 0:
+                self.stdout.write(f"  {hechos}/{total} documentos")
+
+        if options['pendientes']:
+            LotePDFService.marcar_interrumpidos()
+            lotes = LotePDFService.procesar_pendientes(procesos=options['procesos'], progreso=progreso)
+            for lote in lotes:
+                self.stdout.write(f"Lote {lote.pk}: {lote.get_estado_display()}")
+            self.stdout.write(self.style.SUCCESS(f"Cola vacía ({len(lotes)} lotes procesados)"))
+            return
+
+        if options['lote']:
+            try:
+                lote = LoteDocumentos.objects.get(pk=options['lote'])
+            except LoteDocumentos.DoesNotExist:
+                raise CommandError(f"No existe el lote {options['lote']}.")
+            if lote.estado == 'procesando':
+                raise CommandError(f"El lote {lote.pk} ya se está procesando.")
+        elif options['cursos'] or options['todos']:
+            lote = LoteDocumentos.objects.create(
+                tipo=options['tipo'],
+                año=options['anio'] or AcademicoService.get_anio_actual(),
+            )
+            if options['cursos']:
+                cursos = Curso.objects.filter(pk__in=options['cursos'])
+                if len(cursos) != len(set(options['cursos'])):
+                    raise CommandError("Alguno de los cursos indicados no existe.")
+                lote.cursos.set(cursos)
+        else:
+            raise CommandError("Indique --lote, --pendientes, --curso o --todos.")
+
+        self.stdout.write(f"Generando lote {lote.pk}: {lote.get_tipo_display()} {lote.año}...")
+        LotePDFService.generar(lote, procesos=options['procesos'], progreso=progreso)
+
+        mensaje = f"Lote {lote.pk} listo: {lote.procesados - lote.fallidos}/{lote.total} documentos en {lote.archivo.name}"
+        if lote.fallidos:
+            self.stdout.write(self.style.WARNING(f"{mensaje} ({lote.fallidos} con error)"))
+            self.stdout.write(lote.errores)
+        else:
+            self.stdout.write(self.style.SUCCESS(mensaje))
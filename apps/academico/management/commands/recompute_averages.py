@@ -0,0 +1,54 @@
+"""
+Management command: recompute_averages
+Reconstruye los acumulados de notas (PromedioAcumulado) y los promedios
+derivados, o verifica que no se hayan desviado de las calificaciones.
+
+Uso:
+    python manage.py recompute_averages              # Reconstruir todo
+    python manage.py recompute_averages --check      # Solo reportar desviaciones
+    python manage.py recompute_averages --estudiante 15 --estudiante 16
+"""
+from django.core.management.base import BaseCommand, CommandError
+from academico.services import PromedioService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los promedios acumulados desde las calificaciones o detecta desviaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='No modifica datos; falla si los acumulados no coinciden con las calificaciones',
+        )
+        parser.add_argument(
+            '--estudiante',
+            type=int,
+            action='append',
+            dest='estudiantes',
+            help='ID de estudiante a procesar (repetible). Por defecto, todos.',
+        )
+
+    def handle(self, *args, **options):
+        estudiante_ids = options['estudiantes']
+
+        if options['check']:
+            desviaciones = PromedioService.detectar_desviaciones(estudiante_ids)
+            if not desviaciones:
+                self.stdout.write(self.style.SUCCESS("Los acumulados coinciden con las calificaciones."))
+                return
+
+            for d in desviaciones[:50]:
+                self.stdout.write(
+                    f"Estudiante {d['estudiante_id']} - Curso {d['curso_id']} - Asignatura {d['asignatura_id']} "
+                    f"S{d['semestre']}: esperado {d['esperado']}, almacenado {d['almacenado']}"
+                )
+            if len(desviaciones) > 50:
+                self.stdout.write(f"... y {len(desviaciones) - 50} más.")
+            raise CommandError(
+                f"Se detectaron {len(desviaciones)} acumulados desviados. "
+                "Ejecute 'recompute_averages' sin --check para reconstruirlos."
+            )
+
+        total = PromedioService.reconstruir(estudiante_ids)
+        self.stdout.write(self.style.SUCCESS(f"Proceso finalizado. {total} acumulados reconstruidos."))
@@ -0,0 +1,54 @@
+"""
+Management command: recompute_summaries
+Reconstruye los resúmenes por estudiante, curso y año (ResumenEstudiante), o
+verifica que coincidan con las calificaciones y asistencias registradas.
+
+Uso:
+    python manage.py recompute_summaries              # Reconstruir todo
+    python manage.py recompute_summaries --check      # Solo reportar desviaciones
+    python manage.py recompute_summaries --estudiante 15 --estudiante 16
+"""
+from django.core.management.base import BaseCommand, CommandError
+from academico.services import ResumenService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes de estudiantes desde notas y asistencia o detecta desviaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='No modifica datos; falla si los resúmenes no coinciden con las tablas de origen',
+        )
+        parser.add_argument(
+            '--estudiante',
+            type=int,
+            action='append',
+            dest='estudiantes',
+            help='ID de estudiante a procesar (repetible). Por defecto, todos.',
+        )
+
+    def handle(self, *args, **options):
+        estudiante_ids = options['estudiantes']
+
+        if options['check']:
+            desviaciones = ResumenService.detectar_desviaciones(estudiante_ids)
+            if not desviaciones:
+                self.stdout.write(self.style.SUCCESS("Los resúmenes coinciden con notas y asistencia."))
+                return
+
+            for d in desviaciones[:50]:
+                self.stdout.write(
+                    f"Estudiante {d['estudiante_id']} - Curso {d['curso_id']} - Año {d['año']}: "
+                    f"esperado {d['esperado']}, almacenado {d['almacenado']}"
+                )
+            if len(desviaciones) > 50:
+                self.stdout.write(f"... y {len(desviaciones) - 50} más.")
+            raise CommandError(
+                f"Se detectaron {len(desviaciones)} resúmenes desviados. "
+                "Ejecute 'recompute_summaries' sin --check para reconstruirlos."
+            )
+
+        total = ResumenService.reconstruir(estudiante_ids)
+        self.stdout.write(self.style.SUCCESS(f"Proceso finalizado. {total} resúmenes reconstruidos."))
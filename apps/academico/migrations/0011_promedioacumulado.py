@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_acumulados(apps, schema_editor):
+    """Construye los acumulados iniciales a partir de las calificaciones existentes"""
+    Calificacion = apps.get_model('academico', 'Calificacion')
+    PromedioAcumulado = apps.get_model('academico', 'PromedioAcumulado')
+    filas = Calificacion.objects.values(
+        'estudiante_id', 'curso_id', 'asignatura_id', 'semestre'
+    ).annotate(suma=Sum('nota'), cantidad=Count('id')).order_by()
+    PromedioAcumulado.objects.bulk_create([
+        PromedioAcumulado(
+            estudiante_id=f['estudiante_id'],
+            curso_id=f['curso_id'],
+            asignatura_id=f['asignatura_id'],
+            semestre=f['semestre'],
+            suma_notas=f['suma'],
+            cantidad_notas=f['cantidad'],
+        )
+        for f in filas
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0010_anotacion_uuid_asignatura_uuid_asistencia_uuid_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromedioAcumulado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semestre', models.CharField(choices=[('1', 'Primer Semestre'), ('2', 'Segundo Semestre')], max_length=1)),
+                ('suma_notas', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('cantidad_notas', models.IntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('asignatura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promedios_acumulados', to='academico.asignatura')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promedios_acumulados', to='academico.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promedios_acumulados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Promedio Acumulado',
+                'verbose_name_plural': 'Promedios Acumulados',
+                'unique_together': {('estudiante', 'curso', 'asignatura', 'semestre')},
+            },
+        ),
+        migrations.RunPython(poblar_acumulados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Construye los resúmenes iniciales a partir de las calificaciones y asistencias existentes"""
+    Calificacion = apps.get_model('academico', 'Calificacion')
+    Asistencia = apps.get_model('academico', 'Asistencia')
+    ResumenEstudiante = apps.get_model('academico', 'ResumenEstudiante')
+    resumenes = {}
+
+    def resumen(est_id, curso_id, anio):
+        clave = (est_id, curso_id, anio)
+        if clave not in resumenes:
+            resumenes[clave] = ResumenEstudiante(
+                estudiante_id=est_id, curso_id=curso_id, año=anio, suma_notas=0, notas_por_asignatura={}
+            )
+        return resumenes[clave]
+
+    notas = Calificacion.objects.annotate(anio=ExtractYear('fecha_evaluacion')).values(
+        'estudiante_id', 'curso_id', 'anio', 'asignatura_id'
+    ).annotate(suma=Sum('nota'), cantidad=Count('id')).order_by()
+    for f in notas:
+        r = resumen(f['estudiante_id'], f['curso_id'], f['anio'])
+        r.suma_notas += f['suma']
+        r.cantidad_notas += f['cantidad']
+        r.notas_por_asignatura[str(f['asignatura_id'])] = [str(f['suma']), f['cantidad']]
+
+    asistencias = Asistencia.objects.annotate(anio=ExtractYear('fecha')).values(
+        'estudiante_id', 'curso_id', 'anio', 'estado'
+    ).annotate(cantidad=Count('id')).order_by()
+    for f in asistencias:
+        r = resumen(f['estudiante_id'], f['curso_id'], f['anio'])
+        setattr(r, f"asistencias_{f['estado']}", f['cantidad'])
+
+    ResumenEstudiante.objects.bulk_create(resumenes.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0011_promedioacumulado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenEstudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.IntegerField()),
+                ('asistencias_presente', models.IntegerField(default=0)),
+                ('asistencias_ausente', models.IntegerField(default=0)),
+                ('asistencias_tardanza', models.IntegerField(default=0)),
+                ('asistencias_justificado', models.IntegerField(default=0)),
+                ('suma_notas', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('cantidad_notas', models.IntegerField(default=0)),
+                ('notas_por_asignatura', models.JSONField(blank=True, default=dict)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='academico.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Estudiante',
+                'verbose_name_plural': 'Resúmenes de Estudiantes',
+                'unique_together': {('estudiante', 'curso', 'año')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0012_resumenestudiante'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteDocumentos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('informe_notas', 'Informe de Notas'), ('alumno_regular', 'Certificado de Alumno Regular'), ('asistencia', 'Reporte de Asistencia')], max_length=20)),
+                ('año', models.IntegerField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('procesados', models.IntegerField(default=0)),
+                ('fallidos', models.IntegerField(default=0)),
+                ('errores', models.TextField(blank=True)),
+                ('archivo', models.FileField(blank=True, upload_to='lotes_pdf/')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('finalizado', models.DateTimeField(blank=True, null=True)),
+                ('cursos', models.ManyToManyField(blank=True, help_text='Vacío = todos los cursos activos del año', related_name='lotes_documentos', to='academico.curso')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lotes_documentos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lote de Documentos PDF',
+                'verbose_name_plural': 'Lotes de Documentos PDF',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0013_lotedocumentos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recursoacademico',
+            name='archivo',
+            field=models.FileField(storage=core.storage.almacenamiento_deduplicado, upload_to='recursos_academicos/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:08
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0015_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotedocumentos',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='lotedocumentos',
+            name='archivo',
+            field=models.FileField(blank=True, storage=core.storage.almacenamiento_privado, upload_to='lotes_pdf/'),
+        ),
+    ]
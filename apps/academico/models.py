@@ -5,6 +5,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from comunicacion.models import CategoriaNoticia
 from core.models import ConfiguracionAcademica
+from core.storage import almacenamiento_deduplicado, almacenamiento_privado
 
 def obtener_año_actual():
     """Retorna el año académico actual configurado"""
@@ -127,17 +128,52 @@ class Calificacion(models.Model):
     )
     descripcion = models.CharField(max_length=200, blank=True)
     creado = models.DateTimeField(auto_now_add=True)
+    # Marca de cambio para la sincronización incremental de la API
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Calificación"
         verbose_name_plural = "Calificaciones"
         ordering = ['-fecha_evaluacion']
         unique_together = ('estudiante', 'asignatura', 'curso', 'numero_evaluacion')
+        indexes = [
+            models.Index(fields=['estudiante', 'actualizado'], name='calificacion_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.estudiante.username} - {self.asignatura} ({self.nota})"
 
 
+class PromedioAcumulado(models.Model):
+    """
+    Acumulado incremental de notas (suma y cantidad) por estudiante, curso,
+    asignatura y semestre. Se actualiza por deltas en cada alta/cambio/baja de
+    Calificacion y es la fuente de InscripcionCurso.promedio y
+    PerfilUsuario.promedio_general.
+    """
+    estudiante = models.ForeignKey(User, on_delete=models.CASCADE, related_name='promedios_acumulados')
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='promedios_acumulados')
+    asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, related_name='promedios_acumulados')
+    semestre = models.CharField(max_length=1, choices=Calificacion.SEMESTRE_CHOICES)
+    suma_notas = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cantidad_notas = models.IntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Promedio Acumulado"
+        verbose_name_plural = "Promedios Acumulados"
+        unique_together = ('estudiante', 'curso', 'asignatura', 'semestre')
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.asignatura_id} S{self.semestre} ({self.promedio})"
+
+    @property
+    def promedio(self):
+        if not self.cantidad_notas:
+            return None
+        return round(self.suma_notas / self.cantidad_notas, 1)
+
+
 
 class HorarioClases(models.Model):
     """Horarios de clases"""
@@ -195,16 +231,66 @@ class Asistencia(models.Model):
     observacion = models.TextField(blank=True)
     registrado_por = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'perfil__tipo_usuario__in': ['profesor', 'administrativo', 'directivo']})
     creado = models.DateTimeField(auto_now_add=True)
+    # Marca de cambio para la sincronización incremental de la API
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Asistencia"
         verbose_name_plural = "Asistencias"
         unique_together = ('estudiante', 'curso', 'fecha')
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['estudiante', 'actualizado'], name='asistencia_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.estudiante.username} - {self.fecha} ({self.estado})"
 
+
+class ResumenEstudiante(models.Model):
+    """
+    Resumen materializado por estudiante, curso y año calendario: asistencia
+    por estado y suma/cantidad de notas (total y por asignatura). Lo mantienen
+    al día las rutas de escritura de Calificacion y Asistencia, de modo que los
+    paneles lo leen sin volver a agregar esas tablas.
+    """
+    estudiante = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes')
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='resumenes')
+    año = models.IntegerField()
+    asistencias_presente = models.IntegerField(default=0)
+    asistencias_ausente = models.IntegerField(default=0)
+    asistencias_tardanza = models.IntegerField(default=0)
+    asistencias_justificado = models.IntegerField(default=0)
+    suma_notas = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cantidad_notas = models.IntegerField(default=0)
+    # {"<asignatura_id>": ["<suma>", <cantidad>]}
+    notas_por_asignatura = models.JSONField(default=dict, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Estudiante"
+        verbose_name_plural = "Resúmenes de Estudiantes"
+        unique_together = ('estudiante', 'curso', 'año')
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.curso_id} ({self.año})"
+
+    @property
+    def total_asistencias(self):
+        return (self.asistencias_presente + self.asistencias_ausente
+                + self.asistencias_tardanza + self.asistencias_justificado)
+
+    @property
+    def porcentaje_asistencia(self):
+        total = self.total_asistencias
+        return round(self.asistencias_presente / total * 100, 1) if total else 0
+
+    @property
+    def promedio(self):
+        if not self.cantidad_notas:
+            return None
+        return round(self.suma_notas / self.cantidad_notas, 1)
+
 class TipoExamen(models.Model):
     """Tipos de exámenes y evaluaciones"""
     nombre = models.CharField(max_length=100, unique=True)
@@ -303,11 +389,16 @@ class Anotacion(models.Model):
     categoria = models.CharField(max_length=20, choices=CATEGORIA_CHOICES, default='otro')
     observacion = models.TextField("Observación")
     fecha = models.DateTimeField(auto_now_add=True)
+    # Marca de cambio para la sincronización incremental de la API
+    actualizado = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Anotación"
         verbose_name_plural = "Anotaciones"
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['estudiante', 'actualizado'], name='anotacion_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.estudiante.get_full_name()}"
@@ -316,7 +407,7 @@ class RecursoAcademico(models.Model):
     """Recursos académicos subidos por profesores"""
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField(blank=True)
-    archivo = models.FileField(upload_to='recursos_academicos/%Y/%m/')
+    archivo = models.FileField(upload_to='recursos_academicos/%Y/%m/', storage=almacenamiento_deduplicado)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='recursos')
     profesor = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'perfil__tipo_usuario__in': ['profesor', 'administrativo', 'directivo']})
     asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, null=True, blank=True)
@@ -329,3 +420,52 @@ class RecursoAcademico(models.Model):
 
     def __str__(self):
         return f"{self.titulo} ({self.curso})"
+
+
+class LoteDocumentos(models.Model):
+    """
+    Generación masiva de documentos PDF (informes, certificados) para uno o
+    varios cursos. La procesa el comando generar_lote_pdf fuera del ciclo de
+    la petición y deja un ZIP en ARCHIVOS_PRIVADOS_ROOT/lotes_pdf/, que solo se
+    descarga desde el admin.
+    """
+    TIPO_CHOICES = [
+        ('informe_notas', 'Informe de Notas'),
+        ('alumno_regular', 'Certificado de Alumno Regular'),
+        ('asistencia', 'Reporte de Asistencia'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    año = models.IntegerField()
+    cursos = models.ManyToManyField(Curso, blank=True, related_name='lotes_documentos',
+                                    help_text="Vacío = todos los cursos activos del año")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    total = models.IntegerField(default=0)
+    procesados = models.IntegerField(default=0)
+    fallidos = models.IntegerField(default=0)
+    errores = models.TextField(blank=True)
+    archivo = models.FileField(upload_to='lotes_pdf/', storage=almacenamiento_privado, blank=True)
+    solicitado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='lotes_documentos')
+    creado = models.DateTimeField(auto_now_add=True)
+    # Último avance registrado: un lote 'procesando' sin avance reciente quedó interrumpido
+    actualizado = models.DateTimeField(auto_now=True)
+    finalizado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Lote de Documentos PDF"
+        verbose_name_plural = "Lotes de Documentos PDF"
+        ordering = ['-creado']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.año} ({self.get_estado_display()})"
+
+    @property
+    def porcentaje(self):
+        return round(self.procesados / self.total * 100) if self.total else 0
@@ -5,7 +5,6 @@ from django.db.models import Q, Avg
 from django.http import JsonResponse, FileResponse
 from django.core.paginator import Paginator
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.core.files.storage import default_storage
@@ -13,11 +12,13 @@ import datetime
 import os
 
 from usuarios.models import PerfilUsuario
+from core.services import CorreoService
 from academico.models import (
     Asignatura, Curso, InscripcionCurso, Calificacion, 
     Asistencia, HorarioClases, RecursoAcademico
 )
 from .forms import SeleccionCursoAsignaturaForm, CalificacionForm
+from .services import GradeBatchWriter, AttendanceBatchWriter, GradebookMatrix
 from documentos.models import ComunicadoPadres
 
 @login_required
@@ -204,53 +205,31 @@ def gestionar_calificaciones(request, estudiante_id):
     
     if request.method == 'POST':
         try:
+            writer = GradeBatchWriter(profesor=user, curso=inscripcion.curso)
+            hoy = datetime.date.today()
+            
             for asignatura in asignaturas_profesor:
                 for i in range(1, NUMERO_EVALUACIONES + 1):
-                    campo_nota = f'nota_{asignatura.id}_{i}'
-                    campo_desc = f'desc_{asignatura.id}_{i}'
+                    nota_str = request.POST.get(f'nota_{asignatura.id}_{i}', '').strip()
                     
-                    if campo_nota in request.POST:
-                        nota_str = request.POST.get(campo_nota, '').strip()
-                        descripcion = request.POST.get(campo_desc, f'Evaluación {i}')
-                        
-                        if nota_str:
-                            try:
-                                # Reemplazar coma por punto para soportar formato local
-                                nota_str = nota_str.replace(',', '.')
-                                nota = float(nota_str)
-                                if 1.0 <= nota <= 7.0:
-                                    Calificacion.objects.update_or_create(
-                                        estudiante=estudiante,
-                                        asignatura=asignatura,
-                                        curso=inscripcion.curso,
-                                        numero_evaluacion=i,
-                                        defaults={
-                                            'nota': nota,
-                                            'descripcion': descripcion,
-                                            'fecha_evaluacion': datetime.date.today(),
-                                            'profesor': user,
-                                            'tipo_evaluacion': 'nota',
-                                            'semestre': '1',
-                                        }
-                                    )
-                                else:
-                                    messages.error(request, f'⚠️ Nota fuera de rango en {asignatura.nombre} - Evaluación {i}: {nota}. Las notas deben estar entre 1.0 y 7.0')
-                            except ValueError:
-                                messages.warning(request, f'Nota inválida para {asignatura.nombre} - Evaluación {i}. Solo se permiten números.')
+                    if nota_str:
+                        writer.agregar(
+                            estudiante, asignatura, i, nota_str,
+                            tipo_evaluacion='nota',
+                            semestre='1',
+                            fecha_evaluacion=hoy,
+                            descripcion=request.POST.get(f'desc_{asignatura.id}_{i}', f'Evaluación {i}'),
+                            etiqueta=f'{asignatura.nombre} - Evaluación {i}',
+                        )
             
-            # --- LOGGING ---
-            try:
-                from administrativo.services import LiceoOSService
-                LiceoOSService.registrar_evento(
-                    usuario=request.user,
-                    tipo_accion='nota',
-                    descripcion=f"Actualizó calificaciones de {estudiante}",
-                    detalles=f"Curso: {inscripcion.curso}, Asignaturas: {[a.nombre for a in asignaturas_profesor]}",
-                    request=request
-                )
-            except Exception:
-                pass
-            # ----------------
+            for error in writer.errores:
+                messages.error(request, f'⚠️ {error}')
+            
+            writer.guardar(
+                request=request,
+                descripcion=f"Actualizó calificaciones de {estudiante}",
+                detalles=f"Curso: {inscripcion.curso}, Asignaturas: {[a.nombre for a in asignaturas_profesor]}",
+            )
 
             messages.success(request, 'Calificaciones actualizadas exitosamente.')
             return redirect('academico:gestionar_calificaciones', estudiante_id=estudiante_id)
@@ -306,55 +285,39 @@ def enviar_correos(request):
                 return redirect('academico:enviar_correos')
             
             # Obtener estudiantes seleccionados
-            estudiantes_seleccionados = User.objects.filter(
+            correos = list(User.objects.filter(
                 id__in=destinatarios,
                 perfil__tipo_usuario='estudiante'
-            )
+            ).values_list('email', flat=True))
             
-            correos_enviados = 0
-            correos_fallidos = 0
+            # Si se incluyen apoderados, aquí podrían sumarse sus correos
+            # (por simplicidad, aún no se buscan)
             
-            for estudiante in estudiantes_seleccionados:
-                try:
-                    # Enviar correo al estudiante
-                    send_mail(
-                        asunto,
-                        mensaje,
-                        settings.EMAIL_HOST_USER or 'liceo@liceo.cl',
-                        [estudiante.email],
-                        fail_silently=False,
-                    )
-                    
-                    # Si se incluyen apoderados, buscar información
-                    if incluir_apoderados:
-                        # Aquí podrías buscar el apoderado del estudiante
-                        # Por simplicidad, usamos un correo genérico
-                        pass
-                    
-                    correos_enviados += 1
-                    
-                except Exception as e:
-                    correos_fallidos += 1
-                    logger.error(f"Error enviando correo a {estudiante.email}: {e}")
+            # Solo se encolan: el comando enviar_correos_pendientes los despacha
+            correos_encolados = CorreoService.encolar(
+                correos, asunto, mensaje, remitente=settings.EMAIL_HOST_USER or 'liceo@liceo.cl'
+            )
+            # Las direcciones repetidas se encolan una vez, pero no son estudiantes sin correo
+            sin_correo = sum(1 for correo in correos if not correo)
             
             # Mensaje de resultado
-            if correos_enviados > 0:
+            if correos_encolados > 0:
                 # --- LOGGING ---
                 try:
                     from administrativo.services import LiceoOSService
                     LiceoOSService.registrar_evento(
                         usuario=request.user,
                         tipo_accion='otro',
-                        descripcion=f"Envió {correos_enviados} correos a estudiantes",
+                        descripcion=f"Encoló {correos_encolados} correos a estudiantes",
                         detalles=f"Asunto: {asunto}",
                         request=request
                     )
                 except Exception:
                     pass
                 # ----------------
-                messages.success(request, f'Correos enviados exitosamente: {correos_enviados}')
-            if correos_fallidos > 0:
-                messages.warning(request, f'Correos fallidos: {correos_fallidos}')
+                messages.success(request, f'Correos en cola de envío: {correos_encolados}')
+            if sin_correo > 0:
+                messages.warning(request, f'Estudiantes sin correo registrado: {sin_correo}')
             
             return redirect('academico:enviar_correos')
             
@@ -412,30 +375,20 @@ def registro_asistencias(request, curso_id):
                 cursos_inscrito__curso=curso
             )
             
-            estudiantes_procesados = 0
+            writer = AttendanceBatchWriter(curso, fecha_asistencia, registrado_por=user)
             
             for estudiante in estudiantes:
                 campo_estado = f'estado_{estudiante.id}'
-                campo_obs = f'observaciones_{estudiante.id}'
                 
                 if campo_estado in request.POST:
-                    estado = request.POST.get(campo_estado)
-                    obs_individual = request.POST.get(campo_obs, '')
-                    
-                    # Crear o actualizar asistencia
-                    Asistencia.objects.update_or_create(
-                        estudiante=estudiante,
-                        curso=curso,
-                        fecha=fecha_asistencia,
-                        defaults={
-                            'estado': estado,
-                            'observacion': obs_individual or observacion_general,
-                            'registrado_por': user
-                        }
-                    )
-                    estudiantes_procesados += 1
+                    obs_individual = request.POST.get(f'observaciones_{estudiante.id}', '')
+                    writer.agregar(estudiante, request.POST.get(campo_estado), obs_individual or observacion_general)
             
-            messages.success(request, f'Asistencia registrada para {estudiantes_procesados} estudiantes.')
+            resumen = writer.guardar()
+            for error in writer.errores:
+                messages.warning(request, error)
+            
+            messages.success(request, f"Asistencia registrada para {resumen['total']} estudiantes ({AttendanceBatchWriter.describir(resumen) or 'sin registros'}).")
             return redirect('academico:registro_asistencias', curso_id=curso_id)
             
         except Exception as e:
@@ -539,6 +492,43 @@ def estadisticas_profesor(request):
     
     return render(request, 'academico/profesor_estadisticas.html', context)
 
+@login_required
+def libro_calificaciones(request, curso_id, asignatura_id):
+    """
+    Libro de calificaciones de un curso × asignatura: matriz estudiante ×
+    evaluación con promedios, desviación y distribución por evaluación.
+    Con ?formato=json responde la misma estructura como JSON.
+    """
+    user = request.user
+    perfil = getattr(user, 'perfil', None)
+    
+    if not perfil or perfil.tipo_usuario != 'profesor':
+        if request.GET.get('formato') == 'json':
+            return JsonResponse({'error': 'Sin permisos'}, status=403)
+        messages.error(request, 'No tienes permisos para acceder a esta sección.')
+        return redirect('usuarios:panel')
+    
+    curso = get_object_or_404(Curso, id=curso_id)
+    asignatura = get_object_or_404(Asignatura, id=asignatura_id)
+    
+    dicta_asignatura = HorarioClases.objects.filter(curso=curso, asignatura=asignatura, profesor=user).exists()
+    if not dicta_asignatura and curso.profesor_jefe_id != user.id:
+        if request.GET.get('formato') == 'json':
+            return JsonResponse({'error': 'Sin permisos'}, status=403)
+        messages.error(request, 'No dictas esta asignatura en este curso.')
+        return redirect('academico:estadisticas_profesor')
+    
+    libro = GradebookMatrix.cargar(curso, asignatura).como_dict()
+    
+    if request.GET.get('formato') == 'json':
+        return JsonResponse(libro)
+    
+    return render(request, 'academico/profesor_libro_calificaciones.html', {
+        'curso': curso,
+        'asignatura': asignatura,
+        'libro': libro,
+    })
+
 # --- RECURSOS ACADÉMICOS ---
 
 @login_required
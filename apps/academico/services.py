@@ -1,6 +1,31 @@
-from django.db.models import Avg, Count, Q
+import hashlib
+import math
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Avg, Count, Max, Q, Sum, F, Case, When, Value, DecimalField
+from django.db.models.functions import ExtractYear
 from django.contrib.auth.models import User
-from .models import Calificacion, Asistencia, InscripcionCurso, HorarioClases, ConfiguracionAcademica, Asignatura
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from core.storage import almacenamiento_privado
+from usuarios.models import PerfilUsuario
+from .models import (
+    Calificacion, Asistencia, InscripcionCurso, HorarioClases, ConfiguracionAcademica, Asignatura,
+    PromedioAcumulado, ResumenEstudiante, LoteDocumentos
+)
+from .utils import inicializar_worker_pdf, renderizar_pdf_estudiante
 
 class AcademicoService:
     @staticmethod
@@ -20,24 +45,13 @@ class AcademicoService:
     @staticmethod
     def obtener_asistencia_curso(estudiante, curso, anio):
         """Obtiene estadísticas de asistencia para un estudiante en un curso y año."""
-        total = Asistencia.objects.filter(
-            estudiante=estudiante, 
-            curso=curso, 
-            fecha__year=anio
-        ).count()
-        
-        presentes = Asistencia.objects.filter(
-            estudiante=estudiante, 
-            curso=curso, 
-            fecha__year=anio, 
-            estado='presente'
-        ).count()
-        
-        porcentaje = (presentes / total * 100) if total > 0 else 0
+        resumen = ResumenEstudiante.objects.filter(estudiante=estudiante, curso=curso, año=anio).first()
+        if resumen is None:
+            return {'total': 0, 'presentes': 0, 'porcentaje': 0}
         return {
-            'total': total,
-            'presentes': presentes,
-            'porcentaje': round(porcentaje, 1)
+            'total': resumen.total_asistencias,
+            'presentes': resumen.asistencias_presente,
+            'porcentaje': resumen.porcentaje_asistencia,
         }
 
     @staticmethod
@@ -101,3 +115,1364 @@ class AcademicoService:
             'labels_grafico': labels_grafico,
             'data_grafico': data_grafico
         }
+
+
+class PromedioService:
+    """
+    Motor incremental de promedios.
+
+    Mantiene PromedioAcumulado (suma y cantidad de notas) con aritmética de
+    deltas y deriva desde allí InscripcionCurso.promedio y
+    PerfilUsuario.promedio_general, sin volver a agregar la tabla de
+    calificaciones.
+    """
+    # Tamaño de lote para los UPDATE ... CASE al recalcular muchos estudiantes
+    TAMANO_LOTE = 500
+
+    @staticmethod
+    def _promedio(suma, cantidad):
+        if not cantidad:
+            return None
+        return round(Decimal(suma) / cantidad, 1)
+
+    @staticmethod
+    def estado_calificacion(calificacion):
+        """
+        Clave del acumulado, nota y año de una calificación:
+        (estudiante, curso, asignatura, semestre, nota, año)
+        """
+        return (
+            calificacion.estudiante_id,
+            calificacion.curso_id,
+            calificacion.asignatura_id,
+            str(calificacion.semestre),
+            Decimal(str(calificacion.nota)),
+            ResumenService.anio_de(calificacion.fecha_evaluacion),
+        )
+
+    @staticmethod
+    def aplicar_delta(estudiante_id, curso_id, asignatura_id, semestre, delta_suma, delta_cantidad):
+        """Suma un delta al acumulado (estudiante, curso, asignatura, semestre), creándolo si no existe."""
+        filtro = {
+            'estudiante_id': estudiante_id,
+            'curso_id': curso_id,
+            'asignatura_id': asignatura_id,
+            'semestre': semestre,
+        }
+        actualizados = PromedioAcumulado.objects.filter(**filtro).update(
+            suma_notas=F('suma_notas') + delta_suma,
+            cantidad_notas=F('cantidad_notas') + delta_cantidad,
+            actualizado=timezone.now(),
+        )
+        if actualizados or delta_cantidad <= 0:
+            # Un delta negativo sin fila previa proviene de un borrado en cascada: no hay nada que restar
+            return
+        try:
+            with transaction.atomic():
+                PromedioAcumulado.objects.create(
+                    suma_notas=delta_suma, cantidad_notas=delta_cantidad, **filtro
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila entre el UPDATE y el INSERT
+            PromedioAcumulado.objects.filter(**filtro).update(
+                suma_notas=F('suma_notas') + delta_suma,
+                cantidad_notas=F('cantidad_notas') + delta_cantidad,
+                actualizado=timezone.now(),
+            )
+
+    @staticmethod
+    def aplicar_deltas(deltas):
+        """
+        Aplica en bloque varios deltas {(estudiante, curso, asignatura, semestre): (suma, cantidad)}.
+        Bloquea los acumulados afectados, suma en memoria y los escribe con un único upsert.
+        """
+        deltas = {clave: delta for clave, delta in deltas.items() if delta[1] or delta[0]}
+        if not deltas:
+            return
+
+        existentes = {
+            (a.estudiante_id, a.curso_id, a.asignatura_id, a.semestre): a
+            for a in PromedioAcumulado.objects.select_for_update().filter(
+                estudiante_id__in={c[0] for c in deltas},
+                curso_id__in={c[1] for c in deltas},
+                asignatura_id__in={c[2] for c in deltas},
+            ).only('estudiante_id', 'curso_id', 'asignatura_id', 'semestre', 'suma_notas', 'cantidad_notas')
+        }
+
+        ahora = timezone.now()
+        filas = []
+        for clave, (delta_suma, delta_cantidad) in deltas.items():
+            previo = existentes.get(clave)
+            if previo is None and delta_cantidad <= 0:
+                continue
+            filas.append(PromedioAcumulado(
+                estudiante_id=clave[0], curso_id=clave[1], asignatura_id=clave[2], semestre=clave[3],
+                suma_notas=(previo.suma_notas if previo else 0) + delta_suma,
+                cantidad_notas=(previo.cantidad_notas if previo else 0) + delta_cantidad,
+                actualizado=ahora,
+            ))
+
+        PromedioAcumulado.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=['estudiante', 'curso', 'asignatura', 'semestre'],
+            update_fields=['suma_notas', 'cantidad_notas', 'actualizado'],
+            batch_size=PromedioService.TAMANO_LOTE,
+        )
+
+    @staticmethod
+    def actualizar_derivados(estudiante_ids):
+        """
+        Recalcula InscripcionCurso.promedio y PerfilUsuario.promedio_general de
+        los estudiantes indicados a partir de los acumulados.
+        Usa una consulta agrupada y un UPDATE ... CASE por tabla, por lote.
+        """
+        estudiante_ids = list(dict.fromkeys(estudiante_ids))
+        for inicio in range(0, len(estudiante_ids), PromedioService.TAMANO_LOTE):
+            lote = estudiante_ids[inicio:inicio + PromedioService.TAMANO_LOTE]
+            PromedioService._actualizar_derivados_lote(lote)
+
+    @staticmethod
+    def _actualizar_derivados_lote(estudiante_ids):
+        filas = PromedioAcumulado.objects.filter(
+            estudiante_id__in=estudiante_ids
+        ).values('estudiante_id', 'curso_id').annotate(
+            suma=Sum('suma_notas'),
+            cantidad=Sum('cantidad_notas'),
+        ).order_by()
+
+        por_curso = {}
+        totales = {est_id: [Decimal('0'), 0] for est_id in estudiante_ids}
+        for fila in filas:
+            por_curso[(fila['estudiante_id'], fila['curso_id'])] = PromedioService._promedio(
+                fila['suma'], fila['cantidad']
+            )
+            totales[fila['estudiante_id']][0] += fila['suma'] or 0
+            totales[fila['estudiante_id']][1] += fila['cantidad'] or 0
+
+        campo_promedio = DecimalField(max_digits=4, decimal_places=1)
+
+        if por_curso:
+            InscripcionCurso.objects.filter(
+                estudiante_id__in=estudiante_ids,
+                curso_id__in={curso_id for _, curso_id in por_curso},
+            ).update(promedio=Case(
+                *[
+                    When(estudiante_id=est_id, curso_id=curso_id, then=Value(promedio, output_field=campo_promedio))
+                    for (est_id, curso_id), promedio in por_curso.items()
+                ],
+                default=F('promedio'),
+                output_field=campo_promedio,
+            ))
+
+        PerfilUsuario.objects.filter(user_id__in=estudiante_ids).update(promedio_general=Case(
+            *[
+                When(user_id=est_id, then=Value(PromedioService._promedio(suma, cantidad), output_field=campo_promedio))
+                for est_id, (suma, cantidad) in totales.items()
+            ],
+            default=F('promedio_general'),
+            output_field=campo_promedio,
+        ))
+
+    @staticmethod
+    def _acumulados_desde_calificaciones(estudiante_ids=None):
+        """Agrega Calificacion por (estudiante, curso, asignatura, semestre) directamente en la BD."""
+        calificaciones = Calificacion.objects.all()
+        if estudiante_ids is not None:
+            calificaciones = calificaciones.filter(estudiante_id__in=estudiante_ids)
+        filas = calificaciones.values(
+            'estudiante_id', 'curso_id', 'asignatura_id', 'semestre'
+        ).annotate(suma=Sum('nota'), cantidad=Count('id')).order_by()
+        return {
+            (f['estudiante_id'], f['curso_id'], f['asignatura_id'], f['semestre']): (f['suma'], f['cantidad'])
+            for f in filas
+        }
+
+    @staticmethod
+    def reconstruir(estudiante_ids=None):
+        """
+        Reconstruye desde cero los acumulados (y sus promedios derivados) de
+        los estudiantes indicados, o de todos si no se indica ninguno.
+        Retorna la cantidad de acumulados creados.
+        """
+        esperados = PromedioService._acumulados_desde_calificaciones(estudiante_ids)
+
+        with transaction.atomic():
+            acumulados = PromedioAcumulado.objects.all()
+            inscripciones = InscripcionCurso.objects.all()
+            perfiles = PerfilUsuario.objects.filter(tipo_usuario='estudiante')
+            if estudiante_ids is not None:
+                acumulados = acumulados.filter(estudiante_id__in=estudiante_ids)
+                inscripciones = inscripciones.filter(estudiante_id__in=estudiante_ids)
+                perfiles = perfiles.filter(user_id__in=estudiante_ids)
+
+            acumulados.delete()
+            inscripciones.update(promedio=None)
+            perfiles.update(promedio_general=None)
+
+            PromedioAcumulado.objects.bulk_create([
+                PromedioAcumulado(
+                    estudiante_id=est_id, curso_id=curso_id, asignatura_id=asig_id,
+                    semestre=semestre, suma_notas=suma, cantidad_notas=cantidad,
+                )
+                for (est_id, curso_id, asig_id, semestre), (suma, cantidad) in esperados.items()
+            ], batch_size=PromedioService.TAMANO_LOTE)
+
+            PromedioService.actualizar_derivados(sorted({clave[0] for clave in esperados}))
+
+        return len(esperados)
+
+    @staticmethod
+    def detectar_desviaciones(estudiante_ids=None):
+        """
+        Compara los acumulados almacenados con una agregación completa de
+        Calificacion. Retorna una lista de dicts con las claves que difieren.
+        """
+        esperados = PromedioService._acumulados_desde_calificaciones(estudiante_ids)
+
+        acumulados = PromedioAcumulado.objects.filter(cantidad_notas__gt=0)
+        if estudiante_ids is not None:
+            acumulados = acumulados.filter(estudiante_id__in=estudiante_ids)
+        almacenados = {
+            (a['estudiante_id'], a['curso_id'], a['asignatura_id'], a['semestre']): (a['suma_notas'], a['cantidad_notas'])
+            for a in acumulados.values(
+                'estudiante_id', 'curso_id', 'asignatura_id', 'semestre', 'suma_notas', 'cantidad_notas'
+            )
+        }
+
+        desviaciones = []
+        for clave in sorted(set(esperados) | set(almacenados), key=str):
+            esperado = esperados.get(clave, (Decimal('0'), 0))
+            almacenado = almacenados.get(clave, (Decimal('0'), 0))
+            if Decimal(esperado[0]) != Decimal(almacenado[0]) or esperado[1] != almacenado[1]:
+                desviaciones.append({
+                    'estudiante_id': clave[0],
+                    'curso_id': clave[1],
+                    'asignatura_id': clave[2],
+                    'semestre': clave[3],
+                    'esperado': esperado,
+                    'almacenado': almacenado,
+                })
+        return desviaciones
+
+
+class ResumenService:
+    """
+    Mantenimiento y lectura de ResumenEstudiante (estudiante × curso × año).
+
+    Las rutas de escritura entregan deltas: de notas por
+    (estudiante, curso, año, asignatura) -> (suma, cantidad) y de asistencia
+    por (estudiante, curso, año, estado) -> cantidad. Cada llamada cuesta un
+    SELECT de los resúmenes afectados y un upsert, sin importar el tamaño del lote.
+    """
+    CAMPOS_ASISTENCIA = {estado: f'asistencias_{estado}' for estado, _ in Asistencia.ESTADO_CHOICES}
+    CAMPOS_ACTUALIZABLES = list(CAMPOS_ASISTENCIA.values()) + [
+        'suma_notas', 'cantidad_notas', 'notas_por_asignatura', 'actualizado'
+    ]
+
+    @staticmethod
+    def anio_de(fecha):
+        """Año calendario de una fecha (acepta date o 'YYYY-MM-DD')"""
+        fecha = Asistencia._meta.get_field('fecha').to_python(fecha)
+        return fecha.year if fecha else None
+
+    @staticmethod
+    def estado_asistencia(asistencia):
+        """Clave del resumen y estado de una asistencia: (estudiante, curso, año, estado)"""
+        return (
+            asistencia.estudiante_id,
+            asistencia.curso_id,
+            ResumenService.anio_de(asistencia.fecha),
+            asistencia.estado,
+        )
+
+    @staticmethod
+    def _vacio(estudiante_id, curso_id, anio):
+        return ResumenEstudiante(
+            estudiante_id=estudiante_id, curso_id=curso_id, año=anio,
+            suma_notas=Decimal('0'), cantidad_notas=0, notas_por_asignatura={},
+        )
+
+    @staticmethod
+    def aplicar_deltas(notas=None, asistencias=None):
+        """
+        Aplica en bloque deltas de notas {(est, curso, año, asignatura): (suma, cantidad)}
+        y de asistencia {(est, curso, año, estado): cantidad}.
+        """
+        notas = {c: d for c, d in (notas or {}).items() if d[0] or d[1]}
+        asistencias = {c: d for c, d in (asistencias or {}).items() if d}
+        claves = {c[:3] for c in notas} | {c[:3] for c in asistencias}
+        if not claves:
+            return
+
+        with transaction.atomic(savepoint=False):
+            existentes = {
+                (r.estudiante_id, r.curso_id, r.año): r
+                for r in ResumenEstudiante.objects.select_for_update().filter(
+                    estudiante_id__in={c[0] for c in claves},
+                    curso_id__in={c[1] for c in claves},
+                    año__in={c[2] for c in claves},
+                )
+            }
+
+            afectados = {}
+            for clave in claves:
+                resumen = existentes.get(clave)
+                if resumen is None:
+                    # Un delta solo negativo sin resumen previo proviene de un borrado en cascada
+                    positivo = any(d[1] > 0 for c, d in notas.items() if c[:3] == clave) or \
+                        any(d > 0 for c, d in asistencias.items() if c[:3] == clave)
+                    if not positivo:
+                        continue
+                    resumen = ResumenService._vacio(*clave)
+                afectados[clave] = resumen
+
+            for (est_id, curso_id, anio, asig_id), (delta_suma, delta_cantidad) in notas.items():
+                resumen = afectados.get((est_id, curso_id, anio))
+                if resumen is None:
+                    continue
+                resumen.suma_notas = Decimal(resumen.suma_notas) + delta_suma
+                resumen.cantidad_notas += delta_cantidad
+                suma, cantidad = resumen.notas_por_asignatura.get(str(asig_id), ('0', 0))
+                suma, cantidad = Decimal(suma) + delta_suma, cantidad + delta_cantidad
+                if cantidad > 0:
+                    resumen.notas_por_asignatura[str(asig_id)] = [str(suma.quantize(Decimal('0.01'))), cantidad]
+                else:
+                    resumen.notas_por_asignatura.pop(str(asig_id), None)
+
+            for (est_id, curso_id, anio, estado), delta in asistencias.items():
+                resumen = afectados.get((est_id, curso_id, anio))
+                campo = ResumenService.CAMPOS_ASISTENCIA.get(estado)
+                if resumen is None or campo is None:
+                    continue
+                setattr(resumen, campo, getattr(resumen, campo) + delta)
+
+            ahora = timezone.now()
+            for resumen in afectados.values():
+                resumen.actualizado = ahora
+                # Sin pk, bulk_create envía nuevos y existentes en un mismo INSERT ... ON CONFLICT
+                resumen.pk = None
+
+            ResumenEstudiante.objects.bulk_create(
+                list(afectados.values()),
+                update_conflicts=True,
+                unique_fields=['estudiante', 'curso', 'año'],
+                update_fields=ResumenService.CAMPOS_ACTUALIZABLES,
+                batch_size=PromedioService.TAMANO_LOTE,
+            )
+
+    @staticmethod
+    def deltas_calificacion(anterior, actual):
+        """
+        Deltas de notas entre dos estados de PromedioService.estado_calificacion
+        (cualquiera puede ser None, para altas y bajas).
+        """
+        deltas = {}
+        for estado, signo in ((anterior, -1), (actual, 1)):
+            if estado is None:
+                continue
+            est_id, curso_id, asig_id, _, nota, anio = estado
+            clave = (est_id, curso_id, anio, asig_id)
+            suma, cantidad = deltas.get(clave, (Decimal('0'), 0))
+            deltas[clave] = (suma + signo * nota, cantidad + signo)
+        return deltas
+
+    @staticmethod
+    def _resumenes_desde_fuentes(estudiante_ids=None):
+        """Agrega Calificacion y Asistencia por (estudiante, curso, año) directamente en la BD."""
+        calificaciones = Calificacion.objects.all()
+        asistencias = Asistencia.objects.all()
+        if estudiante_ids is not None:
+            calificaciones = calificaciones.filter(estudiante_id__in=estudiante_ids)
+            asistencias = asistencias.filter(estudiante_id__in=estudiante_ids)
+
+        resumenes = {}
+
+        def resumen(est_id, curso_id, anio):
+            clave = (est_id, curso_id, anio)
+            if clave not in resumenes:
+                resumenes[clave] = ResumenService._vacio(*clave)
+            return resumenes[clave]
+
+        notas = calificaciones.annotate(anio=ExtractYear('fecha_evaluacion')).values(
+            'estudiante_id', 'curso_id', 'anio', 'asignatura_id'
+        ).annotate(suma=Sum('nota'), cantidad=Count('id')).order_by()
+        for f in notas:
+            r = resumen(f['estudiante_id'], f['curso_id'], f['anio'])
+            r.suma_notas += f['suma']
+            r.cantidad_notas += f['cantidad']
+            r.notas_por_asignatura[str(f['asignatura_id'])] = [str(f['suma']), f['cantidad']]
+
+        conteos = asistencias.annotate(anio=ExtractYear('fecha')).values(
+            'estudiante_id', 'curso_id', 'anio', 'estado'
+        ).annotate(cantidad=Count('id')).order_by()
+        for f in conteos:
+            campo = ResumenService.CAMPOS_ASISTENCIA.get(f['estado'])
+            if campo:
+                setattr(resumen(f['estudiante_id'], f['curso_id'], f['anio']), campo, f['cantidad'])
+
+        return resumenes
+
+    @staticmethod
+    def _firma(resumen):
+        """Contenido comparable de un resumen, independiente del formato de los decimales"""
+        return (
+            tuple(getattr(resumen, campo) for campo in ResumenService.CAMPOS_ASISTENCIA.values()),
+            Decimal(resumen.suma_notas).quantize(Decimal('0.01')),
+            resumen.cantidad_notas,
+            {
+                asig_id: (Decimal(suma).quantize(Decimal('0.01')), cantidad)
+                for asig_id, (suma, cantidad) in resumen.notas_por_asignatura.items() if cantidad
+            },
+        )
+
+    @staticmethod
+    def reconstruir(estudiante_ids=None):
+        """
+        Reconstruye desde cero los resúmenes de los estudiantes indicados, o de
+        todos si no se indica ninguno. Retorna la cantidad de resúmenes creados.
+        """
+        esperados = ResumenService._resumenes_desde_fuentes(estudiante_ids)
+        with transaction.atomic():
+            resumenes = ResumenEstudiante.objects.all()
+            if estudiante_ids is not None:
+                resumenes = resumenes.filter(estudiante_id__in=estudiante_ids)
+            resumenes.delete()
+            ResumenEstudiante.objects.bulk_create(esperados.values(), batch_size=PromedioService.TAMANO_LOTE)
+        return len(esperados)
+
+    @staticmethod
+    def detectar_desviaciones(estudiante_ids=None):
+        """
+        Compara los resúmenes almacenados con una agregación completa de las
+        tablas de origen. Retorna una lista de dicts con las claves que difieren.
+        """
+        esperados = ResumenService._resumenes_desde_fuentes(estudiante_ids)
+        resumenes = ResumenEstudiante.objects.all()
+        if estudiante_ids is not None:
+            resumenes = resumenes.filter(estudiante_id__in=estudiante_ids)
+        almacenados = {(r.estudiante_id, r.curso_id, r.año): r for r in resumenes}
+
+        vacio = ResumenService._firma(ResumenService._vacio(None, None, None))
+        desviaciones = []
+        for clave in sorted(set(esperados) | set(almacenados), key=str):
+            esperado = ResumenService._firma(esperados[clave]) if clave in esperados else vacio
+            almacenado = ResumenService._firma(almacenados[clave]) if clave in almacenados else vacio
+            if esperado != almacenado:
+                desviaciones.append({
+                    'estudiante_id': clave[0],
+                    'curso_id': clave[1],
+                    'año': clave[2],
+                    'esperado': esperado,
+                    'almacenado': almacenado,
+                })
+        return desviaciones
+
+    @staticmethod
+    def combinar(resumenes):
+        """
+        Suma varios resúmenes (p.ej. todos los cursos o años de un estudiante).
+        Retorna asistencia por estado, total y porcentaje, promedio general y
+        promedio por asignatura {asignatura_id: Decimal}.
+        """
+        asistencias = {estado: 0 for estado in ResumenService.CAMPOS_ASISTENCIA}
+        suma, cantidad = Decimal('0'), 0
+        por_asignatura = {}
+        actualizado = None
+        for r in resumenes:
+            for estado, campo in ResumenService.CAMPOS_ASISTENCIA.items():
+                asistencias[estado] += getattr(r, campo)
+            suma += Decimal(r.suma_notas)
+            cantidad += r.cantidad_notas
+            for asig_id, (suma_asig, cantidad_asig) in r.notas_por_asignatura.items():
+                previo = por_asignatura.get(int(asig_id), (Decimal('0'), 0))
+                por_asignatura[int(asig_id)] = (previo[0] + Decimal(suma_asig), previo[1] + cantidad_asig)
+            if r.actualizado and (actualizado is None or r.actualizado > actualizado):
+                actualizado = r.actualizado
+
+        total = sum(asistencias.values())
+        return {
+            'asistencias': asistencias,
+            'total_asistencias': total,
+            'porcentaje_asistencia': round(asistencias['presente'] / total * 100, 1) if total else 0,
+            'cantidad_notas': cantidad,
+            'promedio': PromedioService._promedio(suma, cantidad),
+            'promedios_asignatura': {
+                asig_id: PromedioService._promedio(s, c) for asig_id, (s, c) in por_asignatura.items() if c
+            },
+            'actualizado': actualizado,
+        }
+
+
+class GradeBatchWriter:
+    """
+    Ingreso masivo de calificaciones de un curso.
+
+    Valida todas las filas del formulario antes de escribir y las persiste
+    con un único INSERT ... ON CONFLICT sobre la clave
+    (estudiante, asignatura, curso, numero_evaluacion). Como bulk_create no
+    dispara señales, aplica los deltas de promedios y de ResumenEstudiante en
+    bloque y registra un solo evento de auditoría por lote.
+
+    Uso:
+        writer = GradeBatchWriter(profesor=request.user, curso=curso)
+        writer.agregar(estudiante, asignatura, 1, '6,5', semestre='1', ...)
+        guardadas = writer.guardar(request=request, descripcion='...')
+        writer.errores  # Mensajes de las filas rechazadas
+    """
+    # actualizado incluido: el UPDATE del ON CONFLICT no pasa por auto_now
+    CAMPOS_ACTUALIZABLES = [
+        'profesor', 'tipo_evaluacion', 'semestre', 'fecha_evaluacion', 'nota', 'descripcion', 'actualizado',
+    ]
+    NOTA_MINIMA = Decimal('1.0')
+    NOTA_MAXIMA = Decimal('7.0')
+
+    def __init__(self, profesor, curso):
+        self.profesor = profesor
+        self.curso = curso
+        self.errores = []
+        self._filas = {}
+
+    @classmethod
+    def parsear_nota(cls, valor):
+        """Convierte '6,5' / '6.5' / 6.5 en Decimal con 2 decimales. Lanza ValueError si no es válida."""
+        texto = str(valor).strip().replace(',', '.')
+        try:
+            nota = Decimal(texto)
+        except InvalidOperation:
+            raise ValueError(f"Nota inválida: '{valor}'. Solo se permiten números.")
+        if not nota.is_finite() or not (cls.NOTA_MINIMA <= nota <= cls.NOTA_MAXIMA):
+            raise ValueError(f"Nota fuera de rango: {valor}. Las notas deben estar entre 1.0 y 7.0")
+        return nota.quantize(Decimal('0.01'))
+
+    def agregar(self, estudiante, asignatura, numero_evaluacion, nota, tipo_evaluacion, semestre,
+                fecha_evaluacion, descripcion='', etiqueta=None):
+        """Valida y encola una calificación. Retorna False (y registra el error) si la fila es inválida."""
+        etiqueta = etiqueta or str(estudiante)
+        try:
+            nota = self.parsear_nota(nota)
+            numero_evaluacion = int(numero_evaluacion)
+            if numero_evaluacion < 1:
+                raise ValueError("El número de evaluación debe ser positivo.")
+            fecha_evaluacion = Calificacion._meta.get_field('fecha_evaluacion').to_python(fecha_evaluacion)
+            if fecha_evaluacion is None:
+                raise ValueError("La fecha de evaluación es obligatoria.")
+        except (ValueError, ValidationError) as e:
+            motivo = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            self.errores.append(f"{etiqueta}: {motivo}")
+            return False
+
+        clave = (estudiante.id, asignatura.id, numero_evaluacion)
+        self._filas[clave] = Calificacion(
+            estudiante_id=estudiante.id,
+            asignatura_id=asignatura.id,
+            curso_id=self.curso.id,
+            numero_evaluacion=numero_evaluacion,
+            profesor_id=self.profesor.id,
+            tipo_evaluacion=tipo_evaluacion,
+            semestre=str(semestre),
+            fecha_evaluacion=fecha_evaluacion,
+            nota=nota,
+            descripcion=(descripcion or '')[:200],
+        )
+        return True
+
+    def __len__(self):
+        return len(self._filas)
+
+    def guardar(self, request=None, descripcion=None, detalles=''):
+        """
+        Persiste el lote completo y recalcula los promedios afectados.
+        Retorna la cantidad de calificaciones escritas.
+        """
+        if not self._filas:
+            return 0
+
+        filas = list(self._filas.values())
+        estudiante_ids = {c.estudiante_id for c in filas}
+
+        with transaction.atomic():
+            previas = {
+                (est_id, asig_id, numero): (semestre, nota, fecha.year)
+                for est_id, asig_id, numero, semestre, nota, fecha in Calificacion.objects.select_for_update().filter(
+                    curso_id=self.curso.id,
+                    estudiante_id__in=estudiante_ids,
+                    asignatura_id__in={c.asignatura_id for c in filas},
+                    numero_evaluacion__in={c.numero_evaluacion for c in filas},
+                ).values_list('estudiante_id', 'asignatura_id', 'numero_evaluacion', 'semestre', 'nota',
+                              'fecha_evaluacion')
+            }
+
+            Calificacion.objects.bulk_create(
+                filas,
+                update_conflicts=True,
+                unique_fields=['estudiante', 'asignatura', 'curso', 'numero_evaluacion'],
+                update_fields=self.CAMPOS_ACTUALIZABLES,
+                batch_size=PromedioService.TAMANO_LOTE,
+            )
+
+            deltas = {}
+            deltas_resumen = {}
+
+            def sumar(destino, clave_delta, nota, signo):
+                suma, cantidad = destino.get(clave_delta, (Decimal('0'), 0))
+                destino[clave_delta] = (suma + signo * nota, cantidad + signo)
+
+            for clave, calificacion in self._filas.items():
+                est_id, asig_id = calificacion.estudiante_id, calificacion.asignatura_id
+                sumar(deltas, (est_id, self.curso.id, asig_id, calificacion.semestre), calificacion.nota, 1)
+                sumar(deltas_resumen, (est_id, self.curso.id, calificacion.fecha_evaluacion.year, asig_id),
+                      calificacion.nota, 1)
+
+                if clave in previas:
+                    semestre_previo, nota_previa, anio_previo = previas[clave]
+                    sumar(deltas, (est_id, self.curso.id, asig_id, semestre_previo), nota_previa, -1)
+                    sumar(deltas_resumen, (est_id, self.curso.id, anio_previo, asig_id), nota_previa, -1)
+
+            PromedioService.aplicar_deltas(deltas)
+            PromedioService.actualizar_derivados(sorted(estudiante_ids))
+            ResumenService.aplicar_deltas(notas=deltas_resumen)
+
+        if descripcion:
+            from administrativo.services import LiceoOSService
+            LiceoOSService.registrar_evento(
+                usuario=self.profesor,
+                tipo_accion='nota',
+                descripcion=descripcion,
+                detalles=detalles,
+                request=request
+            )
+
+        return len(filas)
+
+
+class AttendanceBatchWriter:
+    """
+    Registro masivo de asistencia de un curso para una fecha.
+
+    Construye todas las filas en memoria y las escribe con un único
+    INSERT ... ON CONFLICT sobre (estudiante, curso, fecha), ajustando
+    ResumenEstudiante con los cambios de estado. Retorna el conteo por estado
+    para que la confirmación no requiera más consultas.
+
+    Uso:
+        writer = AttendanceBatchWriter(curso, fecha, registrado_por=request.user)
+        writer.agregar(estudiante, 'presente', observacion='')
+        resumen = writer.guardar()  # {'total': 45, 'actualizados': 0, 'por_estado': {...}}
+    """
+    ESTADOS = dict(Asistencia.ESTADO_CHOICES)
+
+    def __init__(self, curso, fecha, registrado_por):
+        fecha = Asistencia._meta.get_field('fecha').to_python(fecha)
+        if fecha is None:
+            raise ValidationError("La fecha de asistencia es obligatoria.")
+        self.curso = curso
+        self.fecha = fecha
+        self.registrado_por = registrado_por
+        self.errores = []
+        self._filas = {}
+
+    def agregar(self, estudiante, estado, observacion=''):
+        """Encola el registro de un estudiante. Retorna False si el estado no es válido."""
+        if estado not in self.ESTADOS:
+            self.errores.append(f"{estudiante}: estado de asistencia inválido '{estado}'")
+            return False
+        self._filas[estudiante.id] = Asistencia(
+            estudiante_id=estudiante.id,
+            curso_id=self.curso.id,
+            fecha=self.fecha,
+            estado=estado,
+            observacion=observacion or '',
+            registrado_por_id=self.registrado_por.id,
+        )
+        return True
+
+    def __len__(self):
+        return len(self._filas)
+
+    def guardar(self, request=None, descripcion=None, detalles=''):
+        """Persiste el lote. Retorna el resumen con totales por estado."""
+        resumen = {
+            'total': len(self._filas),
+            'actualizados': 0,
+            'por_estado': {estado: 0 for estado in self.ESTADOS},
+        }
+        if not self._filas:
+            return resumen
+
+        with transaction.atomic():
+            previas = dict(
+                Asistencia.objects.select_for_update().filter(
+                    curso_id=self.curso.id,
+                    fecha=self.fecha,
+                    estudiante_id__in=self._filas.keys(),
+                ).values_list('estudiante_id', 'estado')
+            )
+            Asistencia.objects.bulk_create(
+                list(self._filas.values()),
+                update_conflicts=True,
+                unique_fields=['estudiante', 'curso', 'fecha'],
+                update_fields=['estado', 'observacion', 'registrado_por', 'actualizado'],
+                batch_size=500,
+            )
+
+            deltas = {}
+            for est_id, asistencia in self._filas.items():
+                clave = (est_id, self.curso.id, self.fecha.year, asistencia.estado)
+                deltas[clave] = deltas.get(clave, 0) + 1
+                if est_id in previas:
+                    clave = (est_id, self.curso.id, self.fecha.year, previas[est_id])
+                    deltas[clave] = deltas.get(clave, 0) - 1
+            ResumenService.aplicar_deltas(asistencias=deltas)
+
+        resumen['actualizados'] = len(previas)
+        for asistencia in self._filas.values():
+            resumen['por_estado'][asistencia.estado] += 1
+
+        if descripcion:
+            from administrativo.services import LiceoOSService
+            LiceoOSService.registrar_evento(
+                usuario=self.registrado_por,
+                tipo_accion='asistencia',
+                descripcion=descripcion,
+                detalles=detalles or f"Registros procesados: {resumen['total']}",
+                request=request
+            )
+
+        return resumen
+
+    @classmethod
+    def cambiar_estado(cls, queryset, estado):
+        """
+        Cambia a `estado` los registros existentes de `queryset`, que puede
+        abarcar varios cursos y fechas (acciones masivas del admin), con un
+        solo UPDATE y ajustando ResumenEstudiante con los cambios, que un
+        queryset.update() no notificaría. Retorna la cantidad de registros
+        que cambiaron.
+        """
+        if estado not in cls.ESTADOS:
+            raise ValidationError(f"Estado de asistencia inválido '{estado}'")
+
+        with transaction.atomic():
+            previas = list(
+                Asistencia.objects.select_for_update().filter(pk__in=queryset.values('pk')).exclude(
+                    estado=estado
+                ).values_list('pk', 'estudiante_id', 'curso_id', 'fecha', 'estado')
+            )
+            if not previas:
+                return 0
+            # update() no aplica auto_now: sin `actualizado`, ?since= no vería el cambio
+            Asistencia.objects.filter(pk__in=[fila[0] for fila in previas]).update(
+                estado=estado, actualizado=timezone.now()
+            )
+
+            deltas = {}
+            for _, est_id, curso_id, fecha, anterior in previas:
+                for clave, delta in (((est_id, curso_id, fecha.year, estado), 1),
+                                     ((est_id, curso_id, fecha.year, anterior), -1)):
+                    deltas[clave] = deltas.get(clave, 0) + delta
+            ResumenService.aplicar_deltas(asistencias=deltas)
+        return len(previas)
+
+    @classmethod
+    def describir(cls, resumen):
+        """Texto corto con el conteo por estado, p.ej. '40 presentes, 3 ausentes'"""
+        partes = [
+            f"{cantidad} {cls.ESTADOS[estado].lower()}{'s' if cantidad != 1 else ''}"
+            for estado, cantidad in resumen['por_estado'].items() if cantidad
+        ]
+        return ', '.join(partes)
+
+
+@dataclass(frozen=True)
+class NotasAgrupadas:
+    """Suma y cantidad de notas de un grupo (asignatura, semestre o tipo de evaluación)"""
+    suma: Decimal = Decimal('0')
+    cantidad: int = 0
+
+    @property
+    def promedio(self):
+        return PromedioService._promedio(self.suma, self.cantidad)
+
+    def __add__(self, otro):
+        return NotasAgrupadas(self.suma + otro.suma, self.cantidad + otro.cantidad)
+
+
+@dataclass(frozen=True)
+class LineaAsignatura:
+    asignatura_id: int
+    nombre: str
+    total: NotasAgrupadas
+    por_semestre: dict
+    por_tipo: dict
+
+    @property
+    def promedio(self):
+        return self.total.promedio
+
+    @property
+    def cantidad_notas(self):
+        return self.total.cantidad
+
+    def promedio_semestre(self, semestre):
+        return self.por_semestre.get(str(semestre), NotasAgrupadas()).promedio
+
+
+@dataclass(frozen=True)
+class BloqueCurso:
+    curso_id: int
+    nombre: str
+    asignaturas: tuple
+
+    @property
+    def promedio(self):
+        """Promedio de los promedios (redondeados) de las asignaturas con notas"""
+        promedios = [a.promedio for a in self.asignaturas if a.promedio]
+        return round(sum(promedios) / len(promedios), 1) if promedios else None
+
+
+@dataclass(frozen=True)
+class InformeNotas:
+    estudiante_id: int
+    año: int
+    cursos: tuple
+
+    @property
+    def promedio_general(self):
+        """Promedio de los promedios de curso, como en el informe de notas"""
+        promedios = [c.promedio for c in self.cursos if c.promedio]
+        return round(sum(promedios) / len(promedios), 1) if promedios else None
+
+
+class ReportCardBuilder:
+    """
+    Arma el informe de notas de un estudiante para un año con consultas
+    constantes: inscripciones activas, asignaturas del horario de esos cursos
+    y una única consulta agrupada de Calificacion por
+    (curso, asignatura, semestre, tipo de evaluación).
+
+    El resultado es una estructura inmutable (InformeNotas) que se puede
+    cachear y que consumen tanto el informe HTML/PDF como el certificado
+    ReportLab.
+
+    Uso:
+        informe = ReportCardBuilder(estudiante, año).construir()
+        for curso in informe.cursos:
+            for asignatura in curso.asignaturas: ...
+    """
+
+    def __init__(self, estudiante, año=None):
+        self.estudiante = estudiante
+        self.año = año or AcademicoService.get_anio_actual()
+
+    def construir(self):
+        inscripciones = list(
+            InscripcionCurso.objects.filter(
+                estudiante=self.estudiante, año=self.año, estado='activo'
+            ).select_related('curso').order_by('curso__nivel', 'curso__letra')
+        )
+        curso_ids = [i.curso_id for i in inscripciones]
+
+        asignaturas_por_curso = {curso_id: {} for curso_id in curso_ids}
+        for curso_id, asig_id, nombre in HorarioClases.objects.filter(
+            curso_id__in=curso_ids
+        ).values_list('curso_id', 'asignatura_id', 'asignatura__nombre').distinct():
+            asignaturas_por_curso[curso_id][asig_id] = nombre
+
+        grupos = Calificacion.objects.filter(
+            estudiante=self.estudiante,
+            curso_id__in=curso_ids,
+            fecha_evaluacion__year=self.año,
+        ).values(
+            'curso_id', 'asignatura_id', 'asignatura__nombre', 'semestre', 'tipo_evaluacion'
+        ).annotate(suma=Sum('nota'), cantidad=Count('id')).order_by()
+
+        # {(curso, asignatura): {'semestre': {...}, 'tipo': {...}}}
+        detalle = {}
+        for g in grupos:
+            # Asignaturas con notas que ya no están en el horario también se informan
+            asignaturas_por_curso[g['curso_id']].setdefault(g['asignatura_id'], g['asignatura__nombre'])
+            notas = NotasAgrupadas(g['suma'], g['cantidad'])
+            grupo = detalle.setdefault((g['curso_id'], g['asignatura_id']), {'semestre': {}, 'tipo': {}})
+            for dimension, valor in (('semestre', str(g['semestre'])), ('tipo', g['tipo_evaluacion'])):
+                grupo[dimension][valor] = grupo[dimension].get(valor, NotasAgrupadas()) + notas
+
+        cursos = []
+        for inscripcion in inscripciones:
+            lineas = []
+            for asig_id, nombre in asignaturas_por_curso[inscripcion.curso_id].items():
+                grupo = detalle.get((inscripcion.curso_id, asig_id), {'semestre': {}, 'tipo': {}})
+                lineas.append(LineaAsignatura(
+                    asignatura_id=asig_id,
+                    nombre=nombre,
+                    total=sum(grupo['semestre'].values(), NotasAgrupadas()),
+                    por_semestre=grupo['semestre'],
+                    por_tipo=grupo['tipo'],
+                ))
+            lineas.sort(key=lambda linea: linea.nombre)
+            cursos.append(BloqueCurso(
+                curso_id=inscripcion.curso_id,
+                nombre=inscripcion.curso.nombre,
+                asignaturas=tuple(lineas),
+            ))
+
+        return InformeNotas(estudiante_id=self.estudiante.id, año=self.año, cursos=tuple(cursos))
+
+
+class GradebookMatrix:
+    """
+    Libro de calificaciones de un curso × asignatura.
+
+    Carga todas las notas con una sola consulta en una matriz densa
+    estudiante × evaluación (array('d') en orden por filas, NaN = sin nota) y
+    calcula las estadísticas recorriendo filas y columnas de la matriz, sin
+    volver a la BD.
+
+    Uso:
+        libro = GradebookMatrix.cargar(curso, asignatura)
+        libro.promedios_estudiante()    # [5.3, None, ...] por fila
+        libro.estadisticas_evaluacion() # promedio, desviación, mín/máx, distribución por columna
+        libro.como_dict()               # Estructura serializable a JSON
+    """
+    # Tramos de la distribución de notas: (etiqueta, inicio, fin), con [inicio, fin)
+    TRAMOS = [
+        ('1.0-1.9', 1.0, 2.0), ('2.0-2.9', 2.0, 3.0), ('3.0-3.9', 3.0, 4.0),
+        ('4.0-4.9', 4.0, 5.0), ('5.0-5.9', 5.0, 6.0), ('6.0-7.0', 6.0, 7.01),
+    ]
+    NOTA_APROBATORIA = 4.0
+
+    def __init__(self, curso, asignatura, estudiantes, evaluaciones, valores):
+        self.curso = curso
+        self.asignatura = asignatura
+        self.estudiantes = estudiantes
+        self.evaluaciones = evaluaciones
+        self.valores = valores
+
+    @classmethod
+    def cargar(cls, curso, asignatura):
+        estudiantes = [
+            i.estudiante for i in InscripcionCurso.objects.filter(
+                curso=curso, estado='activo'
+            ).select_related('estudiante').order_by('estudiante__last_name', 'estudiante__first_name')
+        ]
+        fila_de = {e.id: i for i, e in enumerate(estudiantes)}
+
+        notas = list(Calificacion.objects.filter(
+            curso=curso, asignatura=asignatura, estudiante_id__in=fila_de
+        ).values_list('estudiante_id', 'numero_evaluacion', 'nota', 'tipo_evaluacion', 'fecha_evaluacion'))
+
+        evaluaciones = {}
+        for _, numero, _, tipo, fecha in notas:
+            evaluaciones.setdefault(numero, {'numero': numero, 'tipo': tipo, 'fecha': fecha})
+        evaluaciones = [evaluaciones[n] for n in sorted(evaluaciones)]
+        columna_de = {e['numero']: j for j, e in enumerate(evaluaciones)}
+
+        columnas = len(evaluaciones)
+        valores = array('d', [math.nan]) * (len(estudiantes) * columnas)
+        for est_id, numero, nota, _, _ in notas:
+            valores[fila_de[est_id] * columnas + columna_de[numero]] = float(nota)
+
+        return cls(curso, asignatura, estudiantes, evaluaciones, valores)
+
+    @property
+    def forma(self):
+        return len(self.estudiantes), len(self.evaluaciones)
+
+    def fila(self, i):
+        columnas = len(self.evaluaciones)
+        return self.valores[i * columnas:(i + 1) * columnas]
+
+    def columna(self, j):
+        return self.valores[j::len(self.evaluaciones)] if self.evaluaciones else array('d')
+
+    @staticmethod
+    def _presentes(valores):
+        return [v for v in valores if not math.isnan(v)]
+
+    @staticmethod
+    def _media(valores):
+        return math.fsum(valores) / len(valores) if valores else None
+
+    def promedios_estudiante(self):
+        """Promedio de cada fila (estudiante), ignorando evaluaciones sin nota"""
+        promedios = []
+        for i in range(len(self.estudiantes)):
+            media = self._media(self._presentes(self.fila(i)))
+            promedios.append(round(media, 1) if media is not None else None)
+        return promedios
+
+    def distribucion(self, valores=None):
+        """Cantidad de notas por tramo, p.ej. {'4.0-4.9': 12, ...}"""
+        valores = self._presentes(self.valores) if valores is None else valores
+        conteo = {}
+        for etiqueta, inicio, fin in self.TRAMOS:
+            conteo[etiqueta] = sum(1 for v in valores if inicio <= v < fin)
+        return conteo
+
+    def estadisticas_evaluacion(self):
+        """Promedio, desviación estándar, mínimo, máximo y distribución de cada columna (evaluación)"""
+        estadisticas = []
+        for j, evaluacion in enumerate(self.evaluaciones):
+            notas = self._presentes(self.columna(j))
+            media = self._media(notas)
+            desviacion = math.sqrt(math.fsum((v - media) ** 2 for v in notas) / len(notas)) if notas else None
+            estadisticas.append({
+                **evaluacion,
+                'cantidad': len(notas),
+                'promedio': round(media, 1) if media is not None else None,
+                'desviacion': round(desviacion, 2) if desviacion is not None else None,
+                'minimo': min(notas) if notas else None,
+                'maximo': max(notas) if notas else None,
+                'reprobados': sum(1 for v in notas if v < self.NOTA_APROBATORIA),
+                'distribucion': self.distribucion(notas),
+            })
+        return estadisticas
+
+    def como_dict(self):
+        """Estructura serializable a JSON para el endpoint del libro de calificaciones"""
+        promedios = self.promedios_estudiante()
+        return {
+            'curso': {'id': self.curso.id, 'nombre': str(self.curso)},
+            'asignatura': {'id': self.asignatura.id, 'nombre': self.asignatura.nombre},
+            'evaluaciones': [
+                {**e, 'fecha': e['fecha'].isoformat() if e['fecha'] else None}
+                for e in self.estadisticas_evaluacion()
+            ],
+            'estudiantes': [
+                {
+                    'id': estudiante.id,
+                    'nombre': estudiante.get_full_name() or estudiante.username,
+                    'notas': [None if math.isnan(v) else v for v in self.fila(i)],
+                    'promedio': promedios[i],
+                }
+                for i, estudiante in enumerate(self.estudiantes)
+            ],
+            'distribucion': self.distribucion(),
+        }
+
+
+class LotePDFService:
+    """
+    Genera los documentos PDF de un LoteDocumentos en un pool de procesos
+    (xhtml2pdf y ReportLab son intensivos en CPU) y los escribe a medida que
+    terminan en un ZIP en disco, sin acumularlos en memoria.
+
+    La concurrencia está acotada: hay a lo sumo 2 × procesos tareas en vuelo.
+    El progreso se publica en el lote (procesados/fallidos) como máximo una vez
+    por INTERVALO_PROGRESO segundos y, opcionalmente, en un callback.
+
+    Los lotes lanzados desde el admin forman una cola: a lo sumo
+    PDF_LOTE_SIMULTANEOS procesos la van vaciando, y un lote 'procesando' sin
+    avance en PDF_LOTE_MINUTOS_SIN_AVANCE minutos se da por interrumpido.
+
+    Uso:
+        LotePDFService.generar(lote, procesos=4, progreso=lambda hechos, total: ...)
+        LotePDFService.lanzar(lote)   # En segundo plano, desde una vista o el admin
+    """
+
+    INTERVALO_PROGRESO = 1.0
+
+    @staticmethod
+    def procesos_por_defecto():
+        return max(1, min(settings.PDF_LOTE_PROCESOS, os.cpu_count() or 1))
+
+    @staticmethod
+    def estudiantes(lote):
+        """{estudiante_id: nombre del curso} de los alumnos activos del lote, en orden de lista"""
+        inscripciones = InscripcionCurso.objects.filter(año=lote.año, estado='activo')
+        curso_ids = list(lote.cursos.values_list('id', flat=True))
+        if curso_ids:
+            inscripciones = inscripciones.filter(curso_id__in=curso_ids)
+        else:
+            inscripciones = inscripciones.filter(curso__activo=True)
+        return dict(inscripciones.order_by(
+            'curso__nivel', 'curso__letra', 'estudiante__last_name', 'estudiante__first_name'
+        ).values_list('estudiante_id', 'curso__nombre'))
+
+    @staticmethod
+    def _resultados(tipo, año, estudiante_ids, procesos):
+        """Resultados de renderizar_pdf_estudiante en orden de término"""
+        if procesos <= 1:
+            for estudiante_id in estudiante_ids:
+                yield renderizar_pdf_estudiante(tipo, estudiante_id, año)
+            return
+
+        # Los workers no deben heredar conexiones abiertas del proceso padre
+        connections.close_all()
+        pendientes = iter(estudiante_ids)
+        with ProcessPoolExecutor(max_workers=procesos, initializer=inicializar_worker_pdf) as pool:
+            en_vuelo = set()
+            while True:
+                for estudiante_id in pendientes:
+                    en_vuelo.add(pool.submit(renderizar_pdf_estudiante, tipo, estudiante_id, año))
+                    if len(en_vuelo) >= procesos * 2:
+                        break
+                if not en_vuelo:
+                    return
+                listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    yield futuro.result()
+
+    @staticmethod
+    def generar(lote, procesos=None, progreso=None):
+        procesos = procesos or LotePDFService.procesos_por_defecto()
+        cursos = LotePDFService.estudiantes(lote)
+
+        lote.estado = 'procesando'
+        lote.total = len(cursos)
+        lote.procesados = lote.fallidos = 0
+        lote.errores = ''
+        lote.save(update_fields=['estado', 'total', 'procesados', 'fallidos', 'errores', 'actualizado'])
+
+        relativo = LotePDFService.ruta_zip(lote)
+        destino = Path(almacenamiento_privado().path(relativo))
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        parcial = destino.with_name(destino.name + '.parcial')
+
+        errores = []
+        ultimo_aviso = time.monotonic()
+        try:
+            with zipfile.ZipFile(parcial, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+                resultados = LotePDFService._resultados(lote.tipo, lote.año, list(cursos), procesos)
+                for estudiante_id, nombre, datos, error in resultados:
+                    if error:
+                        errores.append(f"Estudiante {estudiante_id}: {error}")
+                    else:
+                        carpeta = cursos[estudiante_id].replace('/', '-')
+                        archivo_zip.writestr(f"{carpeta}/{nombre}", datos)
+                    lote.procesados += 1
+
+                    if progreso:
+                        progreso(lote.procesados, lote.total)
+                    if time.monotonic() - ultimo_aviso >= LotePDFService.INTERVALO_PROGRESO:
+                        LoteDocumentos.objects.filter(pk=lote.pk).update(
+                            procesados=lote.procesados, fallidos=len(errores), actualizado=timezone.now()
+                        )
+                        ultimo_aviso = time.monotonic()
+            os.replace(parcial, destino)
+        except Exception as e:
+            parcial.unlink(missing_ok=True)
+            lote.estado = 'error'
+            lote.errores = str(e)
+            lote.finalizado = timezone.now()
+            lote.save(update_fields=['estado', 'errores', 'finalizado', 'procesados', 'actualizado'])
+            raise
+
+        lote.estado = 'completado'
+        lote.fallidos = len(errores)
+        lote.errores = '\n'.join(errores)
+        lote.archivo.name = relativo
+        lote.finalizado = timezone.now()
+        lote.save(update_fields=['estado', 'procesados', 'fallidos', 'errores', 'archivo', 'finalizado', 'actualizado'])
+        return lote
+
+    @staticmethod
+    def ruta_zip(lote):
+        """Nombre del ZIP del lote dentro de ARCHIVOS_PRIVADOS_ROOT"""
+        return f"lotes_pdf/lote_{lote.pk}_{lote.tipo}.zip"
+
+    @staticmethod
+    def siguiente_pendiente():
+        """Toma el lote pendiente más antiguo (lo pasa a 'procesando'); None si la cola está vacía"""
+        for lote in LoteDocumentos.objects.filter(estado='pendiente').order_by('creado', 'pk'):
+            # Solo uno de los procesos que compiten por el mismo lote logra cambiarle el estado
+            tomado = LoteDocumentos.objects.filter(pk=lote.pk, estado='pendiente').update(
+                estado='procesando', actualizado=timezone.now()
+            )
+            if tomado:
+                return lote
+        return None
+
+    @staticmethod
+    def procesar_pendientes(procesos=None, progreso=None):
+        """Genera los lotes en cola uno tras otro hasta vaciarla; retorna los lotes procesados"""
+        lotes = []
+        while True:
+            lote = LotePDFService.siguiente_pendiente()
+            if lote is None:
+                return lotes
+            try:
+                LotePDFService.generar(lote, procesos=procesos, progreso=progreso)
+            except Exception:
+                # generar ya dejó el lote en 'error'; se sigue con el resto de la cola
+                pass
+            lotes.append(lote)
+
+    @staticmethod
+    def marcar_interrumpidos():
+        """
+        Pasa a 'error' los lotes 'procesando' sin avance en PDF_LOTE_MINUTOS_SIN_AVANCE
+        minutos (su proceso murió) y elimina su ZIP parcial. Retorna cuántos marcó.
+        """
+        limite = timezone.now() - timedelta(minutes=settings.PDF_LOTE_MINUTOS_SIN_AVANCE)
+        marcados = 0
+        for lote in LoteDocumentos.objects.filter(estado='procesando', actualizado__lt=limite):
+            ahora = timezone.now()
+            if LoteDocumentos.objects.filter(pk=lote.pk, estado='procesando', actualizado__lt=limite).update(
+                estado='error', errores='El proceso de generación se interrumpió.', finalizado=ahora, actualizado=ahora
+            ):
+                destino = almacenamiento_privado().path(LotePDFService.ruta_zip(lote))
+                Path(destino + '.parcial').unlink(missing_ok=True)
+                marcados += 1
+        return marcados
+
+    @staticmethod
+    def lanzar(lote):
+        """
+        Al confirmar la transacción, inicia un proceso aparte (manage.py
+        generar_lote_pdf --pendientes) que vacía la cola. Si ya hay
+        PDF_LOTE_SIMULTANEOS lotes en proceso no inicia otro: el lote queda
+        'pendiente' y lo toma el primero de ellos que termine.
+        """
+        transaction.on_commit(LotePDFService._iniciar_proceso)
+
+    @staticmethod
+    def _iniciar_proceso():
+        LotePDFService.marcar_interrumpidos()
+        if LoteDocumentos.objects.filter(estado='procesando').count() >= settings.PDF_LOTE_SIMULTANEOS:
+            return None
+        comando = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'generar_lote_pdf', '--pendientes']
+        return subprocess.Popen(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+class CacheDocumentosPDF:
+    """
+    Caché en disco de documentos PDF por estudiante, direccionada por
+    contenido: la clave es un hash de los archivos fuente que producen el
+    documento (ruta, mtime y tamaño de la plantilla y del código generador),
+    la versión de los datos del estudiante (última actualización de sus
+    ResumenEstudiante y calificaciones, inscripciones y datos personales) y
+    la fecha de emisión. Si nada de eso cambió, la descarga se sirve desde
+    ARCHIVOS_PRIVADOS_ROOT/cache_pdf/ sin volver a renderizar.
+
+    El tamaño total se acota con PDF_CACHE_MAX_BYTES. Cada PDF generado suma
+    su tamaño a un total llevado en la caché de Django; solo al superar el
+    límite se recorre el directorio y se eliminan los archivos usados hace más
+    tiempo (cada acierto actualiza el atime del archivo; el mtime queda como
+    fecha de generación).
+
+    Uso:
+        ruta, clave, generado = CacheDocumentosPDF.obtener('informe_notas', estudiante, año, fuentes, generar)
+    """
+
+    DIRECTORIO = 'cache_pdf'
+    # Al expulsar se libera espacio hasta esta fracción del límite
+    MARGEN_EXPULSION = 0.9
+    # Bytes ocupados por el directorio, según la caché de Django
+    CLAVE_TAMANO = 'cache_pdf:bytes'
+
+    @classmethod
+    def directorio(cls):
+        return Path(settings.ARCHIVOS_PRIVADOS_ROOT) / cls.DIRECTORIO
+
+    @staticmethod
+    def huella_fuentes(rutas):
+        """Identifica la versión de los archivos fuente (plantillas y código generador) de un documento"""
+        huellas = []
+        for ruta in rutas:
+            estado = os.stat(ruta)
+            huellas.append(f"{ruta}:{estado.st_mtime_ns}:{estado.st_size}")
+        return '|'.join(huellas)
+
+    @staticmethod
+    def version_datos(estudiante):
+        """Versión de los datos del estudiante que alimentan sus documentos"""
+        resumenes = ResumenEstudiante.objects.filter(estudiante=estudiante).aggregate(
+            actualizado=Max('actualizado'), cantidad=Count('id')
+        )
+        # Un cambio sin delta neto (p. ej. mover una nota de semestre) no toca ResumenEstudiante
+        notas = Calificacion.objects.filter(estudiante=estudiante).aggregate(
+            actualizado=Max('actualizado'), cantidad=Count('id')
+        )
+        inscripciones = list(InscripcionCurso.objects.filter(estudiante=estudiante).order_by('pk').values_list(
+            'pk', 'curso_id', 'curso__nombre', 'año', 'estado'
+        ))
+        perfil = getattr(estudiante, 'perfil', None)
+        return repr((
+            resumenes['actualizado'], resumenes['cantidad'], notas['actualizado'], notas['cantidad'], inscripciones,
+            estudiante.username, estudiante.first_name, estudiante.last_name, getattr(perfil, 'rut', None),
+        ))
+
+    @classmethod
+    def clave(cls, tipo, estudiante, año, fuentes):
+        partes = [
+            tipo, str(estudiante.pk), str(año), cls.huella_fuentes(fuentes),
+            cls.version_datos(estudiante), timezone.localdate().isoformat(),
+        ]
+        return hashlib.sha256('\x1f'.join(partes).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def ruta(cls, clave):
+        return cls.directorio() / clave[:2] / f"{clave}.pdf"
+
+    @classmethod
+    def obtener(cls, tipo, estudiante, año, fuentes, generar):
+        """
+        Retorna (ruta, clave, fecha de generación como timestamp) del PDF,
+        generándolo con `generar()` (bytes o None) solo si no está en caché.
+        Retorna (None, clave, None) si la generación falla.
+        """
+        clave = cls.clave(tipo, estudiante, año, fuentes)
+        ruta = cls.ruta(clave)
+        try:
+            estado = ruta.stat()
+            os.utime(ruta, ns=(time.time_ns(), estado.st_mtime_ns))
+            return ruta, clave, estado.st_mtime
+        except FileNotFoundError:
+            pass
+
+        contenido = generar()
+        if not contenido:
+            return None, clave, None
+
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+        temporal.write_bytes(contenido)
+        os.replace(temporal, ruta)
+        if cls._sumar_tamano(len(contenido)) > settings.PDF_CACHE_MAX_BYTES:
+            cls.expulsar()
+        return ruta, clave, time.time()
+
+    @classmethod
+    def _archivos(cls):
+        """[(atime, tamaño, ruta)] de los PDF en caché"""
+        archivos = []
+        for ruta in cls.directorio().glob('*/*.pdf'):
+            try:
+                estado = ruta.stat()
+            except FileNotFoundError:
+                continue
+            archivos.append((estado.st_atime_ns, estado.st_size, ruta))
+        return archivos
+
+    @classmethod
+    def _sumar_tamano(cls, tamaño):
+        """Suma los bytes de un PDF recién escrito al total; retorna el total actualizado"""
+        try:
+            return cache.incr(cls.CLAVE_TAMANO, tamaño)
+        except ValueError:
+            # Sin total registrado (primer uso o caché reiniciada): se mide el directorio una vez
+            total = sum(tamaño for _, tamaño, _ in cls._archivos())
+            cache.add(cls.CLAVE_TAMANO, total, None)
+            return total
+
+    @classmethod
+    def expulsar(cls, limite=None):
+        """
+        Elimina los PDF menos usados recientemente hasta quedar bajo el límite
+        de tamaño y corrige el total registrado con lo que hay en disco.
+        """
+        limite = settings.PDF_CACHE_MAX_BYTES if limite is None else limite
+        archivos = cls._archivos()
+        total = sum(tamaño for _, tamaño, _ in archivos)
+
+        eliminados = 0
+        if total > limite:
+            for _, tamaño, ruta in sorted(archivos):
+                if total <= limite * cls.MARGEN_EXPULSION:
+                    break
+                ruta.unlink(missing_ok=True)
+                total -= tamaño
+                eliminados += 1
+        cache.set(cls.CLAVE_TAMANO, total, None)
+        return eliminados
@@ -1,35 +1,102 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg
-from .models import Calificacion, InscripcionCurso
-from usuarios.models import PerfilUsuario
+from core.models import RegistroEliminado
+from .models import Calificacion, Asistencia, Anotacion
+from .services import PromedioService, ResumenService
 
-@receiver([post_save, post_delete], sender=Calificacion)
-def actualizar_promedios(sender, instance, **kwargs):
+_CAMPOS_PROMEDIO = {'estudiante_id', 'curso_id', 'asignatura_id', 'semestre', 'nota', 'fecha_evaluacion'}
+_CAMPOS_RESUMEN = {'estudiante_id', 'curso_id', 'fecha', 'estado'}
+
+
+@receiver(post_init, sender=Calificacion)
+def recordar_estado_calificacion(sender, instance, **kwargs):
+    """
+    Guarda la clave y nota con que la calificación salió de la BD, para que
+    post_save pueda calcular el delta sin volver a consultarla.
+    """
+    if instance.pk is None or _CAMPOS_PROMEDIO & instance.get_deferred_fields():
+        instance._estado_promedio = None
+    else:
+        instance._estado_promedio = PromedioService.estado_calificacion(instance)
+
+
+@receiver(post_save, sender=Calificacion)
+def actualizar_promedios(sender, instance, created, **kwargs):
     """
-    Actualiza el promedio del curso y el promedio general del estudiante
-    cada vez que se guarda o elimina una calificación.
+    Aplica el delta de la calificación guardada sobre PromedioAcumulado y
+    ResumenEstudiante, y actualiza el promedio del curso y el promedio general
+    del estudiante.
     """
-    estudiante = instance.estudiante
-    curso = instance.curso
-    
-    # 1. Actualizar promedio del curso específico
-    inscripcion = InscripcionCurso.objects.filter(estudiante=estudiante, curso=curso).first()
-    if inscripcion:
-        promedio_curso = Calificacion.objects.filter(
-            estudiante=estudiante, 
-            curso=curso
-        ).aggregate(Avg('nota'))['nota__avg']
-        
-        inscripcion.promedio = round(promedio_curso, 1) if promedio_curso else None
-        inscripcion.save()
-        
-    # 2. Actualizar promedio general del estudiante
-    perfil = getattr(estudiante, 'perfil', None)
-    if perfil:
-        promedio_general = Calificacion.objects.filter(
-            estudiante=estudiante
-        ).aggregate(Avg('nota'))['nota__avg']
-        
-        perfil.promedio_general = round(promedio_general, 1) if promedio_general else None
-        perfil.save()
+    anterior = None if created else getattr(instance, '_estado_promedio', None)
+    actual = PromedioService.estado_calificacion(instance)
+    instance._estado_promedio = actual
+
+    if not created and anterior is None:
+        # Se desconoce el estado previo (p.ej. instancia construida a mano): reconstruir al estudiante
+        PromedioService.reconstruir(estudiante_ids=[instance.estudiante_id])
+        ResumenService.reconstruir(estudiante_ids=[instance.estudiante_id])
+        return
+
+    if anterior == actual:
+        return
+
+    if anterior is not None:
+        PromedioService.aplicar_delta(*anterior[:4], delta_suma=-anterior[4], delta_cantidad=-1)
+    PromedioService.aplicar_delta(*actual[:4], delta_suma=actual[4], delta_cantidad=1)
+
+    estudiantes = [actual[0]] if anterior is None else [anterior[0], actual[0]]
+    PromedioService.actualizar_derivados(estudiantes)
+    ResumenService.aplicar_deltas(notas=ResumenService.deltas_calificacion(anterior, actual))
+
+
+@receiver(post_delete, sender=Calificacion)
+def descontar_promedios(sender, instance, **kwargs):
+    """Resta la calificación eliminada de su acumulado y resumen, y actualiza los promedios derivados."""
+    estado = getattr(instance, '_estado_promedio', None) or PromedioService.estado_calificacion(instance)
+    PromedioService.aplicar_delta(*estado[:4], delta_suma=-estado[4], delta_cantidad=-1)
+    PromedioService.actualizar_derivados([estado[0]])
+    ResumenService.aplicar_deltas(notas=ResumenService.deltas_calificacion(estado, None))
+
+
+@receiver(post_init, sender=Asistencia)
+def recordar_estado_asistencia(sender, instance, **kwargs):
+    """Guarda la clave y estado con que la asistencia salió de la BD."""
+    if instance.pk is None or _CAMPOS_RESUMEN & instance.get_deferred_fields():
+        instance._estado_resumen = None
+    else:
+        instance._estado_resumen = ResumenService.estado_asistencia(instance)
+
+
+@receiver(post_save, sender=Asistencia)
+def actualizar_resumen_asistencia(sender, instance, created, **kwargs):
+    """Mueve la asistencia guardada entre los contadores de ResumenEstudiante."""
+    anterior = None if created else getattr(instance, '_estado_resumen', None)
+    actual = ResumenService.estado_asistencia(instance)
+    instance._estado_resumen = actual
+
+    if not created and anterior is None:
+        ResumenService.reconstruir(estudiante_ids=[instance.estudiante_id])
+        return
+
+    if anterior == actual:
+        return
+
+    deltas = {actual: 1}
+    if anterior is not None:
+        deltas[anterior] = deltas.get(anterior, 0) - 1
+    ResumenService.aplicar_deltas(asistencias=deltas)
+
+
+@receiver(post_delete, sender=Asistencia)
+def descontar_resumen_asistencia(sender, instance, **kwargs):
+    """Resta la asistencia eliminada de su resumen."""
+    estado = getattr(instance, '_estado_resumen', None) or ResumenService.estado_asistencia(instance)
+    ResumenService.aplicar_deltas(asistencias={estado: -1})
+
+
+@receiver(post_delete, sender=Calificacion)
+@receiver(post_delete, sender=Asistencia)
+@receiver(post_delete, sender=Anotacion)
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Deja la lápida que la sincronización incremental de la API entrega como 'eliminados'."""
+    RegistroEliminado.registrar(instance)
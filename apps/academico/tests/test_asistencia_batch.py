@@ -0,0 +1,57 @@
+"""
+Tests del registro masivo de asistencia (AttendanceBatchWriter)
+"""
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from academico.models import Curso, InscripcionCurso, Asistencia
+from academico.services import AttendanceBatchWriter
+
+
+class AttendanceBatchWriterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_asist')
+        cls.curso = Curso.objects.create(nombre='3 Medio C', nivel='3', letra='C', año=2024)
+        cls.estudiantes = []
+        for i in range(45):
+            estudiante = User.objects.create(username=f'alumno_asist_{i}')
+            InscripcionCurso.objects.create(estudiante=estudiante, curso=cls.curso, año=2024)
+            cls.estudiantes.append(estudiante)
+
+    def _writer(self, estados):
+        writer = AttendanceBatchWriter(self.curso, '2024-04-02', registrado_por=self.profesor)
+        for estudiante, estado in zip(self.estudiantes, estados):
+            writer.agregar(estudiante, estado)
+        return writer
+
+    def test_curso_completo_en_consultas_constantes(self):
+        estados = ['presente'] * 40 + ['ausente'] * 3 + ['tardanza'] * 2
+        writer = self._writer(estados)
+
+        # SELECT previos + INSERT ... ON CONFLICT + SELECT y upsert de resúmenes (+ SAVEPOINT/RELEASE de atomic)
+        with self.assertNumQueries(6):
+            resumen = writer.guardar()
+
+        self.assertEqual(resumen['total'], 45)
+        self.assertEqual(resumen['actualizados'], 0)
+        self.assertEqual(resumen['por_estado'], {'presente': 40, 'ausente': 3, 'tardanza': 2, 'justificado': 0})
+        self.assertEqual(Asistencia.objects.filter(fecha=date(2024, 4, 2)).count(), 45)
+
+    def test_sobrescribe_registro_del_dia(self):
+        self._writer(['presente'] * 45).guardar()
+        resumen = self._writer(['ausente'] * 45).guardar()
+
+        self.assertEqual(resumen['actualizados'], 45)
+        self.assertEqual(Asistencia.objects.count(), 45)
+        self.assertFalse(Asistencia.objects.filter(estado='presente').exists())
+
+    def test_estado_invalido_se_rechaza(self):
+        writer = AttendanceBatchWriter(self.curso, date(2024, 4, 2), registrado_por=self.profesor)
+        self.assertFalse(writer.agregar(self.estudiantes[0], 'vacaciones'))
+        self.assertTrue(writer.agregar(self.estudiantes[1], 'justificado'))
+
+        self.assertEqual(writer.guardar()['total'], 1)
+        self.assertEqual(len(writer.errores), 1)
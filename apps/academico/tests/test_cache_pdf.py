@@ -0,0 +1,141 @@
+"""
+Tests de la caché de documentos PDF (CacheDocumentosPDF)
+"""
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from usuarios.models import PerfilUsuario
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion
+from academico import views
+from academico.services import CacheDocumentosPDF
+from core.models import ConfiguracionAcademica
+
+
+class CacheDocumentosPDFTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ConfiguracionAcademica.objects.update_or_create(pk=1, defaults={'año_actual': 2024})
+        cls.estudiante = User.objects.create_user(username='alumno_cache_pdf', password='x')
+        PerfilUsuario.objects.create(user=cls.estudiante, rut='30.000.000-3', tipo_usuario='estudiante')
+        cls.curso = Curso.objects.create(nombre='2 Medio C', nivel='2', letra='C', año=2024)
+        cls.asignatura = Asignatura.objects.create(nombre='Artes', codigo='ART')
+        InscripcionCurso.objects.create(estudiante=cls.estudiante, curso=cls.curso, año=2024, estado='activo')
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.privado = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.privado, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media, ARCHIVOS_PRIVADOS_ROOT=self.privado)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        cache.delete(CacheDocumentosPDF.CLAVE_TAMANO)
+        self.client.force_login(self.estudiante)
+
+    def _archivos_en_cache(self):
+        return sorted(CacheDocumentosPDF.directorio().glob('*/*.pdf'))
+
+    def test_descarga_repetida_se_sirve_desde_cache(self):
+        url = reverse('academico:descargar_certificado_pdf', args=['notas'])
+
+        primera = self.client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertTrue(b''.join(primera.streaming_content).startswith(b'%PDF'))
+        self.assertIn('Last-Modified', primera)
+        archivo = self._archivos_en_cache()[0]
+        generado = archivo.stat().st_mtime_ns
+
+        segunda = self.client.get(url)
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+        self.assertEqual(self._archivos_en_cache(), [archivo])
+        self.assertEqual(archivo.stat().st_mtime_ns, generado)
+
+        no_modificado = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+    def test_nueva_nota_invalida_el_documento(self):
+        url = reverse('academico:descargar_informe_notas')
+        primera = self.client.get(url)
+
+        Calificacion.objects.create(
+            estudiante=self.estudiante, asignatura=self.asignatura, curso=self.curso, profesor=self.estudiante,
+            tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, 1), numero_evaluacion=1, nota='6.5',
+        )
+        segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+
+        self.assertEqual(segunda.status_code, 200)
+        self.assertNotEqual(segunda['ETag'], primera['ETag'])
+        self.assertEqual(len(self._archivos_en_cache()), 2)
+
+    def test_mover_nota_de_semestre_invalida_el_documento(self):
+        nota = Calificacion.objects.create(
+            estudiante=self.estudiante, asignatura=self.asignatura, curso=self.curso, profesor=self.estudiante,
+            tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, 1), numero_evaluacion=1, nota='6.5',
+        )
+        url = reverse('academico:descargar_informe_notas')
+        primera = self.client.get(url)
+
+        # Mismo valor en otro semestre: el resumen no cambia, pero el informe muestra columnas por semestre
+        nota.semestre = '2'
+        nota.save()
+        segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+
+        self.assertEqual(segunda.status_code, 200)
+        self.assertNotEqual(segunda['ETag'], primera['ETag'])
+
+    def test_expulsa_los_menos_usados(self):
+        rutas = []
+        for i, clave in enumerate(['aa01', 'bb02', 'cc03']):
+            ruta = CacheDocumentosPDF.ruta(clave)
+            ruta.parent.mkdir(parents=True)
+            ruta.write_bytes(b'x' * 100)
+            # atime creciente: 'aa01' es el menos usado recientemente
+            os.utime(ruta, ns=((i + 1) * 10**9, 10**9))
+            rutas.append(ruta)
+
+        self.assertEqual(CacheDocumentosPDF.expulsar(limite=250), 1)
+        self.assertEqual(self._archivos_en_cache(), rutas[1:])
+        self.assertEqual(CacheDocumentosPDF.expulsar(limite=250), 0)
+
+    def test_cache_fuera_de_media(self):
+        self.client.get(reverse('academico:descargar_certificado_pdf', args=['alumno_regular']))
+        self.assertTrue(str(self._archivos_en_cache()[0]).startswith(self.privado))
+        self.assertEqual(os.listdir(self.media), [])
+
+    def test_huella_cubre_todas_las_fuentes(self):
+        # Los certificados dependen también de ReportCardBuilder (services.py), no solo de utils.py
+        self.assertIn(os.path.join('academico', 'services.py'), ''.join(views.FUENTES_DOCUMENTOS))
+
+        fuentes = [os.path.join(self.media, nombre) for nombre in ('utils.py', 'services.py')]
+        for ruta in fuentes:
+            with open(ruta, 'w') as archivo:
+                archivo.write('# fuente')
+        huella = CacheDocumentosPDF.huella_fuentes(fuentes)
+        os.utime(fuentes[1], ns=(10**9, 10**9))
+        self.assertNotEqual(CacheDocumentosPDF.huella_fuentes(fuentes), huella)
+
+    def test_solo_recorre_el_directorio_al_superar_el_limite(self):
+        url = reverse('academico:descargar_certificado_pdf', args=['alumno_regular'])
+        with mock.patch.object(CacheDocumentosPDF, 'expulsar', wraps=CacheDocumentosPDF.expulsar) as expulsar:
+            self.client.get(url)
+            expulsar.assert_not_called()
+            tamaño = self._archivos_en_cache()[0].stat().st_size
+            self.assertEqual(cache.get(CacheDocumentosPDF.CLAVE_TAMANO), tamaño)
+
+            # El total registrado llega al límite: el siguiente PDF generado recorre el directorio
+            cache.set(CacheDocumentosPDF.CLAVE_TAMANO, settings.PDF_CACHE_MAX_BYTES, None)
+            self.client.get(reverse('academico:descargar_certificado_pdf', args=['notas']))
+            expulsar.assert_called_once()
+
+        # Al recorrerlo se corrige el total con lo que hay en disco
+        total = sum(ruta.stat().st_size for ruta in self._archivos_en_cache())
+        self.assertEqual(cache.get(CacheDocumentosPDF.CLAVE_TAMANO), total)
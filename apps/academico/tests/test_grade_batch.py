@@ -0,0 +1,96 @@
+"""
+Tests del ingreso masivo de notas (GradeBatchWriter)
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from usuarios.models import PerfilUsuario
+from administrativo.models import RegistroActividad
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, HorarioClases
+from academico.services import GradeBatchWriter, PromedioService
+from core.models import ConfiguracionAcademica
+
+
+class GradeBatchWriterTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        ConfiguracionAcademica.objects.update_or_create(pk=1, defaults={'año_actual': 2024, 'semestre_actual': '1'})
+
+        self.profesor = User.objects.create_user(username='profe_lote', password='password123')
+        PerfilUsuario.objects.create(user=self.profesor, rut='11.111.111-1', tipo_usuario='profesor')
+
+        self.curso = Curso.objects.create(nombre='2 Medio B', nivel='2', letra='B', año=2024)
+        self.asignatura = Asignatura.objects.create(nombre='Historia', codigo='HIS')
+        HorarioClases.objects.create(
+            curso=self.curso, asignatura=self.asignatura, profesor=self.profesor, dia='lunes', hora='1'
+        )
+
+    def _crear_estudiantes(self, cantidad, desde=0):
+        estudiantes = []
+        for i in range(desde, desde + cantidad):
+            user = User.objects.create_user(username=f'alumno_lote_{i}', password='password123')
+            PerfilUsuario.objects.create(user=user, rut=f'{10000000 + i}-{i % 10}', tipo_usuario='estudiante')
+            InscripcionCurso.objects.create(estudiante=user, curso=self.curso, año=2024, estado='activo')
+            estudiantes.append(user)
+        return estudiantes
+
+    def _post_notas(self, estudiantes, nota='5,5', numero=1):
+        datos = {
+            'asignatura': self.asignatura.id,
+            'tipo_evaluacion': 'nota',
+            'numero_evaluacion': numero,
+            'fecha_evaluacion': '2024-05-10',
+        }
+        for estudiante in estudiantes:
+            datos[f'nota_{estudiante.id}'] = nota
+        return self.client.post(reverse('academico:registrar_notas_curso', args=[self.curso.id]), datos)
+
+    def test_registrar_notas_usa_consultas_constantes(self):
+        self.client.force_login(self.profesor)
+        pocos = self._crear_estudiantes(5)
+
+        with CaptureQueriesContext(connection) as consultas_pocos:
+            self._post_notas(pocos)
+
+        muchos = self._crear_estudiantes(40, desde=5)
+        with CaptureQueriesContext(connection) as consultas_muchos:
+            self._post_notas(pocos + muchos, numero=2)
+
+        self.assertEqual(Calificacion.objects.count(), 50)
+        self.assertEqual(len(consultas_pocos), len(consultas_muchos))
+        self.assertEqual(RegistroActividad.objects.filter(tipo_accion='nota').count(), 2)
+
+    def test_sobrescritura_actualiza_promedios(self):
+        estudiante = self._crear_estudiantes(1)[0]
+
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        writer.agregar(estudiante, self.asignatura, 1, '4.0', 'nota', '1', date(2024, 5, 1))
+        writer.agregar(estudiante, self.asignatura, 2, '6.0', 'nota', '1', date(2024, 5, 2))
+        self.assertEqual(writer.guardar(), 2)
+
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        writer.agregar(estudiante, self.asignatura, 1, '7,0', 'nota', '2', date(2024, 9, 1))
+        writer.guardar()
+
+        inscripcion = InscripcionCurso.objects.get(estudiante=estudiante)
+        self.assertEqual(inscripcion.promedio, Decimal('6.5'))
+        self.assertEqual(Calificacion.objects.get(numero_evaluacion=1).semestre, '2')
+        self.assertEqual(PromedioService.detectar_desviaciones(), [])
+
+    def test_filas_invalidas_se_reportan_sin_bloquear_el_lote(self):
+        estudiante, otro = self._crear_estudiantes(2)
+
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        self.assertFalse(writer.agregar(estudiante, self.asignatura, 1, '9.5', 'nota', '1', date(2024, 5, 1)))
+        self.assertFalse(writer.agregar(otro, self.asignatura, 1, 'abc', 'nota', '1', date(2024, 5, 1)))
+        self.assertTrue(writer.agregar(otro, self.asignatura, 2, '5', 'nota', '1', date(2024, 5, 1)))
+
+        self.assertEqual(writer.guardar(), 1)
+        self.assertEqual(len(writer.errores), 2)
+        self.assertEqual(Calificacion.objects.get().nota, Decimal('5.00'))
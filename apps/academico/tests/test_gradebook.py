@@ -0,0 +1,81 @@
+"""
+Tests del libro de calificaciones (GradebookMatrix)
+"""
+import math
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from usuarios.models import PerfilUsuario
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, HorarioClases
+from academico.services import GradebookMatrix
+
+
+class GradebookMatrixTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_libro')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='55.555.555-5', tipo_usuario='profesor')
+        cls.curso = Curso.objects.create(nombre='3 Medio D', nivel='3', letra='D', año=2024)
+        cls.asignatura = Asignatura.objects.create(nombre='Química', codigo='QUI')
+        HorarioClases.objects.create(curso=cls.curso, asignatura=cls.asignatura, profesor=cls.profesor, dia='lunes', hora='2')
+
+        # notas[i][j]: estudiante i, evaluación j+1 (None = sin nota)
+        notas = [
+            ['6.0', '5.0', '7.0'],
+            ['3.0', None, '4.0'],
+            ['5.0', '2.0', None],
+        ]
+        cls.estudiantes = []
+        for i, fila in enumerate(notas):
+            estudiante = User.objects.create(username=f'alumno_libro_{i}', last_name=f'Apellido {i}')
+            InscripcionCurso.objects.create(estudiante=estudiante, curso=cls.curso, año=2024, estado='activo')
+            cls.estudiantes.append(estudiante)
+            for j, nota in enumerate(fila, start=1):
+                if nota:
+                    Calificacion.objects.create(
+                        estudiante=estudiante, asignatura=cls.asignatura, curso=cls.curso, profesor=cls.profesor,
+                        tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, j),
+                        numero_evaluacion=j, nota=nota,
+                    )
+
+    def test_matriz_y_estadisticas(self):
+        with self.assertNumQueries(2):
+            libro = GradebookMatrix.cargar(self.curso, self.asignatura)
+
+        self.assertEqual(libro.forma, (3, 3))
+        self.assertTrue(math.isnan(libro.fila(1)[1]))
+        self.assertEqual(libro.promedios_estudiante(), [6.0, 3.5, 3.5])
+
+        primera, segunda, _ = libro.estadisticas_evaluacion()
+        self.assertEqual((primera['promedio'], primera['desviacion']), (4.7, 1.25))
+        self.assertEqual((primera['minimo'], primera['maximo'], primera['reprobados']), (3.0, 6.0, 1))
+        self.assertEqual(segunda['cantidad'], 2)
+        self.assertEqual(libro.distribucion(), {
+            '1.0-1.9': 0, '2.0-2.9': 1, '3.0-3.9': 1, '4.0-4.9': 1, '5.0-5.9': 2, '6.0-7.0': 2,
+        })
+
+    def test_endpoint_json_y_permisos(self):
+        url = reverse('academico:libro_calificaciones', args=[self.curso.id, self.asignatura.id])
+        self.client.force_login(self.profesor)
+
+        datos = self.client.get(url, {'formato': 'json'}).json()
+        self.assertEqual(datos['estudiantes'][1]['notas'], [3.0, None, 4.0])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        otro = User.objects.create(username='otro_profe_libro')
+        PerfilUsuario.objects.create(user=otro, rut='66.666.666-6', tipo_usuario='profesor')
+        self.client.force_login(otro)
+        self.assertEqual(self.client.get(url, {'formato': 'json'}).status_code, 403)
+
+        # Quien no es profesor recibe 403 en JSON, no una redirección
+        self.client.force_login(self.estudiantes[0])
+        self.assertEqual(self.client.get(url, {'formato': 'json'}).status_code, 403)
+
+    def test_dashboard_profesor_enlaza_el_libro(self):
+        self.client.force_login(self.profesor)
+        respuesta = self.client.get(reverse('academico:dashboard_academico'))
+        url = reverse('academico:libro_calificaciones', args=[self.curso.id, self.asignatura.id])
+        self.assertContains(respuesta, f'href="{url}"')
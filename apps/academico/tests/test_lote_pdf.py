@@ -0,0 +1,144 @@
+"""
+Tests de la generación masiva de documentos PDF (LotePDFService)
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from usuarios.models import PerfilUsuario
+from academico.models import Curso, InscripcionCurso, LoteDocumentos
+from academico.services import LotePDFService
+from core.models import ConfiguracionAcademica
+
+
+class LotePDFServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ConfiguracionAcademica.get_actual()
+        cls.curso = Curso.objects.create(nombre='4 Medio A', nivel='4', letra='A', año=2024)
+        cls.otro_curso = Curso.objects.create(nombre='4 Medio B', nivel='4', letra='B', año=2024)
+        for i, curso in enumerate([cls.curso, cls.curso, cls.otro_curso]):
+            estudiante = User.objects.create(username=f'alumno_lote_pdf_{i}', first_name='Alumno', last_name=str(i))
+            PerfilUsuario.objects.create(user=estudiante, rut=f'2000000{i}-{i}', tipo_usuario='estudiante')
+            InscripcionCurso.objects.create(estudiante=estudiante, curso=curso, año=2024, estado='activo')
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.privado = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.privado, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media, ARCHIVOS_PRIVADOS_ROOT=self.privado)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_genera_zip_por_curso_con_progreso(self):
+        lote = LoteDocumentos.objects.create(tipo='alumno_regular', año=2024)
+        lote.cursos.set([self.curso])
+        avances = []
+
+        LotePDFService.generar(lote, procesos=1, progreso=lambda hechos, total: avances.append((hechos, total)))
+
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.procesados, lote.fallidos), ('completado', 2, 0))
+        self.assertEqual(avances, [(1, 2), (2, 2)])
+        with zipfile.ZipFile(lote.archivo.path) as archivo_zip:
+            self.assertEqual(sorted(archivo_zip.namelist()), [
+                '4 Medio A/Certificado_Alumno_Regular_alumno_lote_pdf_0.pdf',
+                '4 Medio A/Certificado_Alumno_Regular_alumno_lote_pdf_1.pdf',
+            ])
+            self.assertTrue(archivo_zip.read(archivo_zip.namelist()[0]).startswith(b'%PDF'))
+
+    def test_comando_todo_el_liceo(self):
+        call_command('generar_lote_pdf', '--tipo', 'informe_notas', '--todos', '--anio', '2024',
+                     '--procesos', '1', stdout=StringIO())
+
+        lote = LoteDocumentos.objects.get()
+        self.assertEqual((lote.estado, lote.total, lote.fallidos), ('completado', 3, 0))
+        with zipfile.ZipFile(lote.archivo.path) as archivo_zip:
+            self.assertEqual(len(archivo_zip.namelist()), 3)
+
+    def test_accion_admin_encola_el_lote(self):
+        admin = User.objects.create_superuser(username='admin_lote', password='x')
+        self.client.force_login(admin)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('admin:academico_curso_changelist'), {
+                'action': 'generar_lote_informes_notas',
+                '_selected_action': [self.curso.pk, self.otro_curso.pk],
+            })
+
+        lote = LoteDocumentos.objects.get()
+        self.assertEqual((lote.tipo, lote.estado, lote.solicitado_por), ('informe_notas', 'pendiente', admin))
+        self.assertEqual(lote.cursos.count(), 2)
+        # El proceso en segundo plano se lanza solo al confirmar la transacción
+        self.assertEqual(len(callbacks), 1)
+
+    def test_zip_privado_se_descarga_solo_desde_el_admin(self):
+        lote = LoteDocumentos.objects.create(tipo='alumno_regular', año=2024)
+        lote.cursos.set([self.otro_curso])
+        LotePDFService.generar(lote, procesos=1)
+
+        lote.refresh_from_db()
+        self.assertTrue(lote.archivo.path.startswith(self.privado))
+        self.assertEqual(os.listdir(self.media), [])
+
+        url = reverse('admin:academico_lotedocumentos_descargar', args=[lote.pk])
+        estudiante = User.objects.get(username='alumno_lote_pdf_2')
+        self.client.force_login(estudiante)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser(username='admin_descarga', password='x'))
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        with zipfile.ZipFile(BytesIO(b''.join(respuesta.streaming_content))) as archivo_zip:
+            self.assertEqual(len(archivo_zip.namelist()), 1)
+        self.assertContains(self.client.get(reverse('admin:academico_lotedocumentos_changelist')), url)
+        self.assertContains(self.client.get(reverse('admin:academico_lotedocumentos_change', args=[lote.pk])), url)
+
+    @mock.patch('academico.services.subprocess.Popen')
+    def test_lanzar_respeta_el_cupo_y_libera_lotes_interrumpidos(self, popen):
+        en_curso = LoteDocumentos.objects.create(tipo='informe_notas', año=2024, estado='procesando')
+        parcial = os.path.join(self.privado, LotePDFService.ruta_zip(en_curso) + '.parcial')
+        os.makedirs(os.path.dirname(parcial))
+        open(parcial, 'wb').close()
+        nuevo = LoteDocumentos.objects.create(tipo='alumno_regular', año=2024)
+
+        with override_settings(PDF_LOTE_SIMULTANEOS=1):
+            with self.captureOnCommitCallbacks(execute=True):
+                LotePDFService.lanzar(nuevo)
+            popen.assert_not_called()
+
+            # El proceso del lote en curso murió: sin avance, se da por interrumpido y se libera el cupo
+            LoteDocumentos.objects.filter(pk=en_curso.pk).update(actualizado=timezone.now() - timedelta(hours=1))
+            with self.captureOnCommitCallbacks(execute=True):
+                LotePDFService.lanzar(nuevo)
+
+        en_curso.refresh_from_db()
+        self.assertEqual(en_curso.estado, 'error')
+        self.assertFalse(os.path.exists(parcial))
+        popen.assert_called_once()
+        self.assertIn('--pendientes', popen.call_args.args[0])
+
+    def test_comando_vacia_la_cola_de_pendientes(self):
+        primero = LoteDocumentos.objects.create(tipo='alumno_regular', año=2024)
+        primero.cursos.set([self.curso])
+        segundo = LoteDocumentos.objects.create(tipo='alumno_regular', año=2024)
+        segundo.cursos.set([self.otro_curso])
+
+        call_command('generar_lote_pdf', '--pendientes', '--procesos', '1', stdout=StringIO())
+
+        self.assertEqual(
+            list(LoteDocumentos.objects.order_by('pk').values_list('estado', 'total')),
+            [('completado', 2), ('completado', 1)],
+        )
+        self.assertIsNone(LotePDFService.siguiente_pendiente())
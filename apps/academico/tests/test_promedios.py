@@ -0,0 +1,99 @@
+"""
+Tests del motor incremental de promedios (PromedioAcumulado)
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from usuarios.models import PerfilUsuario
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, PromedioAcumulado
+
+
+class PromedioIncrementalTest(TestCase):
+    def setUp(self):
+        self.profesor = User.objects.create_user(username='profe_prom', password='password123')
+        PerfilUsuario.objects.create(user=self.profesor, rut='11.111.111-1', tipo_usuario='profesor')
+
+        self.estudiante = User.objects.create_user(username='alumno_prom', password='password123')
+        PerfilUsuario.objects.create(user=self.estudiante, rut='22.222.222-2', tipo_usuario='estudiante')
+
+        self.curso = Curso.objects.create(nombre='1 Medio A', nivel='1', letra='A', año=2024)
+        self.matematicas = Asignatura.objects.create(nombre='Matemáticas', codigo='MAT')
+        self.lenguaje = Asignatura.objects.create(nombre='Lenguaje', codigo='LEN')
+        self.inscripcion = InscripcionCurso.objects.create(
+            estudiante=self.estudiante, curso=self.curso, año=2024, estado='activo'
+        )
+
+    def _calificar(self, asignatura, numero, nota, semestre='1'):
+        return Calificacion.objects.create(
+            estudiante=self.estudiante, asignatura=asignatura, curso=self.curso,
+            profesor=self.profesor, tipo_evaluacion='nota', semestre=semestre,
+            fecha_evaluacion=date(2024, 5, 1), numero_evaluacion=numero, nota=nota,
+        )
+
+    def _promedios(self):
+        self.inscripcion.refresh_from_db()
+        perfil = PerfilUsuario.objects.get(user=self.estudiante)
+        return self.inscripcion.promedio, perfil.promedio_general
+
+    def test_alta_actualiza_promedios(self):
+        self._calificar(self.matematicas, 1, '6.0')
+        self._calificar(self.lenguaje, 2, '5.0')
+
+        self.assertEqual(self._promedios(), (Decimal('5.5'), Decimal('5.5')))
+        acumulado = PromedioAcumulado.objects.get(asignatura=self.matematicas)
+        self.assertEqual((acumulado.suma_notas, acumulado.cantidad_notas), (Decimal('6.00'), 1))
+
+    def test_cambio_de_nota_y_semestre_aplica_delta(self):
+        self._calificar(self.matematicas, 1, '4.0')
+        self._calificar(self.matematicas, 2, '6.0')
+
+        calificacion, _ = Calificacion.objects.update_or_create(
+            estudiante=self.estudiante, asignatura=self.matematicas, curso=self.curso, numero_evaluacion=1,
+            defaults={'nota': '7.0', 'semestre': '2', 'profesor': self.profesor,
+                      'tipo_evaluacion': 'nota', 'fecha_evaluacion': date(2024, 9, 1)},
+        )
+
+        self.assertEqual(self._promedios(), (Decimal('6.5'), Decimal('6.5')))
+        s1 = PromedioAcumulado.objects.get(asignatura=self.matematicas, semestre='1')
+        s2 = PromedioAcumulado.objects.get(asignatura=self.matematicas, semestre='2')
+        self.assertEqual((s1.suma_notas, s1.cantidad_notas), (Decimal('6.00'), 1))
+        self.assertEqual((s2.suma_notas, s2.cantidad_notas), (Decimal('7.00'), 1))
+
+    def test_baja_descuenta_nota(self):
+        calificacion = self._calificar(self.matematicas, 1, '3.0')
+        self._calificar(self.matematicas, 2, '5.0')
+
+        calificacion.delete()
+        self.assertEqual(self._promedios(), (Decimal('5.0'), Decimal('5.0')))
+
+        Calificacion.objects.get(numero_evaluacion=2).delete()
+        self.assertEqual(self._promedios(), (None, None))
+
+    def test_guardado_usa_cantidad_constante_de_consultas(self):
+        for numero in range(1, 6):
+            self._calificar(self.matematicas, numero, '5.0')
+        # Crear + delta (UPDATE) + agregado de acumulados + UPDATE inscripción + UPDATE perfil
+        # + SELECT y upsert del resumen del estudiante
+        with self.assertNumQueries(7):
+            self._calificar(self.matematicas, 6, '6.2')
+
+    def test_recompute_averages_detecta_y_corrige_desviaciones(self):
+        self._calificar(self.matematicas, 1, '4.0')
+        self._calificar(self.lenguaje, 2, '6.0')
+
+        # Un UPDATE masivo no dispara señales y desvía los acumulados
+        Calificacion.objects.filter(asignatura=self.matematicas).update(nota=Decimal('2.0'))
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_averages', '--check', stdout=StringIO())
+
+        call_command('recompute_averages', stdout=StringIO())
+
+        call_command('recompute_averages', '--check', stdout=StringIO())
+        self.assertEqual(self._promedios(), (Decimal('4.0'), Decimal('4.0')))
@@ -0,0 +1,69 @@
+"""
+Tests del informe de notas consolidado (ReportCardBuilder)
+"""
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from usuarios.models import PerfilUsuario
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, HorarioClases
+from academico.services import ReportCardBuilder
+from academico.utils import generar_certificado_notas
+
+
+class ReportCardBuilderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_informe')
+        cls.estudiante = User.objects.create(username='alumno_informe')
+        PerfilUsuario.objects.create(user=cls.estudiante, rut='44.444.444-4', tipo_usuario='estudiante')
+        cls.curso = Curso.objects.create(nombre='2 Medio C', nivel='2', letra='C', año=2024)
+        InscripcionCurso.objects.create(estudiante=cls.estudiante, curso=cls.curso, año=2024, estado='activo')
+
+        cls.asignaturas = []
+        for i, dia in enumerate(['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado']):
+            asignatura = Asignatura.objects.create(nombre=f'Asignatura {i}', codigo=f'AS{i}')
+            HorarioClases.objects.create(curso=cls.curso, asignatura=asignatura, profesor=cls.profesor, dia=dia, hora='1')
+            cls.asignaturas.append(asignatura)
+
+    def _calificar(self, asignatura, numero, nota, semestre='1', tipo='nota', fecha=date(2024, 5, 1)):
+        Calificacion.objects.create(
+            estudiante=self.estudiante, asignatura=asignatura, curso=self.curso, profesor=self.profesor,
+            tipo_evaluacion=tipo, semestre=semestre, fecha_evaluacion=fecha, numero_evaluacion=numero, nota=nota,
+        )
+
+    def test_consultas_constantes_y_agrupacion(self):
+        matematicas, lenguaje = self.asignaturas[:2]
+        self._calificar(matematicas, 1, '4.0')
+        self._calificar(matematicas, 2, '6.0', semestre='2', tipo='examen')
+        self._calificar(lenguaje, 1, '5.5')
+        self._calificar(lenguaje, 2, '3.0', fecha=date(2023, 5, 1))  # Otro año: no cuenta
+
+        with self.assertNumQueries(3):
+            informe = ReportCardBuilder(self.estudiante, 2024).construir()
+
+        curso = informe.cursos[0]
+        self.assertEqual(len(curso.asignaturas), 6)
+        linea = curso.asignaturas[0]
+        self.assertEqual((linea.promedio, linea.cantidad_notas), (Decimal('5.0'), 2))
+        self.assertEqual(linea.promedio_semestre('2'), Decimal('6.0'))
+        self.assertEqual(linea.por_tipo['examen'].promedio, Decimal('6.0'))
+        self.assertEqual(curso.asignaturas[1].promedio, Decimal('5.5'))
+        self.assertIsNone(curso.asignaturas[2].promedio)
+        self.assertEqual(curso.promedio, Decimal('5.2'))
+        self.assertEqual(informe.promedio_general, Decimal('5.2'))
+
+    def test_pdfs_consumen_el_informe(self):
+        self._calificar(self.asignaturas[0], 1, '6.0')
+        self.client.force_login(self.estudiante)
+
+        # El informe queda en la caché de PDF: se escribe en un directorio temporal
+        with tempfile.TemporaryDirectory() as directorio, self.settings(ARCHIVOS_PRIVADOS_ROOT=directorio):
+            response = self.client.get(reverse('academico:descargar_informe_notas'))
+            b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(generar_certificado_notas(self.estudiante).getvalue().startswith(b'%PDF'))
@@ -0,0 +1,139 @@
+"""
+Tests del resumen materializado por estudiante (ResumenEstudiante)
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from usuarios.models import PerfilUsuario
+from usuarios.services import PanelService
+from academico.admin import marcar_ausentes, marcar_presentes
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, Asistencia, ResumenEstudiante
+from academico.services import AcademicoService, AttendanceBatchWriter, GradeBatchWriter, ResumenService
+
+
+class ResumenEstudianteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_resumen')
+        cls.estudiante = User.objects.create(username='alumno_resumen')
+        PerfilUsuario.objects.create(user=cls.estudiante, rut='33.333.333-3', tipo_usuario='estudiante')
+        cls.curso = Curso.objects.create(nombre='4 Medio A', nivel='4', letra='A', año=2024)
+        cls.matematicas = Asignatura.objects.create(nombre='Matemáticas', codigo='MAT')
+        cls.lenguaje = Asignatura.objects.create(nombre='Lenguaje', codigo='LEN')
+        InscripcionCurso.objects.create(estudiante=cls.estudiante, curso=cls.curso, año=2024, estado='activo')
+
+    def _calificar(self, asignatura, numero, nota, fecha=date(2024, 5, 1)):
+        return Calificacion.objects.create(
+            estudiante=self.estudiante, asignatura=asignatura, curso=self.curso,
+            profesor=self.profesor, tipo_evaluacion='nota', semestre='1',
+            fecha_evaluacion=fecha, numero_evaluacion=numero, nota=nota,
+        )
+
+    def _asistir(self, fecha, estado):
+        return Asistencia.objects.create(
+            estudiante=self.estudiante, curso=self.curso, fecha=fecha, estado=estado,
+            registrado_por=self.profesor,
+        )
+
+    def _resumen(self, anio=2024):
+        return ResumenEstudiante.objects.get(estudiante=self.estudiante, curso=self.curso, año=anio)
+
+    def test_notas_individuales_mantienen_el_resumen(self):
+        self._calificar(self.matematicas, 1, '6.0')
+        cal = self._calificar(self.lenguaje, 2, '4.0')
+        self.assertEqual(self._resumen().promedio, Decimal('5.0'))
+
+        cal.nota = Decimal('5.0')
+        cal.fecha_evaluacion = date(2025, 3, 10)
+        cal.save()
+        self.assertEqual(self._resumen().promedio, Decimal('6.0'))
+        self.assertEqual(self._resumen(2025).notas_por_asignatura, {str(self.lenguaje.id): ['5.00', 1]})
+
+        cal.delete()
+        self.assertEqual(self._resumen(2025).cantidad_notas, 0)
+        self.assertEqual(ResumenService.detectar_desviaciones(), [])
+
+    def test_asistencia_individual_y_masiva_mantienen_el_resumen(self):
+        asistencia = self._asistir(date(2024, 4, 1), 'ausente')
+        self._asistir(date(2024, 4, 2), 'presente')
+
+        asistencia.estado = 'justificado'
+        asistencia.save()
+        writer = AttendanceBatchWriter(self.curso, date(2024, 4, 2), registrado_por=self.profesor)
+        writer.agregar(self.estudiante, 'tardanza')
+        writer.guardar()
+
+        resumen = self._resumen()
+        self.assertEqual(
+            (resumen.asistencias_presente, resumen.asistencias_tardanza, resumen.asistencias_justificado,
+             resumen.asistencias_ausente),
+            (0, 1, 1, 0),
+        )
+        Asistencia.objects.get(fecha=date(2024, 4, 1)).delete()
+        self.assertEqual(self._resumen().total_asistencias, 1)
+        self.assertEqual(ResumenService.detectar_desviaciones(), [])
+
+    def test_acciones_del_admin_mantienen_el_resumen(self):
+        self._asistir(date(2024, 4, 1), 'presente')
+        self._asistir(date(2024, 4, 2), 'tardanza')
+        self._asistir(date(2025, 3, 10), 'ausente')
+
+        marcar_ausentes(None, None, Asistencia.objects.filter(fecha__lt=date(2025, 1, 1)))
+        resumen = self._resumen()
+        self.assertEqual((resumen.asistencias_presente, resumen.asistencias_tardanza, resumen.asistencias_ausente),
+                         (0, 0, 2))
+
+        marcar_presentes(None, None, Asistencia.objects.all())
+        self.assertEqual((self._resumen().asistencias_presente, self._resumen(2025).asistencias_presente), (2, 1))
+        self.assertEqual(ResumenService.detectar_desviaciones(), [])
+
+    def test_lote_de_notas_mantiene_el_resumen(self):
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        writer.agregar(self.estudiante, self.matematicas, 1, '3,0', 'nota', '1', date(2024, 5, 1))
+        writer.agregar(self.estudiante, self.lenguaje, 2, '7,0', 'nota', '1', date(2024, 5, 1))
+        writer.guardar()
+
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        writer.agregar(self.estudiante, self.matematicas, 1, '5,0', 'nota', '1', date(2024, 6, 1))
+        writer.guardar()
+
+        self.assertEqual(self._resumen().promedio, Decimal('6.0'))
+        self.assertEqual(ResumenService.detectar_desviaciones(), [])
+
+    def test_lecturas_usan_el_resumen(self):
+        self._calificar(self.matematicas, 1, '5.5')
+        self._asistir(date(2024, 4, 1), 'presente')
+        self._asistir(date(2024, 4, 2), 'ausente')
+
+        self.assertEqual(
+            AcademicoService.obtener_asistencia_curso(self.estudiante, self.curso, 2024),
+            {'total': 2, 'presentes': 1, 'porcentaje': 50.0},
+        )
+        with self.assertNumQueries(2):
+            stats = PanelService.get_student_stats(self.estudiante)
+            inscripcion = stats['cursos_inscritos'][0]
+        self.assertEqual(stats['asistencia_porcentaje'], 50)
+        self.assertEqual(inscripcion.promedio_calculado, Decimal('5.5'))
+
+    def test_recompute_summaries_detecta_y_corrige_desviaciones(self):
+        self._calificar(self.matematicas, 1, '4.0')
+        self._asistir(date(2024, 4, 1), 'presente')
+
+        # Los UPDATE masivos no disparan señales y desvían el resumen
+        Asistencia.objects.update(estado='ausente')
+        Calificacion.objects.update(nota=Decimal('2.0'))
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_summaries', '--check', stdout=StringIO())
+
+        call_command('recompute_summaries', '--estudiante', str(self.estudiante.id), stdout=StringIO())
+
+        call_command('recompute_summaries', '--check', stdout=StringIO())
+        resumen = self._resumen()
+        self.assertEqual((resumen.asistencias_ausente, resumen.promedio), (1, Decimal('2.0')))
@@ -1,9 +1,12 @@
+import tempfile
+
+from django.core import mail
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from usuarios.models import PerfilUsuario
 from academico.models import Curso, InscripcionCurso, Asistencia, Asignatura
-from core.models import ConfiguracionAcademica
+from core.models import ConfiguracionAcademica, CorreoSaliente
 from datetime import datetime
 
 from django.conf import settings
@@ -50,7 +53,11 @@ class AcademicoViewsTest(TestCase):
 
     def test_descargar_informe_notas_estudiante(self):
         self.client.force_login(self.estudiante_user)
-        response = self.client.get(reverse('academico:descargar_informe_notas'))
+        # El informe queda en la caché de PDF: se escribe en directorios temporales
+        with tempfile.TemporaryDirectory() as directorio, \
+                self.settings(MEDIA_ROOT=directorio, ARCHIVOS_PRIVADOS_ROOT=directorio):
+            response = self.client.get(reverse('academico:descargar_informe_notas'))
+            b''.join(response.streaming_content)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
         
@@ -68,3 +75,30 @@ class AcademicoViewsTest(TestCase):
         # Puede ser 200 o 302 dependiendo de los permisos estrictos de "dicta clases en este curso"
         # Si la vista chequea estrictamente, podría fallar si no asignamos horario.
         # Ajustaremos si falla.
+
+    def test_enviar_correos_solo_encola(self):
+        self.estudiante_user.email = 'alumno@liceo.cl'
+        self.estudiante_user.save()
+        self.client.force_login(self.profesor_user)
+        response = self.client.post(reverse('academico:enviar_correos'), {
+            'destinatarios': [self.estudiante_user.id], 'asunto': 'Aviso', 'mensaje': 'Prueba mañana',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            list(CorreoSaliente.objects.values_list('destinatario', 'estado')), [('alumno@liceo.cl', 'pendiente')]
+        )
+
+    def test_enviar_correos_cuenta_solo_estudiantes_sin_correo(self):
+        self.estudiante_user.email = 'familia@liceo.cl'
+        self.estudiante_user.save()
+        hermano = User.objects.create_user(username='hermano', email='familia@liceo.cl')
+        sin_correo = User.objects.create_user(username='sin_correo')
+        for user, rut in ((hermano, '11111111-1'), (sin_correo, '22222222-2')):
+            PerfilUsuario.objects.create(user=user, rut=rut, tipo_usuario='estudiante')
+        self.client.force_login(self.profesor_user)
+        response = self.client.post(reverse('academico:enviar_correos'), {
+            'destinatarios': [self.estudiante_user.id, hermano.id, sin_correo.id], 'asunto': 'Aviso', 'mensaje': 'Hola',
+        }, follow=True)
+        self.assertEqual(CorreoSaliente.objects.count(), 1)
+        self.assertIn('Estudiantes sin correo registrado: 1', [str(m) for m in response.context['messages']])
@@ -4,7 +4,7 @@ from .profesor_views import (
     panel_profesor, mis_estudiantes_profesor, gestionar_calificaciones,
     enviar_correos, registro_asistencias, estadisticas_profesor,
     lista_calificaciones_profesor, gestionar_recursos, subir_recurso,
-    eliminar_recurso, descargar_recurso
+    eliminar_recurso, descargar_recurso, libro_calificaciones
 )
 
 app_name = 'academico'
@@ -35,6 +35,7 @@ urlpatterns = [
     path('profesor/correos/', enviar_correos, name='enviar_correos'),
     path('profesor/asistencias/<int:curso_id>/', registro_asistencias, name='registro_asistencias'),
     path('profesor/estadisticas/', estadisticas_profesor, name='estadisticas_profesor'),
+    path('profesor/libro/<int:curso_id>/<int:asignatura_id>/', libro_calificaciones, name='libro_calificaciones'),
     
     # Recursos Académicos
     path('profesor/recursos/', gestionar_recursos, name='gestionar_recursos'),
@@ -106,19 +106,16 @@ def generar_certificado_notas(alumno):
     
     c.setFont("Helvetica", 11)
     
-    # Obtener notas (lógica simplificada para demo/rapidez)
-    # En un caso real, esto llamaría a un servicio de cálculo de promedios
-    from .models import Calificacion, Asignatura
-    asignaturas = Asignatura.objects.filter(curso__inscripciones__estudiante=alumno).distinct()
-    
-    for asig in asignaturas:
-        notas = Calificacion.objects.filter(estudiante=alumno, asignatura=asig)
-        if notas.exists():
-            # Calcular promedio simple
-            promedio = sum([n.nota for n in notas]) / len(notas)
-            c.drawString(70, y, asig.nombre[:40])
-            c.drawString(350, y, f"{promedio:.1f}")
-            y -= 20
+    # Promedios del año desde el informe consolidado (consultas constantes)
+    from .services import ReportCardBuilder
+    informe = ReportCardBuilder(alumno).construir()
+
+    for curso in informe.cursos:
+        for asig in curso.asignaturas:
+            if asig.cantidad_notas:
+                c.drawString(70, y, asig.nombre[:40])
+                c.drawString(350, y, f"{asig.promedio:.1f}")
+                y -= 20
             
     # Footer
     c.setFont("Helvetica-Oblique", 9)
@@ -239,3 +236,64 @@ def generar_reporte_asistencia(alumno, fecha_inicio=None, fecha_fin=None):
     c.save()
     buffer.seek(0)
     return buffer
+
+
+# --- GENERACIÓN DE DOCUMENTOS POR ESTUDIANTE (vistas y lotes) ---
+
+def contexto_informe_notas(estudiante, anio):
+    """Contexto de la plantilla pdf/informe_notas.html"""
+    from .services import ReportCardBuilder
+
+    informe = ReportCardBuilder(estudiante, anio).construir()
+    return {
+        'estudiante': estudiante,
+        'informe': informe,
+        'promedio_general': informe.promedio_general,
+        'fecha': timezone.now(),
+        'anio': anio,
+    }
+
+
+def generar_informe_notas(alumno, anio):
+    """Informe detallado de notas (plantilla xhtml2pdf) como buffer"""
+    pdf = render_to_pdf('academico/pdf/informe_notas.html', contexto_informe_notas(alumno, anio))
+    return io.BytesIO(pdf) if pdf else None
+
+
+# tipo: (prefijo del archivo, generador(alumno, anio) -> BytesIO)
+DOCUMENTOS_PDF = {
+    'informe_notas': ('Informe_Notas', generar_informe_notas),
+    'alumno_regular': ('Certificado_Alumno_Regular', lambda alumno, anio: generar_certificado_alumno_regular(alumno)),
+    'asistencia': ('Reporte_Asistencia', lambda alumno, anio: generar_reporte_asistencia(alumno)),
+}
+
+
+def inicializar_worker_pdf():
+    """
+    Inicializador de los procesos del pool de lotes PDF: prepara Django si el
+    proceso se creó con 'spawn'. Con 'fork' el padre cierra sus conexiones
+    antes de crear el pool, así que cada worker abre la suya.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def renderizar_pdf_estudiante(tipo, estudiante_id, anio):
+    """
+    Tarea del pool: genera un documento y devuelve (estudiante_id, nombre, bytes, error).
+    Los errores se devuelven en vez de propagarse para no abortar el lote.
+    """
+    from django.contrib.auth.models import User
+
+    prefijo, generador = DOCUMENTOS_PDF[tipo]
+    try:
+        alumno = User.objects.select_related('perfil').get(pk=estudiante_id)
+        buffer = generador(alumno, anio)
+        if buffer is None:
+            return estudiante_id, None, None, "Error generando PDF"
+        return estudiante_id, f"{prefijo}_{alumno.username}.pdf", buffer.getvalue(), None
+    except Exception as e:
+        return estudiante_id, None, None, str(e)
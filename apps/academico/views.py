@@ -6,15 +6,47 @@ from datetime import datetime, timedelta
 from django.contrib import messages
 from django.http import HttpResponse
 
-from .models import Asignatura, Curso, InscripcionCurso, Calificacion, HorarioClases, Asistencia
+from .models import Asignatura, Curso, InscripcionCurso, Calificacion, HorarioClases, Asistencia, ResumenEstudiante
 from comunicacion.models import Noticia
 from core.models import ConfiguracionAcademica
-from .utils import render_to_pdf, generar_certificado_alumno_regular, generar_certificado_notas, generar_reporte_asistencia
+from .utils import render_to_pdf, contexto_informe_notas, generar_certificado_alumno_regular, generar_certificado_notas, generar_reporte_asistencia
 from django.utils import timezone
-from .services import AcademicoService
+from .services import AcademicoService, GradeBatchWriter, AttendanceBatchWriter, CacheDocumentosPDF, ReportCardBuilder
+import inspect
 import secrets
 import mimetypes
 from django.http import FileResponse
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Código que genera los documentos PDF (certificados ReportLab y contexto del informe en utils.py,
+# ReportCardBuilder en services.py): su versión forma parte de la clave de caché
+FUENTES_DOCUMENTOS = (
+    inspect.getsourcefile(generar_certificado_alumno_regular),
+    inspect.getsourcefile(ReportCardBuilder),
+)
+
+
+def _respuesta_pdf_cacheado(request, tipo, anio, fuentes, generar, filename):
+    """
+    Sirve un PDF del estudiante desde CacheDocumentosPDF con ETag y
+    Last-Modified; responde 304 si el navegador ya tiene esa versión.
+    Retorna None si no se pudo generar.
+    """
+    ruta, clave, generado = CacheDocumentosPDF.obtener(tipo, request.user, anio, fuentes, generar)
+    if ruta is None:
+        return None
+
+    etag = f'"{clave}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(generado))
+    if response is None:
+        response = FileResponse(open(ruta, 'rb'), as_attachment=True, filename=filename,
+                                content_type='application/pdf')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(generado)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 @login_required
 def dashboard_academico(request):
@@ -69,79 +101,13 @@ def descargar_informe_notas(request):
     estudiante = request.user
     anio_actual = ConfiguracionAcademica.get_actual().año_actual
     
-    # 1. Obtener cursos activos
-    inscripciones = InscripcionCurso.objects.filter(
-        estudiante=estudiante,
-        año=anio_actual,
-        estado='activo'
-    ).select_related('curso')
-
-    datos_informe = []
-    promedio_global_acumulado = 0
-    cantidad_asignaturas_global = 0
-
-    for inscripcion in inscripciones:
-        curso = inscripcion.curso
-        # Obtener asignaturas del curso (base horarios)
-        ids_asignaturas = HorarioClases.objects.filter(curso=curso).values_list('asignatura_id', flat=True).distinct()
-        asignaturas = Asignatura.objects.filter(id__in=ids_asignaturas).order_by('nombre')
-        
-        lista_asignaturas = []
-        promedio_curso_acumulado = 0
-        cantidad_asignaturas_curso = 0
-        
-        for asignatura in asignaturas:
-            # Calcular promedio asignatura
-            notas = Calificacion.objects.filter(
-                estudiante=estudiante,
-                asignatura=asignatura,
-                curso=curso,
-                fecha_evaluacion__year=anio_actual
-            )
-            
-            promedio_asignatura = notas.aggregate(Avg('nota'))['nota__avg']
-            
-            if promedio_asignatura:
-                promedio_final = round(promedio_asignatura, 1)
-                promedio_curso_acumulado += promedio_final
-                cantidad_asignaturas_curso += 1
-            else:
-                promedio_final = None
-                
-            lista_asignaturas.append({
-                'nombre': asignatura.nombre,
-                'promedio': promedio_final,
-                'cantidad_notas': notas.count()
-            })
-            
-        promedio_curso = round(promedio_curso_acumulado / cantidad_asignaturas_curso, 1) if cantidad_asignaturas_curso > 0 else None
-        
-        if promedio_curso:
-            promedio_global_acumulado += promedio_curso
-            cantidad_asignaturas_global += 1
-            
-        datos_informe.append({
-            'curso': curso,
-            'asignaturas': lista_asignaturas,
-            'promedio_curso': promedio_curso
-        })
-        
-    promedio_general = round(promedio_global_acumulado / cantidad_asignaturas_global, 1) if cantidad_asignaturas_global > 0 else None
-
-    context = {
-        'estudiante': estudiante,
-        'datos_informe': datos_informe,
-        'promedio_general': promedio_general,
-        'fecha': timezone.now(),
-        'anio': anio_actual
-    }
-    
-    pdf = render_to_pdf('academico/pdf/informe_notas.html', context)
-    if pdf:
-        response = HttpResponse(pdf, content_type='application/pdf')
-        filename = f"Informe_Notas_{estudiante.username}.pdf"
-        content = f"attachment; filename={filename}"
-        response['Content-Disposition'] = content
+    plantilla = 'academico/pdf/informe_notas.html'
+    response = _respuesta_pdf_cacheado(
+        request, 'informe_notas', anio_actual, (get_template(plantilla).origin.name, *FUENTES_DOCUMENTOS),
+        lambda: render_to_pdf(plantilla, contexto_informe_notas(estudiante, anio_actual)),
+        f"Informe_Notas_{estudiante.username}.pdf",
+    )
+    if response:
         return response
         
     return HttpResponse("Error generando PDF", status=400)
@@ -216,8 +182,15 @@ def dashboard_profesor(request, context):
         if eval.curso_id not in mapa_ultima_eval:
             mapa_ultima_eval[eval.curso_id] = eval
             
+    # Mapear curso_id -> asignaturas que dicta el profesor (enlaces al libro de calificaciones)
+    mapa_asignaturas = {}
+    for horario in horarios:
+        asignaturas_curso = mapa_asignaturas.setdefault(horario.curso_id, {})
+        asignaturas_curso.setdefault(horario.asignatura_id, horario.asignatura)
+
     # Asignar datos a los cursos
     for curso in cursos_unicos:
+        curso.asignaturas_profesor = list(mapa_asignaturas.get(curso.id, {}).values())
         ultima_eval = mapa_ultima_eval.get(curso.id)
         
         if ultima_eval:
@@ -279,46 +252,23 @@ def tomar_asistencia(request, curso_id):
     ).order_by('last_name', 'first_name')
     
     if request.method == 'POST':
-        fecha_hoy = datetime.now().date()
+        writer = AttendanceBatchWriter(curso, datetime.now().date(), registrado_por=request.user)
         
-        # Verificar si ya se tomó asistencia hoy
-        if Asistencia.objects.filter(curso=curso, fecha=fecha_hoy).exists():
-            messages.warning(request, f"Ya existe un registro de asistencia para el curso {curso} con fecha de hoy.")
-            # Opcional: Redirigir o permitir sobrescribir. Por seguridad, permitimos sobrescribir/actualizar.
-        
-        registros_creados = 0
         for estudiante in estudiantes:
             estado = request.POST.get(f'estado_{estudiante.id}')
-            observacion = request.POST.get(f'obs_{estudiante.id}', '')
             
             if estado:
-                Asistencia.objects.update_or_create(
-                    estudiante=estudiante,
-                    curso=curso,
-                    fecha=fecha_hoy,
-                    defaults={
-                        'estado': estado,
-                        'observacion': observacion,
-                        'registrado_por': request.user
-                    }
-                )
-                registros_creados += 1
+                writer.agregar(estudiante, estado, request.POST.get(f'obs_{estudiante.id}', ''))
         
-        # --- LOGGING ---
-        try:
-            from administrativo.services import LiceoOSService
-            LiceoOSService.registrar_evento(
-                usuario=request.user,
-                tipo_accion='asistencia',
-                descripcion=f"Pasó asistencia en {curso}",
-                detalles=f"Registros procesados: {registros_creados}",
-                request=request
-            )
-        except Exception:
-            pass
-        # ----------------
+        resumen = writer.guardar(request=request, descripcion=f"Pasó asistencia en {curso}")
         
-        messages.success(request, f"Se registró la asistencia de {registros_creados} estudiantes correctamente.")
+        if resumen['actualizados']:
+            # Por seguridad se permite sobrescribir/actualizar el registro del día
+            messages.warning(request, f"Ya existía un registro de asistencia para el curso {curso} con fecha de hoy; se actualizaron {resumen['actualizados']} registros.")
+        for error in writer.errores:
+            messages.warning(request, error)
+        
+        messages.success(request, f"Se registró la asistencia de {resumen['total']} estudiantes correctamente ({AttendanceBatchWriter.describir(resumen) or 'sin registros'}).")
         return redirect('academico:dashboard_academico')
         
     return render(request, 'academico/tomar_asistencia.html', {
@@ -546,48 +496,32 @@ def registrar_notas_curso(request, curso_id):
             messages.error(request, "Todos los campos de configuración son obligatorios.")
         else:
             asignatura = get_object_or_404(Asignatura, id=asignatura_id)
-            notas_guardadas = 0
+            semestre_actual = ConfiguracionAcademica.get_actual().semestre_actual
+            writer = GradeBatchWriter(profesor=request.user, curso=curso)
             
             for estudiante in estudiantes:
                 nota_valor = request.POST.get(f'nota_{estudiante.id}')
                 obs_individual = request.POST.get(f'obs_{estudiante.id}', '')
                 
                 if nota_valor:
-                    try:
-                        # Crear o actualizar calificación
-                        Calificacion.objects.update_or_create(
-                            estudiante=estudiante,
-                            asignatura=asignatura,
-                            curso=curso,
-                            numero_evaluacion=numero_evaluacion,
-                            defaults={
-                                'profesor': request.user,
-                                'tipo_evaluacion': tipo_evaluacion,
-                                'semestre': ConfiguracionAcademica.get_actual().semestre_actual,
-                                'fecha_evaluacion': fecha_evaluacion,
-                                'nota': nota_valor,
-                                'descripcion': obs_individual or descripcion_general
-                            }
-                        )
-                        notas_guardadas += 1
-                    except Exception as e:
-                        messages.warning(request, f"Error guardando nota para {estudiante}: {e}")
+                    writer.agregar(
+                        estudiante, asignatura, numero_evaluacion, nota_valor,
+                        tipo_evaluacion=tipo_evaluacion,
+                        semestre=semestre_actual,
+                        fecha_evaluacion=fecha_evaluacion,
+                        descripcion=obs_individual or descripcion_general,
+                    )
+            
+            for error in writer.errores:
+                messages.warning(request, f"Error guardando nota para {error}")
+            
+            notas_guardadas = writer.guardar(
+                request=request,
+                descripcion=f"Ingresó {len(writer)} notas en {asignatura.nombre} ({curso})",
+                detalles=f"Evaluación {numero_evaluacion}, Tipo: {tipo_evaluacion}",
+            )
             
             if notas_guardadas > 0:
-                # --- LOGGING ---
-                try:
-                    from administrativo.services import LiceoOSService
-                    LiceoOSService.registrar_evento(
-                        usuario=request.user,
-                        tipo_accion='nota',
-                        descripcion=f"Ingresó {notas_guardadas} notas en {asignatura.nombre} ({curso})",
-                        detalles=f"Evaluación {numero_evaluacion}, Tipo: {tipo_evaluacion}",
-                        request=request
-                    )
-                except Exception:
-                    pass
-                # ----------------
-                
                 messages.success(request, f"Se guardaron exitosamente {notas_guardadas} notas.")
                 return redirect('academico:dashboard_academico')
             else:
@@ -644,33 +578,15 @@ def detalle_estudiante(request, pk):
     resumen_academico = []
     anio_actual = ConfiguracionAcademica.get_actual().año_actual
     
+    resumenes = {
+        r.curso_id: r for r in ResumenEstudiante.objects.filter(estudiante=estudiante, año=anio_actual)
+    }
     for inscripcion in inscripciones:
-        # Promedio
-        promedio = Calificacion.objects.filter(
-            estudiante=estudiante, 
-            curso=inscripcion.curso,
-            fecha_evaluacion__year=anio_actual
-        ).aggregate(Avg('nota'))['nota__avg']
-        
-        # Asistencia
-        total_asist = Asistencia.objects.filter(
-            estudiante=estudiante,
-            curso=inscripcion.curso,
-            fecha__year=anio_actual
-        ).count()
-        presentes = Asistencia.objects.filter(
-            estudiante=estudiante,
-            curso=inscripcion.curso,
-            fecha__year=anio_actual,
-            estado='presente'
-        ).count()
-        
-        porcentaje_asistencia = (presentes / total_asist * 100) if total_asist > 0 else 0
-        
+        resumen = resumenes.get(inscripcion.curso_id)
         resumen_academico.append({
             'curso': inscripcion.curso,
-            'promedio': round(promedio, 1) if promedio else None,
-            'asistencia': round(porcentaje_asistencia, 1)
+            'promedio': resumen.promedio if resumen else None,
+            'asistencia': resumen.porcentaje_asistencia if resumen else 0
         })
 
     return render(request, 'academico/detalle_estudiante.html', {
@@ -843,25 +759,24 @@ def descargar_certificado_pdf(request, tipo):
     if not perfil or perfil.tipo_usuario != 'estudiante':
         return HttpResponse("No autorizado", status=403)
 
-    buffer = None
-    filename = ""
+    generadores = {
+        'alumno_regular': (generar_certificado_alumno_regular, "Certificado_Alumno_Regular"),
+        'notas': (generar_certificado_notas, "Informe_Notas"),
+        'asistencia': (generar_reporte_asistencia, "Reporte_Asistencia"),
+    }
 
     try:
-        if tipo == 'alumno_regular':
-            buffer = generar_certificado_alumno_regular(request.user)
-            filename = f"Certificado_Alumno_Regular_{request.user.username}.pdf"
-        elif tipo == 'notas':
-            buffer = generar_certificado_notas(request.user)
-            filename = f"Informe_Notas_{request.user.username}.pdf"
-        elif tipo == 'asistencia':
-            buffer = generar_reporte_asistencia(request.user)
-            filename = f"Reporte_Asistencia_{request.user.username}.pdf"
-        else:
+        if tipo not in generadores:
             messages.error(request, "Tipo de certificado no válido.")
             return redirect('academico:mis_certificados')
 
-        if buffer:
-            response = FileResponse(buffer, as_attachment=True, filename=filename)
+        generador, prefijo = generadores[tipo]
+        response = _respuesta_pdf_cacheado(
+            request, f"certificado_{tipo}", None, FUENTES_DOCUMENTOS,
+            lambda: generador(request.user).getvalue(),
+            f"{prefijo}_{request.user.username}.pdf",
+        )
+        if response:
             return response
         else:
             messages.error(request, "Error generando el certificado.")
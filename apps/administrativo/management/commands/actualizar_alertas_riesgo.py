@@ -0,0 +1,26 @@
+"""
+Management command: actualizar_alertas_riesgo
+Regenera el snapshot del Sistema de Alerta Temprana (AlertaRiesgo) que lee
+el dashboard de LiceoOS. Pensado para ejecutarse periódicamente (cron).
+
+Uso:
+    python manage.py actualizar_alertas_riesgo             # Año actual
+    python manage.py actualizar_alertas_riesgo --anio 2024
+"""
+from django.core.management.base import BaseCommand
+from administrativo.services import LiceoOSService
+
+
+class Command(BaseCommand):
+    help = 'Regenera las alertas de riesgo académico (SAT) precalculadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--anio',
+            type=int,
+            help='Año a procesar. Por defecto, el año en curso.',
+        )
+
+    def handle(self, *args, **options):
+        total = LiceoOSService.actualizar_alertas_riesgo(año=options['anio'])
+        self.stdout.write(self.style.SUCCESS(f"Proceso finalizado. {total} alertas de riesgo generadas."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0012_resumenestudiante'),
+        ('administrativo', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertaRiesgo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.IntegerField()),
+                ('promedio', models.DecimalField(decimal_places=1, default=0, max_digits=3)),
+                ('asistencia', models.DecimalField(decimal_places=1, max_digits=4)),
+                ('motivos', models.JSONField(default=list)),
+                ('nivel_riesgo', models.CharField(choices=[('alto', 'Alto'), ('medio', 'Medio')], max_length=10)),
+                ('generado', models.DateTimeField()),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas_riesgo', to='academico.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas_riesgo', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Alerta de Riesgo',
+                'verbose_name_plural': 'Alertas de Riesgo',
+                'ordering': ['nivel_riesgo', 'promedio'],
+            },
+        ),
+    ]
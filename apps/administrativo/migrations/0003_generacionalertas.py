@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrativo', '0002_alertariesgo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneracionAlertas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.IntegerField(unique=True)),
+                ('generado', models.DateTimeField()),
+                ('total', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Generación de Alertas',
+                'verbose_name_plural': 'Generaciones de Alertas',
+            },
+        ),
+    ]
@@ -31,3 +31,51 @@ class RegistroActividad(models.Model):
     def __str__(self):
         user_str = self.usuario.username if self.usuario else "Sistema"
         return f"[{self.get_tipo_accion_display()}] {user_str}: {self.descripcion}"
+
+
+class AlertaRiesgo(models.Model):
+    """
+    Snapshot del Sistema de Alerta Temprana (SAT). Se regenera periódicamente
+    con 'actualizar_alertas_riesgo' para que el dashboard lea una lista ya
+    calculada.
+    """
+    NIVEL_CHOICES = [
+        ('alto', 'Alto'),
+        ('medio', 'Medio'),
+    ]
+
+    estudiante = models.ForeignKey(User, on_delete=models.CASCADE, related_name='alertas_riesgo')
+    curso = models.ForeignKey('academico.Curso', on_delete=models.CASCADE, related_name='alertas_riesgo')
+    año = models.IntegerField()
+    promedio = models.DecimalField(max_digits=3, decimal_places=1, default=0)
+    asistencia = models.DecimalField(max_digits=4, decimal_places=1)
+    motivos = models.JSONField(default=list)
+    nivel_riesgo = models.CharField(max_length=10, choices=NIVEL_CHOICES)
+    generado = models.DateTimeField()
+
+    class Meta:
+        ordering = ['nivel_riesgo', 'promedio']
+        verbose_name = "Alerta de Riesgo"
+        verbose_name_plural = "Alertas de Riesgo"
+
+    def __str__(self):
+        return f"{self.estudiante.username} - {self.curso} ({self.get_nivel_riesgo_display()})"
+
+
+class GeneracionAlertas(models.Model):
+    """
+    Cuándo se generó el snapshot AlertaRiesgo de cada año. Va aparte de las
+    alertas para que un año sin estudiantes en riesgo también quede vigente,
+    y su fila se bloquea al regenerar para que cargas concurrentes del
+    dashboard no recalculen el mismo snapshot.
+    """
+    año = models.IntegerField(unique=True)
+    generado = models.DateTimeField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Generación de Alertas"
+        verbose_name_plural = "Generaciones de Alertas"
+
+    def __str__(self):
+        return f"SAT {self.año}: {self.total} alertas ({self.generado:%d-%m-%Y %H:%M})"
@@ -1,7 +1,12 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, F, Q, Value, DecimalField, ExpressionWrapper
 from django.utils import timezone
-from academico.models import InscripcionCurso, Asistencia, Calificacion
+from academico.models import InscripcionCurso, Asistencia, ResumenEstudiante
+from core.models import ConfiguracionAcademica
 from usuarios.models import PerfilUsuario
-from django.db.models import Avg
 
 class LiceoOSService:
     @staticmethod
@@ -35,50 +40,70 @@ class LiceoOSService:
         }
 
     @staticmethod
-    def detectar_riesgo_academico():
+    def detectar_riesgo_academico(año=None, umbral_promedio=None, umbral_asistencia=None):
         """
         Sistema de Alerta Temprana (SAT)
         Detecta alumnos con:
-        1. Promedio general < 4.0
-        2. Asistencia < 85%
+        1. Promedio general bajo el umbral (por defecto 4.0)
+        2. Asistencia bajo el umbral (por defecto 85%)
+        Los umbrales se configuran en ConfiguracionAcademica.
+
+        Cálculo por conjuntos: una consulta agrupada sobre ResumenEstudiante
+        filtra en la BD (HAVING) solo a los estudiantes en riesgo, y otra trae
+        sus inscripciones activas.
         """
-        año_actual = timezone.now().year
-        # Obtener inscripciones activas
-        inscripciones = InscripcionCurso.objects.filter(año=año_actual, estado='activo').select_related('estudiante', 'curso')
-        
+        año = año or timezone.now().year
+        if umbral_promedio is None or umbral_asistencia is None:
+            config = ConfiguracionAcademica.get_actual()
+            if umbral_promedio is None:
+                umbral_promedio = config.umbral_promedio_riesgo
+            if umbral_asistencia is None:
+                umbral_asistencia = config.umbral_asistencia_riesgo
+        umbral_promedio = Decimal(str(umbral_promedio))
+        umbral_asistencia = Decimal(str(umbral_asistencia))
+        decimal = DecimalField(max_digits=12, decimal_places=2)
+
+        inscritos = InscripcionCurso.objects.filter(año=año, estado='activo').values('estudiante_id')
+        en_riesgo = ResumenEstudiante.objects.filter(
+            año=año, estudiante_id__in=inscritos
+        ).values('estudiante_id').annotate(
+            suma=Sum('suma_notas'),
+            cantidad=Sum('cantidad_notas'),
+            presentes=Sum('asistencias_presente'),
+            total=Sum(
+                F('asistencias_presente') + F('asistencias_ausente')
+                + F('asistencias_tardanza') + F('asistencias_justificado')
+            ),
+        ).annotate(
+            limite_notas=ExpressionWrapper(F('cantidad') * Value(umbral_promedio), output_field=decimal),
+            presentes_x100=ExpressionWrapper(F('presentes') * 100, output_field=decimal),
+            limite_asistencia=ExpressionWrapper(F('total') * Value(umbral_asistencia), output_field=decimal),
+        ).filter(
+            Q(cantidad__gt=0, suma__lt=F('limite_notas'))
+            | Q(total__gt=0, presentes_x100__lt=F('limite_asistencia'))
+        ).order_by()
+        totales = {fila['estudiante_id']: fila for fila in en_riesgo}
+        if not totales:
+            return []
+
+        inscripciones = InscripcionCurso.objects.filter(
+            año=año, estado='activo', estudiante_id__in=totales
+        ).select_related('estudiante', 'curso')
+
         alertas = []
-        
         for inscripcion in inscripciones:
             estudiante = inscripcion.estudiante
-            
-            # Calcular Promedio
-            promedio = Calificacion.objects.filter(
-                estudiante=estudiante,
-                fecha_evaluacion__year=año_actual
-            ).aggregate(Avg('nota'))['nota__avg']
-            
-            # Calcular Asistencia
-            total_asist = Asistencia.objects.filter(
-                estudiante=estudiante,
-                fecha__year=año_actual
-            ).count()
-            
-            presentes = Asistencia.objects.filter(
-                estudiante=estudiante,
-                fecha__year=año_actual,
-                estado='presente'
-            ).count()
-            
-            pct_asistencia = (presentes / total_asist * 100) if total_asist > 0 else 100 # Asumimos 100 si no hay registros aun
-            
-            promedio = round(promedio, 1) if promedio else 0
-            
+            fila = totales[estudiante.id]
+            promedio = round(Decimal(fila['suma']) / fila['cantidad'], 1) if fila['cantidad'] else 0
+            total_asist = fila['total']
+            pct_asistencia = (fila['presentes'] / total_asist * 100) if total_asist > 0 else 100 # Asumimos 100 si no hay registros aun
+
             motivos = []
-            if promedio > 0 and promedio < 4.0:
+            if promedio > 0 and promedio < umbral_promedio:
                 motivos.append("Rendimiento Crítico")
-            if pct_asistencia < 85:
+            if pct_asistencia < umbral_asistencia:
                 motivos.append("Inasistencia Grave")
-                
+
             if motivos:
                 alertas.append({
                     'estudiante': estudiante,
@@ -88,10 +113,66 @@ class LiceoOSService:
                     'motivos': motivos,
                     'nivel_riesgo': 'alto' if len(motivos) > 1 else 'medio'
                 })
-        
+
         # Ordenar por riesgo (doble motivo primero)
         return sorted(alertas, key=lambda x: x['nivel_riesgo'], reverse=False)
 
+    @staticmethod
+    def actualizar_alertas_riesgo(año=None, vencido_antes_de=None):
+        """
+        Regenera el snapshot AlertaRiesgo del año indicado (por defecto, el
+        actual). Retorna la cantidad de alertas generadas.
+
+        Bloquea la fila GeneracionAlertas del año mientras calcula. Con
+        `vencido_antes_de`, otra request que esperaba el bloqueo no vuelve a
+        regenerar si el snapshot ya es posterior a ese instante, y retorna
+        None.
+        """
+        from .models import AlertaRiesgo, GeneracionAlertas
+
+        año = año or timezone.now().year
+        with transaction.atomic():
+            generacion, creada = GeneracionAlertas.objects.select_for_update().get_or_create(
+                año=año, defaults={'generado': timezone.now()}
+            )
+            if not creada and vencido_antes_de and generacion.generado >= vencido_antes_de:
+                return None
+
+            ahora = timezone.now()
+            alertas = LiceoOSService.detectar_riesgo_academico(año=año)
+            AlertaRiesgo.objects.filter(año=año).delete()
+            AlertaRiesgo.objects.bulk_create([
+                AlertaRiesgo(
+                    estudiante=a['estudiante'],
+                    curso=a['curso'],
+                    año=año,
+                    promedio=a['promedio'],
+                    asistencia=a['asistencia'],
+                    motivos=a['motivos'],
+                    nivel_riesgo=a['nivel_riesgo'],
+                    generado=ahora,
+                )
+                for a in alertas
+            ])
+            generacion.generado = ahora
+            generacion.total = len(alertas)
+            generacion.save(update_fields=['generado', 'total'])
+        return len(alertas)
+
+    @staticmethod
+    def obtener_alertas_riesgo(año=None):
+        """
+        Lee el snapshot AlertaRiesgo. Si no existe o es más antiguo que
+        SAT_VIGENCIA_MINUTOS, lo regenera antes de retornarlo.
+        """
+        from .models import AlertaRiesgo, GeneracionAlertas
+
+        año = año or timezone.now().year
+        vigencia = timezone.now() - timedelta(minutes=settings.SAT_VIGENCIA_MINUTOS)
+        if not GeneracionAlertas.objects.filter(año=año, generado__gte=vigencia).exists():
+            LiceoOSService.actualizar_alertas_riesgo(año=año, vencido_antes_de=vigencia)
+        return list(AlertaRiesgo.objects.filter(año=año).select_related('estudiante', 'curso'))
+
     @staticmethod
     def registrar_evento(usuario, tipo_accion, descripcion, detalles='', request=None):
         """
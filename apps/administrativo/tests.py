@@ -1,3 +1,99 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion, Asistencia
+from core.models import ConfiguracionAcademica
+from administrativo.models import AlertaRiesgo, GeneracionAlertas
+from administrativo.services import LiceoOSService
+
+
+class AlertaTempranaTest(TestCase):
+    """Sistema de Alerta Temprana (SAT) por conjuntos y su snapshot"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.anio = timezone.now().year
+        ConfiguracionAcademica.get_actual()
+        cls.profesor = User.objects.create(username='profe_sat')
+        cls.curso = Curso.objects.create(nombre='1 Medio Z', nivel='1', letra='Z', año=cls.anio)
+        cls.asignatura = Asignatura.objects.create(nombre='Física', codigo='FIS')
+        cls.estudiantes = {}
+        # nombre: (notas, presentes, ausentes)
+        perfiles = {
+            'ok': (['6.0'], 9, 1),
+            'notas': (['3.0', '4.0'], 10, 0),
+            'asistencia': (['5.0'], 8, 2),
+            'ambos': (['2.0'], 1, 1),
+            'sin_datos': ([], 0, 0),
+        }
+        for nombre, (notas, presentes, ausentes) in perfiles.items():
+            user = User.objects.create(username=f'alumno_sat_{nombre}')
+            InscripcionCurso.objects.create(estudiante=user, curso=cls.curso, año=cls.anio, estado='activo')
+            for i, nota in enumerate(notas, start=1):
+                Calificacion.objects.create(
+                    estudiante=user, asignatura=cls.asignatura, curso=cls.curso, profesor=cls.profesor,
+                    tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(cls.anio, 3, 1),
+                    numero_evaluacion=i, nota=nota,
+                )
+            for dia in range(presentes + ausentes):
+                Asistencia.objects.create(
+                    estudiante=user, curso=cls.curso, fecha=date(cls.anio, 3, 1) + timedelta(days=dia),
+                    estado='presente' if dia < presentes else 'ausente', registrado_por=cls.profesor,
+                )
+            cls.estudiantes[nombre] = user
+
+    def test_detecta_riesgo_en_consultas_constantes(self):
+        # Configuración + agregado con HAVING + inscripciones de los estudiantes en riesgo
+        with self.assertNumQueries(3):
+            alertas = LiceoOSService.detectar_riesgo_academico()
+
+        por_nombre = {a['estudiante'].username.replace('alumno_sat_', ''): a for a in alertas}
+        self.assertEqual(set(por_nombre), {'notas', 'asistencia', 'ambos'})
+        self.assertEqual(por_nombre['notas']['promedio'], Decimal('3.5'))
+        self.assertEqual(por_nombre['asistencia']['motivos'], ['Inasistencia Grave'])
+        self.assertEqual(por_nombre['ambos']['nivel_riesgo'], 'alto')
+        self.assertEqual(alertas[0]['nivel_riesgo'], 'alto')
+
+    def test_umbrales_configurables(self):
+        ConfiguracionAcademica.objects.update_or_create(
+            pk=1, defaults={'umbral_promedio_riesgo': Decimal('3.0'), 'umbral_asistencia_riesgo': 60}
+        )
+        alertas = LiceoOSService.detectar_riesgo_academico()
+        self.assertEqual([a['estudiante'] for a in alertas], [self.estudiantes['ambos']])
+
+    def test_snapshot_y_comando(self):
+        call_command('actualizar_alertas_riesgo', stdout=StringIO())
+        self.assertEqual(AlertaRiesgo.objects.filter(año=self.anio).count(), 3)
+
+        # Con el snapshot vigente, la lectura no recalcula: vigencia + alertas
+        with self.assertNumQueries(2):
+            alertas = LiceoOSService.obtener_alertas_riesgo()
+        self.assertEqual(alertas[0].estudiante, self.estudiantes['ambos'])
+
+        # Un snapshot vencido se regenera
+        GeneracionAlertas.objects.update(generado=timezone.now() - timedelta(days=1))
+        AlertaRiesgo.objects.update(generado=timezone.now() - timedelta(days=1))
+        LiceoOSService.obtener_alertas_riesgo()
+        self.assertFalse(AlertaRiesgo.objects.filter(generado__lt=timezone.now() - timedelta(hours=1)).exists())
+        self.assertEqual(GeneracionAlertas.objects.get(año=self.anio).total, 3)
+
+    def test_snapshot_sin_alertas_queda_vigente(self):
+        anio = self.anio - 10
+        self.assertEqual(LiceoOSService.obtener_alertas_riesgo(año=anio), [])
+        with self.assertNumQueries(2):
+            self.assertEqual(LiceoOSService.obtener_alertas_riesgo(año=anio), [])
 
-# Create your tests here.
+    def test_regeneracion_concurrente_no_se_repite(self):
+        LiceoOSService.actualizar_alertas_riesgo()
+        # Otra request vio el snapshot vencido antes de que esta lo regenerara
+        generado = GeneracionAlertas.objects.get(año=self.anio).generado
+        vencido_antes_de = timezone.now() - timedelta(minutes=1)
+        self.assertIsNone(LiceoOSService.actualizar_alertas_riesgo(vencido_antes_de=vencido_antes_de))
+        self.assertEqual(GeneracionAlertas.objects.get(año=self.anio).generado, generado)
+        self.assertEqual(set(AlertaRiesgo.objects.values_list('generado', flat=True)), {generado})
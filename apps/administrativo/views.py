@@ -7,6 +7,7 @@ from django.forms import modelform_factory
 import secrets
 
 from academico.models import Curso, Asignatura
+from core.models import ConfiguracionAcademica
 from .services import LiceoOSService
 
 def es_administrativo_check(user):
@@ -28,12 +29,13 @@ def dashboard_main(request):
         # 1. Obtener KPIs en tiempo real
         kpis = LiceoOSService.get_kpis_globales()
         
-        # 2. Ejecutar Sistema de Alerta Temprana (SAT)
-        alertas = LiceoOSService.detectar_riesgo_academico()
+        # 2. Sistema de Alerta Temprana (SAT), precalculado en AlertaRiesgo
+        alertas = LiceoOSService.obtener_alertas_riesgo()
         
         context = {
             'kpis': kpis,
-            'alertas': alertas, # Lista de diccionarios con riesgo
+            'alertas': alertas, # Snapshot de AlertaRiesgo
+            'configuracion': ConfiguracionAcademica.get_actual(),
             'page_title': 'LiceoOS - Centro de Operaciones',
             'actividades_recientes': LiceoOSService.get_historial_actividad(limite=8)
         }
@@ -0,0 +1,160 @@
+"""
+Serialización compilada de solo lectura para los listados grandes de la API
+"""
+import decimal
+from functools import cached_property
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import fields, serializers
+from rest_framework.settings import api_settings
+
+
+class SerializadorCompilado:
+    """
+    Versión de solo lectura de un ModelSerializer para listados grandes. Al
+    primer uso recorre una vez los campos del serializer y arma, para cada
+    uno, la columna de .values() que lee y una función que convierte el
+    valor crudo en lo mismo que entregaría DRF: las opciones y sus
+    get_FOO_display salen de mapas precalculados, los serializers anidados
+    de columnas con prefijo (asignatura__nombre), y fechas, decimales y uuid
+    de conversiones directas. Así cada fila es un dict armado con las
+    columnas ya leídas, sin instanciar el modelo ni pasar por
+    Field.get_attribute / to_representation.
+
+    Los campos que no son columnas (propiedades del modelo) se declaran en
+    `calculados` con las columnas que necesitan; cualquier otro campo sin
+    columna falla al compilar, no en silencio.
+
+    Uso:
+        NOTAS = SerializadorCompilado(CalificacionSerializer)
+        filas = NOTAS.valores(Calificacion.objects.filter(estudiante=user))  # .values() con las columnas
+        NOTAS.serializar(filas)  # == CalificacionSerializer(queryset, many=True).data
+    """
+
+    def __init__(self, serializer_class, calculados=None):
+        """`calculados`: {campo: (columnas, función(*valores))} para los campos que no son columnas"""
+        self.serializer_class = serializer_class
+        self.calculados = calculados or {}
+
+    @cached_property
+    def _compilado(self):
+        return self._compilar(self.serializer_class(), prefijo='', calculados=self.calculados)
+
+    @property
+    def columnas(self):
+        return self._compilado[0]
+
+    def valores(self, queryset, *extras):
+        """El queryset como .values() con las columnas del serializer y `extras`"""
+        return queryset.values(*self.columnas, *extras)
+
+    def serializar(self, filas):
+        """Lista de dicts con la misma forma y valores que serializer_class(many=True).data"""
+        convertir = self._compilado[1]
+        return [convertir(fila) for fila in filas]
+
+    @classmethod
+    def _compilar(cls, serializer, prefijo, calculados):
+        """Retorna (columnas, función fila → dict) para `serializer`"""
+        modelo = serializer.Meta.model
+        columnas = []
+        campos = []
+        for nombre, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            if nombre in calculados:
+                requeridas, funcion = calculados[nombre]
+                requeridas = [prefijo + c for c in requeridas]
+                columnas.extend(requeridas)
+                campos.append((nombre, cls._calculado(requeridas, funcion)))
+            elif isinstance(campo, serializers.BaseSerializer):
+                relacion = prefijo + campo.source
+                anidadas, convertir = cls._compilar(campo, f'{relacion}__', {})
+                columnas.extend([relacion, *anidadas])
+                campos.append((nombre, cls._anidado(relacion, convertir)))
+            else:
+                columna, convertir = cls._columna(modelo, campo)
+                columnas.append(prefijo + columna)
+                campos.append((nombre, cls._simple(prefijo + columna, convertir)))
+
+        def fila_a_dict(fila):
+            return {nombre: obtener(fila) for nombre, obtener in campos}
+        return list(dict.fromkeys(columnas)), fila_a_dict
+
+    @staticmethod
+    def _simple(columna, convertir):
+        def obtener(fila):
+            valor = fila[columna]
+            return None if valor is None else convertir(valor)
+        return obtener
+
+    @staticmethod
+    def _anidado(relacion, convertir):
+        # Sin relación (FK nula) DRF entrega None en vez del dict anidado
+        def obtener(fila):
+            return None if fila[relacion] is None else convertir(fila)
+        return obtener
+
+    @staticmethod
+    def _calculado(columnas, funcion):
+        def obtener(fila):
+            return funcion(*(fila[c] for c in columnas))
+        return obtener
+
+    @classmethod
+    def _columna(cls, modelo, campo):
+        """(columna, conversor) para un campo de DRF que lee una columna de `modelo`"""
+        fuente = campo.source
+        if fuente.startswith('get_') and fuente.endswith('_display'):
+            columna = fuente[4:-8]
+            opciones = dict(modelo._meta.get_field(columna).flatchoices)
+            return columna, lambda valor: str(opciones.get(valor, valor))
+
+        try:
+            campo_modelo = modelo._meta.get_field(fuente)
+        except FieldDoesNotExist:
+            campo_modelo = None
+        if not isinstance(campo_modelo, models.Field) or campo_modelo.is_relation:
+            raise ImproperlyConfigured(
+                f"{type(campo.parent).__name__}.{campo.field_name} no es una columna de {modelo.__name__}; "
+                f"declárelo en `calculados`"
+            )
+        return fuente, cls._conversor(campo)
+
+    @staticmethod
+    def _conversor(campo):
+        """Equivalente directo de campo.to_representation para valores no nulos"""
+        if isinstance(campo, fields.ChoiceField):
+            mapa = campo.choice_strings_to_values
+            return lambda valor: valor if valor == '' else mapa.get(str(valor), valor)
+        if isinstance(campo, fields.UUIDField) and campo.uuid_format == 'hex_verbose':
+            return str
+        if type(campo) is fields.CharField:
+            return str
+        if type(campo) is fields.IntegerField:
+            return int
+        if type(campo) is fields.BooleanField:
+            return bool
+        if type(campo) in (fields.DateField, fields.TimeField):
+            formato = getattr(
+                campo, 'format', api_settings.DATE_FORMAT if type(campo) is fields.DateField else api_settings.TIME_FORMAT
+            )
+            if isinstance(formato, str) and formato.lower() == fields.ISO_8601:
+                return lambda valor: valor.isoformat()
+        if (type(campo) is fields.DecimalField and campo.decimal_places is not None and not campo.localize
+                and not campo.normalize_output
+                and getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+            exponente = decimal.Decimal('.1') ** campo.decimal_places
+            contexto = decimal.getcontext().copy()
+            if campo.max_digits is not None:
+                contexto.prec = campo.max_digits
+            rounding = campo.rounding
+
+            def decimal_a_texto(valor):
+                if not isinstance(valor, decimal.Decimal):
+                    valor = decimal.Decimal(str(valor).strip())
+                return f'{valor.quantize(exponente, rounding=rounding, context=contexto):f}'
+            return decimal_a_texto
+        # Cualquier otro campo: su propia conversión, igual de correcta pero sin atajo
+        return campo.to_representation
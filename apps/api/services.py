@@ -0,0 +1,270 @@
+"""
+Servicios de la API REST: secciones de datos del alumno
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from academico.models import Calificacion, Asistencia, HorarioClases, Anotacion, InscripcionCurso
+from core.models import Notificacion, RegistroEliminado
+from core.services import ContadorNoLeidosService
+from tareas.models import Entrega, Tarea
+from .compilados import SerializadorCompilado
+from .serializers import (
+    UserSerializer, CalificacionSerializer, AsistenciaSerializer, HorarioSerializer,
+    NotificacionSerializer, AnotacionSerializer, TareaSerializer, EntregaSerializer,
+)
+
+# Listados grandes (años de historia): se arman desde .values() sin pasar por DRF fila a fila
+NOTAS = SerializadorCompilado(CalificacionSerializer)
+ASISTENCIAS = SerializadorCompilado(AsistenciaSerializer)
+TAREAS = SerializadorCompilado(TareaSerializer, calculados={
+    'esta_vencida': (['fecha_entrega'], lambda fecha_entrega: date.today() > fecha_entrega),
+})
+
+
+class SincronizacionService:
+    """
+    Sincronización incremental de los listados del alumno (notas,
+    asistencia, anotaciones, entregas). Cada respuesta trae un sync_token
+    opaco: la hora de la consulta, en microsegundos, menos MARGEN. Quien lo
+    devuelve en ?since= recibe solo las filas con `actualizado` posterior y
+    los uuid eliminados desde entonces (RegistroEliminado), con el mismo
+    índice (estudiante, actualizado) en todos los modelos.
+
+    MARGEN cubre las transacciones que confirman después de emitido el
+    token con una marca anterior: esas filas se reenvían en la siguiente
+    sincronización y la App las aplica por uuid sin duplicarlas. Un token
+    más antiguo que RegistroEliminado.RETENCION ya pudo perder sus lápidas
+    y recibe el listado completo ('completo': true).
+
+    Uso:
+        desde = SincronizacionService.desde(request.query_params.get('since'))  # ValueError si es inválido
+        filas, eliminados = SincronizacionService.cambios(queryset, user, desde)
+    """
+
+    MARGEN = timedelta(seconds=30)
+    _EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+    @staticmethod
+    def emitir(inicio):
+        """sync_token para una consulta que comenzó en `inicio`"""
+        return str((inicio - SincronizacionService.MARGEN - SincronizacionService._EPOCA) // timedelta(microseconds=1))
+
+    @staticmethod
+    def desde(token):
+        """Fecha desde la que sincronizar, o None si corresponde el listado completo"""
+        if not token:
+            return None
+        if not token.isdigit():
+            raise ValueError("sync_token inválido")
+        desde = SincronizacionService._EPOCA + timedelta(microseconds=int(token))
+        if desde < timezone.now() - RegistroEliminado.RETENCION:
+            return None
+        return desde
+
+    @staticmethod
+    def cambios(queryset, user, desde):
+        """Filas cambiadas y uuid eliminados desde `desde`; sin `desde`, todas las filas"""
+        if desde is None:
+            return list(queryset), []
+        filas = list(queryset.filter(actualizado__gte=desde))
+        eliminados = RegistroEliminado.objects.filter(
+            estudiante=user, modelo=queryset.model._meta.label_lower, eliminado__gte=desde
+        ).values_list('uuid', flat=True)
+        return filas, [str(uuid) for uuid in eliminados]
+
+    @staticmethod
+    def marcas(inicio, desde, eliminados):
+        return {
+            'sync_token': SincronizacionService.emitir(inicio),
+            'completo': desde is None,
+            'eliminados': eliminados,
+        }
+
+
+class AlumnoApiService:
+    """
+    Arma las secciones de datos del alumno que exponen los endpoints
+    /api/alumno/me/... y el bootstrap de la app móvil. Cada sección recibe
+    la inscripción activa ya resuelta y hace una consulta propia, con sus
+    totales calculados sobre las filas ya leídas, así que el bootstrap
+    completo cuesta un número fijo de consultas sin importar cuántas
+    notas, asistencias o tareas tenga el alumno.
+
+    Notas, asistencia y tareas se serializan con SerializadorCompilado
+    (mismo resultado que sus serializers de DRF, desde .values()).
+
+    Notas, asistencia, anotaciones y entregas aceptan `desde` (ver
+    SincronizacionService): entonces traen solo lo cambiado, y sus totales
+    salen de un agregado sobre todas las filas del alumno.
+
+    Uso:
+        inscripcion = AlumnoApiService.inscripcion_activa(user)
+        AlumnoApiService.notas(user)  # {'notas': [...], 'promedio_general': 5.8, 'total': 12}
+        AlumnoApiService.bootstrap(user, ['perfil', 'tareas'])
+    """
+
+    SECCIONES = ('perfil', 'notas', 'asistencia', 'horario', 'anotaciones', 'tareas', 'notificaciones')
+    MAX_NOTIFICACIONES = 50
+
+    @staticmethod
+    def es_estudiante(user):
+        perfil = getattr(user, 'perfil', None)
+        return perfil is not None and perfil.tipo_usuario == 'estudiante'
+
+    @staticmethod
+    def inscripcion_activa(user):
+        return InscripcionCurso.objects.filter(estudiante=user, estado='activo').select_related('curso').first()
+
+    @staticmethod
+    def perfil(user, inscripcion):
+        data = UserSerializer(user).data
+        if inscripcion:
+            data['curso'] = {
+                'uuid': str(inscripcion.curso.uuid),
+                'nombre': str(inscripcion.curso),
+                'promedio': inscripcion.promedio
+            }
+        return data
+
+    @staticmethod
+    def notas(user, desde=None):
+        inicio = timezone.now()
+        notas, eliminados = SincronizacionService.cambios(
+            NOTAS.valores(Calificacion.objects.filter(estudiante=user).order_by('-fecha_evaluacion')), user, desde
+        )
+        if desde is None:
+            suma, total = sum(c['nota'] for c in notas), len(notas)
+        else:
+            totales = Calificacion.objects.filter(estudiante=user).aggregate(suma=Sum('nota'), total=Count('id'))
+            suma, total = totales['suma'], totales['total']
+        promedio = suma / total if total else None
+        return {
+            'notas': NOTAS.serializar(notas),
+            'promedio_general': round(promedio, 1) if promedio else None,
+            'total': total,
+            **SincronizacionService.marcas(inicio, desde, eliminados)
+        }
+
+    @staticmethod
+    def asistencia(user, desde=None):
+        inicio = timezone.now()
+        asistencias, eliminados = SincronizacionService.cambios(
+            ASISTENCIAS.valores(Asistencia.objects.filter(estudiante=user).order_by('-fecha')), user, desde
+        )
+        if desde is None:
+            total = len(asistencias)
+            presentes = sum(1 for a in asistencias if a['estado'] == 'presente')
+        else:
+            totales = Asistencia.objects.filter(estudiante=user).aggregate(
+                total=Count('id'), presentes=Count('id', filter=Q(estado='presente'))
+            )
+            total, presentes = totales['total'], totales['presentes']
+        return {
+            'asistencia': ASISTENCIAS.serializar(asistencias),
+            'estadisticas': {
+                'total_dias': total,
+                'dias_presente': presentes,
+                'porcentaje_asistencia': round((presentes / total * 100), 1) if total > 0 else 100
+            },
+            **SincronizacionService.marcas(inicio, desde, eliminados)
+        }
+
+    @staticmethod
+    def horario(inscripcion):
+        """Horario del curso de la inscripción; None si el alumno no tiene curso"""
+        if not inscripcion:
+            return None
+        horarios = HorarioClases.objects.filter(
+            curso_id=inscripcion.curso_id,
+            activo=True
+        ).select_related('asignatura').order_by('dia', 'hora')
+        return {
+            'curso': str(inscripcion.curso),
+            'horario': HorarioSerializer(horarios, many=True).data
+        }
+
+    @staticmethod
+    def anotaciones(user, desde=None):
+        inicio = timezone.now()
+        anotaciones, eliminados = SincronizacionService.cambios(
+            Anotacion.objects.filter(estudiante=user).order_by('-fecha'), user, desde
+        )
+        if desde is None:
+            resumen = {
+                'positivas': sum(1 for a in anotaciones if a.tipo == 'positiva'),
+                'negativas': sum(1 for a in anotaciones if a.tipo == 'negativa')
+            }
+        else:
+            resumen = Anotacion.objects.filter(estudiante=user).aggregate(
+                positivas=Count('id', filter=Q(tipo='positiva')), negativas=Count('id', filter=Q(tipo='negativa'))
+            )
+        return {
+            'anotaciones': AnotacionSerializer(anotaciones, many=True).data,
+            'resumen': resumen,
+            **SincronizacionService.marcas(inicio, desde, eliminados)
+        }
+
+    @staticmethod
+    def tareas(user, inscripcion):
+        """Tareas publicadas del curso, separadas según si el alumno ya entregó"""
+        tareas = []
+        if inscripcion:
+            tareas = TAREAS.valores(Tarea.objects.filter(
+                curso_id=inscripcion.curso_id,
+                estado='publicada'
+            ).annotate(
+                entregada=Exists(Entrega.objects.filter(tarea=OuterRef('pk'), estudiante=user))
+            ).order_by('fecha_entrega'), 'entregada')
+        pendientes = [t for t in tareas if not t['entregada']]
+        entregadas = [t for t in tareas if t['entregada']]
+        return {
+            'pendientes': TAREAS.serializar(pendientes),
+            'entregadas': TAREAS.serializar(entregadas),
+            'total_pendientes': len(pendientes)
+        }
+
+    @staticmethod
+    def entregas(user, desde=None):
+        inicio = timezone.now()
+        entregas, eliminados = SincronizacionService.cambios(
+            Entrega.objects.filter(estudiante=user).select_related(
+                'tarea', 'tarea__asignatura'
+            ).order_by('-fecha_entrega'),
+            user, desde
+        )
+        total = len(entregas) if desde is None else Entrega.objects.filter(estudiante=user).count()
+        return {
+            'entregas': EntregaSerializer(entregas, many=True).data,
+            'total': total,
+            **SincronizacionService.marcas(inicio, desde, eliminados)
+        }
+
+    @staticmethod
+    def notificaciones(user):
+        notificaciones = Notificacion.objects.filter(
+            usuario=user
+        ).order_by('-created_at')[:AlumnoApiService.MAX_NOTIFICACIONES]
+        return {
+            'notificaciones': NotificacionSerializer(notificaciones, many=True).data,
+            'no_leidas': ContadorNoLeidosService.obtener(user)['notificaciones']
+        }
+
+    @staticmethod
+    def bootstrap(user, secciones=SECCIONES):
+        """Retorna {seccion: datos} con las secciones pedidas, compartiendo la inscripción activa"""
+        inscripcion = None
+        if {'perfil', 'horario', 'tareas'} & set(secciones):
+            inscripcion = AlumnoApiService.inscripcion_activa(user)
+        constructores = {
+            'perfil': lambda: AlumnoApiService.perfil(user, inscripcion),
+            'notas': lambda: AlumnoApiService.notas(user),
+            'asistencia': lambda: AlumnoApiService.asistencia(user),
+            'horario': lambda: AlumnoApiService.horario(inscripcion),
+            'anotaciones': lambda: AlumnoApiService.anotaciones(user),
+            'tareas': lambda: AlumnoApiService.tareas(user, inscripcion),
+            'notificaciones': lambda: AlumnoApiService.notificaciones(user),
+        }
+        return {seccion: constructores[seccion]() for seccion in AlumnoApiService.SECCIONES if seccion in secciones}
@@ -1,3 +1,392 @@
+"""
+Tests de la API REST
+"""
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from academico.admin import marcar_ausentes
+from academico.models import Anotacion, Asignatura, Asistencia, Calificacion, Curso, HorarioClases, InscripcionCurso
+from academico.services import GradeBatchWriter
+from core.condicional import MetricasCondicionales
+from core.models import ColegioConfig, Notificacion, RegistroEliminado
+from tareas.models import Entrega, Tarea
+from .compilados import SerializadorCompilado
+from .serializers import AsistenciaSerializer, CalificacionSerializer, TareaSerializer
+from .services import ASISTENCIAS, NOTAS, TAREAS, SincronizacionService
+from .utils import codificar_json
+from usuarios.models import PerfilUsuario, Pupilo
+
+
+class AlumnoBootstrapTest(TestCase):
+    """GET /api/alumno/me/bootstrap/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_api')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='55.555.555-5', tipo_usuario='profesor')
+        cls.alumno = User.objects.create(username='alumno_api', first_name='Ana')
+        PerfilUsuario.objects.create(user=cls.alumno, rut='11.111.111-1', tipo_usuario='estudiante')
+        cls.curso = Curso.objects.create(nombre='2 Medio B', nivel='2', letra='B', año=2024)
+        InscripcionCurso.objects.create(estudiante=cls.alumno, curso=cls.curso, año=2024, estado='activo')
+        cls.asignaturas = [Asignatura.objects.create(nombre=f'Asignatura {i}', codigo=f'A{i}') for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alumno)
+        self.cantidad = 0
+
+    def _poblar(self, n):
+        """Agrega n filas a cada sección del alumno"""
+        for i in range(self.cantidad, self.cantidad + n):
+            asignatura = self.asignaturas[i % 3]
+            Calificacion.objects.create(
+                estudiante=self.alumno, asignatura=asignatura, curso=self.curso, profesor=self.profesor,
+                tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, 1) + timedelta(days=i),
+                numero_evaluacion=i + 1, nota='5.5',
+            )
+            Asistencia.objects.create(
+                estudiante=self.alumno, curso=self.curso, fecha=date(2024, 3, 1) + timedelta(days=i),
+                estado='presente' if i % 4 else 'ausente', registrado_por=self.profesor,
+            )
+            HorarioClases.objects.create(
+                curso=self.curso, asignatura=asignatura, profesor=self.profesor, dia='lunes', hora=str(i + 1),
+            )
+            Anotacion.objects.create(
+                estudiante=self.alumno, profesor=self.profesor, curso=self.curso,
+                tipo='positiva' if i % 2 else 'negativa', observacion=f'Anotación {i}',
+            )
+            tarea = Tarea.objects.create(
+                titulo=f'Tarea {i}', descripcion='...', curso=self.curso, asignatura=asignatura,
+                profesor=self.profesor, fecha_entrega=date(2024, 5, 1) + timedelta(days=i), estado='publicada',
+            )
+            if i % 2:
+                Entrega.objects.create(tarea=tarea, estudiante=self.alumno, archivo='tareas/entregas/entrega.pdf')
+            Notificacion.crear_notificacion(self.alumno, 'info', f'Aviso {i}')
+        self.cantidad += n
+
+    def _consultas(self, url):
+        # Con los totales de no leídos ya cacheados, como en el uso normal
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(consultas)
+
+    def test_secciones_iguales_a_los_endpoints_individuales(self):
+        self._poblar(4)
+        data = self.client.get(reverse('api:alumno_bootstrap')).json()['data']
+
+        individuales = {
+            'perfil': 'api:alumno_profile',
+            'notas': 'api:alumno_notas',
+            'asistencia': 'api:alumno_asistencia',
+            'horario': 'api:alumno_horario',
+            'anotaciones': 'api:alumno_anotaciones',
+            'tareas': 'api:alumno_tareas',
+        }
+        self.assertEqual(list(data), [*individuales, 'notificaciones'])
+        for seccion, nombre in individuales.items():
+            individual = self.client.get(reverse(nombre)).json()['data']
+            if 'sync_token' in individual:
+                # El token depende de la hora de cada consulta
+                self.assertTrue(data[seccion].pop('sync_token'))
+                individual.pop('sync_token')
+            self.assertEqual(data[seccion], individual, seccion)
+        self.assertEqual(len(data['notificaciones']['notificaciones']), 4)
+        self.assertEqual(data['notificaciones']['no_leidas'], 4)
+        self.assertEqual(data['tareas']['total_pendientes'], 2)
+        self.assertEqual(data['asistencia']['estadisticas']['dias_presente'], 3)
+
+    def test_consultas_fijas(self):
+        url = reverse('api:alumno_bootstrap')
+        self._poblar(1)
+        pocas = self._consultas(url)
+        self._poblar(10)
+        self.assertEqual(self._consultas(url), pocas)
+        self.assertLessEqual(pocas, 10)
+
+    def test_fields_selecciona_secciones(self):
+        self._poblar(2)
+        response = self.client.get(reverse('api:alumno_bootstrap'), {'fields': 'notas, tareas'})
+        self.assertEqual(list(response.json()['data']), ['notas', 'tareas'])
+
+        # Sin secciones que usen el curso no se consulta la inscripción
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('api:alumno_bootstrap'), {'fields': 'notas'})
+        self.assertFalse([q for q in consultas if 'academico_inscripcioncurso' in q['sql']])
+
+        response = self.client.get(reverse('api:alumno_bootstrap'), {'fields': 'notas,mensajes'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['fields'], ['mensajes'])
+
+    def test_solo_estudiantes(self):
+        self.client.force_authenticate(self.profesor)
+        self.assertEqual(self.client.get(reverse('api:alumno_bootstrap')).status_code, 403)
+
+
+class SincronizacionTest(TestCase):
+    """GET /api/alumno/me/...?since=<sync_token>"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_sync')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='66.666.666-6', tipo_usuario='profesor')
+        cls.alumno = User.objects.create(username='alumno_sync')
+        PerfilUsuario.objects.create(user=cls.alumno, rut='22.222.222-2', tipo_usuario='estudiante')
+        cls.curso = Curso.objects.create(nombre='3 Medio A', nivel='3', letra='A', año=2024)
+        InscripcionCurso.objects.create(estudiante=cls.alumno, curso=cls.curso, año=2024, estado='activo')
+        cls.asignatura = Asignatura.objects.create(nombre='Historia', codigo='HIS')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alumno)
+        self.notas = [
+            Calificacion.objects.create(
+                estudiante=self.alumno, asignatura=self.asignatura, curso=self.curso, profesor=self.profesor,
+                tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, 1), numero_evaluacion=i + 1,
+                nota=nota,
+            ) for i, nota in enumerate(['4.0', '5.0', '6.0'])
+        ]
+        # Todo lo anterior quedó sincronizado hace una hora
+        Calificacion.objects.update(actualizado=timezone.now() - timedelta(hours=1))
+
+    def _notas(self, since):
+        response = self.client.get(reverse('api:alumno_notas'), {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_since_trae_solo_cambios_y_eliminados(self):
+        token = SincronizacionService.emitir(timezone.now())
+        modificada, eliminada, _ = self.notas
+        modificada.nota = '7.0'
+        modificada.save()
+        uuid_eliminada = str(eliminada.uuid)
+        eliminada.delete()
+
+        data = self._notas(token)
+        self.assertFalse(data['completo'])
+        self.assertEqual([n['uuid'] for n in data['notas']], [str(modificada.uuid)])
+        self.assertEqual(data['eliminados'], [uuid_eliminada])
+        # Los totales consideran todas las notas, no solo las cambiadas
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['promedio_general'], 6.5)
+
+    def test_ingreso_masivo_marca_actualizado(self):
+        token = SincronizacionService.emitir(timezone.now())
+        writer = GradeBatchWriter(profesor=self.profesor, curso=self.curso)
+        writer.agregar(self.alumno, self.asignatura, 1, '6,8', 'nota', '1', date(2024, 4, 1))
+        writer.guardar()
+
+        data = self._notas(token)
+        self.assertEqual([n['uuid'] for n in data['notas']], [str(self.notas[0].uuid)])
+        self.assertEqual(Decimal(data['notas'][0]['nota']), Decimal('6.8'))
+
+    def test_acciones_del_admin_marcan_actualizado(self):
+        asistencia = Asistencia.objects.create(
+            estudiante=self.alumno, curso=self.curso, fecha=date(2024, 4, 1), estado='presente',
+            registrado_por=self.profesor,
+        )
+        Asistencia.objects.update(actualizado=timezone.now() - timedelta(hours=1))
+        token = SincronizacionService.emitir(timezone.now())
+        marcar_ausentes(None, None, Asistencia.objects.filter(pk=asistencia.pk))
+
+        response = self.client.get(reverse('api:alumno_asistencia'), {'since': token})
+        self.assertEqual(
+            [(a['uuid'], a['estado']) for a in response.json()['data']['asistencia']],
+            [(str(asistencia.uuid), 'ausente')],
+        )
+
+    def test_token_vencido_o_invalido(self):
+        vencido = SincronizacionService.emitir(timezone.now() - RegistroEliminado.RETENCION - timedelta(days=1))
+        data = self._notas(vencido)
+        self.assertTrue(data['completo'])
+        self.assertEqual(len(data['notas']), 3)
+
+        response = self.client.get(reverse('api:alumno_asistencia'), {'since': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', response.json()['errors'])
+
+    def test_entregas_y_purga(self):
+        tarea = Tarea.objects.create(
+            titulo='Ensayo', descripcion='...', curso=self.curso, asignatura=self.asignatura,
+            profesor=self.profesor, fecha_entrega=date(2024, 5, 1), estado='publicada',
+        )
+        entrega = Entrega.objects.create(tarea=tarea, estudiante=self.alumno, archivo='tareas/entregas/e.pdf')
+        token = SincronizacionService.emitir(timezone.now())
+        entrega.delete()
+
+        response = self.client.get(reverse('api:alumno_entregas'), {'since': token})
+        self.assertEqual(response.json()['data']['eliminados'], [str(entrega.uuid)])
+
+        RegistroEliminado.objects.update(eliminado=timezone.now() - RegistroEliminado.RETENCION - timedelta(days=1))
+        self.assertEqual(RegistroEliminado.purgar(), 1)
+
+
+class GetCondicionalApiTest(TestCase):
+    """ETag y 304 en los endpoints DRF"""
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_colegio_discover(self):
+        client = APIClient()
+        url = reverse('api:colegio_discover')
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('private', response['Cache-Control'])
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        config = ColegioConfig.get_config()
+        config.nombre = 'Liceo Renombrado'
+        config.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['nombre'], 'Liceo Renombrado')
+        self.assertEqual(MetricasCondicionales.estadisticas(['colegio_discover'])['colegio_discover']['fallos'], 2)
+
+
+class ApoderadoPupilosTest(TestCase):
+    """GET /api/apoderado/pupilos/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create(username='profe_pupilos')
+        cls.apoderado = User.objects.create(username='apoderado_api')
+        cls.perfil = PerfilUsuario.objects.create(user=cls.apoderado, rut='33.333.333-3', tipo_usuario='apoderado')
+        cls.curso = Curso.objects.create(nombre='1 Medio A', nivel='1', letra='A', año=2024)
+        cls.asignatura = Asignatura.objects.create(nombre='Lenguaje', codigo='LEN')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.apoderado)
+        self.cantidad = 0
+
+    def _agregar_pupilo(self, notas=(), presentes=0, ausentes=0, inscrito=True):
+        i = self.cantidad
+        self.cantidad += 1
+        alumno = User.objects.create(username=f'pupilo_{i}')
+        estudiante = PerfilUsuario.objects.create(user=alumno, rut=f'44.444.44{i}-{i}', tipo_usuario='estudiante')
+        Pupilo.objects.create(apoderado=self.perfil, estudiante=estudiante, vinculo='padre')
+        if inscrito:
+            InscripcionCurso.objects.create(estudiante=alumno, curso=self.curso, año=2024, estado='activo')
+        for j, nota in enumerate(notas):
+            Calificacion.objects.create(
+                estudiante=alumno, asignatura=self.asignatura, curso=self.curso, profesor=self.profesor,
+                tipo_evaluacion='nota', semestre='1', fecha_evaluacion=date(2024, 4, 1), numero_evaluacion=j + 1,
+                nota=nota,
+            )
+        for j in range(presentes + ausentes):
+            Asistencia.objects.create(
+                estudiante=alumno, curso=self.curso, fecha=date(2024, 3, 1) + timedelta(days=j),
+                estado='presente' if j < presentes else 'ausente', registrado_por=self.profesor,
+            )
+
+    def _pupilos(self):
+        response = self.client.get(reverse('api:apoderado_pupilos'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']['pupilos']
+
+    def test_resumen_de_cada_pupilo(self):
+        self._agregar_pupilo(notas=['5.0', '6.0'], presentes=3, ausentes=1)
+        self._agregar_pupilo(inscrito=False)
+
+        con_datos, sin_datos = self._pupilos()
+        self.assertEqual(con_datos['curso'], str(self.curso))
+        self.assertEqual(Decimal(con_datos['promedio']), Decimal('5.5'))
+        self.assertEqual(con_datos['asistencia'], 75.0)
+        self.assertEqual((sin_datos['curso'], sin_datos['promedio'], sin_datos['asistencia']), (None, None, 100))
+
+    def test_consultas_fijas(self):
+        self._agregar_pupilo(notas=['4.0'], presentes=1)
+        with CaptureQueriesContext(connection) as pocos:
+            self._pupilos()
+        for _ in range(5):
+            self._agregar_pupilo(notas=['6.0', '7.0'], presentes=2, ausentes=2)
+        with CaptureQueriesContext(connection) as muchos:
+            self.assertEqual(len(self._pupilos()), 6)
+        self.assertEqual(len(pocos), len(muchos))
+
+
+class SerializadorCompiladoTest(TestCase):
+    """La serialización compilada debe entregar exactamente lo mismo que los serializers de DRF"""
+
+    TEXTO = 'Ñandú "comillas" \\ barra\nlínea\u2028separador 🦤 \x01'
+
+    def setUp(self):
+        self.profesor = User.objects.create_user(username='profesor_compilado')
+        self.alumno = User.objects.create_user(username='alumno_compilado')
+        PerfilUsuario.objects.create(user=self.alumno, rut='66.666.666-6', tipo_usuario='estudiante')
+        self.curso = Curso.objects.create(nombre='Primero', nivel='1', letra='A', año=2024)
+        self.asignatura = Asignatura.objects.create(nombre=f'Lenguaje {self.TEXTO}', codigo='LEN')
+        for i, tipo in enumerate(['nota', 'examen', 'participacion']):
+            Calificacion.objects.create(
+                estudiante=self.alumno, asignatura=self.asignatura, curso=self.curso, profesor=self.profesor,
+                tipo_evaluacion=tipo, semestre='2', fecha_evaluacion=date(2024, 4, 1) + timedelta(days=i),
+                numero_evaluacion=i + 1, nota=Decimal('4.5') + i, descripcion=self.TEXTO,
+            )
+        for i, estado in enumerate(['presente', 'ausente', 'justificado']):
+            Asistencia.objects.create(
+                estudiante=self.alumno, curso=self.curso, fecha=date(2024, 3, 1) + timedelta(days=i), estado=estado,
+                observacion=self.TEXTO if i else '', registrado_por=self.profesor,
+            )
+        hoy = timezone.localdate()
+        for i, hora in enumerate([None, time(23, 59)]):
+            Tarea.objects.create(
+                titulo=f'Tarea {i}', descripcion=self.TEXTO, tipo='proyecto', curso=self.curso,
+                asignatura=self.asignatura, profesor=self.profesor, fecha_entrega=hoy + timedelta(days=2 * i - 1),
+                hora_limite=hora, puntaje_maximo=Decimal('7.25'), estado='publicada',
+            )
+
+    def _comparar(self, compilado, serializer_class, queryset):
+        esperado = serializer_class(queryset, many=True).data
+        obtenido = compilado.serializar(compilado.valores(queryset))
+        self.assertEqual(obtenido, esperado)
+        self.assertEqual(codificar_json(obtenido), JSONRenderer().render(esperado))
+
+    def test_igual_a_drf(self):
+        self._comparar(NOTAS, CalificacionSerializer, Calificacion.objects.order_by('fecha_evaluacion'))
+        self._comparar(ASISTENCIAS, AsistenciaSerializer, Asistencia.objects.order_by('fecha'))
+        self._comparar(TAREAS, TareaSerializer, Tarea.objects.order_by('fecha_entrega'))
+
+    def test_una_consulta_sin_instanciar_modelos(self):
+        with CaptureQueriesContext(connection) as consultas:
+            filas = TAREAS.serializar(TAREAS.valores(Tarea.objects.all()))
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual([f['esta_vencida'] for f in sorted(filas, key=lambda f: f['fecha_entrega'])], [True, False])
+
+    def test_campo_sin_columna_falla_al_compilar(self):
+        class ConPropiedad(serializers.ModelSerializer):
+            esta_vencida = serializers.BooleanField(read_only=True)
+
+            class Meta:
+                model = Tarea
+                fields = ['uuid', 'esta_vencida']
+
+        with self.assertRaises(ImproperlyConfigured):
+            SerializadorCompilado(ConPropiedad).columnas
 
-# Create your tests here.
+    def test_endpoint_de_notas(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.alumno)
+        response = cliente.get(reverse('api:alumno_notas'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        notas = response.json()['data']['notas']
+        self.assertEqual(notas, CalificacionSerializer(
+            Calificacion.objects.filter(estudiante=self.alumno).order_by('-fecha_evaluacion'), many=True
+        ).data)
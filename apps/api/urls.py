@@ -7,7 +7,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     CustomTokenObtainPairView, CustomTokenRefreshView,
     AlumnoProfileView, AlumnoNotasView, AlumnoAsistenciaView,
-    AlumnoHorarioView, AlumnoAnotacionesView, AlumnoTareasView, AlumnoEntregasView,
+    AlumnoHorarioView, AlumnoAnotacionesView, AlumnoTareasView, AlumnoEntregasView, AlumnoBootstrapView,
     NotificacionesListView, NotificacionMarcarLeidaView,
     ColegioDiscoverView, ApoderadoPupilosView
 )
@@ -29,6 +29,7 @@ urlpatterns = [
     path('alumno/me/asistencia/', AlumnoAsistenciaView.as_view(), name='alumno_asistencia'),
     path('alumno/me/horario/', AlumnoHorarioView.as_view(), name='alumno_horario'),
     path('alumno/me/anotaciones/', AlumnoAnotacionesView.as_view(), name='alumno_anotaciones'),
+    path('alumno/me/bootstrap/', AlumnoBootstrapView.as_view(), name='alumno_bootstrap'),
     
     # ==========================================================================
     # NOTIFICACIONES
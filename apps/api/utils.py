@@ -1,8 +1,16 @@
 """
 Utilidades para la API REST
 """
-from rest_framework.views import exception_handler
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import exception_handler
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se codifica con el JSONRenderer de DRF
+    orjson = None
 
 
 def custom_exception_handler(exc, context):
@@ -51,3 +59,36 @@ def api_error(message, errors=None, status=400):
         'message': message,
         'errors': errors or {}
     }, status=status)
+
+
+_CODIFICADOR_DRF = JSONEncoder()
+
+
+def codificar_json(data):
+    """
+    Codifica `data` con los mismos bytes que el JSONRenderer de DRF
+    (compacto, UTF-8, U+2028 y U+2029 escapados). Con orjson instalado lo
+    hace varias veces más rápido; los tipos que orjson no representa igual
+    que DRF (Decimal, datetime, textos perezosos) pasan por el encoder de DRF.
+    """
+    renderer = JSONRenderer
+    if orjson is None or renderer.ensure_ascii or not renderer.compact:
+        return renderer().render(data)
+    ret = orjson.dumps(data, default=_CODIFICADOR_DRF.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+def api_response_rapida(data=None, message='OK', status=200):
+    """
+    Igual que api_response, pero codifica el JSON de inmediato con
+    codificar_json en vez de pasar por la negociación y el renderer de DRF.
+    Para listados grandes armados con datos ya serializados.
+    """
+    return HttpResponse(codificar_json({
+        'success': True,
+        'data': data,
+        'message': message,
+        'errors': None
+    }), status=status, content_type=JSONRenderer.media_type)
@@ -2,23 +2,30 @@
 Views de la API REST para Schoolar OS
 Endpoints que consumirá la App móvil
 """
+from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.db.models import Avg
 
 from .serializers import (
     UserSerializer, CalificacionSerializer, AsistenciaSerializer,
-    HorarioSerializer, NotificacionSerializer, AnotacionSerializer
+    NotificacionSerializer, AnotacionSerializer
 )
-from .utils import api_response, api_error
-from academico.models import Calificacion, Asistencia, HorarioClases, Anotacion, InscripcionCurso
+from .services import AlumnoApiService, SincronizacionService
+from .utils import api_response, api_response_rapida, api_error
+from academico.models import Calificacion, Asistencia, Anotacion
+from core.condicional import get_condicional
 from core.models import Notificacion, ColegioConfig
 
 
+def _desde(request):
+    """Fecha de ?since=<sync_token> (None: listado completo). ValueError si el token no es válido."""
+    return SincronizacionService.desde(request.query_params.get('since'))
+
+
 # =============================================================================
 # AUTENTICACIÓN
 # =============================================================================
@@ -94,34 +101,17 @@ class AlumnoProfileView(APIView):
         user = request.user
         
         # Verificar que es estudiante
-        if not hasattr(user, 'perfil') or user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(user):
             return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        serializer = UserSerializer(user)
-        
-        # Agregar info adicional del alumno
-        data = serializer.data
-        
-        # Obtener curso actual
-        inscripcion = InscripcionCurso.objects.filter(
-            estudiante=user,
-            estado='activo'
-        ).select_related('curso').first()
-        
-        if inscripcion:
-            data['curso'] = {
-                'uuid': str(inscripcion.curso.uuid),
-                'nombre': str(inscripcion.curso),
-                'promedio': inscripcion.promedio
-            }
-        
-        return api_response(data=data)
+        inscripcion = AlumnoApiService.inscripcion_activa(user)
+        return api_response(data=AlumnoApiService.perfil(user, inscripcion))
 
 
 class AlumnoNotasView(ListAPIView):
     """
-    GET /api/alumno/me/notas/
-    Retorna las notas del alumno autenticado
+    GET /api/alumno/me/notas/?since=<sync_token>
+    Retorna las notas del alumno autenticado; con since, solo las cambiadas
     """
     serializer_class = CalificacionSerializer
     permission_classes = [IsAuthenticated]
@@ -134,26 +124,21 @@ class AlumnoNotasView(ListAPIView):
     
     def list(self, request, *args, **kwargs):
         # Verificar que es estudiante
-        if not hasattr(request.user, 'perfil') or request.user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(request.user):
             return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        
-        # Calcular promedio general
-        promedio = queryset.aggregate(promedio=Avg('nota'))['promedio']
+        try:
+            desde = _desde(request)
+        except ValueError as e:
+            return api_error(str(e), errors={'since': [str(e)]})
         
-        return api_response(data={
-            'notas': serializer.data,
-            'promedio_general': round(promedio, 1) if promedio else None,
-            'total': queryset.count()
-        })
+        return api_response_rapida(data=AlumnoApiService.notas(request.user, desde))
 
 
 class AlumnoAsistenciaView(ListAPIView):
     """
-    GET /api/alumno/me/asistencia/
-    Retorna la asistencia del alumno autenticado
+    GET /api/alumno/me/asistencia/?since=<sync_token>
+    Retorna la asistencia del alumno autenticado; con since, solo la cambiada
     """
     serializer_class = AsistenciaSerializer
     permission_classes = [IsAuthenticated]
@@ -165,25 +150,15 @@ class AlumnoAsistenciaView(ListAPIView):
         ).order_by('-fecha')
     
     def list(self, request, *args, **kwargs):
-        if not hasattr(request.user, 'perfil') or request.user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(request.user):
             return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        
-        # Calcular estadísticas
-        total = queryset.count()
-        presentes = queryset.filter(estado='presente').count()
-        porcentaje = round((presentes / total * 100), 1) if total > 0 else 100
+        try:
+            desde = _desde(request)
+        except ValueError as e:
+            return api_error(str(e), errors={'since': [str(e)]})
         
-        return api_response(data={
-            'asistencia': serializer.data,
-            'estadisticas': {
-                'total_dias': total,
-                'dias_presente': presentes,
-                'porcentaje_asistencia': porcentaje
-            }
-        })
+        return api_response_rapida(data=AlumnoApiService.asistencia(request.user, desde))
 
 
 class AlumnoHorarioView(APIView):
@@ -196,35 +171,20 @@ class AlumnoHorarioView(APIView):
     def get(self, request):
         user = request.user
         
-        if not hasattr(user, 'perfil') or user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(user):
             return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        # Obtener curso del alumno
-        inscripcion = InscripcionCurso.objects.filter(
-            estudiante=user,
-            estado='activo'
-        ).first()
-        
-        if not inscripcion:
+        horario = AlumnoApiService.horario(AlumnoApiService.inscripcion_activa(user))
+        if horario is None:
             return api_error('No tienes un curso asignado', status=404)
         
-        horarios = HorarioClases.objects.filter(
-            curso=inscripcion.curso,
-            activo=True
-        ).select_related('asignatura').order_by('dia', 'hora')
-        
-        serializer = HorarioSerializer(horarios, many=True)
-        
-        return api_response(data={
-            'curso': str(inscripcion.curso),
-            'horario': serializer.data
-        })
+        return api_response(data=horario)
 
 
 class AlumnoAnotacionesView(ListAPIView):
     """
-    GET /api/alumno/me/anotaciones/
-    Retorna las anotaciones (hoja de vida) del alumno
+    GET /api/alumno/me/anotaciones/?since=<sync_token>
+    Retorna las anotaciones (hoja de vida) del alumno; con since, solo las cambiadas
     """
     serializer_class = AnotacionSerializer
     permission_classes = [IsAuthenticated]
@@ -235,22 +195,41 @@ class AlumnoAnotacionesView(ListAPIView):
         ).order_by('-fecha')
     
     def list(self, request, *args, **kwargs):
-        if not hasattr(request.user, 'perfil') or request.user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(request.user):
             return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        try:
+            desde = _desde(request)
+        except ValueError as e:
+            return api_error(str(e), errors={'since': [str(e)]})
+        
+        return api_response(data=AlumnoApiService.anotaciones(request.user, desde))
+
+
+class AlumnoBootstrapView(APIView):
+    """
+    GET /api/alumno/me/bootstrap/?fields=perfil,notas,horario
+    Retorna en una sola respuesta las secciones que la App carga al iniciar:
+    perfil, notas, asistencia, horario, anotaciones, tareas y notificaciones,
+    con el mismo contenido que sus endpoints individuales. Sin `fields` se
+    incluyen todas.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        if not AlumnoApiService.es_estudiante(request.user):
+            return api_error('Solo estudiantes pueden acceder a este recurso', status=403)
         
-        positivas = queryset.filter(tipo='positiva').count()
-        negativas = queryset.filter(tipo='negativa').count()
+        fields = request.query_params.get('fields', '')
+        secciones = [s.strip() for s in fields.split(',') if s.strip()] or AlumnoApiService.SECCIONES
+        desconocidas = [s for s in secciones if s not in AlumnoApiService.SECCIONES]
+        if desconocidas:
+            return api_error(
+                'Secciones no válidas',
+                errors={'fields': desconocidas, 'disponibles': list(AlumnoApiService.SECCIONES)}
+            )
         
-        return api_response(data={
-            'anotaciones': serializer.data,
-            'resumen': {
-                'positivas': positivas,
-                'negativas': negativas
-            }
-        })
+        return api_response_rapida(data=AlumnoApiService.bootstrap(request.user, secciones))
 
 
 # =============================================================================
@@ -268,18 +247,11 @@ class NotificacionesListView(ListAPIView):
     def get_queryset(self):
         return Notificacion.objects.filter(
             usuario=self.request.user
-        ).order_by('-created_at')[:50]  # Últimas 50
+        ).order_by('-created_at')[:AlumnoApiService.MAX_NOTIFICACIONES]
     
+    @method_decorator(get_condicional('api_notificaciones', lambda request: Notificacion.version(request.user)))
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        
-        no_leidas = queryset.filter(leida=False).count()
-        
-        return api_response(data={
-            'notificaciones': serializer.data,
-            'no_leidas': no_leidas
-        })
+        return api_response(data=AlumnoApiService.notificaciones(request.user))
 
 
 class NotificacionMarcarLeidaView(APIView):
@@ -314,6 +286,9 @@ class ColegioDiscoverView(APIView):
     """
     permission_classes = [AllowAny]
     
+    @method_decorator(get_condicional(
+        'colegio_discover', lambda request: (ColegioConfig.get_config().updated_at,), privado=False
+    ))
     def get(self, request):
         config = ColegioConfig.get_config()
         
@@ -345,71 +320,31 @@ class AlumnoTareasView(ListAPIView):
     """
     permission_classes = [IsAuthenticated]
     
-    def get_queryset(self):
-        from tareas.models import Tarea
-        from academico.models import InscripcionCurso
-        
-        user = self.request.user
-        # Obtener curso del alumno
-        inscripcion = InscripcionCurso.objects.filter(
-            estudiante=user,
-            estado='activo'
-        ).first()
-        
-        if not inscripcion:
-            return Tarea.objects.none()
-        
-        return Tarea.objects.filter(
-            curso=inscripcion.curso,
-            estado='publicada'
-        ).select_related('asignatura').order_by('fecha_entrega')
-    
     def list(self, request, *args, **kwargs):
-        from .serializers import TareaSerializer
-        from tareas.models import Entrega
-        
-        if not hasattr(request.user, 'perfil') or request.user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(request.user):
             return api_error('Solo estudiantes pueden acceder', status=403)
         
-        queryset = self.get_queryset()
-        
-        # Separar pendientes y entregadas
-        entregadas_ids = Entrega.objects.filter(
-            estudiante=request.user
-        ).values_list('tarea_id', flat=True)
-        
-        pendientes = queryset.exclude(id__in=entregadas_ids)
-        entregadas = queryset.filter(id__in=entregadas_ids)
-        
-        return api_response(data={
-            'pendientes': TareaSerializer(pendientes, many=True).data,
-            'entregadas': TareaSerializer(entregadas, many=True).data,
-            'total_pendientes': pendientes.count()
-        })
+        inscripcion = AlumnoApiService.inscripcion_activa(request.user)
+        return api_response_rapida(data=AlumnoApiService.tareas(request.user, inscripcion))
 
 
 class AlumnoEntregasView(ListAPIView):
     """
-    GET /api/alumno/me/entregas/
-    Retorna las entregas del alumno con sus calificaciones
+    GET /api/alumno/me/entregas/?since=<sync_token>
+    Retorna las entregas del alumno con sus calificaciones; con since, solo las cambiadas
     """
     permission_classes = [IsAuthenticated]
     
     def list(self, request, *args, **kwargs):
-        from .serializers import EntregaSerializer
-        from tareas.models import Entrega
-        
-        if not hasattr(request.user, 'perfil') or request.user.perfil.tipo_usuario != 'estudiante':
+        if not AlumnoApiService.es_estudiante(request.user):
             return api_error('Solo estudiantes pueden acceder', status=403)
         
-        entregas = Entrega.objects.filter(
-            estudiante=request.user
-        ).select_related('tarea', 'tarea__asignatura').order_by('-fecha_entrega')
+        try:
+            desde = _desde(request)
+        except ValueError as e:
+            return api_error(str(e), errors={'since': [str(e)]})
         
-        return api_response(data={
-            'entregas': EntregaSerializer(entregas, many=True).data,
-            'total': entregas.count()
-        })
+        return api_response(data=AlumnoApiService.entregas(request.user, desde))
 
 
 # =============================================================================
@@ -425,51 +360,28 @@ class ApoderadoPupilosView(APIView):
     
     def get(self, request):
         from usuarios.models import Pupilo
-        from .serializers import PupiloResumenSerializer
-        from academico.models import Calificacion, Asistencia, InscripcionCurso
-        from django.db.models import Avg
+        from usuarios.services import PupiloSummaryService
         
         user = request.user
         
         if not hasattr(user, 'perfil') or user.perfil.tipo_usuario != 'apoderado':
             return api_error('Solo apoderados pueden acceder', status=403)
         
-        pupilos = Pupilo.objects.filter(
-            apoderado=user.perfil
-        ).select_related('estudiante', 'estudiante__user')
-        
-        resultado = []
-        for pupilo in pupilos:
-            estudiante_user = pupilo.estudiante.user
-            
-            # Obtener curso
-            inscripcion = InscripcionCurso.objects.filter(
-                estudiante=estudiante_user,
-                estado='activo'
-            ).select_related('curso').first()
-            
-            # Calcular promedio
-            promedio = Calificacion.objects.filter(
-                estudiante=estudiante_user
-            ).aggregate(prom=Avg('nota'))['prom']
-            
-            # Calcular asistencia
-            total_dias = Asistencia.objects.filter(estudiante=estudiante_user).count()
-            dias_presente = Asistencia.objects.filter(
-                estudiante=estudiante_user, estado='presente'
-            ).count()
-            asistencia_pct = round((dias_presente / total_dias * 100), 1) if total_dias > 0 else 100
-            
-            resultado.append({
-                'uuid': str(pupilo.estudiante.uuid),
-                'nombre_completo': pupilo.estudiante.nombre_completo,
-                'rut': pupilo.estudiante.rut,
-                'vinculo': pupilo.get_vinculo_display(),
-                'es_principal': pupilo.es_apoderado_principal,
-                'curso': str(inscripcion.curso) if inscripcion else None,
-                'promedio': round(promedio, 1) if promedio else None,
-                'asistencia': asistencia_pct
-            })
+        # Curso, promedio y asistencia de todos los pupilos con consultas fijas
+        pupilos = PupiloSummaryService.resumir(
+            Pupilo.objects.filter(apoderado=user.perfil).select_related('estudiante', 'estudiante__user')
+        )
+        
+        resultado = [{
+            'uuid': str(pupilo.estudiante.uuid),
+            'nombre_completo': pupilo.estudiante.nombre_completo,
+            'rut': pupilo.estudiante.rut,
+            'vinculo': pupilo.get_vinculo_display(),
+            'es_principal': pupilo.es_apoderado_principal,
+            'curso': str(pupilo.curso_actual) if pupilo.curso_actual else None,
+            'promedio': pupilo.promedio,
+            'asistencia': pupilo.asistencia_porcentaje
+        } for pupilo in pupilos]
         
         return api_response(data={
             'pupilos': resultado,
@@ -7,8 +7,11 @@ from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from datetime import datetime, date
 
+from django.db.models import Count, Max
+
 from .models import Evento
 from academico.models import InscripcionCurso
+from core.condicional import get_condicional
 from core.models import ConfiguracionAcademica
 
 
@@ -28,6 +31,32 @@ def calendario_usuario(request):
     })
 
 
+def _version_eventos(request):
+    """
+    Versión de eventos_json para el GET condicional: cantidad y última
+    modificación de eventos y tareas, las inscripciones activas del alumno
+    y el día (del que depende el color de las tareas vencidas). Renombrar
+    un curso o asignatura no la cambia.
+    """
+    from tareas.models import Tarea
+
+    version = [
+        date.today(),
+        tuple(Evento.objects.aggregate(Count('id'), Max('updated_at')).values()),
+        tuple(Tarea.objects.aggregate(Count('id'), Max('updated_at')).values()),
+    ]
+    perfil = getattr(request.user, 'perfil', None) if request.user.is_authenticated else None
+    if perfil and perfil.tipo_usuario == 'estudiante':
+        version.append(tuple(InscripcionCurso.objects.filter(
+            estudiante=request.user, estado='activo'
+        ).values_list('curso_id', 'año')))
+        version.append(ConfiguracionAcademica.get_actual().año_actual)
+    elif perfil:
+        version.append(perfil.tipo_usuario)
+    return version
+
+
+@get_condicional('eventos_json', _version_eventos)
 def eventos_json(request):
     """
     API JSON para FullCalendar.
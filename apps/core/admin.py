@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ConfiguracionSistema, ConfiguracionAcademica
+from .models import ConfiguracionSistema, ConfiguracionAcademica, CorreoSaliente
 
 @admin.register(ConfiguracionSistema)
 
@@ -17,8 +17,20 @@ class ConfiguracionSistemaAdmin(admin.ModelAdmin):
 @admin.register(ConfiguracionAcademica)
 class ConfiguracionAcademicaAdmin(admin.ModelAdmin):
     """Configuración del Año Académico"""
-    list_display = ('año_actual', 'get_semestre_actual_display')
+    list_display = ('año_actual', 'get_semestre_actual_display', 'umbral_promedio_riesgo', 'umbral_asistencia_riesgo')
     
     def has_add_permission(self, request):
         # Solo permitir crear si no existe ninguna configuración
         return not ConfiguracionAcademica.objects.exists()
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    """Bandeja de salida de correos (solo lectura)"""
+    list_display = ('destinatario', 'asunto', 'estado', 'creado', 'enviado_en')
+    list_filter = ('estado', 'creado')
+    search_fields = ('destinatario', 'asunto')
+    readonly_fields = ('destinatario', 'asunto', 'cuerpo', 'remitente', 'estado', 'error', 'creado', 'enviado_en')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,173 @@
+"""
+GET condicional (ETag / Last-Modified → 304) para los endpoints JSON que
+los clientes consultan periódicamente
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Recursos decorados con get_condicional: {recurso: privado}
+RECURSOS = {}
+
+
+class MetricasCondicionales:
+    """
+    Aciertos (304) y fallos (respuesta completa) de cada recurso condicional,
+    en contadores de la caché de Django. Los fallos suman además los bytes y
+    microsegundos de la respuesta generada, para estimar lo que ahorra cada
+    acierto. Con locmem los contadores son por proceso; en producción la
+    caché compartida (Redis) los junta.
+
+    Uso:
+        MetricasCondicionales.estadisticas()
+        # {'notificaciones_json': {'aciertos': 90, 'fallos': 10, 'tasa_aciertos': 0.9,
+        #                          'bytes_ahorrados': 184320, 'ms_ahorrados': 412.5}, ...}
+    """
+
+    CAMPOS = ('aciertos', 'fallos', 'bytes', 'us')
+
+    @staticmethod
+    def _clave(recurso, campo):
+        return f"condicional:metricas:{recurso}:{campo}"
+
+    @staticmethod
+    def _sumar(recurso, campo, cantidad=1):
+        clave = MetricasCondicionales._clave(recurso, campo)
+        if not cache.add(clave, cantidad, None):
+            try:
+                cache.incr(clave, cantidad)
+            except ValueError:
+                # Expulsada entre add e incr
+                cache.set(clave, cantidad, None)
+
+    @staticmethod
+    def registrar_acierto(recurso):
+        MetricasCondicionales._sumar(recurso, 'aciertos')
+
+    @staticmethod
+    def registrar_fallo(recurso, tamano, inicio):
+        """Respuesta completa de `tamano` bytes, generada desde `inicio` (time.perf_counter)"""
+        MetricasCondicionales._sumar(recurso, 'fallos')
+        MetricasCondicionales._sumar(recurso, 'bytes', tamano)
+        MetricasCondicionales._sumar(recurso, 'us', round((time.perf_counter() - inicio) * 1_000_000))
+
+    @staticmethod
+    def estadisticas(recursos=None):
+        """Retorna {recurso: métricas}; el ahorro se estima con el promedio de los fallos"""
+        recursos = sorted(recursos or RECURSOS)
+        claves = {
+            MetricasCondicionales._clave(recurso, campo): (recurso, campo)
+            for recurso in recursos for campo in MetricasCondicionales.CAMPOS
+        }
+        valores = {recurso: dict.fromkeys(MetricasCondicionales.CAMPOS, 0) for recurso in recursos}
+        for clave, valor in cache.get_many(list(claves)).items():
+            recurso, campo = claves[clave]
+            valores[recurso][campo] = valor
+
+        resultado = {}
+        for recurso, v in valores.items():
+            consultas = v['aciertos'] + v['fallos']
+            resultado[recurso] = {
+                'aciertos': v['aciertos'],
+                'fallos': v['fallos'],
+                'tasa_aciertos': round(v['aciertos'] / consultas, 3) if consultas else None,
+                'bytes_ahorrados': v['aciertos'] * v['bytes'] // v['fallos'] if v['fallos'] else 0,
+                'ms_ahorrados': round(v['aciertos'] * v['us'] / v['fallos'] / 1000, 1) if v['fallos'] else 0,
+            }
+        return resultado
+
+    @staticmethod
+    def reiniciar(recursos=None):
+        cache.delete_many([
+            MetricasCondicionales._clave(recurso, campo)
+            for recurso in (recursos or RECURSOS) for campo in MetricasCondicionales.CAMPOS
+        ])
+
+
+def _huella(*partes):
+    return hashlib.md5(repr(partes).encode(), usedforsecurity=False).hexdigest()
+
+
+def _modificado_desde(recurso, alcance, etag):
+    """
+    Instante (segundos) en que este alcance empezó a responder con `etag`.
+    Cada cambio de versión lo mueve al menos un segundo más allá del
+    anterior, así que If-Modified-Since nunca confirma una versión distinta
+    a la que el cliente ya tiene. Si la entrada se expulsa de la caché se
+    toma la hora actual: a lo sumo se responde completo una vez de más.
+    """
+    clave = f"condicional:version:{recurso}:{alcance}"
+    anterior = cache.get(clave)
+    if anterior and anterior[0] == etag:
+        return anterior[1]
+    desde = int(time.time())
+    if anterior:
+        desde = max(desde, anterior[1] + 1)
+    cache.set(clave, (etag, desde), 60 * 60 * 24)
+    return desde
+
+
+def get_condicional(recurso, version, privado=True):
+    """
+    Decorador de vistas GET que responde 304 a If-None-Match /
+    If-Modified-Since sin ejecutar la vista mientras el recurso no cambie.
+
+    `version(request, *args, **kwargs)` debe ser barata (un agregado o un
+    valor ya cacheado) y retornar algo que cambie con cualquier cambio del
+    contenido. El ETag combina esa versión con el alcance de la respuesta
+    (usuario, host y URL con sus parámetros). Las respuestas privadas
+    (por usuario) llevan Cache-Control: private; todas llevan no-cache,
+    para que el cliente siempre revalide.
+
+    Uso:
+        @login_required
+        @get_condicional('notificaciones_json', lambda request: ...)
+        def notificaciones_json(request): ...
+
+        @method_decorator(get_condicional('colegio_discover', ..., privado=False))
+        def get(self, request): ...
+    """
+    RECURSOS[recurso] = privado
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vista(request, *args, **kwargs)
+
+            alcance = _huella(request.user.pk if privado else None, request.get_host(), request.get_full_path())
+            etag = f'W/"{_huella(alcance, version(request, *args, **kwargs))}"'
+            modificado = _modificado_desde(recurso, alcance, etag)
+
+            response = get_conditional_response(request, etag=etag, last_modified=modificado)
+            if response is not None:
+                if response.status_code == 304:
+                    MetricasCondicionales.registrar_acierto(recurso)
+                response.headers['ETag'] = etag
+                return response
+
+            inicio = time.perf_counter()
+            response = vista(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            response.headers['ETag'] = etag
+            response.headers['Last-Modified'] = http_date(modificado)
+            if privado:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            if getattr(response, 'is_rendered', True):
+                MetricasCondicionales.registrar_fallo(recurso, len(response.content), inicio)
+            else:
+                # Respuestas de DRF: el cuerpo existe recién al renderizar
+                response.add_post_render_callback(
+                    lambda r: MetricasCondicionales.registrar_fallo(recurso, len(r.content), inicio)
+                )
+            return response
+        return envoltura
+    return decorador
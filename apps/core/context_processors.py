@@ -5,7 +5,7 @@ Requerido para cumplir con los requisitos del proyecto.
 
 from django.conf import settings
 from .models import ConfiguracionAcademica
-from django.apps import apps
+from .services import ContadorNoLeidosService
 
 def institucion_info(request):
     """
@@ -22,12 +22,11 @@ def institucion_info(request):
         semestre_actual = '1'
         semestre_label = 'Primer Semestre'
 
-    # Notificaciones de mensajería (lazy loading para evitar circular imports si fuera necesario)
-    total_no_leidos = 0
+    # Badges de mensajes y notificaciones: proyección cacheada por usuario, sin COUNT por página
+    no_leidos = {'mensajes': 0, 'notificaciones': 0}
     if request.user.is_authenticated:
         try:
-            Mensaje = apps.get_model('mensajeria', 'Mensaje')
-            total_no_leidos = Mensaje.objects.filter(receptor=request.user, leido=False).count()
+            no_leidos = ContadorNoLeidosService.obtener(request.user)
         except Exception:
             pass
 
@@ -46,7 +45,9 @@ def institucion_info(request):
             'semestre_label': semestre_label,
         },
         'notificaciones': {
-            'mensajes_no_leidos': total_no_leidos
+            'mensajes_no_leidos': no_leidos['mensajes'],
+            'notificaciones_no_leidas': no_leidos['notificaciones'],
+            'tiempo_real': settings.MENSAJERIA_TIEMPO_REAL,
         },
         'contacto_email': settings.INSTITUCION_INFO['email'],
         'pagina_personalizada': {
@@ -0,0 +1,38 @@
+"""
+Management command: deduplicar_archivos
+Enlaza los archivos subidos con contenido idéntico (adjuntos, entregas,
+recursos y documentos) a un único blob en MEDIA_ROOT/blobs/, recalcula
+las referencias de ArchivoBlob e informa el espacio recuperado. Se
+ejecuta una vez tras migrar los campos de archivo a
+AlmacenamientoDeduplicado, y de nuevo tras restaurar media desde un
+respaldo.
+
+Uso:
+    python manage.py deduplicar_archivos
+    python manage.py deduplicar_archivos --simular   # Solo informa
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from core.models import ArchivoBlob
+from core.storage import deduplicar
+
+
+class Command(BaseCommand):
+    help = 'Deduplica por contenido los archivos subidos e informa el espacio recuperado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='Informar sin modificar archivos ni la BD')
+
+    def handle(self, *args, **options):
+        reporte = deduplicar(apps.get_model, ArchivoBlob, simular=options['simular'])
+        self.stdout.write(
+            f"{reporte['archivos']} archivos revisados en {reporte['blobs']} contenidos distintos."
+        )
+        if reporte['faltantes']:
+            self.stdout.write(self.style.WARNING(f"{reporte['faltantes']} rutas sin archivo en disco."))
+        if options['simular']:
+            resultado = f"{reporte['enlazados']} duplicados por enlazar: {{}} recuperables."
+        else:
+            resultado = f"{reporte['enlazados']} duplicados enlazados: {{}} recuperados."
+        self.stdout.write(self.style.SUCCESS(resultado.format(filesizeformat(reporte['bytes_recuperados']))))
@@ -0,0 +1,67 @@
+"""
+Management command: enviar_correos_pendientes
+Despacha los correos encolados en la bandeja de salida (CorreoSaliente) por
+una sola conexión SMTP, en lotes, y reprograma los fallidos con espera
+creciente. Se puede ejecutar periódicamente (cron) o como worker con --bucle.
+
+Uso:
+    python manage.py enviar_correos_pendientes
+    python manage.py enviar_correos_pendientes --limite 500 --lote 100
+    python manage.py enviar_correos_pendientes --bucle --intervalo 10
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.services import CorreoService
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, help='Máximo de correos a enviar por pasada')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=CorreoService.TAMANO_LOTE,
+            help=f'Correos reservados y enviados por lote (por defecto, {CorreoService.TAMANO_LOTE})',
+        )
+        parser.add_argument('--bucle', action='store_true', help='Seguir despachando hasta que se detenga el proceso')
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=10,
+            help='Segundos de espera entre pasadas sin trabajo en modo --bucle (por defecto, 10)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['bucle']:
+            self._pasada(options)
+            return
+
+        self.stdout.write("Despachando correos pendientes (Ctrl+C para detener)...")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    enviados, fallidos = self._pasada(options, silencioso=True)
+                except Exception as e:
+                    # Servidor SMTP o BD no disponibles: se reintenta en la próxima pasada
+                    self.stderr.write(f"Error al despachar correos: {e}")
+                    enviados = fallidos = 0
+                if not enviados and not fallidos:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write("Detenido.")
+
+    def _pasada(self, options, silencioso=False):
+        enviados, fallidos = CorreoService.enviar_pendientes(limite=options['limite'], tamano_lote=options['lote'])
+        if silencioso and not enviados and not fallidos:
+            return enviados, fallidos
+        mensaje = f"{enviados} correos enviados."
+        if fallidos:
+            self.stdout.write(self.style.WARNING(f"{mensaje} {fallidos} con error."))
+        else:
+            self.stdout.write(self.style.SUCCESS(mensaje))
+        return enviados, fallidos
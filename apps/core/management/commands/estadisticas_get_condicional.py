@@ -0,0 +1,36 @@
+"""
+Management command: estadisticas_get_condicional
+Muestra, por cada endpoint con GET condicional (core.condicional), cuántas
+consultas se respondieron con 304 y el ancho de banda y tiempo de CPU
+ahorrados estimados con el promedio de las respuestas completas.
+
+Uso:
+    python manage.py estadisticas_get_condicional
+    python manage.py estadisticas_get_condicional --reiniciar   # Muestra y pone a cero
+"""
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from django.urls import get_resolver
+from core.condicional import MetricasCondicionales
+
+
+class Command(BaseCommand):
+    help = 'Muestra la tasa de aciertos (304) del GET condicional y el ahorro estimado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reiniciar', action='store_true', help='Poner los contadores a cero después de mostrarlos')
+
+    def handle(self, *args, **options):
+        # Importa las vistas para que registren sus recursos
+        get_resolver().url_patterns
+
+        for recurso, m in MetricasCondicionales.estadisticas().items():
+            tasa = f"{m['tasa_aciertos']:.1%}" if m['tasa_aciertos'] is not None else '-'
+            self.stdout.write(
+                f"{recurso}: {m['aciertos']} aciertos / {m['fallos']} fallos ({tasa}), "
+                f"ahorro estimado {filesizeformat(m['bytes_ahorrados'])} y {m['ms_ahorrados']} ms"
+            )
+
+        if options['reiniciar']:
+            MetricasCondicionales.reiniciar()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
@@ -0,0 +1,20 @@
+"""
+Management command: purgar_registros_eliminados
+Elimina las lápidas de la sincronización incremental (RegistroEliminado)
+más antiguas que RegistroEliminado.RETENCION. Un sync_token de esa
+antigüedad ya recibe el listado completo, así que nadie las lee.
+Se puede ejecutar periódicamente (cron).
+
+Uso:
+    python manage.py purgar_registros_eliminados
+"""
+from django.core.management.base import BaseCommand
+from core.models import RegistroEliminado
+
+
+class Command(BaseCommand):
+    help = 'Elimina los registros de eliminación más antiguos que la retención de la sincronización'
+
+    def handle(self, *args, **options):
+        eliminados = RegistroEliminado.purgar()
+        self.stdout.write(self.style.SUCCESS(f"{eliminados} registros eliminados purgados."))
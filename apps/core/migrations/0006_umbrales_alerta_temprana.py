@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_colegioconfig'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracionacademica',
+            name='umbral_asistencia_riesgo',
+            field=models.PositiveSmallIntegerField(default=85, help_text='Bajo este porcentaje el estudiante entra en alerta por inasistencia', verbose_name='Asistencia mínima % (SAT)'),
+        ),
+        migrations.AddField(
+            model_name='configuracionacademica',
+            name='umbral_promedio_riesgo',
+            field=models.DecimalField(decimal_places=1, default=4.0, help_text='Bajo este promedio el estudiante entra en alerta por rendimiento', max_digits=2, verbose_name='Promedio mínimo (SAT)'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def poblar_contadores(apps, schema_editor):
+    """Cuenta los mensajes y notificaciones no leídos existentes de cada usuario"""
+    Mensaje = apps.get_model('mensajeria', 'Mensaje')
+    Notificacion = apps.get_model('core', 'Notificacion')
+    ContadorNoLeidos = apps.get_model('core', 'ContadorNoLeidos')
+    contadores = {}
+
+    mensajes = Mensaje.objects.filter(leido=False).values('receptor_id').annotate(cantidad=Count('id')).order_by()
+    for f in mensajes:
+        contadores.setdefault(f['receptor_id'], ContadorNoLeidos(usuario_id=f['receptor_id'])).mensajes = f['cantidad']
+
+    notificaciones = Notificacion.objects.filter(leida=False).values('usuario_id').annotate(
+        cantidad=Count('id')
+    ).order_by()
+    for f in notificaciones:
+        contadores.setdefault(f['usuario_id'], ContadorNoLeidos(usuario_id=f['usuario_id'])).notificaciones = f['cantidad']
+
+    ContadorNoLeidos.objects.bulk_create(contadores.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_umbrales_alerta_temprana'),
+        ('mensajeria', '0005_delete_configuracionsistema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorNoLeidos',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contador_no_leidos', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('mensajes', models.PositiveIntegerField(default=0)),
+                ('notificaciones', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de No Leídos',
+                'verbose_name_plural': 'Contadores de No Leídos',
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_correosaliente'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='correosaliente',
+            name='correo_estado_idx',
+        ),
+        migrations.AddField(
+            model_name='correosaliente',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='correosaliente',
+            name='proximo_intento',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='No se envía antes de esta fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='correosaliente',
+            index=models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_idx'),
+        ),
+    ]
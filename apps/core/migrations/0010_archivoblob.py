@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_correosaliente_reintentos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('tamano', models.PositiveBigIntegerField(help_text='Tamaño en bytes')),
+                ('referencias', models.PositiveIntegerField(default=0, help_text='Rutas enlazadas a este contenido')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo Deduplicado',
+                'verbose_name_plural': 'Archivos Deduplicados',
+            },
+        ),
+    ]
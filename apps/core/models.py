@@ -1,5 +1,10 @@
+import copy
+import time
 import uuid
-from django.db import models
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
 
 class ConfiguracionSistema(models.Model):
     """Configuraciones generales del sistema"""
@@ -18,7 +23,68 @@ class ConfiguracionSistema(models.Model):
     def __str__(self):
         return f"{self.clave}: {self.valor[:50]}{'...' if len(self.valor) > 50 else ''}"
 
-class ConfiguracionAcademica(models.Model):
+# Copias locales del proceso: {modelo: (sello de versión, instante de validación, instancia)}
+_SINGLETONS_LOCALES = {}
+
+
+class SingletonCacheado:
+    """
+    Lectura cacheada de modelos singleton (pk=1) en dos niveles: una copia
+    local del proceso y la caché de Django (CACHES). Ambas quedan atadas a
+    un sello de versión que las señales post_save/post_delete renuevan (ver
+    core.signals). Con una caché compartida (Redis) el cambio se ve en todos
+    los procesos en a lo más VIGENCIA_LOCAL segundos.
+
+    El sello además vence cada VIGENCIA_VERSION segundos: si la caché es
+    por proceso (LocMemCache) o una señal no corrió (queryset.update), los
+    demás procesos releen la BD a más tardar al vencer su sello.
+    """
+    # Segundos que la copia local se usa sin volver a consultar el sello
+    VIGENCIA_LOCAL = 5
+    # Segundos de vida del sello de versión y de la instancia cacheada con él
+    VIGENCIA_VERSION = 60
+
+    @classmethod
+    def _clave_cache(cls, sufijo):
+        return f"singleton:{cls._meta.label_lower}:{sufijo}"
+
+    @classmethod
+    def _obtener_cacheado(cls, cargar):
+        """Retorna una copia de la instancia cacheada, llamando a cargar() solo si falta"""
+        if transaction.get_connection().in_atomic_block:
+            # Lo leído dentro de una transacción podría revertirse: no se cachea
+            return cargar()
+
+        ahora = time.monotonic()
+        local = _SINGLETONS_LOCALES.get(cls)
+        if local and ahora - local[1] < cls.VIGENCIA_LOCAL:
+            return copy.copy(local[2])
+
+        clave_version = cls._clave_cache('version')
+        version = cache.get(clave_version)
+        if version is None:
+            cache.add(clave_version, uuid.uuid4().hex, cls.VIGENCIA_VERSION)
+            version = cache.get(clave_version)
+
+        if local and local[0] == version:
+            instancia = local[2]
+        else:
+            instancia = cache.get(cls._clave_cache(version))
+            if instancia is None:
+                instancia = cargar()
+                cache.set(cls._clave_cache(version), instancia, cls.VIGENCIA_VERSION)
+
+        _SINGLETONS_LOCALES[cls] = (version, ahora, instancia)
+        return copy.copy(instancia)
+
+    @classmethod
+    def invalidar_cache(cls):
+        """Renueva el sello de versión y descarta la copia local"""
+        cache.set(cls._clave_cache('version'), uuid.uuid4().hex, cls.VIGENCIA_VERSION)
+        _SINGLETONS_LOCALES.pop(cls, None)
+
+
+class ConfiguracionAcademica(SingletonCacheado, models.Model):
     """Configuración global del año y semestre académico (Singleton)"""
     año_actual = models.PositiveIntegerField(default=2024, verbose_name="Año Escolar Actual")
     SEMESTRE_CHOICES = [
@@ -26,6 +92,16 @@ class ConfiguracionAcademica(models.Model):
         ('2', 'Segundo Semestre'),
     ]
     semestre_actual = models.CharField(max_length=1, choices=SEMESTRE_CHOICES, default='1')
+
+    # Umbrales del Sistema de Alerta Temprana (SAT)
+    umbral_promedio_riesgo = models.DecimalField(
+        max_digits=2, decimal_places=1, default=4.0, verbose_name="Promedio mínimo (SAT)",
+        help_text="Bajo este promedio el estudiante entra en alerta por rendimiento"
+    )
+    umbral_asistencia_riesgo = models.PositiveSmallIntegerField(
+        default=85, verbose_name="Asistencia mínima % (SAT)",
+        help_text="Bajo este porcentaje el estudiante entra en alerta por inasistencia"
+    )
     
     class Meta:
         verbose_name = "Configuración Académica"
@@ -41,12 +117,11 @@ class ConfiguracionAcademica(models.Model):
 
     @classmethod
     def get_actual(cls):
-        """Retorna la configuración actual, creándola si no existe"""
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """Retorna la configuración actual (cacheada), creándola si no existe"""
+        return cls._obtener_cacheado(lambda: cls.objects.get_or_create(pk=1)[0])
 
 
-class ColegioConfig(models.Model):
+class ColegioConfig(SingletonCacheado, models.Model):
     """
     Configuración única del colegio (Singleton).
     Usado por el Phone Home Protocol para auto-registro con el Directorio Central.
@@ -91,15 +166,14 @@ class ColegioConfig(models.Model):
     
     @classmethod
     def get_config(cls):
-        """Retorna la configuración del colegio, creándola si no existe"""
-        obj, created = cls.objects.get_or_create(
+        """Retorna la configuración del colegio (cacheada), creándola si no existe"""
+        return cls._obtener_cacheado(lambda: cls.objects.get_or_create(
             pk=1,
             defaults={
                 'codigo': cls._generate_code(),
                 'nombre': 'Mi Colegio'
             }
-        )
-        return obj
+        )[0])
     
     @staticmethod
     def _generate_code():
@@ -159,3 +233,138 @@ class Notificacion(models.Model):
     def no_leidas_count(cls, usuario):
         """Retorna el número de notificaciones no leídas"""
         return cls.objects.filter(usuario=usuario, leida=False).count()
+
+    @classmethod
+    def version(cls, usuario):
+        """
+        Versión de las notificaciones del usuario para el GET condicional:
+        cambia al crear, eliminar o marcar como leída alguna. Las ediciones
+        del texto de una notificación existente no la cambian.
+        """
+        return tuple(cls.objects.filter(usuario=usuario).aggregate(
+            total=models.Count('id'),
+            ultima=models.Max('id'),
+            no_leidas=models.Count('id', filter=models.Q(leida=False)),
+        ).values())
+
+
+class ContadorNoLeidos(models.Model):
+    """
+    Proyección por usuario de sus mensajes y notificaciones no leídos, para
+    el badge del layout. La mantienen con deltas atómicos los caminos de
+    envío y lectura (ver core.services.ContadorNoLeidosService).
+    """
+    usuario = models.OneToOneField(
+        'auth.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='contador_no_leidos'
+    )
+    mensajes = models.PositiveIntegerField(default=0)
+    notificaciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contador de No Leídos'
+        verbose_name_plural = 'Contadores de No Leídos'
+
+    def __str__(self):
+        return f"{self.usuario}: {self.mensajes} mensajes, {self.notificaciones} notificaciones"
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida de correos. Las vistas solo encolan filas y responden;
+    el comando enviar_correos_pendientes las envía fuera del ciclo de la
+    petición y reintenta las fallidas con espera creciente
+    (ver core.services.CorreoService).
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('error', 'Error'),
+    ]
+
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254, blank=True, help_text='Vacío = EMAIL_HOST_USER o DEFAULT_FROM_EMAIL')
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now, help_text='No se envía antes de esta fecha')
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Correo Saliente'
+        verbose_name_plural = 'Correos Salientes'
+        ordering = ['-creado']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} → {self.destinatario} ({self.get_estado_display()})"
+
+
+class ArchivoBlob(models.Model):
+    """
+    Contenido único de un archivo subido, guardado en MEDIA_ROOT/blobs/ y
+    enlazado desde cada ruta que lo usa (ver core.storage.AlmacenamientoDeduplicado).
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    tamano = models.PositiveBigIntegerField(help_text='Tamaño en bytes')
+    referencias = models.PositiveIntegerField(default=0, help_text='Rutas enlazadas a este contenido')
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archivo Deduplicado'
+        verbose_name_plural = 'Archivos Deduplicados'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.referencias} referencias)"
+
+
+class RegistroEliminado(models.Model):
+    """
+    Lápida de una fila eliminada que la App pudo haber sincronizado. Las
+    escriben las señales post_delete de los modelos sincronizables y la
+    sincronización incremental de la API las entrega como 'eliminados' a
+    quien presente un sync_token anterior. Pasada RETENCION ese token ya
+    recibe el listado completo y las lápidas se pueden purgar.
+    """
+    RETENCION = timedelta(days=90)
+
+    modelo = models.CharField(max_length=50)
+    uuid = models.UUIDField()
+    # Sin restricción de FK: las lápidas sobreviven al usuario y se purgan por antigüedad
+    estudiante = models.ForeignKey(
+        'auth.User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    eliminado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Registro Eliminado'
+        verbose_name_plural = 'Registros Eliminados'
+        indexes = [
+            models.Index(fields=['estudiante', 'modelo', 'eliminado'], name='registro_eliminado_sync_idx'),
+            models.Index(fields=['eliminado'], name='registro_eliminado_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.uuid} ({self.eliminado:%d/%m/%Y %H:%M})"
+
+    @classmethod
+    def registrar(cls, instance):
+        """Deja la lápida de `instance`, que debe tener uuid y estudiante"""
+        cls.objects.create(
+            modelo=instance._meta.label_lower, uuid=instance.uuid, estudiante_id=instance.estudiante_id
+        )
+
+    @classmethod
+    def purgar(cls):
+        """Elimina las lápidas más antiguas que RETENCION; retorna cuántas"""
+        return cls.objects.filter(eliminado__lt=timezone.now() - cls.RETENCION).delete()[0]
@@ -0,0 +1,255 @@
+"""
+Servicios del núcleo compartidos por las demás apps
+"""
+import smtplib
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ContadorNoLeidos, CorreoSaliente
+
+
+class ContadorNoLeidosService:
+    """
+    Totales de mensajes y notificaciones no leídos por usuario, leídos por el
+    context processor en cada página. La lectura sale de la caché y, si falta,
+    de una búsqueda por clave primaria en ContadorNoLeidos; nunca de un COUNT
+    sobre los mensajes recibidos.
+
+    Los caminos de envío aplican deltas atómicos
+    (UPDATE ... SET mensajes = mensajes + n) dentro de la misma transacción
+    que el cambio de origen, e invalidan la entrada cacheada del usuario.
+    Al leer una conversación, los mensajes se recalculan sumando los
+    contadores por conversación, que se derivan de las marcas de lectura.
+    Un usuario sin fila se reconstruye desde el origen en su próxima lectura.
+
+    La invalidación solo alcanza a los demás workers si la caché es
+    compartida (Redis en producción); con una caché por proceso, la entrada
+    de otro worker vence a los DURACION_CACHE segundos. Releer la fila
+    cuesta una búsqueda por clave primaria, por lo que la duración es corta.
+
+    Uso:
+        ContadorNoLeidosService.obtener(request.user)  # {'mensajes': 3, 'notificaciones': 1, 'total': 4}
+        ContadorNoLeidosService.sumar(usuario.pk, notificaciones=-marcadas)
+    """
+
+    DURACION_CACHE = 60
+
+    @staticmethod
+    def _clave(usuario_id):
+        return f"no_leidos:{usuario_id}"
+
+    @staticmethod
+    def obtener(usuario):
+        """Retorna los totales de no leídos del usuario"""
+        clave = ContadorNoLeidosService._clave(usuario.pk)
+        totales = cache.get(clave)
+        if totales is None:
+            totales = ContadorNoLeidos.objects.filter(pk=usuario.pk).values('mensajes', 'notificaciones').first()
+            if totales is None:
+                totales = ContadorNoLeidosService.recalcular(usuario.pk)
+            if not transaction.get_connection().in_atomic_block:
+                # Lo leído dentro de una transacción podría revertirse: no se cachea
+                cache.set(clave, totales, ContadorNoLeidosService.DURACION_CACHE)
+        return {**totales, 'total': totales['mensajes'] + totales['notificaciones']}
+
+    @staticmethod
+    def sumar(usuario_id, mensajes=0, notificaciones=0):
+        """Aplica un delta atómico a los contadores del usuario"""
+        ContadorNoLeidosService.sumar_lote([usuario_id], mensajes=mensajes, notificaciones=notificaciones)
+
+    @staticmethod
+    def sumar_lote(usuario_ids, mensajes=0, notificaciones=0):
+        """Aplica el mismo delta a los contadores de varios usuarios en un solo UPDATE"""
+        cambios = {
+            campo: Greatest(F(campo) + delta, 0, output_field=models.PositiveIntegerField())
+            for campo, delta in (('mensajes', mensajes), ('notificaciones', notificaciones)) if delta
+        }
+        if not cambios:
+            return
+        # Sin fila no hay nada que ajustar: obtener() la construye desde el origen
+        ContadorNoLeidos.objects.filter(pk__in=usuario_ids).update(**cambios)
+        ContadorNoLeidosService.invalidar(*usuario_ids)
+
+    @staticmethod
+    def recalcular(usuario_id):
+        """
+        Calcula los no leídos desde el origen y guarda la proyección del
+        usuario. Los mensajes salen de los contadores de sus conversaciones,
+        no de un COUNT sobre los mensajes recibidos.
+        """
+        Conversacion = apps.get_model('mensajeria', 'Conversacion')
+        Notificacion = apps.get_model('core', 'Notificacion')
+        mensajes = Conversacion.objects.filter(Q(alumno_id=usuario_id) | Q(profesor_id=usuario_id)).aggregate(
+            total=Coalesce(Sum(Case(
+                When(alumno_id=usuario_id, then='no_leidos_alumno'),
+                default='no_leidos_profesor',
+            )), 0)
+        )['total']
+        totales = {
+            'mensajes': mensajes,
+            'notificaciones': Notificacion.objects.filter(usuario_id=usuario_id, leida=False).count(),
+        }
+        ContadorNoLeidos.objects.bulk_create(
+            [ContadorNoLeidos(usuario_id=usuario_id, **totales)],
+            update_conflicts=True, unique_fields=['usuario'], update_fields=list(totales),
+        )
+        return totales
+
+    @staticmethod
+    def descartar(usuario_id):
+        """Elimina la proyección del usuario para que se reconstruya en la próxima lectura"""
+        ContadorNoLeidos.objects.filter(pk=usuario_id).delete()
+        ContadorNoLeidosService.invalidar(usuario_id)
+
+    @staticmethod
+    def invalidar(*usuario_ids):
+        """
+        Descarta los totales cacheados de los usuarios, ahora y al confirmar
+        la transacción, por si otra request los volvió a cachear mientras el
+        cambio aún no era visible.
+        """
+        claves = [ContadorNoLeidosService._clave(usuario_id) for usuario_id in usuario_ids]
+        cache.delete_many(claves)
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+class CorreoService:
+    """
+    Bandeja de salida de correos (CorreoSaliente). Quien envía solo encola
+    filas con un bulk_create, que se confirman junto con su transacción; el
+    comando enviar_correos_pendientes las despacha después.
+
+    El despacho abre una sola conexión SMTP por pasada y toma lotes de
+    correos vencidos. Cada lote se reserva corriendo su proximo_intento en
+    RESERVA segundos, así otro worker no lo toma y, si el proceso muere a
+    mitad de lote, vuelve a quedar disponible. Cada correo pasa por
+    send_messages por separado para registrar el resultado de cada
+    destinatario, y los resultados se guardan con un bulk_update por lote.
+
+    Un fallo se reintenta tras ESPERA_BASE * 2^(intentos - 1) segundos,
+    hasta MAX_INTENTOS; una dirección rechazada por el servidor queda en
+    error de inmediato. Si la conexión cae y no puede reabrirse, los correos
+    del lote que no alcanzaron a intentarse se liberan sin contar intento.
+
+    Uso:
+        CorreoService.encolar(['alumno@liceo.cl', ...], asunto, cuerpo)
+        enviados, fallidos = CorreoService.enviar_pendientes()
+    """
+
+    TAMANO_LOTE = 50
+    MAX_INTENTOS = 5
+    ESPERA_BASE = 60
+    RESERVA = 10 * 60
+
+    @staticmethod
+    def encolar(destinatarios, asunto, cuerpo, remitente=''):
+        """Encola un correo por dirección (sin vacías ni repetidas); retorna la cantidad encolada"""
+        correos = [
+            CorreoSaliente(destinatario=destinatario, asunto=asunto[:200], cuerpo=cuerpo, remitente=remitente)
+            for destinatario in dict.fromkeys(destinatarios) if destinatario
+        ]
+        CorreoSaliente.objects.bulk_create(correos, batch_size=500)
+        return len(correos)
+
+    @staticmethod
+    def _vencidos():
+        return CorreoSaliente.objects.filter(estado='pendiente', proximo_intento__lte=timezone.now())
+
+    @staticmethod
+    def _reservar_lote(tamano):
+        """Toma hasta `tamano` correos vencidos y los aparta por RESERVA segundos"""
+        with transaction.atomic():
+            correos = list(
+                CorreoService._vencidos().select_for_update(skip_locked=True).order_by('proximo_intento', 'id')[:tamano]
+            )
+            CorreoSaliente.objects.filter(pk__in=[correo.pk for correo in correos]).update(
+                proximo_intento=timezone.now() + timedelta(seconds=CorreoService.RESERVA)
+            )
+        return correos
+
+    @staticmethod
+    def _enviar_lote(conexion, correos):
+        """
+        Envía los correos por la conexión abierta. Retorna [(correo, excepción
+        o None)] de los intentados y los que quedaron sin intentar porque la
+        conexión no pudo reabrirse.
+        """
+        remitente = settings.EMAIL_HOST_USER or settings.DEFAULT_FROM_EMAIL
+        resultados = []
+        for i, correo in enumerate(correos):
+            mensaje = EmailMessage(correo.asunto, correo.cuerpo, correo.remitente or remitente, [correo.destinatario])
+            try:
+                conexion.send_messages([mensaje])
+            except Exception as e:
+                resultados.append((correo, e))
+                if isinstance(e, smtplib.SMTPRecipientsRefused):
+                    continue
+                try:
+                    # La conexión pudo quedar inutilizable: se abre otra para el resto del lote
+                    conexion.close()
+                    conexion.open()
+                except Exception:
+                    return resultados, correos[i + 1:]
+            else:
+                resultados.append((correo, None))
+        return resultados, []
+
+    @staticmethod
+    def _liberar(correos):
+        """Devuelve correos reservados y no intentados a su proximo_intento previo, sin contar un intento"""
+        CorreoSaliente.objects.bulk_update(correos, ['proximo_intento'])
+
+    @staticmethod
+    def _registrar(resultados):
+        """Guarda el resultado de cada destinatario y programa los reintentos"""
+        ahora = timezone.now()
+        for correo, error in resultados:
+            correo.intentos += 1
+            if error is None:
+                correo.estado, correo.enviado_en, correo.error = 'enviado', ahora, ''
+                continue
+            correo.error = f"{type(error).__name__}: {error}"
+            if correo.intentos >= CorreoService.MAX_INTENTOS or isinstance(error, smtplib.SMTPRecipientsRefused):
+                correo.estado = 'error'
+            else:
+                espera = CorreoService.ESPERA_BASE * 2 ** (correo.intentos - 1)
+                correo.proximo_intento = ahora + timedelta(seconds=espera)
+        CorreoSaliente.objects.bulk_update(
+            [correo for correo, _ in resultados],
+            ['estado', 'error', 'intentos', 'proximo_intento', 'enviado_en'],
+        )
+
+    @staticmethod
+    def enviar_pendientes(limite=None, tamano_lote=None):
+        """Despacha los correos vencidos por una conexión, en lotes; retorna (enviados, fallidos)"""
+        if not CorreoService._vencidos().exists():
+            # Sin trabajo no se abre la conexión SMTP
+            return 0, 0
+        tamano_lote = tamano_lote or CorreoService.TAMANO_LOTE
+        enviados = fallidos = 0
+        with get_connection() as conexion:
+            while limite is None or enviados + fallidos < limite:
+                pendientes = tamano_lote if limite is None else min(tamano_lote, limite - enviados - fallidos)
+                correos = CorreoService._reservar_lote(pendientes)
+                if not correos:
+                    break
+                resultados, sin_intentar = CorreoService._enviar_lote(conexion, correos)
+                CorreoService._registrar(resultados)
+                con_error = sum(1 for _, error in resultados if error is not None)
+                enviados += len(resultados) - con_error
+                fallidos += con_error
+                if sin_intentar:
+                    # Servidor SMTP caído: el resto queda para la próxima pasada sin gastar reintentos
+                    CorreoService._liberar(sin_intentar)
+                    break
+                if len(correos) < pendientes:
+                    break
+        return enviados, fallidos
@@ -0,0 +1,77 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import ConfiguracionAcademica, ColegioConfig, Notificacion
+from .services import ContadorNoLeidosService
+from .storage import CAMPOS_DEDUPLICADOS
+
+
+@receiver(post_save, sender=ConfiguracionAcademica)
+@receiver(post_delete, sender=ConfiguracionAcademica)
+@receiver(post_save, sender=ColegioConfig)
+@receiver(post_delete, sender=ColegioConfig)
+def invalidar_singleton(sender, **kwargs):
+    """
+    Invalida la caché del singleton modificado. Se repite al confirmar la
+    transacción, por si otro proceso volvió a cachear el valor anterior
+    mientras el cambio aún no era visible.
+    """
+    sender.invalidar_cache()
+    transaction.on_commit(sender.invalidar_cache)
+
+
+@receiver(post_init, sender=Notificacion)
+def recordar_estado_notificacion(sender, instance, **kwargs):
+    """Guarda si la notificación salió de la BD como leída, para calcular el delta al guardar."""
+    if instance.pk is None or 'leida' in instance.get_deferred_fields():
+        instance._leida_original = None
+    else:
+        instance._leida_original = instance.leida
+
+
+@receiver(post_save, sender=Notificacion)
+def actualizar_contador_notificaciones(sender, instance, created, **kwargs):
+    """Ajusta las notificaciones no leídas del usuario al crear o marcar una notificación."""
+    # Una notificación nueva cuenta como si antes hubiera estado leída
+    anterior = True if created else getattr(instance, '_leida_original', None)
+    instance._leida_original = instance.leida
+    if anterior is None:
+        ContadorNoLeidosService.descartar(instance.usuario_id)
+    elif anterior != instance.leida:
+        ContadorNoLeidosService.sumar(instance.usuario_id, notificaciones=1 if anterior else -1)
+
+
+@receiver(post_delete, sender=Notificacion)
+def descontar_notificacion(sender, instance, **kwargs):
+    if not instance.leida:
+        ContadorNoLeidosService.sumar(instance.usuario_id, notificaciones=-1)
+
+
+def _eliminar_archivo_huerfano(modelo, campo, archivo):
+    """Elimina el archivo si ninguna otra fila lo referencia; el almacenamiento libera su blob"""
+    if not modelo.objects.filter(**{campo: archivo.name}).exists():
+        archivo.storage.delete(archivo.name)
+
+
+def liberar_archivos_deduplicados(sender, instance, **kwargs):
+    """
+    Al eliminar una fila con archivos deduplicados, elimina sus archivos y
+    resta su referencia al blob. Se hace al confirmar la transacción, para
+    no perder el archivo si la eliminación se revierte.
+    """
+    for app, modelo, campo in CAMPOS_DEDUPLICADOS:
+        if (app, modelo) != (sender._meta.app_label, sender._meta.object_name):
+            continue
+        archivo = getattr(instance, campo)
+        if archivo:
+            transaction.on_commit(partial(_eliminar_archivo_huerfano, sender, campo, archivo))
+
+
+for app, modelo, _ in CAMPOS_DEDUPLICADOS:
+    post_delete.connect(
+        liberar_archivos_deduplicados, sender=apps.get_model(app, modelo),
+        dispatch_uid=f'liberar_archivos_{app}_{modelo}',
+    )
@@ -0,0 +1,226 @@
+"""
+Almacenamiento de archivos subidos con deduplicación por contenido
+"""
+import hashlib
+import os
+import tempfile
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+# Campos cuyos archivos se guardan deduplicados: (app, modelo, campo)
+CAMPOS_DEDUPLICADOS = [
+    ('mensajeria', 'Mensaje', 'adjunto'),
+    ('tareas', 'Tarea', 'archivo_adjunto'),
+    ('tareas', 'Entrega', 'archivo'),
+    ('academico', 'RecursoAcademico', 'archivo'),
+    ('documentos', 'Documento', 'archivo'),
+]
+
+DIRECTORIO_BLOBS = 'blobs'
+TAMANO_BLOQUE = 64 * 1024
+
+
+def hash_archivo(ruta):
+    """SHA-256 de un archivo en disco, leído por bloques"""
+    sha256 = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+
+@deconstructible
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    """
+    FileSystemStorage direccionado por contenido. El contenido de cada
+    archivo se escribe una sola vez en MEDIA_ROOT/blobs/<aa>/<sha256>, con
+    el hash calculado mientras se copia la subida por bloques. La ruta que
+    pide el FileField (p. ej. tareas/entregas/guia.pdf) es un enlace duro a
+    ese blob, así que nombres, URLs y el servidor de media no cambian, y la
+    misma guía subida a diez cursos ocupa disco una vez.
+
+    ArchivoBlob cuenta las rutas enlazadas a cada blob: save() suma una,
+    delete() resta una y, al llegar a cero, elimina el blob. Los archivos
+    guardados no deben modificarse en su lugar: el cambio alcanzaría a todas
+    las rutas que comparten el blob.
+    """
+
+    def ruta_blob(self, sha256):
+        return os.path.join(self.location, DIRECTORIO_BLOBS, sha256[:2], sha256)
+
+    def _copiar_con_hash(self, content):
+        """Copia el contenido a un temporal junto a los blobs; retorna (ruta, sha256, tamaño)"""
+        directorio = os.path.join(self.location, DIRECTORIO_BLOBS, 'tmp')
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio)
+        sha256 = hashlib.sha256()
+        tamano = 0
+        try:
+            with os.fdopen(descriptor, 'wb') as destino:
+                for bloque in content.chunks(TAMANO_BLOQUE):
+                    sha256.update(bloque)
+                    destino.write(bloque)
+                    tamano += len(bloque)
+        except BaseException:
+            os.remove(temporal)
+            raise
+        return temporal, sha256.hexdigest(), tamano
+
+    def _publicar_blob(self, temporal, sha256):
+        """Deja el contenido en la ruta del blob, si aún no estaba; retorna esa ruta"""
+        blob = self.ruta_blob(sha256)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(temporal, blob)
+            if self.file_permissions_mode is not None:
+                os.chmod(blob, self.file_permissions_mode)
+        except FileExistsError:
+            # Mismo hash, mismo contenido: se reutiliza el existente
+            pass
+        return blob
+
+    def _save(self, name, content):
+        temporal, sha256, tamano = self._copiar_con_hash(content)
+        try:
+            while True:
+                blob = self._publicar_blob(temporal, sha256)
+                ruta = self.path(name)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                try:
+                    os.link(blob, ruta)
+                    break
+                except FileExistsError:
+                    # Otra petición tomó el nombre entre get_available_name y el enlace
+                    name = self.get_available_name(name)
+                except FileNotFoundError:
+                    # Se liberó la última referencia del blob entre medio: se vuelve a publicar
+                    continue
+        finally:
+            os.remove(temporal)
+        self._sumar_referencia(sha256, tamano)
+        return str(name).replace('\\', '/')
+
+    def delete(self, name):
+        ruta = self.path(name)
+        sha256 = hash_archivo(ruta) if os.path.isfile(ruta) else None
+        super().delete(name)
+        if sha256:
+            self._restar_referencia(sha256)
+
+    @staticmethod
+    def _sumar_referencia(sha256, tamano):
+        ArchivoBlob = apps.get_model('core', 'ArchivoBlob')
+        if ArchivoBlob.objects.filter(pk=sha256).update(referencias=F('referencias') + 1):
+            return
+        try:
+            with transaction.atomic():
+                ArchivoBlob.objects.create(sha256=sha256, tamano=tamano, referencias=1)
+        except IntegrityError:
+            ArchivoBlob.objects.filter(pk=sha256).update(referencias=F('referencias') + 1)
+
+    def _restar_referencia(self, sha256):
+        ArchivoBlob = apps.get_model('core', 'ArchivoBlob')
+        ArchivoBlob.objects.filter(pk=sha256, referencias__gt=0).update(referencias=F('referencias') - 1)
+        if ArchivoBlob.objects.filter(pk=sha256, referencias=0).delete()[0]:
+            try:
+                os.remove(self.ruta_blob(sha256))
+            except FileNotFoundError:
+                pass
+
+
+def almacenamiento_deduplicado():
+    return _almacenamiento
+
+
+_almacenamiento = AlmacenamientoDeduplicado()
+
+
+@deconstructible
+class AlmacenamientoPrivado(FileSystemStorage):
+    """
+    FileSystemStorage bajo ARCHIVOS_PRIVADOS_ROOT, fuera de MEDIA_ROOT (que
+    nginx sirve sin autenticar). Sus archivos no tienen URL pública: se
+    descargan a través de vistas que verifican permisos.
+    """
+
+    @property
+    def base_location(self):
+        return settings.ARCHIVOS_PRIVADOS_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError("Los archivos privados no tienen URL pública.")
+
+
+def almacenamiento_privado():
+    return _almacenamiento_privado
+
+
+_almacenamiento_privado = AlmacenamientoPrivado()
+
+
+def deduplicar(modelos, ArchivoBlob, almacenamiento=None, simular=False):
+    """
+    Enlaza al blob de su contenido los archivos existentes de CAMPOS_DEDUPLICADOS
+    y recalcula ArchivoBlob. `modelos(app, modelo)` retorna la clase del modelo
+    (apps.get_model, o el de la migración). Con `simular` solo informa.
+
+    Retorna {'archivos', 'blobs', 'enlazados', 'bytes_recuperados', 'faltantes'}.
+    """
+    almacenamiento = almacenamiento or _almacenamiento
+    rutas = set()
+    for app, modelo, campo in CAMPOS_DEDUPLICADOS:
+        nombres = modelos(app, modelo).objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+        rutas.update(nombres.values_list(campo, flat=True).distinct())
+
+    por_hash = defaultdict(list)
+    faltantes = 0
+    for nombre in sorted(rutas):
+        ruta = almacenamiento.path(nombre)
+        if not os.path.isfile(ruta):
+            faltantes += 1
+            continue
+        por_hash[hash_archivo(ruta)].append(ruta)
+
+    reporte = {'archivos': sum(map(len, por_hash.values())), 'blobs': len(por_hash), 'enlazados': 0,
+               'bytes_recuperados': 0, 'faltantes': faltantes}
+    blobs = []
+    for sha256, rutas_hash in por_hash.items():
+        blob = almacenamiento.ruta_blob(sha256)
+        tamano = os.path.getsize(rutas_hash[0])
+        if not simular and not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.link(rutas_hash[0], blob)
+        inodo_blob = os.stat(blob).st_ino if os.path.exists(blob) else os.stat(rutas_hash[0]).st_ino
+        inodos_liberados = set()
+        for ruta in rutas_hash:
+            inodo = os.stat(ruta).st_ino
+            if inodo == inodo_blob:
+                continue
+            reporte['enlazados'] += 1
+            # Un archivo que ya era enlace duro de otra ruta libera espacio una sola vez
+            if inodo not in inodos_liberados:
+                inodos_liberados.add(inodo)
+                reporte['bytes_recuperados'] += tamano
+            if not simular:
+                # Enlace a un nombre temporal y reemplazo atómico: la ruta nunca queda sin archivo
+                temporal = f"{ruta}.dedup"
+                os.link(blob, temporal)
+                os.replace(temporal, ruta)
+        blobs.append(ArchivoBlob(sha256=sha256, tamano=tamano, referencias=len(rutas_hash)))
+
+    if not simular:
+        ArchivoBlob.objects.bulk_create(
+            blobs, batch_size=500,
+            update_conflicts=True, unique_fields=['sha256'], update_fields=['tamano', 'referencias'],
+        )
+    return reporte
@@ -1,5 +1,35 @@
-from django.test import TestCase, Client
+import os
+import shutil
+import smtplib
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from core.condicional import MetricasCondicionales
+from core.context_processors import institucion_info
+from django.apps import apps
+
+from core.models import (
+    ArchivoBlob, ConfiguracionAcademica, ColegioConfig, ContadorNoLeidos, CorreoSaliente, Notificacion,
+    _SINGLETONS_LOCALES,
+)
+from core.services import ContadorNoLeidosService, CorreoService
+from core.storage import AlmacenamientoDeduplicado, deduplicar
+from documentos.models import CategoriaDocumento, Documento
+from mensajeria.models import Conversacion, Mensaje
+from usuarios.models import PerfilUsuario
 
 class CoreViewsTest(TestCase):
     def setUp(self):
@@ -14,3 +44,406 @@ class CoreViewsTest(TestCase):
         # Assuming 'usuarios:login' is the URL name for login
         response = self.client.get(reverse('usuarios:login'))
         self.assertEqual(response.status_code, 200)
+
+
+class SingletonCacheadoTest(TransactionTestCase):
+    """Caché de ConfiguracionAcademica y ColegioConfig (fuera de transacciones, como en una request)"""
+
+    def setUp(self):
+        cache.clear()
+        _SINGLETONS_LOCALES.clear()
+
+    def tearDown(self):
+        cache.clear()
+        _SINGLETONS_LOCALES.clear()
+
+    def test_lecturas_repetidas_no_consultan_la_bd(self):
+        ConfiguracionAcademica.get_actual()
+        ColegioConfig.get_config()
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2024)
+                ColegioConfig.get_config()
+
+    def test_guardar_invalida_la_cache(self):
+        config = ConfiguracionAcademica.get_actual()
+        config.año_actual = 2025
+        config.save()
+        self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2025)
+
+        # Otro proceso: sin copia local, lee la versión nueva desde la caché compartida
+        _SINGLETONS_LOCALES.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2025)
+
+    def test_sello_vencido_relee_la_bd(self):
+        ConfiguracionAcademica.objects.create(pk=1)
+        ConfiguracionAcademica.get_actual()
+        # Cambio que este proceso no ve invalidado (otro worker con su propia caché)
+        ConfiguracionAcademica.objects.filter(pk=1).update(año_actual=2030)
+        _SINGLETONS_LOCALES.clear()
+        self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2024)
+
+        vencido = time.time() + ConfiguracionAcademica.VIGENCIA_VERSION + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=vencido):
+            _SINGLETONS_LOCALES.clear()
+            self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2030)
+
+    def test_transaccion_revertida_no_deja_valores_en_cache(self):
+        ConfiguracionAcademica.get_actual()
+        try:
+            with transaction.atomic():
+                ConfiguracionAcademica.objects.update_or_create(pk=1, defaults={'semestre_actual': '2'})
+                self.assertEqual(ConfiguracionAcademica.get_actual().semestre_actual, '2')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(ConfiguracionAcademica.get_actual().semestre_actual, '1')
+
+    def test_instancia_retornada_es_una_copia(self):
+        ConfiguracionAcademica.get_actual().año_actual = 1999
+        self.assertEqual(ConfiguracionAcademica.get_actual().año_actual, 2024)
+
+
+class ContadorNoLeidosTest(TransactionTestCase):
+    """Proyección de no leídos por usuario que alimenta los badges del layout"""
+
+    def setUp(self):
+        cache.clear()
+        self.alumno = User.objects.create_user(username='alumno_badge', password='password123')
+        self.profesor = User.objects.create_user(username='profe_badge', password='password123')
+        PerfilUsuario.objects.create(user=self.alumno, rut='12.345.678-9', tipo_usuario='estudiante')
+        PerfilUsuario.objects.create(user=self.profesor, rut='12.345.679-7', tipo_usuario='profesor')
+        self.conversacion = Conversacion.objects.create(alumno=self.alumno, profesor=self.profesor)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _enviar(self, cantidad=1):
+        return [
+            Mensaje.objects.create(
+                conversacion=self.conversacion, autor=self.alumno, receptor=self.profesor, contenido=f'Hola {i}'
+            )
+            for i in range(cantidad)
+        ]
+
+    def _badges(self, usuario):
+        request = RequestFactory().get('/')
+        request.user = usuario
+        return institucion_info(request)['notificaciones']
+
+    def _assert_sin_desviacion(self, usuario):
+        fila = ContadorNoLeidos.objects.get(pk=usuario.pk)
+        self.assertEqual(
+            {'mensajes': fila.mensajes, 'notificaciones': fila.notificaciones},
+            ContadorNoLeidosService.recalcular(usuario.pk),
+        )
+
+    def test_badge_leido_desde_cache(self):
+        self._enviar(3)
+        Notificacion.crear_notificacion(self.profesor, 'info', 'Aviso')
+
+        # Primera lectura: sin fila, se reconstruye desde el origen
+        badges = self._badges(self.profesor)
+        self.assertEqual((badges['mensajes_no_leidos'], badges['notificaciones_no_leidas']), (3, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(self._badges(self.profesor)['mensajes_no_leidos'], 3)
+
+        # Un envío invalida la caché; la relectura es una búsqueda por clave primaria
+        self._enviar()
+        with self.assertNumQueries(1):
+            self.assertEqual(self._badges(self.profesor)['mensajes_no_leidos'], 4)
+
+    def test_cache_de_otro_worker_vence_pronto(self):
+        self._enviar(2)
+        self.assertEqual(self._badges(self.profesor)['mensajes_no_leidos'], 2)
+        # Un delta aplicado por otro proceso, sin invalidar esta caché
+        ContadorNoLeidos.objects.filter(pk=self.profesor.pk).update(mensajes=5)
+        self.assertEqual(self._badges(self.profesor)['mensajes_no_leidos'], 2)
+
+        vencido = time.time() + ContadorNoLeidosService.DURACION_CACHE + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=vencido):
+            self.assertEqual(self._badges(self.profesor)['mensajes_no_leidos'], 5)
+
+    def test_envio_y_lectura_aplican_deltas(self):
+        mensajes = self._enviar(4)
+        ContadorNoLeidosService.obtener(self.profesor)
+
+        mensajes[0].marcar_como_leido(self.profesor)
+        mensajes[1].delete()
+        self.assertEqual(ContadorNoLeidosService.obtener(self.profesor)['mensajes'], 2)
+
+        # Abrir la conversación marca el resto con un UPDATE masivo
+        self.client.force_login(self.profesor)
+        self.client.get(reverse('mensajeria:conversacion_detail', args=[self.conversacion.id]))
+        self.assertEqual(ContadorNoLeidosService.obtener(self.profesor)['mensajes'], 0)
+        self.assertEqual(ContadorNoLeidosService.obtener(self.alumno)['mensajes'], 0)
+        self._assert_sin_desviacion(self.profesor)
+
+    def test_notificaciones_aplican_deltas(self):
+        notificaciones = [Notificacion.crear_notificacion(self.alumno, 'info', f'Aviso {i}') for i in range(3)]
+        ContadorNoLeidosService.obtener(self.alumno)
+
+        notificacion = Notificacion.objects.get(pk=notificaciones[0].pk)
+        notificacion.leida = True
+        notificacion.save()
+        notificacion.save()
+        self.assertEqual(ContadorNoLeidosService.obtener(self.alumno)['notificaciones'], 2)
+
+        self.client.force_login(self.alumno)
+        self.client.get(reverse('marcar_todas_leidas'))
+        self.assertEqual(ContadorNoLeidosService.obtener(self.alumno)['notificaciones'], 0)
+        self._assert_sin_desviacion(self.alumno)
+
+    def test_transaccion_revertida_no_altera_el_contador(self):
+        self._enviar()
+        ContadorNoLeidosService.obtener(self.profesor)
+        try:
+            with transaction.atomic():
+                self._enviar(2)
+                self.assertEqual(ContadorNoLeidosService.obtener(self.profesor)['mensajes'], 3)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(ContadorNoLeidosService.obtener(self.profesor)['mensajes'], 1)
+
+
+
+class GetCondicionalTest(TestCase):
+    """ETag / Last-Modified y 304 en los endpoints JSON consultados periódicamente"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='alumno_etag', password='password123')
+        self.client.force_login(self.usuario)
+        Notificacion.crear_notificacion(self.usuario, 'info', 'Bienvenida')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_notificaciones_json_responde_304_sin_cambios(self):
+        url = reverse('notificaciones_json')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(3):  # Sesión, usuario y versión: sin leer las notificaciones
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        # Marcar como leída, crear o eliminar cambian la versión
+        Notificacion.objects.update(leida=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Otro usuario con el mismo ETag no recibe 304
+        otro = User.objects.create_user(username='otro_etag', password='password123')
+        self.client.force_login(otro)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_if_modified_since(self):
+        url = reverse('notificaciones_json')
+        modificado = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=modificado).status_code, 304)
+
+        # Un cambio en el mismo segundo igual mueve Last-Modified
+        Notificacion.crear_notificacion(self.usuario, 'info', 'Otra')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modificado)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(modificado))
+
+    def test_metricas_de_aciertos(self):
+        url = reverse('notificaciones_json')
+        etag = self.client.get(url)['ETag']
+        for _ in range(3):
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        metricas = MetricasCondicionales.estadisticas(['notificaciones_json'])['notificaciones_json']
+        self.assertEqual((metricas['aciertos'], metricas['fallos']), (3, 1))
+        self.assertEqual(metricas['tasa_aciertos'], 0.75)
+        self.assertEqual(metricas['bytes_ahorrados'], 3 * len(self.client.get(url).content))
+
+        MetricasCondicionales.reiniciar(['notificaciones_json'])
+        self.assertIsNone(MetricasCondicionales.estadisticas(['notificaciones_json'])['notificaciones_json']['tasa_aciertos'])
+
+
+class CorreoServiceTest(TestCase):
+    """Tests de la bandeja de salida de correos"""
+
+    def test_encolar_omite_vacios_y_repetidos(self):
+        encolados = CorreoService.encolar(['a@liceo.cl', '', 'b@liceo.cl', 'a@liceo.cl'], 'Aviso', 'Texto')
+        self.assertEqual(encolados, 2)
+        self.assertEqual(
+            sorted(CorreoSaliente.objects.values_list('destinatario', flat=True)), ['a@liceo.cl', 'b@liceo.cl']
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_enviar_pendientes_en_lotes(self):
+        CorreoService.encolar([f'{i}@liceo.cl' for i in range(5)], 'Aviso', 'Texto')
+        self.assertEqual(CorreoService.enviar_pendientes(tamano_lote=2), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(CorreoSaliente.objects.exclude(estado='enviado').exists())
+        # Los ya enviados no se repiten
+        self.assertEqual(CorreoService.enviar_pendientes(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='core.tests.BackendConFallos')
+    def test_reintentos_con_espera_y_rechazos(self):
+        CorreoService.encolar(['ok@liceo.cl', 'caido@liceo.cl', 'rechazado@liceo.cl'], 'Aviso', 'Texto')
+        self.assertEqual(CorreoService.enviar_pendientes(), (1, 2))
+
+        estados = {c.destinatario: c for c in CorreoSaliente.objects.all()}
+        self.assertEqual(estados['ok@liceo.cl'].estado, 'enviado')
+        # Dirección rechazada: no se reintenta
+        self.assertEqual(estados['rechazado@liceo.cl'].estado, 'error')
+        caido = estados['caido@liceo.cl']
+        self.assertEqual((caido.estado, caido.intentos), ('pendiente', 1))
+        self.assertIn('SMTPDataError', caido.error)
+        self.assertGreater(caido.proximo_intento, timezone.now() + timedelta(seconds=CorreoService.ESPERA_BASE - 5))
+        # Aún no vence
+        self.assertEqual(CorreoService.enviar_pendientes(), (0, 0))
+
+        for intento in range(2, CorreoService.MAX_INTENTOS + 1):
+            CorreoSaliente.objects.filter(pk=caido.pk).update(proximo_intento=timezone.now())
+            self.assertEqual(CorreoService.enviar_pendientes(), (0, 1))
+        caido.refresh_from_db()
+        self.assertEqual((caido.estado, caido.intentos), ('error', CorreoService.MAX_INTENTOS))
+
+    @override_settings(EMAIL_BACKEND='core.tests.BackendServidorCaido')
+    def test_servidor_caido_no_gasta_reintentos_de_los_no_intentados(self):
+        CorreoService.encolar(['a@liceo.cl', 'b@liceo.cl', 'c@liceo.cl'], 'Aviso', 'Texto')
+        self.assertEqual(CorreoService.enviar_pendientes(), (0, 1))
+
+        intentado, *resto = CorreoSaliente.objects.order_by('id')
+        self.assertEqual(intentado.intentos, 1)
+        self.assertIn('SMTPServerDisconnected', intentado.error)
+        # Los demás no llegaron a intentarse: sin intento contado y disponibles de inmediato
+        self.assertEqual([(c.intentos, c.error) for c in resto], [(0, ''), (0, '')])
+        self.assertFalse(CorreoSaliente.objects.filter(pk__in=[c.pk for c in resto], proximo_intento__gt=timezone.now()).exists())
+
+    def test_reserva_vencida_se_retoma(self):
+        CorreoService.encolar(['a@liceo.cl'], 'Aviso', 'Texto')
+        # Un worker reservó el lote y murió antes de registrar el resultado
+        self.assertEqual(len(CorreoService._reservar_lote(10)), 1)
+        self.assertEqual(CorreoService.enviar_pendientes(), (0, 0))
+        CorreoSaliente.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(CorreoService.enviar_pendientes(), (1, 0))
+
+
+class BackendConFallos(locmem.EmailBackend):
+    """Backend de prueba: rechaza 'rechazado@' y falla de forma transitoria con 'caido@'"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith('rechazado@'):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No existe')})
+            if message.to[0].startswith('caido@'):
+                raise smtplib.SMTPDataError(451, b'Intente luego')
+        return super().send_messages(messages)
+
+
+class BackendServidorCaido(locmem.EmailBackend):
+    """Backend de prueba: el servidor se cae en el primer envío y no acepta reconexiones"""
+
+    def open(self):
+        if getattr(self, 'caido', False):
+            raise ConnectionRefusedError('Conexión rechazada')
+        return super().open()
+
+    def send_messages(self, messages):
+        self.caido = True
+        raise smtplib.SMTPServerDisconnected('Conexión perdida')
+
+
+class AlmacenamientoDeduplicadoTest(TestCase):
+    """Tests del almacenamiento de archivos direccionado por contenido"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.almacenamiento = AlmacenamientoDeduplicado(location=self.media)
+
+    def test_contenido_repetido_comparte_blob(self):
+        a = self.almacenamiento.save('recursos/guia.pdf', ContentFile(b'%PDF-1.4 guia'))
+        b = self.almacenamiento.save('recursos/guia.pdf', ContentFile(b'%PDF-1.4 guia'))
+        otro = self.almacenamiento.save('recursos/otra.pdf', ContentFile(b'%PDF-1.4 otra'))
+
+        self.assertNotEqual(a, b)
+        self.assertEqual(os.stat(self.almacenamiento.path(a)).st_ino, os.stat(self.almacenamiento.path(b)).st_ino)
+        self.assertNotEqual(os.stat(self.almacenamiento.path(a)).st_ino, os.stat(self.almacenamiento.path(otro)).st_ino)
+        with self.almacenamiento.open(b) as archivo:
+            self.assertEqual(archivo.read(), b'%PDF-1.4 guia')
+        self.assertEqual(sorted(ArchivoBlob.objects.values_list('referencias', flat=True)), [1, 2])
+
+    def test_el_blob_se_elimina_con_la_ultima_referencia(self):
+        a = self.almacenamiento.save('recursos/guia.pdf', ContentFile(b'guia'))
+        b = self.almacenamiento.save('recursos/guia.pdf', ContentFile(b'guia'))
+        blob = ArchivoBlob.objects.get()
+
+        self.almacenamiento.delete(a)
+        self.assertEqual(ArchivoBlob.objects.get().referencias, 1)
+        self.assertTrue(os.path.exists(self.almacenamiento.ruta_blob(blob.sha256)))
+
+        self.almacenamiento.delete(b)
+        self.assertFalse(ArchivoBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.almacenamiento.ruta_blob(blob.sha256)))
+
+    def test_deduplicar_archivos_existentes(self):
+        categoria = CategoriaDocumento.objects.create(nombre='Guías')
+        autor = User.objects.create_user(username='autor_dedup')
+        os.makedirs(os.path.join(self.media, 'documentos'))
+        for nombre, contenido in [('a.pdf', b'x' * 1000), ('b.pdf', b'x' * 1000), ('c.pdf', b'y' * 10)]:
+            with open(os.path.join(self.media, 'documentos', nombre), 'wb') as archivo:
+                archivo.write(contenido)
+            Documento.objects.create(
+                titulo=nombre, archivo=f'documentos/{nombre}', categoria=categoria, creado_por=autor
+            )
+        Documento.objects.create(titulo='perdido', archivo='documentos/perdido.pdf', categoria=categoria, creado_por=autor)
+
+        self.assertEqual(
+            deduplicar(apps.get_model, ArchivoBlob, self.almacenamiento, simular=True)['bytes_recuperados'], 1000
+        )
+        self.assertFalse(ArchivoBlob.objects.exists())
+
+        reporte = deduplicar(apps.get_model, ArchivoBlob, self.almacenamiento)
+        self.assertEqual(reporte, {
+            'archivos': 3, 'blobs': 2, 'enlazados': 1, 'bytes_recuperados': 1000, 'faltantes': 1,
+        })
+        ruta = os.path.join(self.media, 'documentos')
+        self.assertEqual(os.stat(os.path.join(ruta, 'a.pdf')).st_ino, os.stat(os.path.join(ruta, 'b.pdf')).st_ino)
+        self.assertEqual(sorted(ArchivoBlob.objects.values_list('referencias', flat=True)), [1, 2])
+        # Volver a correrlo no encuentra nada nuevo
+        self.assertEqual(deduplicar(apps.get_model, ArchivoBlob, self.almacenamiento)['enlazados'], 0)
+
+    def test_eliminar_la_fila_libera_el_archivo_y_el_blob(self):
+        categoria = CategoriaDocumento.objects.create(nombre='Guías')
+        autor = User.objects.create_user(username='autor_borrado')
+        with override_settings(MEDIA_ROOT=self.media):
+            documentos = [
+                Documento.objects.create(titulo=f'Guía {i}', archivo=ContentFile(b'%PDF guia', name='guia.pdf'),
+                                         categoria=categoria, creado_por=autor)
+                for i in range(2)
+            ]
+            rutas = [documento.archivo.path for documento in documentos]
+            blob = ArchivoBlob.objects.get()
+            self.assertEqual(blob.referencias, 2)
+
+            # Hasta confirmar la transacción el archivo sigue en su lugar
+            with self.captureOnCommitCallbacks() as callbacks:
+                documentos[0].delete()
+            self.assertEqual(len(callbacks), 1)
+            self.assertTrue(os.path.exists(rutas[0]))
+
+            for callback in callbacks:
+                callback()
+            self.assertFalse(os.path.exists(rutas[0]))
+            self.assertEqual(ArchivoBlob.objects.get().referencias, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                documentos[1].delete()
+            self.assertFalse(os.path.exists(rutas[1]))
+            self.assertFalse(ArchivoBlob.objects.exists())
+            self.assertFalse(os.path.exists(self.almacenamiento.ruta_blob(blob.sha256)))
@@ -3,6 +3,8 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from comunicacion.models import Noticia
 from .models import ConfiguracionAcademica, ConfiguracionSistema
+from .condicional import get_condicional
+from .services import ContadorNoLeidosService
 
 def home(request):
     noticias_destacadas = Noticia.objects.filter(es_publica=True, destacado=True).order_by('-creado')[:3]
@@ -76,6 +78,7 @@ from django.http import JsonResponse
 from .models import Notificacion
 
 @login_required
+@get_condicional('notificaciones_json', lambda request: Notificacion.version(request.user))
 def notificaciones_json(request):
     """API JSON para obtener las últimas notificaciones del usuario"""
     notificaciones = Notificacion.objects.filter(
@@ -93,7 +96,7 @@ def notificaciones_json(request):
         'fecha': n.created_at.strftime('%d/%m %H:%M'),
     } for n in notificaciones]
     
-    no_leidas = Notificacion.no_leidas_count(request.user)
+    no_leidas = ContadorNoLeidosService.obtener(request.user)['notificaciones']
     
     return JsonResponse({
         'notificaciones': data,
@@ -117,5 +120,6 @@ def marcar_notificacion_leida(request, notificacion_id):
 @login_required
 def marcar_todas_leidas(request):
     """Marca todas las notificaciones como leídas"""
-    Notificacion.objects.filter(usuario=request.user, leida=False).update(leida=True)
+    marcadas = Notificacion.objects.filter(usuario=request.user, leida=False).update(leida=True)
+    ContadorNoLeidosService.sumar(request.user.pk, notificaciones=-marcadas)
     return JsonResponse({'success': True})
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0003_documento_curso'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documento',
+            name='archivo',
+            field=models.FileField(blank=True, null=True, storage=core.storage.almacenamiento_deduplicado, upload_to='documentos/'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
+from core.storage import almacenamiento_deduplicado
 
 class CategoriaDocumento(models.Model):
     """Categorías de documentos institucionales"""
@@ -41,7 +42,7 @@ class Documento(models.Model):
     
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField(blank=True)
-    archivo = models.FileField(upload_to='documentos/', null=True, blank=True)
+    archivo = models.FileField(upload_to='documentos/', storage=almacenamiento_deduplicado, null=True, blank=True)
     categoria = models.ForeignKey(CategoriaDocumento, on_delete=models.CASCADE, related_name='documentos')
     curso = models.ForeignKey('academico.Curso', on_delete=models.SET_NULL, null=True, blank=True, related_name='documentos', help_text="Curso al que pertenece el documento (opcional)")
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, default='pdf')
@@ -20,7 +20,7 @@ class ConversacionAdmin(admin.ModelAdmin):
         'alumno', 
         'profesor', 
         'creado_en', 
-        'get_total_mensajes',
+        'total_mensajes',
         'no_leidos_alumno', 
         'no_leidos_profesor',
         'ultimo_mensaje_en'
@@ -40,7 +40,10 @@ class ConversacionAdmin(admin.ModelAdmin):
         'actualizado_en',
         'ultimo_mensaje_en', 
         'no_leidos_alumno', 
-        'no_leidos_profesor'
+        'no_leidos_profesor',
+        'ultimo_leido_alumno',
+        'ultimo_leido_profesor',
+        'total_mensajes'
     ]
     date_hierarchy = 'creado_en'
     
@@ -48,12 +51,6 @@ class ConversacionAdmin(admin.ModelAdmin):
         """Query optimizado con anotaciones"""
         qs = super().get_queryset(request)
         return qs.select_related('alumno', 'profesor')
-    
-    def get_total_mensajes(self, obj):
-        """Cuenta total de mensajes en la conversación"""
-        return obj.mensajes.count()
-    get_total_mensajes.short_description = 'Total mensajes'
-    get_total_mensajes.admin_order_field = 'mensajes__count'
 
 
 @admin.register(Mensaje)
@@ -65,12 +62,11 @@ class MensajeAdmin(admin.ModelAdmin):
         'get_conversacion_display',
         'contenido_preview',
         'get_adjunto_info',
-        'leido',
+        'get_leido_display',
         'fecha_creacion'
     ]
     list_filter = [
         'fecha_creacion',
-        'leido',
         'conversacion__alumno',
         'conversacion__profesor'
     ]
@@ -83,7 +79,6 @@ class MensajeAdmin(admin.ModelAdmin):
     readonly_fields = [
         'id',
         'fecha_creacion',
-        'leido'
     ]
     date_hierarchy = 'fecha_creacion'
     
@@ -127,6 +122,11 @@ class MensajeAdmin(admin.ModelAdmin):
             )
         return '-'
     get_adjunto_info.short_description = 'Archivo adjunto'
+    
+    @admin.display(boolean=True, description='Leído')
+    def get_leido_display(self, obj):
+        """Estado derivado de la marca de lectura del receptor"""
+        return obj.leido
 
 
 @admin.register(ConfiguracionMensajeria)
@@ -188,10 +188,9 @@ class RateLimitAdmin(admin.ModelAdmin):
 @admin.action(description='Marcar todas como leídas')
 def marcar_todas_leidas(modeladmin, request, queryset):
     """Acción para marcar conversaciones como leídas"""
-    for conversacion in queryset:
-        conversacion.no_leidos_alumno = 0
-        conversacion.no_leidos_profesor = 0
-        conversacion.save(update_fields=['no_leidos_alumno', 'no_leidos_profesor'])
+    for conversacion in queryset.select_related('alumno', 'profesor'):
+        conversacion.marcar_como_leido(conversacion.alumno)
+        conversacion.marcar_como_leido(conversacion.profesor)
 
 
 @admin.action(description='Exportar estadísticas de mensajería')
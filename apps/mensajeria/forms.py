@@ -5,12 +5,11 @@ Con validaciones de CSRF, rate limiting, y sanitización
 from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.utils import timezone
 from django.db import transaction
-from django.conf import settings
 
-from academico.models import InscripcionCurso, HorarioClases
-from .models import Conversacion, Mensaje, RateLimit, ContactoColegio
+from academico.models import Curso, InscripcionCurso, HorarioClases
+from .models import Conversacion, Mensaje, ContactoColegio
+from .services import RateLimitService
 
 
 class BusquedaConversacionForm(forms.Form):
@@ -30,6 +29,21 @@ class BusquedaConversacionForm(forms.Form):
         return busqueda.strip()
 
 
+class BusquedaMensajesForm(forms.Form):
+    """Búsqueda de texto completo en asunto y contenido de los mensajes"""
+    q = forms.CharField(
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'placeholder': 'Buscar en los mensajes...',
+            'class': 'form-control'
+        })
+    )
+    
+    def clean_q(self):
+        return self.cleaned_data.get('q', '').strip()
+
+
 class NuevaConversacionForm(forms.Form):
     """Formulario para crear nueva conversación con rate limiting"""
     destinatario = forms.ModelChoiceField(
@@ -96,42 +110,9 @@ class NuevaConversacionForm(forms.Form):
         
         return destinatario
     
-    @transaction.atomic
     def _verificar_rate_limit(self, usuario, tipo_accion):
-        """Verifica límites de tasa para prevenir DoS"""
-        # Limpiar registros antiguos (más de 1 hora)
-        una_hora_atras = timezone.now() - timezone.timedelta(hours=1)
-        RateLimit.objects.filter(
-            usuario=usuario,
-            tipo_accion=tipo_accion,
-            timestamp__lt=una_hora_atras
-        ).delete()
-        
-        # Contar solicitudes en la última hora
-        solicitudes_recientes = RateLimit.objects.filter(
-            usuario=usuario,
-            tipo_accion=tipo_accion,
-            timestamp__gte=una_hora_atras
-        ).count()
-        
-        # Límite: 10 conversaciones por hora
-        if solicitudes_recientes >= 10:
-            # Registrar intento
-            RateLimit.objects.create(
-                usuario=usuario,
-                tipo_accion=tipo_accion,
-                ip_address='127.0.0.1'  # En producción, obtener IP real
-            )
-            return True
-        
-        # Registrar esta solicitud
-        RateLimit.objects.create(
-            usuario=usuario,
-            tipo_accion=tipo_accion,
-            ip_address='127.0.0.1'
-        )
-        
-        return False
+        """Verifica límites de tasa para prevenir DoS (por defecto, 10 conversaciones por hora)"""
+        return RateLimitService.excedido(usuario, tipo_accion)
     
     @transaction.atomic
     def save(self, usuario=None):
@@ -232,28 +213,18 @@ class MensajeForm(forms.ModelForm):
         
         return adjunto
 
+    def clean(self):
+        """Límite de mensajes por minuto, solo para envíos por lo demás válidos"""
+        cleaned_data = super().clean()
+        if self.usuario and not self.errors and RateLimitService.excedido(self.usuario, 'mensaje'):
+            raise ValidationError("Demasiados mensajes enviados. Espera un momento.")
+        return cleaned_data
+
     def _verificar_rate_limit_archivos(self):
-        """Verifica límites de archivos por minuto"""
-        un_minuto_atras = timezone.now() - timezone.timedelta(minutes=1)
-        
-        archivos_recientes = RateLimit.objects.filter(
-            usuario=self.usuario,
-            tipo_accion='archivo',
-            timestamp__gte=un_minuto_atras
-        ).count()
-        
+        """Verifica límites de archivos por minuto (configurable por usuario)"""
         config = getattr(self.usuario, 'config_mensajeria', None)
-        limite = config.limite_adjuntos_por_minuto if config else 5
-        
-        if archivos_recientes >= limite:
-            RateLimit.objects.create(
-                usuario=self.usuario,
-                tipo_accion='archivo',
-                ip_address='127.0.0.1'
-            )
-            return True
-        
-        return False
+        limite = config.limite_adjuntos_por_minuto if config else None
+        return RateLimitService.excedido(self.usuario, 'archivo', limite)
 
 
 class ProfesorMensajeForm(forms.Form):
@@ -311,35 +282,54 @@ class ProfesorMensajeForm(forms.Form):
         """Verifica límites de mensajes por minuto"""
         if not self.profesor:
             return False
+        return RateLimitService.excedido(self.profesor, 'mensaje')
 
-        un_minuto_atras = timezone.now() - timezone.timedelta(minutes=1)
-        
-        mensajes_recientes = RateLimit.objects.filter(
-            usuario=self.profesor,
-            tipo_accion='mensaje',
-            timestamp__gte=un_minuto_atras
-        ).count()
-        
-        # Límite: 20 mensajes por minuto
-        if mensajes_recientes >= 20:
-            RateLimit.objects.create(
-                usuario=self.profesor,
-                tipo_accion='mensaje',
-                ip_address='127.0.0.1'
-            )
-            return True
-        
-        return False
-    
-    # save() no se usa en la vista (se maneja manual), pero si se usara, debería actulizar rate limit
-    def registrar_actividad(self):
-        """Helper para registrar actividad de rate limit al guardar manualmente"""
-        if self.profesor:
-            RateLimit.objects.create(
-                usuario=self.profesor,
-                tipo_accion='mensaje',
-                ip_address='127.0.0.1'
-            )
+
+class ProfesorDifusionForm(forms.Form):
+    """Mensaje de un profesor a cursos completos o a todos sus estudiantes"""
+    cursos = forms.ModelMultipleChoiceField(
+        queryset=Curso.objects.none(),
+        required=False,
+        widget=forms.CheckboxSelectMultiple
+    )
+    todos_mis_estudiantes = forms.BooleanField(
+        required=False,
+        label='Todos mis estudiantes',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    asunto = forms.CharField(
+        max_length=150,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Asunto del mensaje'})
+    )
+    contenido = forms.CharField(
+        max_length=1000,
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Contenido del mensaje'})
+    )
+    copia_correo = forms.BooleanField(
+        required=False,
+        label='Enviar también una copia por correo',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        profesor = kwargs.pop('profesor', None)
+        super().__init__(*args, **kwargs)
+        self.profesor = profesor
+
+        if profesor:
+            cursos_profesor = HorarioClases.objects.filter(profesor=profesor).values('curso_id')
+            self.fields['cursos'].queryset = Curso.objects.filter(id__in=cursos_profesor)
+
+    def clean(self):
+        """Exige al menos un destino y aplica el límite de difusiones, solo a envíos por lo demás válidos"""
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        if not cleaned_data.get('cursos') and not cleaned_data.get('todos_mis_estudiantes'):
+            raise ValidationError("Selecciona al menos un curso o todos tus estudiantes.")
+        if self.profesor and RateLimitService.excedido(self.profesor, 'difusion'):
+            raise ValidationError("Demasiados envíos masivos. Intenta en unos minutos.")
+        return cleaned_data
 
 
 class PaginacionForm(forms.Form):
@@ -0,0 +1,19 @@
+"""
+Management command: reindexar_mensajes
+Reconstruye el índice de búsqueda de texto completo de los mensajes. Los
+guardados normales lo mantienen al día; hace falta tras cargas con
+bulk_create o importaciones directas a la BD.
+
+Uso:
+    python manage.py reindexar_mensajes
+"""
+from django.core.management.base import BaseCommand
+from mensajeria.services import BusquedaMensajesService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto completo de los mensajes'
+
+    def handle(self, *args, **options):
+        total = BusquedaMensajesService.reindexar()
+        self.stdout.write(self.style.SUCCESS(f"{total} mensajes indexados."))
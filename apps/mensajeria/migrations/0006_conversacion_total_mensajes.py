@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def poblar_total_mensajes(apps, schema_editor):
+    """Cuenta los mensajes existentes de cada conversación"""
+    Conversacion = apps.get_model('mensajeria', 'Conversacion')
+    Mensaje = apps.get_model('mensajeria', 'Mensaje')
+    totales = Mensaje.objects.filter(conversacion=OuterRef('pk')).order_by().values('conversacion').annotate(
+        cantidad=Count('id')
+    ).values('cantidad')
+    Conversacion.objects.update(total_mensajes=Coalesce(Subquery(totales), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mensajeria', '0005_delete_configuracionsistema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversacion',
+            name='total_mensajes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(poblar_total_mensajes, migrations.RunPython.noop),
+    ]
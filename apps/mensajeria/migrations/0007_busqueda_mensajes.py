@@ -0,0 +1,47 @@
+from django.db import migrations
+
+from mensajeria.utils import normalizar_busqueda
+
+TABLA = 'mensajeria_mensaje_busqueda'
+
+
+def crear_indice(apps, schema_editor):
+    """Crea el índice de texto completo según el motor y lo llena con los mensajes existentes"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {TABLA} USING fts5(texto, tokenize='unicode61')")
+        insertar = f"INSERT INTO {TABLA} (rowid, texto) VALUES (%s, %s)"
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {TABLA} ("
+            "mensaje_id bigint PRIMARY KEY REFERENCES mensajeria_mensaje (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "documento tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {TABLA}_documento_idx ON {TABLA} USING GIN (documento)")
+        insertar = f"INSERT INTO {TABLA} (mensaje_id, documento) VALUES (%s, to_tsvector('simple', %s))"
+    else:
+        return
+
+    Mensaje = apps.get_model('mensajeria', 'Mensaje')
+    filas = [
+        (pk, ' '.join(normalizar_busqueda(f"{asunto} {contenido}")))
+        for pk, asunto, contenido in Mensaje.objects.values_list('id', 'asunto', 'contenido').iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(insertar, filas)
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mensajeria', '0006_conversacion_total_mensajes'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mensajeria', '0007_busqueda_mensajes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mensaje',
+            name='adjunto',
+            field=models.FileField(blank=True, null=True, storage=core.storage.almacenamiento_deduplicado, upload_to='mensajeria/adjuntos/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'], message='Solo se permiten archivos PDF, JPG, PNG, DOC, DOCX')]),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:01
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+PARTICIPANTES = ('alumno', 'profesor')
+
+
+def calcular_marcas(apps, schema_editor):
+    """
+    Marca de cada participante: el mensaje anterior a su primer recibido sin
+    leer o, si leyó todo, el último recibido. Los leídos sueltos después de
+    esa marca vuelven a contar como no leídos; el contador se recalcula
+    desde la marca y los totales por usuario se reconstruyen al leerlos.
+    """
+    Conversacion = apps.get_model('mensajeria', 'Conversacion')
+    Mensaje = apps.get_model('mensajeria', 'Mensaje')
+    ContadorNoLeidos = apps.get_model('core', 'ContadorNoLeidos')
+    for participante in PARTICIPANTES:
+        recibidos = Mensaje.objects.filter(conversacion=OuterRef('pk'), receptor=OuterRef(participante)).order_by()
+        primero_no_leido = recibidos.filter(leido=False).order_by('pk').values('pk')[:1]
+        ultimo = recibidos.order_by('-pk').values('pk')[:1]
+        Conversacion.objects.update(**{f'ultimo_leido_{participante}': Coalesce(
+            Subquery(primero_no_leido) - 1, Subquery(ultimo), 0, output_field=models.PositiveBigIntegerField()
+        )})
+        pendientes = recibidos.filter(pk__gt=OuterRef(f'ultimo_leido_{participante}')).values(
+            'conversacion'
+        ).annotate(cantidad=Count('id')).values('cantidad')
+        Conversacion.objects.update(**{f'no_leidos_{participante}': Coalesce(Subquery(pendientes), 0)})
+    ContadorNoLeidos.objects.all().delete()
+
+
+def restaurar_leidos(apps, schema_editor):
+    Mensaje = apps.get_model('mensajeria', 'Mensaje')
+    Mensaje.objects.filter(
+        Q(receptor=F('conversacion__alumno'), pk__lte=F('conversacion__ultimo_leido_alumno'))
+        | Q(receptor=F('conversacion__profesor'), pk__lte=F('conversacion__ultimo_leido_profesor'))
+    ).update(leido=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_contadornoleidos'),
+        ('mensajeria', '0008_alter_mensaje_adjunto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversacion',
+            name='ultimo_leido_alumno',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversacion',
+            name='ultimo_leido_profesor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_marcas, restaurar_leidos),
+        migrations.RemoveField(
+            model_name='mensaje',
+            name='leido',
+        ),
+    ]
@@ -3,11 +3,16 @@ Sistema de mensajería interna seguro para alumno-profesor
 Cumple con todos los requisitos de seguridad, concurrencia y validaciones
 """
 from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from core.services import ContadorNoLeidosService
+from core.storage import almacenamiento_deduplicado
+from .utils import firma_coincide
 
 
 class Conversacion(models.Model):
@@ -32,6 +37,10 @@ class Conversacion(models.Model):
     ultimo_mensaje_en = models.DateTimeField(null=True, blank=True)
     no_leidos_alumno = models.PositiveIntegerField(default=0)
     no_leidos_profesor = models.PositiveIntegerField(default=0)
+    # Marca de lectura: id del último mensaje leído por cada participante
+    ultimo_leido_alumno = models.PositiveBigIntegerField(default=0)
+    ultimo_leido_profesor = models.PositiveBigIntegerField(default=0)
+    total_mensajes = models.PositiveIntegerField(default=0)
     
     class Meta:
         # PREVIENE duplicados de conversación alumno-profesor
@@ -72,16 +81,50 @@ class Conversacion(models.Model):
             return self.no_leidos_profesor
         return 0
     
+    def campos_lectura(self, usuario_id):
+        """Retorna (marca de lectura, contador de no leídos) del participante"""
+        if usuario_id == self.alumno_id:
+            return 'ultimo_leido_alumno', 'no_leidos_alumno'
+        elif usuario_id == self.profesor_id:
+            return 'ultimo_leido_profesor', 'no_leidos_profesor'
+        raise ValueError("Usuario no participa en esta conversación")
+    
     @transaction.atomic
-    def marcar_como_leido(self, usuario):
-        """Marca conversación como leída de forma atómica"""
-        if usuario == self.alumno:
-            self.no_leidos_alumno = 0
-        elif usuario == self.profesor:
-            self.no_leidos_profesor = 0
+    def marcar_como_leido(self, usuario, hasta=None):
+        """
+        Marca como leído lo recibido por el usuario hasta el mensaje `hasta`
+        (por defecto, todo) con un solo UPDATE que avanza su marca de lectura,
+        SET ultimo_leido = MAX(ultimo_leido, hasta), y recalcula su contador.
+        Los mensajes no se tocan: su estado se deriva de la marca. Si no había
+        nada nuevo que leer no escribe. Retorna si la marca avanzó.
+
+        Los no leídos del badge (ContadorNoLeidos) bajan en la diferencia
+        entre el contador de la conversación antes y después del UPDATE; la
+        fila se bloquea al leer el valor anterior para que un envío
+        concurrente no se cuele entre ambas lecturas.
+        """
+        campo_marca, campo_contador = self.campos_lectura(usuario.pk)
+        anterior = Conversacion.objects.select_for_update().filter(pk=self.pk).values_list(
+            campo_contador, flat=True
+        ).first()
+        recibidos = Mensaje.objects.filter(conversacion=OuterRef('pk'), receptor_id=usuario.pk).order_by()
+        if hasta is None:
+            filtro = {f'{campo_contador}__gt': 0}
+            ultimo = Subquery(recibidos.order_by('-pk').values('pk')[:1])
+            cambios = {
+                campo_marca: Greatest(F(campo_marca), Coalesce(ultimo, 0), output_field=models.PositiveBigIntegerField()),
+                campo_contador: 0,
+            }
         else:
-            raise ValueError("Usuario no participa en esta conversación")
-        self.save()
+            filtro = {f'{campo_marca}__lt': hasta}
+            pendientes = recibidos.filter(pk__gt=hasta).values('conversacion').annotate(total=Count('pk'))
+            cambios = {campo_marca: hasta, campo_contador: Coalesce(Subquery(pendientes.values('total')), 0)}
+        # Solo la marca y el contador: no pisar totales que otro envío haya incrementado con F()
+        if not Conversacion.objects.filter(pk=self.pk, **filtro).update(**cambios):
+            return False
+        self.refresh_from_db(fields=[campo_marca, campo_contador])
+        ContadorNoLeidosService.sumar(usuario.pk, mensajes=getattr(self, campo_contador) - anterior)
+        return True
 
 
 class Mensaje(models.Model):
@@ -104,6 +147,7 @@ class Mensaje(models.Model):
     # Archivos adjuntos seguros
     adjunto = models.FileField(
         upload_to='mensajeria/adjuntos/',
+        storage=almacenamiento_deduplicado,
         blank=True,
         null=True,
         validators=[
@@ -114,7 +158,6 @@ class Mensaje(models.Model):
         ]
     )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
-    leido = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['fecha_creacion']
@@ -192,6 +235,11 @@ class Mensaje(models.Model):
         # Validar nombre de archivo seguro (prevenir path traversal)
         if '..' in self.adjunto.name or '/' in self.adjunto.name or '\\' in self.adjunto.name:
             raise ValidationError("Nombre de archivo no válido")
+        
+        # Validar el contenido de una subida nueva por su cabecera, sin leerla completa
+        extension = nombre_archivo.rsplit('.', 1)[-1]
+        if not self.adjunto._committed and not firma_coincide(self.adjunto.file, extension):
+            raise ValidationError("El contenido del archivo no corresponde a su extensión")
     
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -203,30 +251,37 @@ class Mensaje(models.Model):
 
         if es_nuevo:
             self._actualizar_contadores_no_leidos()
-            self.conversacion.ultimo_mensaje_en = timezone.now()
-            self.conversacion.save(update_fields=['ultimo_mensaje_en'])
     
     def _actualizar_contadores_no_leidos(self):
-        """Actualiza contadores de no leídos de forma atómica"""
+        """Actualiza contadores, total de mensajes y fecha del último mensaje en un solo UPDATE"""
         # Determinar destinatario
         if self.autor == self.conversacion.alumno:
             campo_contador = 'no_leidos_profesor'
         else:
             campo_contador = 'no_leidos_alumno'
         
-        # Incrementar contador de forma atómica
+        # Incrementar contadores de forma atómica
+        ahora = timezone.now()
         Conversacion.objects.filter(
             id=self.conversacion.id
         ).update(
+            ultimo_mensaje_en=ahora,
+            total_mensajes=models.F('total_mensajes') + 1,
             **{campo_contador: models.F(campo_contador) + 1}
         )
+        self.conversacion.ultimo_mensaje_en = ahora
+    
+    @property
+    def leido(self):
+        """Leído si no supera la marca de lectura de su receptor en la conversación"""
+        campo_marca, _ = self.conversacion.campos_lectura(self.receptor_id)
+        return self.pk is not None and self.pk <= getattr(self.conversacion, campo_marca)
     
     def marcar_como_leido(self, usuario):
-        """Marca el mensaje como leído por el destinatario"""
-        if usuario != self.receptor or self.leido:
+        """Marca como leído lo recibido por el destinatario hasta este mensaje"""
+        if usuario.pk != self.receptor_id:
             return
-        self.leido = True
-        super(Mensaje, self).save(update_fields=['leido'])
+        self.conversacion.marcar_como_leido(usuario, hasta=self.pk)
     
     def es_mio(self, usuario):
         """Verifica si el mensaje es del usuario"""
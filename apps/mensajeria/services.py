@@ -0,0 +1,638 @@
+"""
+Servicios de mensajería interna
+"""
+import asyncio
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.services import ContadorNoLeidosService, CorreoService
+from .models import Conversacion, Mensaje, RateLimit
+from .utils import normalizar_busqueda
+
+
+class LimitadorTasa(ABC):
+    """
+    Backend de límites de tasa. `permitir` registra la solicitud y retorna
+    True si está dentro del límite; una solicitud rechazada no se registra.
+    """
+
+    @abstractmethod
+    def permitir(self, usuario_id, accion, limite, ventana):
+        ...
+
+
+class LimitadorVentanaDeslizante(LimitadorTasa):
+    """
+    Contador de ventana deslizante en la caché de Django (locmem/archivo en
+    desarrollo, Redis en producción). Estima las solicitudes de los últimos
+    `ventana` segundos ponderando el contador de la ventana fija anterior por
+    la fracción que aún se solapa con la actual:
+
+        estimado = anterior * (1 - transcurrido / ventana) + actual
+
+    Cada verificación lee dos claves y, si se permite, hace un incr atómico:
+    O(1) y sin escrituras en la base de datos.
+
+    Los contadores viven en la caché, así que el límite es global solo si
+    la caché es compartida entre procesos (Redis en producción). Con
+    LocMemCache cada worker de gunicorn cuenta por su cuenta y el límite
+    real se multiplica por la cantidad de workers; sin caché compartida,
+    use LimitadorBaseDatos.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        # caches[...] es por hilo; el limitador se comparte en todo el proceso
+        return caches[self.alias]
+
+    @staticmethod
+    def _clave(usuario_id, accion, numero_ventana):
+        return f"rate_limit:{accion}:{usuario_id}:{numero_ventana}"
+
+    def permitir(self, usuario_id, accion, limite, ventana):
+        ahora = time.time()
+        numero_ventana, transcurrido = divmod(ahora, ventana)
+        clave_actual = self._clave(usuario_id, accion, int(numero_ventana))
+        clave_anterior = self._clave(usuario_id, accion, int(numero_ventana) - 1)
+
+        contadores = self.cache.get_many([clave_actual, clave_anterior])
+        estimado = (contadores.get(clave_anterior, 0) * (1 - transcurrido / ventana)
+                    + contadores.get(clave_actual, 0))
+        if estimado >= limite:
+            return False
+
+        # La clave vive dos ventanas: la actual y la siguiente, donde actúa como "anterior"
+        if not self.cache.add(clave_actual, 1, timeout=2 * ventana):
+            try:
+                self.cache.incr(clave_actual)
+            except ValueError:
+                # Expiró entre add e incr
+                self.cache.set(clave_actual, 1, timeout=2 * ventana)
+        return True
+
+
+class LimitadorBaseDatos(LimitadorTasa):
+    """
+    Backend sobre la tabla RateLimit (un DELETE, un COUNT y un INSERT por
+    solicitud). Se mantiene como alternativa sin caché compartida y como
+    referencia en scripts/benchmarks/bench_rate_limit.py.
+    """
+
+    @transaction.atomic
+    def permitir(self, usuario_id, accion, limite, ventana):
+        desde = timezone.now() - timezone.timedelta(seconds=ventana)
+        registros = RateLimit.objects.filter(usuario_id=usuario_id, tipo_accion=accion)
+        registros.filter(timestamp__lt=desde).delete()
+        if registros.count() >= limite:
+            return False
+        RateLimit.objects.create(usuario_id=usuario_id, tipo_accion=accion, ip_address='127.0.0.1')
+        return True
+
+
+@lru_cache(maxsize=None)
+def _limitador(ruta_backend):
+    return import_string(ruta_backend)()
+
+
+class RateLimitService:
+    """
+    Límites de tasa por usuario para las acciones de mensajería. El backend
+    (MENSAJERIA_RATE_LIMIT_BACKEND) y los límites por acción
+    (MENSAJERIA_RATE_LIMITS: {accion: (máximo, ventana en segundos)}) se
+    configuran en settings.
+
+    Uso:
+        if RateLimitService.excedido(usuario, 'mensaje'):
+            raise ValidationError(...)
+    """
+
+    @staticmethod
+    def limitador():
+        return _limitador(settings.MENSAJERIA_RATE_LIMIT_BACKEND)
+
+    @staticmethod
+    def excedido(usuario, accion, limite=None):
+        """
+        Registra la acción y retorna True si el usuario superó su límite.
+        `limite` reemplaza el máximo configurado (0 bloquea la acción).
+        """
+        maximo, ventana = settings.MENSAJERIA_RATE_LIMITS[accion]
+        limite = maximo if limite is None else limite
+        return not RateLimitService.limitador().permitir(usuario.pk, accion, limite, ventana)
+
+
+@dataclass
+class PaginaCursor:
+    object_list: list
+    siguiente: str = None
+    anterior: str = None
+
+    @property
+    def has_next(self):
+        return self.siguiente is not None
+
+    @property
+    def has_previous(self):
+        return self.anterior is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class PaginadorCursor:
+    """
+    Paginación por cursor (keyset) sobre (fecha_creacion, id) en orden
+    descendente. En vez de OFFSET y COUNT(*), cada página filtra a partir del
+    último (o primer) mensaje de la anterior, de modo que aprovecha los índices
+    (conversacion|receptor|autor, fecha_creacion) y la página N cuesta lo mismo
+    que la primera.
+
+    Los cursores son opacos y firmados; uno inválido o manipulado vuelve a la
+    primera página.
+
+    Uso:
+        pagina = PaginadorCursor(mensajes, 20).pagina(request.GET.get('cursor'))
+        pagina.object_list, pagina.siguiente, pagina.anterior
+    """
+
+    SALT = 'mensajeria.cursor'
+
+    def __init__(self, queryset, por_pagina, campo='fecha_creacion'):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.campo = campo
+
+    def _cursor(self, objeto, direccion):
+        return signing.dumps([getattr(objeto, self.campo).isoformat(), objeto.pk, direccion], salt=self.SALT)
+
+    def _decodificar(self, cursor):
+        try:
+            fecha, pk, direccion = signing.loads(cursor, salt=self.SALT)
+            return datetime.fromisoformat(fecha), int(pk), direccion
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+
+    def pagina(self, cursor=None):
+        posicion = self._decodificar(cursor) if cursor else None
+        campo = self.campo
+
+        if posicion is None:
+            filas = list(self.queryset.order_by(f'-{campo}', '-pk')[:self.por_pagina + 1])
+            hay_mas, filas = len(filas) > self.por_pagina, filas[:self.por_pagina]
+            return PaginaCursor(filas, siguiente=self._cursor(filas[-1], 'sig') if hay_mas else None)
+
+        fecha, pk, direccion = posicion
+        if direccion == 'ant':
+            # Mensajes más recientes que el cursor: se leen en orden ascendente y se invierten
+            filas = list(self.queryset.filter(
+                Q(**{f'{campo}__gt': fecha}) | Q(**{campo: fecha, 'pk__gt': pk}), **{f'{campo}__gte': fecha}
+            ).order_by(campo, 'pk')[:self.por_pagina + 1])
+            hay_mas, filas = len(filas) > self.por_pagina, filas[:self.por_pagina][::-1]
+            if not filas:
+                return self.pagina()
+            return PaginaCursor(
+                filas,
+                siguiente=self._cursor(filas[-1], 'sig'),
+                anterior=self._cursor(filas[0], 'ant') if hay_mas else None,
+            )
+
+        # El límite {campo}__lte acota el rango en el índice; el OR desempata por id
+        filas = list(self.queryset.filter(
+            Q(**{f'{campo}__lt': fecha}) | Q(**{campo: fecha, 'pk__lt': pk}), **{f'{campo}__lte': fecha}
+        ).order_by(f'-{campo}', '-pk')[:self.por_pagina + 1])
+        hay_mas, filas = len(filas) > self.por_pagina, filas[:self.por_pagina]
+        if not filas:
+            return PaginaCursor([])
+        return PaginaCursor(
+            filas,
+            siguiente=self._cursor(filas[-1], 'sig') if hay_mas else None,
+            anterior=self._cursor(filas[0], 'ant'),
+        )
+
+
+class BrokerEventos(ABC):
+    """
+    Pub/sub de eventos por canal. `publicar` es síncrono (se llama desde
+    señales y vistas); `suscribir` es un context manager asíncrono que entrega
+    una cola con `await cola.get()`. Un broker sobre Redis (redis.asyncio
+    pub/sub) implementaría la misma interfaz para repartir eventos entre
+    procesos.
+    """
+
+    @abstractmethod
+    def publicar(self, canal, evento):
+        ...
+
+    @abstractmethod
+    def suscribir(self, canal):
+        ...
+
+
+class BrokerLocal(BrokerEventos):
+    """
+    Broker en memoria del proceso: cada suscripción es una asyncio.Queue
+    acotada en el event loop del suscriptor. Solo alcanza a las conexiones
+    del mismo proceso, así que sirve con un único worker ASGI.
+    """
+
+    # Eventos pendientes por conexión; a un cliente que no lee se le descartan
+    MAXIMO_PENDIENTES = 100
+
+    def __init__(self):
+        self._suscriptores = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, evento):
+        with self._lock:
+            destinos = list(self._suscriptores.get(canal, ()))
+        for loop, cola in destinos:
+            try:
+                # Se puede publicar desde cualquier hilo (vistas síncronas, sync_to_async)
+                loop.call_soon_threadsafe(self._entregar, cola, evento)
+            except RuntimeError:
+                # Loop ya cerrado: la suscripción se está liberando
+                pass
+
+    @staticmethod
+    def _entregar(cola, evento):
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            pass
+
+    def suscribir(self, canal):
+        return _SuscripcionLocal(self, canal)
+
+    def _agregar(self, canal, entrada):
+        with self._lock:
+            self._suscriptores[canal].add(entrada)
+
+    def _quitar(self, canal, entrada):
+        with self._lock:
+            self._suscriptores[canal].discard(entrada)
+            if not self._suscriptores[canal]:
+                del self._suscriptores[canal]
+
+
+class _SuscripcionLocal:
+    """
+    Suscripción de BrokerLocal. Es una clase y no @asynccontextmanager porque
+    suele cerrarse al finalizar el generador del flujo SSE, y ahí un
+    generador anidado no se puede cerrar con athrow().
+    """
+
+    def __init__(self, broker, canal):
+        self.broker = broker
+        self.canal = canal
+        self.entrada = None
+
+    async def __aenter__(self):
+        cola = asyncio.Queue(maxsize=self.broker.MAXIMO_PENDIENTES)
+        self.entrada = (asyncio.get_running_loop(), cola)
+        self.broker._agregar(self.canal, self.entrada)
+        return cola
+
+    async def __aexit__(self, *exc_info):
+        self.broker._quitar(self.canal, self.entrada)
+
+
+@lru_cache(maxsize=None)
+def _broker(ruta_backend):
+    return import_string(ruta_backend)()
+
+
+class EventosService:
+    """
+    Eventos en tiempo real por usuario ('mensaje', 'notificacion') servidos
+    como Server-Sent Events por la vista asíncrona `eventos`. El broker se
+    configura en MENSAJERIA_EVENTOS_BROKER.
+
+    Los eventos se publican al confirmar la transacción, así el cliente que
+    reacciona a uno siempre encuentra el mensaje en la BD. No hay historial:
+    al (re)conectarse, el cliente se pone al día con una consulta normal.
+
+    Uso:
+        EventosService.publicar(mensaje.receptor_id, 'mensaje', {'conversacion_id': 3})
+        StreamingHttpResponse(EventosService.flujo(usuario.pk), content_type='text/event-stream')
+    """
+
+    # Espera del navegador antes de reconectar cuando se cierra el flujo
+    RECONEXION_MS = 3000
+    # Comentario de keep-alive para que proxies no corten la conexión inactiva
+    LATIDO = 15
+
+    @staticmethod
+    def broker():
+        return _broker(settings.MENSAJERIA_EVENTOS_BROKER)
+
+    @staticmethod
+    def _canal(usuario_id):
+        return f"usuario:{usuario_id}"
+
+    @staticmethod
+    def publicar(usuario_id, tipo, datos):
+        """Publica el evento al confirmar la transacción en curso"""
+        evento = {'tipo': tipo, 'datos': datos}
+        canal = EventosService._canal(usuario_id)
+        transaction.on_commit(lambda: EventosService.broker().publicar(canal, evento))
+
+    @staticmethod
+    def publicar_mensaje(mensaje):
+        EventosService.publicar(mensaje.receptor_id, 'mensaje', {
+            'id': mensaje.pk, 'conversacion_id': mensaje.conversacion_id, 'autor_id': mensaje.autor_id,
+        })
+
+    @staticmethod
+    async def flujo(usuario_id, duracion=None):
+        """
+        Generador asíncrono en formato text/event-stream. Se cierra tras
+        `duracion` segundos (MENSAJERIA_EVENTOS_DURACION) para repartir las
+        conexiones entre workers; EventSource reconecta solo.
+        """
+        fin = time.monotonic() + (duracion or settings.MENSAJERIA_EVENTOS_DURACION)
+        async with EventosService.broker().suscribir(EventosService._canal(usuario_id)) as cola:
+            yield f"retry: {EventosService.RECONEXION_MS}\n\n"
+            while (restante := fin - time.monotonic()) > 0:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), min(EventosService.LATIDO, restante))
+                except asyncio.TimeoutError:
+                    yield ": latido\n\n"
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento['datos'])}\n\n"
+
+
+class IndiceBusqueda(ABC):
+    """
+    Índice invertido de mensajes en la tabla mensajeria_mensaje_busqueda
+    (creada en la migración 0007 según el motor). Guarda los términos ya
+    normalizados por normalizar_busqueda, así ambos motores aplican el mismo
+    stemming en español y el mismo plegado de tildes.
+    """
+    TABLA = 'mensajeria_mensaje_busqueda'
+
+    @abstractmethod
+    def indexar(self, cursor, filas):
+        ...
+
+    @abstractmethod
+    def eliminar(self, cursor, ids):
+        ...
+
+    @abstractmethod
+    def buscar(self, cursor, terminos, usuario_id, limite, despues=None):
+        """[(mensaje_id, rango)] ordenado por relevancia (menor rango primero) e id"""
+
+    def vaciar(self, cursor):
+        cursor.execute(f"DELETE FROM {self.TABLA}")
+
+    @staticmethod
+    def _consulta_paginada(candidatos, despues, limite):
+        # Keyset sobre (rango, id): el rango se calcula en la subconsulta
+        sql = f"SELECT id, rango FROM ({candidatos}) AS candidatos"
+        parametros = []
+        if despues:
+            sql += " WHERE rango > %s OR (rango = %s AND id > %s)"
+            parametros = [despues[0], despues[0], despues[1]]
+        return sql + " ORDER BY rango, id LIMIT %s", parametros + [limite]
+
+
+class IndiceFTS5(IndiceBusqueda):
+    """SQLite: tabla virtual FTS5 con rowid = id del mensaje y ranking bm25()"""
+
+    def indexar(self, cursor, filas):
+        cursor.executemany(f"INSERT OR REPLACE INTO {self.TABLA} (rowid, texto) VALUES (%s, %s)", filas)
+
+    def eliminar(self, cursor, ids):
+        cursor.executemany(f"DELETE FROM {self.TABLA} WHERE rowid = %s", [(i,) for i in ids])
+
+    def buscar(self, cursor, terminos, usuario_id, limite, despues=None):
+        candidatos = f"""
+            SELECT m.id AS id, bm25({self.TABLA}) AS rango
+            FROM {self.TABLA}
+            JOIN mensajeria_mensaje m ON m.id = {self.TABLA}.rowid
+            JOIN mensajeria_conversacion c ON c.id = m.conversacion_id
+            WHERE {self.TABLA} MATCH %s AND (c.alumno_id = %s OR c.profesor_id = %s)
+        """
+        sql, parametros = self._consulta_paginada(candidatos, despues, limite)
+        consulta = ' '.join(f'"{termino}"' for termino in terminos)
+        cursor.execute(sql, [consulta, usuario_id, usuario_id] + parametros)
+        return cursor.fetchall()
+
+
+class IndiceTsvector(IndiceBusqueda):
+    """PostgreSQL: columna tsvector con índice GIN y ranking ts_rank_cd()"""
+
+    def indexar(self, cursor, filas):
+        cursor.executemany(
+            f"INSERT INTO {self.TABLA} (mensaje_id, documento) VALUES (%s, to_tsvector('simple', %s)) "
+            "ON CONFLICT (mensaje_id) DO UPDATE SET documento = EXCLUDED.documento",
+            filas,
+        )
+
+    def eliminar(self, cursor, ids):
+        cursor.execute(f"DELETE FROM {self.TABLA} WHERE mensaje_id = ANY(%s)", [list(ids)])
+
+    def buscar(self, cursor, terminos, usuario_id, limite, despues=None):
+        # 'simple' sin diccionario: los términos ya vienen normalizados
+        candidatos = f"""
+            SELECT m.id AS id, -ts_rank_cd(b.documento, q) AS rango
+            FROM {self.TABLA} b
+            CROSS JOIN to_tsquery('simple', %s) q
+            JOIN mensajeria_mensaje m ON m.id = b.mensaje_id
+            JOIN mensajeria_conversacion c ON c.id = m.conversacion_id
+            WHERE b.documento @@ q AND (c.alumno_id = %s OR c.profesor_id = %s)
+        """
+        sql, parametros = self._consulta_paginada(candidatos, despues, limite)
+        cursor.execute(sql, [' & '.join(terminos), usuario_id, usuario_id] + parametros)
+        return cursor.fetchall()
+
+
+class IndiceSinTabla(IndiceBusqueda):
+    """
+    Otros motores, donde la migración 0007 no crea la tabla: no hay nada que
+    mantener y la búsqueda exige cada término en el asunto o el contenido
+    (icontains), sin ranking y en orden de id. Como los términos ya vienen
+    normalizados, no encuentra palabras con tilde.
+    """
+
+    def indexar(self, cursor, filas):
+        pass
+
+    def eliminar(self, cursor, ids):
+        pass
+
+    def vaciar(self, cursor):
+        pass
+
+    def buscar(self, cursor, terminos, usuario_id, limite, despues=None):
+        mensajes = Mensaje.objects.filter(Q(conversacion__alumno_id=usuario_id) | Q(conversacion__profesor_id=usuario_id))
+        for termino in terminos:
+            mensajes = mensajes.filter(Q(asunto__icontains=termino) | Q(contenido__icontains=termino))
+        if despues:
+            mensajes = mensajes.filter(id__gt=despues[1])
+        return [(pk, 0.0) for pk in mensajes.order_by('id').values_list('id', flat=True)[:limite]]
+
+
+_INDICES = {
+    'sqlite': IndiceFTS5,
+    'postgresql': IndiceTsvector,
+}
+
+
+class BusquedaMensajesService:
+    """
+    Búsqueda de texto completo en asunto y contenido de los mensajes de las
+    conversaciones del usuario, ordenada por relevancia y paginada por cursor.
+    El índice se mantiene al guardar y eliminar mensajes (mensajeria.signals)
+    y DifusionService indexa los mensajes que crea en bloque. Cualquier otra
+    carga que no pase por Mensaje.save (bulk_create en scripts, loaddata
+    --raw, SQL directo) se indexa con `manage.py reindexar_mensajes`. En
+    motores distintos de SQLite y PostgreSQL no hay índice y se usa
+    IndiceSinTabla.
+
+    Uso:
+        pagina = BusquedaMensajesService.buscar(request.user, 'reunión apoderados', cursor=request.GET.get('cursor'))
+        pagina.object_list, pagina.siguiente
+    """
+
+    SALT = 'mensajeria.busqueda'
+    TAMANO_LOTE = 2000
+
+    @staticmethod
+    def indice():
+        return _INDICES.get(connection.vendor, IndiceSinTabla)()
+
+    @staticmethod
+    def indexar(mensajes):
+        filas = [(m.pk, ' '.join(normalizar_busqueda(f"{m.asunto} {m.contenido}"))) for m in mensajes]
+        if filas:
+            with connection.cursor() as cursor:
+                BusquedaMensajesService.indice().indexar(cursor, filas)
+
+    @staticmethod
+    def eliminar(ids):
+        if ids:
+            with connection.cursor() as cursor:
+                BusquedaMensajesService.indice().eliminar(cursor, ids)
+
+    @staticmethod
+    @transaction.atomic
+    def reindexar():
+        """Reconstruye el índice completo; retorna la cantidad de mensajes indexados"""
+        with connection.cursor() as cursor:
+            BusquedaMensajesService.indice().vaciar(cursor)
+        total = 0
+        lote = []
+        for mensaje in Mensaje.objects.only('id', 'asunto', 'contenido').order_by('id').iterator(
+            chunk_size=BusquedaMensajesService.TAMANO_LOTE
+        ):
+            lote.append(mensaje)
+            if len(lote) == BusquedaMensajesService.TAMANO_LOTE:
+                BusquedaMensajesService.indexar(lote)
+                total += len(lote)
+                lote = []
+        BusquedaMensajesService.indexar(lote)
+        return total + len(lote)
+
+    @staticmethod
+    def buscar(usuario, texto, por_pagina=20, cursor=None):
+        terminos = list(dict.fromkeys(normalizar_busqueda(texto)))
+        if not terminos:
+            return PaginaCursor([])
+        despues = None
+        if cursor:
+            try:
+                rango, pk = signing.loads(cursor, salt=BusquedaMensajesService.SALT)
+                despues = (float(rango), int(pk))
+            except (signing.BadSignature, TypeError, ValueError):
+                despues = None
+
+        with connection.cursor() as cur:
+            filas = BusquedaMensajesService.indice().buscar(cur, terminos, usuario.pk, por_pagina + 1, despues)
+        hay_mas, filas = len(filas) > por_pagina, filas[:por_pagina]
+
+        mensajes = Mensaje.objects.select_related('autor', 'conversacion').in_bulk([pk for pk, _ in filas])
+        siguiente = None
+        if hay_mas:
+            siguiente = signing.dumps([filas[-1][1], filas[-1][0]], salt=BusquedaMensajesService.SALT)
+        return PaginaCursor([mensajes[pk] for pk, _ in filas if pk in mensajes], siguiente=siguiente)
+
+
+class DifusionService:
+    """
+    Envío de un mismo mensaje de un profesor a muchos estudiantes (cursos
+    completos). En vez de un get_or_create y un Mensaje.save() por alumno,
+    trabaja por lotes dentro de una transacción:
+
+    - las conversaciones faltantes se insertan de una vez ignorando las que
+      ya existen, y se leen todas con una consulta;
+    - los mensajes se crean con bulk_create. Como así no pasan por
+      Mensaje.save ni por sus señales, los totales de las conversaciones, los
+      no leídos de los receptores y el índice de búsqueda se ajustan con una
+      sentencia por tabla;
+    - las copias por correo quedan en la bandeja de salida (CorreoSaliente).
+
+    La cantidad de consultas no depende del número de destinatarios.
+
+    Uso:
+        resultado = DifusionService.enviar(profesor, estudiantes, asunto, contenido, copia_correo=True)
+        # {'mensajes': 45, 'correos': 44}
+    """
+
+    @staticmethod
+    @transaction.atomic
+    def enviar(profesor, estudiantes, asunto, contenido, copia_correo=False):
+        """
+        Envía el mensaje a cada estudiante del queryset `estudiantes`.
+        Retorna la cantidad de mensajes creados y de correos encolados.
+        """
+        correos = dict(estudiantes.exclude(pk=profesor.pk).values_list('id', 'email'))
+        if not correos:
+            return {'mensajes': 0, 'correos': 0}
+
+        Conversacion.objects.bulk_create(
+            [Conversacion(alumno_id=alumno_id, profesor=profesor) for alumno_id in correos],
+            ignore_conflicts=True,
+        )
+        conversaciones = Conversacion.objects.filter(profesor=profesor, alumno_id__in=correos)
+        mensajes = Mensaje.objects.bulk_create([
+            Mensaje(conversacion=conversacion, autor=profesor, receptor_id=conversacion.alumno_id,
+                    asunto=asunto, contenido=contenido)
+            for conversacion in conversaciones
+        ])
+
+        # Lo que Mensaje.save y las señales de mensajeria harían mensaje por mensaje
+        Conversacion.objects.filter(pk__in=[m.conversacion_id for m in mensajes]).update(
+            ultimo_mensaje_en=timezone.now(),
+            total_mensajes=F('total_mensajes') + 1,
+            no_leidos_alumno=F('no_leidos_alumno') + 1,
+        )
+        ContadorNoLeidosService.sumar_lote([m.receptor_id for m in mensajes], mensajes=1)
+        BusquedaMensajesService.indexar(mensajes)
+        for mensaje in mensajes:
+            EventosService.publicar_mensaje(mensaje)
+
+        encolados = 0
+        if copia_correo:
+            nombre = profesor.get_full_name() or profesor.username
+            cuerpo = f"{contenido}\n\n--\n{nombre} te escribió por la mensajería del liceo."
+            encolados = CorreoService.encolar(correos.values(), asunto, cuerpo)
+        return {'mensajes': len(mensajes), 'correos': encolados}
@@ -0,0 +1,59 @@
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Notificacion
+from core.services import ContadorNoLeidosService
+from .models import Conversacion, Mensaje
+from .services import BusquedaMensajesService, EventosService
+
+
+@receiver(post_save, sender=Mensaje)
+def actualizar_contador_mensajes(sender, instance, created, **kwargs):
+    """
+    Suma el mensaje nuevo a los no leídos del receptor. Corre dentro de la
+    transacción de Mensaje.save; la lectura la descuenta
+    Conversacion.marcar_como_leido.
+    """
+    if created:
+        ContadorNoLeidosService.sumar(instance.receptor_id, mensajes=1)
+
+
+@receiver(post_save, sender=Mensaje)
+def indexar_mensaje(sender, instance, created, update_fields=None, **kwargs):
+    """Mantiene el índice de búsqueda al crear o editar asunto/contenido"""
+    if created or update_fields is None or {'asunto', 'contenido'} & set(update_fields):
+        BusquedaMensajesService.indexar([instance])
+
+
+@receiver(post_delete, sender=Mensaje)
+def desindexar_mensaje(sender, instance, **kwargs):
+    BusquedaMensajesService.eliminar([instance.pk])
+
+
+@receiver(post_delete, sender=Mensaje)
+def descontar_mensaje(sender, instance, **kwargs):
+    cambios = {'total_mensajes': F('total_mensajes') - 1}
+    no_leido = not instance.leido
+    if no_leido:
+        _, campo_contador = instance.conversacion.campos_lectura(instance.receptor_id)
+        cambios[campo_contador] = Greatest(F(campo_contador) - 1, 0, output_field=models.PositiveIntegerField())
+    Conversacion.objects.filter(pk=instance.conversacion_id, total_mensajes__gt=0).update(**cambios)
+    if no_leido:
+        ContadorNoLeidosService.sumar(instance.receptor_id, mensajes=-1)
+
+
+@receiver(post_save, sender=Mensaje)
+def publicar_mensaje(sender, instance, created, **kwargs):
+    if created:
+        EventosService.publicar_mensaje(instance)
+
+
+@receiver(post_save, sender=Notificacion)
+def publicar_notificacion(sender, instance, created, **kwargs):
+    if created:
+        EventosService.publicar(instance.usuario_id, 'notificacion', {
+            'id': instance.pk, 'tipo': instance.tipo, 'titulo': instance.titulo, 'url': instance.url,
+        })
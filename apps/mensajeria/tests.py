@@ -1,16 +1,32 @@
 """
 Tests para el módulo de mensajería interna
 """
-from django.test import TestCase, Client
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User, Group
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from datetime import datetime
 import os
+import shutil
+import tempfile
 
-from mensajeria.models import Conversacion, Mensaje
+from mensajeria.forms import ProfesorMensajeForm
+from mensajeria.models import Conversacion, Mensaje, RateLimit
+from mensajeria.services import (
+    RateLimitService, LimitadorTasa, PaginadorCursor, EventosService, BusquedaMensajesService, DifusionService,
+    IndiceSinTabla,
+)
+from mensajeria.utils import normalizar_busqueda
+from core.models import ContadorNoLeidos, CorreoSaliente, Notificacion
+from core.services import ContadorNoLeidosService
 from usuarios.models import PerfilUsuario
 from academico.models import Curso, Asignatura, InscripcionCurso, HorarioClases
 
@@ -162,6 +178,65 @@ class MensajeriaModelTests(TestCase):
         conversacion.refresh_from_db()
         self.assertEqual(conversacion.no_leidos_alumno, 1)
         self.assertEqual(conversacion.no_leidos_profesor, 1)
+    
+    def test_total_mensajes_denormalizado(self):
+        """total_mensajes sigue a las altas y bajas sin que marcar leído lo pise"""
+        conversacion = Conversacion.objects.get(pk=self.conversacion.pk)
+        Mensaje.objects.create(
+            conversacion=self.conversacion, autor=self.profesor, receptor=self.alumno, contenido='Respuesta'
+        )
+        conversacion.marcar_como_leido(self.profesor)
+        conversacion.refresh_from_db()
+        self.assertEqual(conversacion.total_mensajes, 2)
+        self.assertEqual(conversacion.no_leidos_alumno, 1)
+        
+        self.mensaje.delete()
+        conversacion.refresh_from_db()
+        self.assertEqual(conversacion.total_mensajes, conversacion.mensajes.count())
+
+    def test_marca_de_lectura(self):
+        """Leer avanza la marca del participante; el estado de cada mensaje se deriva de ella"""
+        mensajes = [self.mensaje] + [
+            Mensaje.objects.create(
+                conversacion=self.conversacion, autor=self.alumno, receptor=self.profesor, contenido=f'Mensaje {i}'
+            )
+            for i in range(2)
+        ]
+        conversacion = Conversacion.objects.get(pk=self.conversacion.pk)
+        self.assertEqual(conversacion.no_leidos_profesor, 3)
+        self.assertEqual(ContadorNoLeidosService.obtener(self.profesor)['mensajes'], 3)
+
+        self.assertTrue(conversacion.marcar_como_leido(self.profesor, hasta=mensajes[1].pk))
+        self.assertEqual(conversacion.ultimo_leido_profesor, mensajes[1].pk)
+        self.assertEqual(conversacion.no_leidos_profesor, 1)
+        self.assertEqual(ContadorNoLeidos.objects.get(pk=self.profesor.pk).mensajes, 1)
+        self.assertEqual(
+            [m.leido for m in conversacion.mensajes.order_by('pk')], [True, True, False]
+        )
+        # La marca no retrocede
+        self.assertFalse(conversacion.marcar_como_leido(self.profesor, hasta=mensajes[0].pk))
+        self.assertEqual(conversacion.ultimo_leido_profesor, mensajes[1].pk)
+
+        # El badge baja con un delta, sin recalcular sobre conversaciones ni notificaciones
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(conversacion.marcar_como_leido(self.profesor))
+        self.assertFalse([q for q in consultas if 'SUM(' in q['sql'] or 'core_notificacion' in q['sql']])
+        self.assertEqual((conversacion.ultimo_leido_profesor, conversacion.no_leidos_profesor), (mensajes[2].pk, 0))
+        self.assertEqual(ContadorNoLeidos.objects.get(pk=self.profesor.pk).mensajes, 0)
+
+        # Sin nada nuevo que leer: un UPDATE que no afecta filas y ninguna escritura sobre los mensajes
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertFalse(conversacion.marcar_como_leido(self.profesor))
+        escrituras = [q['sql'] for q in consultas if q['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))]
+        self.assertEqual(len(escrituras), 1)
+        self.assertIn('mensajeria_conversacion', escrituras[0])
+
+    def test_eliminar_no_leido_descuenta_contador(self):
+        conversacion = Conversacion.objects.get(pk=self.conversacion.pk)
+        self.assertEqual(conversacion.no_leidos_profesor, 1)
+        self.mensaje.delete()
+        conversacion.refresh_from_db()
+        self.assertEqual(conversacion.no_leidos_profesor, 0)
 
 class MensajeriaViewTests(TestCase):
     """Tests para las vistas de mensajería"""
@@ -234,6 +309,23 @@ class MensajeriaViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Conversaciones')
     
+    def test_conversaciones_list_estadisticas_agregadas(self):
+        """Total y no leídos salen de un agregado, sin recorrer las conversaciones"""
+        otro_alumno = User.objects.create_user(username='alumno_dos', password='testpass123')
+        PerfilUsuario.objects.create(user=otro_alumno, rut='11.111.111-1', tipo_usuario='estudiante')
+        otra = Conversacion.objects.create(alumno=otro_alumno, profesor=self.profesor)
+        for conversacion, autor in ((self.conversacion, self.alumno), (otra, otro_alumno), (otra, otro_alumno)):
+            Mensaje.objects.create(conversacion=conversacion, autor=autor, receptor=self.profesor, contenido='Hola')
+        Mensaje.objects.create(
+            conversacion=otra, autor=self.profesor, receptor=otro_alumno, contenido='No cuenta para el profesor'
+        )
+        
+        self.client.login(username='profesor_test', password='testpass123')
+        response = self.client.get('/mensajeria/')
+        self.assertEqual(response.context['total_conversaciones'], 2)
+        self.assertEqual(response.context['no_leidos_total'], 3)
+        self.assertEqual(response.context['conversaciones'].paginator.count, 2)
+    
     def test_conversacion_detail_requires_login(self):
         """Test que el detalle de conversación requiera login"""
         response = self.client.get(f'/mensajeria/conversacion/{self.conversacion.id}/')
@@ -539,6 +631,11 @@ class MensajeriaIntegrationTests(TestCase):
     
     def test_file_attachment_flow(self):
         """Test flujo con archivo adjunto"""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
         self.client.login(username='integration_alumno', password='testpass123')
         
         # Crear conversación
@@ -554,7 +651,7 @@ class MensajeriaIntegrationTests(TestCase):
         # Crear archivo de prueba
         archivo_test = SimpleUploadedFile(
             "test.pdf",
-            b"contenido de prueba",
+            b"%PDF-1.4 contenido de prueba",
             content_type="application/pdf"
         )
         
@@ -572,6 +669,16 @@ class MensajeriaIntegrationTests(TestCase):
         mensaje = Mensaje.objects.get(conversacion=conversacion, contenido='Te envío un archivo.')
         self.assertIsNotNone(mensaje.adjunto)
         self.assertTrue(mensaje.adjunto.name.endswith('.pdf'))
+        
+        # Un archivo cuyo contenido no corresponde a la extensión se rechaza
+        response = self.client.post(
+            f'/mensajeria/conversacion/{conversacion.id}/',
+            {
+                'contenido': 'Otro archivo.',
+                'adjunto': SimpleUploadedFile("falso.pdf", b"MZ ejecutable", content_type="application/pdf")
+            }
+        )
+        self.assertFalse(Mensaje.objects.filter(contenido='Otro archivo.').exists())
     
     def test_user_without_role_cannot_access(self):
         """Test que usuarios sin rol no puedan acceder"""
@@ -587,3 +694,393 @@ class MensajeriaIntegrationTests(TestCase):
         
         # Verificar que fue redirigido al panel
         self.assertIn('/usuarios/panel/', response.url)
+
+
+class RateLimitServiceTests(TestCase):
+    """Tests de los límites de tasa de mensajería"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.profesor = User.objects.create_user(username='profesor_rate', password='testpass123')
+        PerfilUsuario.objects.create(user=self.profesor, rut='44.444.444-4', tipo_usuario='profesor')
+        self.alumno = User.objects.create_user(username='alumno_rate', password='testpass123')
+        PerfilUsuario.objects.create(user=self.alumno, rut='55.555.555-5', tipo_usuario='estudiante')
+        curso = Curso.objects.create(nombre='1R', nivel=1, letra='R')
+        asignatura = Asignatura.objects.create(nombre='Música', codigo='MUS101')
+        InscripcionCurso.objects.create(estudiante=self.alumno, curso=curso, año=2024, estado='activo')
+        HorarioClases.objects.create(curso=curso, asignatura=asignatura, profesor=self.profesor, dia='lunes', hora='1')
+
+    @override_settings(MENSAJERIA_RATE_LIMITS={'mensaje': (3, 60)})
+    def test_ventana_deslizante_sin_consultas(self):
+        with self.assertNumQueries(0):
+            resultados = [RateLimitService.excedido(self.profesor, 'mensaje') for _ in range(5)]
+
+        self.assertEqual(resultados, [False, False, False, True, True])
+        self.assertFalse(RateLimitService.excedido(self.alumno, 'mensaje'))
+        self.assertFalse(RateLimit.objects.exists())
+
+    @override_settings(MENSAJERIA_RATE_LIMITS={'archivo': (5, 60)})
+    def test_limite_explicito_cero_bloquea(self):
+        self.assertTrue(RateLimitService.excedido(self.alumno, 'archivo', 0))
+        self.assertEqual(
+            [RateLimitService.excedido(self.alumno, 'archivo', 1) for _ in range(2)], [False, True]
+        )
+
+    def test_limitador_base_es_abstracto(self):
+        with self.assertRaises(TypeError):
+            LimitadorTasa()
+
+    @override_settings(MENSAJERIA_RATE_LIMITS={'mensaje': (2, 60)})
+    def test_formulario_profesor_rechaza_exceso(self):
+        datos = {'destinatario': self.alumno.id, 'asunto': 'Aviso', 'contenido': 'Hola'}
+        validos = [ProfesorMensajeForm(datos, profesor=self.profesor).is_valid() for _ in range(3)]
+
+        self.assertEqual(validos, [True, True, False])
+
+    @override_settings(
+        MENSAJERIA_RATE_LIMIT_BACKEND='mensajeria.services.LimitadorBaseDatos',
+        MENSAJERIA_RATE_LIMITS={'nueva_conversacion': (2, 3600)},
+    )
+    def test_backend_base_datos(self):
+        resultados = [RateLimitService.excedido(self.alumno, 'nueva_conversacion') for _ in range(3)]
+
+        self.assertEqual(resultados, [False, False, True])
+        # Los intentos rechazados no agregan filas
+        self.assertEqual(RateLimit.objects.filter(usuario=self.alumno).count(), 2)
+
+
+class PaginadorCursorTests(TestCase):
+    """Tests de la paginación por cursor de mensajes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create_user(username='profesor_cursor', password='testpass123')
+        cls.profesor.groups.add(Group.objects.create(name='Profesor'))
+        PerfilUsuario.objects.create(user=cls.profesor, rut='66.666.666-6', tipo_usuario='profesor')
+        cls.alumno = User.objects.create_user(username='alumno_cursor', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.alumno, rut='77.777.777-7', tipo_usuario='estudiante')
+        conversacion = Conversacion.objects.create(alumno=cls.alumno, profesor=cls.profesor)
+        Mensaje.objects.bulk_create([
+            Mensaje(conversacion=conversacion, autor=cls.alumno, receptor=cls.profesor, contenido=f'Mensaje {i}')
+            for i in range(25)
+        ])
+        # Empates de fecha: el id desempata
+        base = timezone.now()
+        for i, mensaje in enumerate(Mensaje.objects.order_by('id')):
+            Mensaje.objects.filter(pk=mensaje.pk).update(fecha_creacion=base + timezone.timedelta(minutes=i // 3))
+        cls.esperados = list(Mensaje.objects.order_by('-fecha_creacion', '-id').values_list('id', flat=True))
+
+    def _paginador(self):
+        return PaginadorCursor(Mensaje.objects.filter(receptor=self.profesor), 10)
+
+    def test_recorre_todas_las_paginas_con_una_consulta_cada_una(self):
+        vistos, cursor, paginas = [], None, []
+        while True:
+            with self.assertNumQueries(1):
+                pagina = self._paginador().pagina(cursor)
+            paginas.append(pagina)
+            vistos.extend(m.id for m in pagina.object_list)
+            if not pagina.has_next:
+                break
+            cursor = pagina.siguiente
+
+        self.assertEqual(vistos, self.esperados)
+        self.assertEqual([len(p.object_list) for p in paginas], [10, 10, 5])
+        self.assertFalse(paginas[0].has_previous)
+
+        # Volver desde la tercera página entrega la segunda
+        segunda = self._paginador().pagina(paginas[2].anterior)
+        self.assertEqual([m.id for m in segunda.object_list], self.esperados[10:20])
+        self.assertTrue(segunda.has_previous and segunda.has_next)
+
+    def test_cursor_manipulado_vuelve_a_la_primera_pagina(self):
+        pagina = self._paginador().pagina('no-es-un-cursor')
+        self.assertEqual([m.id for m in pagina.object_list], self.esperados[:10])
+
+    def test_cargar_mas_htmx_entrega_solo_filas(self):
+        self.client.login(username='profesor_cursor', password='testpass123')
+        primera = self.client.get(reverse('mensajeria:bandeja_entrada'))
+        self.assertContains(primera, 'Cargar más')
+        cursor = primera.context['page_obj'].siguiente
+
+        response = self.client.get(reverse('mensajeria:bandeja_entrada'), {'cursor': cursor}, HTTP_HX_REQUEST='true')
+
+        # Bandeja de 20 por página: la segunda es la última
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'Cargar más')
+        self.assertEqual([m.id for m in response.context['mensajes']], self.esperados[20:])
+
+
+@override_settings(MENSAJERIA_TIEMPO_REAL=True)
+class EventosTiempoRealTests(TestCase):
+    """Tests del flujo SSE y del fragmento de mensajes nuevos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create_user(username='profesor_sse', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='88.888.888-8', tipo_usuario='profesor')
+        cls.alumno = User.objects.create_user(username='alumno_sse', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.alumno, rut='99.999.999-9', tipo_usuario='estudiante')
+        cls.conversacion = Conversacion.objects.create(alumno=cls.alumno, profesor=cls.profesor)
+
+    def _enviar(self, contenido='Hola'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Mensaje.objects.create(
+                conversacion=self.conversacion, autor=self.alumno, receptor=self.profesor, contenido=contenido
+            )
+
+    async def test_eventos_se_publican_al_confirmar(self):
+        async with EventosService.broker().suscribir(f'usuario:{self.profesor.pk}') as cola:
+            mensaje = await sync_to_async(self._enviar)()
+
+            def notificar():
+                with self.captureOnCommitCallbacks(execute=True):
+                    Notificacion.crear_notificacion(self.profesor, 'info', 'Aviso')
+            await sync_to_async(notificar)()
+
+            primero = await asyncio.wait_for(cola.get(), 1)
+            segundo = await asyncio.wait_for(cola.get(), 1)
+        self.assertEqual(primero['tipo'], 'mensaje')
+        self.assertEqual(primero['datos']['id'], mensaje.pk)
+        self.assertEqual(primero['datos']['conversacion_id'], self.conversacion.pk)
+        self.assertEqual(segundo['tipo'], 'notificacion')
+
+    async def test_flujo_sse_entrega_eventos_del_usuario(self):
+        await self.async_client.aforce_login(self.profesor)
+        response = await self.async_client.get(reverse('mensajeria:eventos'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        flujo = aiter(response.streaming_content)
+
+        # El preámbulo llega una vez registrada la suscripción
+        self.assertIn(b'retry:', await anext(flujo))
+        EventosService.broker().publicar(f'usuario:{self.alumno.pk}', {'tipo': 'mensaje', 'datos': {'id': 0}})
+        EventosService.broker().publicar(f'usuario:{self.profesor.pk}', {'tipo': 'mensaje', 'datos': {'id': 7}})
+        evento = await asyncio.wait_for(anext(flujo), 1)
+        await flujo.aclose()
+
+        self.assertEqual(evento, b'event: mensaje\ndata: {"id": 7}\n\n')
+
+    @override_settings(MENSAJERIA_TIEMPO_REAL=False)
+    def test_sin_tiempo_real_no_abre_el_flujo(self):
+        self.client.force_login(self.profesor)
+        self.assertEqual(self.client.get(reverse('mensajeria:eventos')).status_code, 204)
+
+    def test_mensajes_nuevos_entrega_solo_posteriores(self):
+        anterior = self._enviar('Primero')
+        nuevo = self._enviar('Segundo')
+        self.client.force_login(self.profesor)
+
+        response = self.client.get(
+            reverse('mensajeria:mensajes_nuevos', args=[self.conversacion.pk]), {'despues': anterior.pk}
+        )
+        self.assertEqual([m.pk for m in response.context['mensajes']], [nuevo.pk])
+        self.assertNotContains(response, '<html')
+        # La conversación está abierta: queda leída, como al entrar en ella
+        self.conversacion.refresh_from_db()
+        self.assertEqual(self.conversacion.ultimo_leido_profesor, nuevo.pk)
+        self.assertEqual(self.conversacion.no_leidos_profesor, 0)
+
+    def test_mensajes_nuevos_requiere_participar(self):
+        intruso = User.objects.create_user(username='intruso_sse', password='testpass123')
+        PerfilUsuario.objects.create(user=intruso, rut='10.101.010-1', tipo_usuario='estudiante')
+        self.client.force_login(intruso)
+        response = self.client.get(reverse('mensajeria:mensajes_nuevos', args=[self.conversacion.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+class BusquedaMensajesTests(TestCase):
+    """Tests de la búsqueda de texto completo en mensajes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create_user(username='profesor_fts', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='13.131.313-1', tipo_usuario='profesor')
+        cls.alumno = User.objects.create_user(username='alumno_fts', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.alumno, rut='14.141.414-1', tipo_usuario='estudiante')
+        cls.ajeno = User.objects.create_user(username='ajeno_fts', password='testpass123')
+        PerfilUsuario.objects.create(user=cls.ajeno, rut='15.151.515-1', tipo_usuario='estudiante')
+        cls.conversacion = Conversacion.objects.create(alumno=cls.alumno, profesor=cls.profesor)
+        cls.otra = Conversacion.objects.create(alumno=cls.ajeno, profesor=User.objects.create(username='otro_profe'))
+
+    def _enviar(self, contenido, asunto='', conversacion=None):
+        conversacion = conversacion or self.conversacion
+        return Mensaje.objects.create(
+            conversacion=conversacion, autor=conversacion.alumno, receptor=conversacion.profesor,
+            asunto=asunto, contenido=contenido,
+        )
+
+    def _ids(self, texto, usuario=None, **kwargs):
+        return [m.pk for m in BusquedaMensajesService.buscar(usuario or self.profesor, texto, **kwargs).object_list]
+
+    def test_normalizacion_pliega_tildes_y_plurales(self):
+        self.assertEqual(normalizar_busqueda('Reuniones de APODERADOS'), ['reunion', 'de', 'apoderad'])
+        self.assertEqual(normalizar_busqueda('reunión apoderada'), ['reunion', 'apoderad'])
+        self.assertEqual(normalizar_busqueda('lápices'), normalizar_busqueda('lápiz'))
+
+    def test_busca_en_asunto_y_contenido_ordenado_por_relevancia(self):
+        poco = self._enviar('Recuerde la reunión del jueves')
+        mucho = self._enviar('Reuniones: la reunión de apoderados', asunto='Reunión')
+        self._enviar('Prueba de matemáticas')
+
+        self.assertEqual(self._ids('REUNION'), [mucho.pk, poco.pk])
+        self.assertEqual(self._ids('reunion apoderados'), [mucho.pk])
+        self.assertEqual(self._ids('   '), [])
+
+    def test_solo_conversaciones_accesibles(self):
+        propio = self._enviar('Tarea de historia')
+        self._enviar('Tarea de historia', conversacion=self.otra)
+
+        self.assertEqual(self._ids('historia'), [propio.pk])
+        self.assertEqual(len(self._ids('historia', usuario=self.ajeno)), 1)
+
+    def test_indice_incremental_al_editar_y_eliminar(self):
+        mensaje = self._enviar('Salida pedagógica')
+        mensaje.contenido = 'Paseo al museo'
+        mensaje.save()
+        self.assertEqual(self._ids('salida'), [])
+        self.assertEqual(self._ids('museo'), [mensaje.pk])
+
+        mensaje.delete()
+        self.assertEqual(self._ids('museo'), [])
+
+    def test_paginacion_por_cursor(self):
+        esperados = {self._enviar(f'Aviso número {i}').pk for i in range(25)}
+        vistos, cursor = [], None
+        while True:
+            pagina = BusquedaMensajesService.buscar(self.profesor, 'aviso', por_pagina=10, cursor=cursor)
+            vistos.extend(m.pk for m in pagina.object_list)
+            if not pagina.has_next:
+                break
+            cursor = pagina.siguiente
+
+        self.assertEqual(len(vistos), 25)
+        self.assertEqual(set(vistos), esperados)
+
+    def test_vista_busqueda(self):
+        mensaje = self._enviar('Justificativo médico adjunto')
+        self.client.login(username='profesor_fts', password='testpass123')
+        response = self.client.get(reverse('mensajeria:buscar_mensajes'), {'q': 'medico'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['mensajes']), [mensaje])
+
+    def test_otro_motor_busca_sin_indice(self):
+        mensaje = self._enviar('Citación de apoderados')
+        self._enviar('Prueba de matemáticas')
+        # Un motor sin índice de texto completo en _INDICES (p. ej. MySQL)
+        with mock.patch.dict('mensajeria.services._INDICES', clear=True):
+            self.assertIsInstance(BusquedaMensajesService.indice(), IndiceSinTabla)
+            self.assertEqual(self._ids('apoderados'), [mensaje.pk])
+            # Sin tabla de índice: guardar y reindexar no la tocan
+            self._enviar('Otra citación de apoderados')
+            self.assertEqual(BusquedaMensajesService.reindexar(), Mensaje.objects.count())
+            self.assertEqual(len(self._ids('apoderados')), 2)
+
+    def test_reindexar_incluye_mensajes_cargados_en_bloque(self):
+        Mensaje.objects.bulk_create([
+            Mensaje(conversacion=self.conversacion, autor=self.alumno, receptor=self.profesor, contenido='Cuaderno')
+        ])
+        self.assertEqual(self._ids('cuaderno'), [])
+        self.assertEqual(BusquedaMensajesService.reindexar(), Mensaje.objects.count())
+        self.assertEqual(len(self._ids('cuaderno')), 1)
+
+
+
+class DifusionTests(TestCase):
+    """Tests del envío de un mensaje a cursos completos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = User.objects.create_user(username='profesor_dif', password='testpass123', first_name='Ana')
+        PerfilUsuario.objects.create(user=cls.profesor, rut='16.161.616-1', tipo_usuario='profesor')
+        asignatura = Asignatura.objects.create(nombre='Historia', codigo='HIS101')
+        cls.curso_a = Curso.objects.create(nombre='2A', nivel=2, letra='A')
+        cls.curso_b = Curso.objects.create(nombre='2B', nivel=2, letra='B')
+        HorarioClases.objects.create(curso=cls.curso_a, asignatura=asignatura, profesor=cls.profesor, dia='lunes', hora='1')
+        HorarioClases.objects.create(curso=cls.curso_b, asignatura=asignatura, profesor=cls.profesor, dia='martes', hora='1')
+        cls.alumnos = []
+        for i, curso in enumerate([cls.curso_a] * 3 + [cls.curso_b] * 2):
+            alumno = User.objects.create_user(username=f'alumno_dif_{i}', email=f'alumno{i}@liceo.cl')
+            PerfilUsuario.objects.create(user=alumno, rut=f'17.000.00{i}-1', tipo_usuario='estudiante')
+            InscripcionCurso.objects.create(estudiante=alumno, curso=curso, año=2024, estado='activo')
+            cls.alumnos.append(alumno)
+        retirado = User.objects.create_user(username='alumno_dif_retirado')
+        PerfilUsuario.objects.create(user=retirado, rut='17.000.099-1', tipo_usuario='estudiante')
+        InscripcionCurso.objects.create(estudiante=retirado, curso=cls.curso_a, año=2024, estado='retirado')
+
+    def setUp(self):
+        cache.clear()
+
+    def _estudiantes(self, *cursos):
+        return User.objects.filter(
+            cursos_inscrito__curso__in=cursos, cursos_inscrito__estado='activo'
+        ).distinct()
+
+    def test_envia_a_los_estudiantes_activos_y_ajusta_contadores(self):
+        existente = Conversacion.objects.create(alumno=self.alumnos[0], profesor=self.profesor)
+        Mensaje.objects.create(conversacion=existente, autor=self.profesor, receptor=self.alumnos[0], contenido='Previo')
+        ContadorNoLeidosService.obtener(self.alumnos[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = DifusionService.enviar(
+                self.profesor, self._estudiantes(self.curso_a), 'Salida pedagógica', 'Traigan autorización firmada'
+            )
+
+        self.assertEqual(resultado, {'mensajes': 3, 'correos': 0})
+        conversaciones = Conversacion.objects.filter(profesor=self.profesor).order_by('alumno_id')
+        self.assertEqual([c.alumno_id for c in conversaciones], [a.pk for a in self.alumnos[:3]])
+        for conversacion in conversaciones:
+            self.assertEqual(conversacion.total_mensajes, conversacion.mensajes.count())
+            self.assertEqual(
+                conversacion.no_leidos_alumno,
+                conversacion.mensajes.filter(receptor=conversacion.alumno, pk__gt=conversacion.ultimo_leido_alumno).count(),
+            )
+            self.assertIsNotNone(conversacion.ultimo_mensaje_en)
+        # El total cacheado antes del envío se invalidó
+        self.assertEqual(ContadorNoLeidosService.obtener(self.alumnos[0])['mensajes'], 2)
+        self.assertEqual(ContadorNoLeidos.objects.get(pk=self.alumnos[0].pk).mensajes, 2)
+        self.assertEqual(
+            sorted(m.receptor_id for m in BusquedaMensajesService.buscar(self.profesor, 'autorizacion').object_list),
+            [a.pk for a in self.alumnos[:3]],
+        )
+        self.assertFalse(CorreoSaliente.objects.exists())
+
+    def test_consultas_constantes_y_copias_por_correo(self):
+        def enviar(*cursos):
+            with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as consultas:
+                resultado = DifusionService.enviar(
+                    self.profesor, self._estudiantes(*cursos), 'Aviso', 'Mañana no hay clases', copia_correo=True
+                )
+            return resultado, len(consultas)
+
+        (resultado_b, consultas_b) = enviar(self.curso_b)
+        self.assertEqual(resultado_b, {'mensajes': 2, 'correos': 2})
+        (resultado_ab, consultas_ab) = enviar(self.curso_a, self.curso_b)
+        self.assertEqual(resultado_ab, {'mensajes': 5, 'correos': 5})
+        self.assertEqual(consultas_ab, consultas_b)
+        self.assertEqual(CorreoSaliente.objects.filter(estado='pendiente').count(), 7)
+        self.assertIn('Ana', CorreoSaliente.objects.first().cuerpo)
+
+    def test_vista_difusion(self):
+        self.client.force_login(self.profesor)
+        url = reverse('mensajeria:profesor_difusion')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        response = self.client.post(url, {'asunto': 'Aviso', 'contenido': 'Hola a todos'})
+        self.assertContains(response, 'Selecciona al menos un curso')
+
+        response = self.client.post(url, {
+            'todos_mis_estudiantes': 'on', 'asunto': 'Aviso', 'contenido': 'Hola a todos', 'copia_correo': 'on',
+        })
+        self.assertRedirects(response, reverse('mensajeria:mensajes_enviados'))
+        self.assertEqual(Mensaje.objects.filter(autor=self.profesor).count(), 5)
+        self.assertEqual(CorreoSaliente.objects.count(), 5)
+
+    def test_vista_difusion_solo_cursos_del_profesor(self):
+        ajeno = Curso.objects.create(nombre='3C', nivel=3, letra='C')
+        self.client.force_login(self.profesor)
+        response = self.client.post(reverse('mensajeria:profesor_difusion'), {
+            'cursos': [ajeno.pk], 'asunto': 'Aviso', 'contenido': 'Hola',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Mensaje.objects.exists())
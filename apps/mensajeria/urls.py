@@ -14,10 +14,15 @@ urlpatterns = [
     path('enviados/', views.mensajes_enviados, name='mensajes_enviados'),
     path('mensaje/<int:mensaje_id>/', views.mensaje_detalle, name='mensaje_detalle'),
     path('profesor/enviar/', views.profesor_redactar, name='profesor_redactar'),
+    path('profesor/difusion/', views.profesor_difusion, name='profesor_difusion'),
     path('contacto/', views.contacto_colegio, name='contacto_colegio'),
     
     # Detalle de conversación
     path('conversacion/<int:conversacion_id>/', views.conversacion_detail, name='conversacion_detail'),
+    path('conversacion/<int:conversacion_id>/nuevos/', views.mensajes_nuevos, name='mensajes_nuevos'),
+    
+    # Eventos en tiempo real (Server-Sent Events)
+    path('eventos/', views.eventos, name='eventos'),
     
     # Crear nueva conversación
     path('nueva/', views.nueva_conversacion, name='nueva_conversacion'),
@@ -34,6 +39,9 @@ urlpatterns = [
     # Mensajes destacados (solo profesores/staff)
     path('destacados/', views.mensajes_destacados, name='mensajes_destacados'),
     
+    # Búsqueda de texto completo en mensajes
+    path('buscar/', views.buscar_mensajes, name='buscar_mensajes'),
+    
     # Gestión Administrativa
     path('gestion/', views.gestion_mensajeria, name='gestion_mensajeria'),
 ]
@@ -0,0 +1,53 @@
+"""
+Utilidades de mensajería: texto de búsqueda y validación de adjuntos
+"""
+import re
+import unicodedata
+
+
+def _raiz(termino):
+    """
+    Stemming liviano en español: une singular/plural y masculino/femenino
+    (mensaje, mensajes -> mensaj; lápiz, lápices -> lapiz). Adaptado del
+    SpanishLightStemmer de Lucene.
+    """
+    if len(termino) < 5:
+        return termino
+    if termino[-1] in 'oae':
+        return termino[:-1]
+    if termino[-1] == 's':
+        if termino.endswith('eses'):
+            return termino[:-2]
+        if termino.endswith('ces'):
+            return termino[:-3] + 'z'
+        if termino[-2] in 'oae':
+            return termino[:-2]
+    return termino
+
+
+def normalizar_busqueda(texto):
+    """Términos indexables del texto: minúsculas, sin tildes y con stemming"""
+    sin_tildes = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode()
+    return [_raiz(termino) for termino in re.findall(r'[a-z0-9]+', sin_tildes)]
+
+
+# Primeros bytes de cada formato de adjunto permitido
+FIRMAS_ADJUNTOS = {
+    'pdf': b'%PDF-',
+    'png': b'\x89PNG\r\n\x1a\n',
+    'jpg': b'\xff\xd8\xff',
+    'jpeg': b'\xff\xd8\xff',
+    'doc': b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',
+    'docx': b'PK\x03\x04',
+}
+
+
+def firma_coincide(archivo, extension):
+    """Compara la cabecera del archivo con la firma de su extensión, sin leerlo completo"""
+    firma = FIRMAS_ADJUNTOS.get(extension.lower())
+    if firma is None:
+        return False
+    archivo.seek(0)
+    cabecera = archivo.read(len(firma))
+    archivo.seek(0)
+    return cabecera == firma
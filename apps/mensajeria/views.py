@@ -1,21 +1,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden, HttpResponseBadRequest, JsonResponse
-from django.db.models import Q, Count
+from django.conf import settings
+from django.http import (
+    HttpResponse, HttpResponseForbidden, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse,
+)
+from django.db.models import Q, Count, Sum, Case, When
 from django.core.paginator import Paginator, EmptyPage, InvalidPage
-from django.db import transaction
 from django.contrib.auth.models import User
 
 from django.utils import timezone
+from django.utils.http import urlencode
 from academico.models import HorarioClases, InscripcionCurso
 from .models import Conversacion, Mensaje, ConfiguracionMensajeria
+from .services import BusquedaMensajesService, DifusionService, EventosService, PaginadorCursor
 from .forms import (
     MensajeForm,
     PaginacionForm,
     ProfesorMensajeForm,
+    ProfesorDifusionForm,
     ContactoColegioForm,
     BusquedaConversacionForm,
+    BusquedaMensajesForm,
     NuevaConversacionForm,
 )
 
@@ -32,6 +38,11 @@ def _estudiantes_de_profesor(profesor):
     cursos_ids = HorarioClases.objects.filter(
         profesor=profesor
     ).values_list('curso_id', flat=True).distinct()
+    return _estudiantes_de_cursos(cursos_ids)
+
+
+def _estudiantes_de_cursos(cursos_ids):
+    """Obtiene los estudiantes con inscripción activa en los cursos indicados"""
     return User.objects.filter(
         cursos_inscrito__curso_id__in=cursos_ids,
         cursos_inscrito__estado='activo',
@@ -51,6 +62,18 @@ def _profesores_de_estudiante(estudiante):
     ).distinct()
 
 
+def _render_paginado(request, mensajes_qs, por_pagina, template, template_parcial, contexto):
+    """
+    Pagina mensajes por cursor (?cursor=...). Las peticiones HTMX del botón
+    "Cargar más" reciben solo las filas nuevas (template_parcial).
+    """
+    page_obj = PaginadorCursor(mensajes_qs, por_pagina).pagina(request.GET.get('cursor'))
+    contexto.update({'page_obj': page_obj, 'mensajes': page_obj.object_list})
+    if request.htmx:
+        return render(request, template_parcial, contexto)
+    return render(request, template, contexto)
+
+
 @login_required
 def conversaciones_list(request):
     """
@@ -75,8 +98,6 @@ def conversaciones_list(request):
         Q(alumno=usuario_actual) | Q(profesor=usuario_actual)
     ).select_related(
         'alumno', 'profesor'
-    ).annotate(
-        total_mensajes=Count('mensajes')
     ).order_by(
         '-ultimo_mensaje_en', '-creado_en'
     )
@@ -95,15 +116,20 @@ def conversaciones_list(request):
                 Q(profesor__username__icontains=busqueda)
             )
     
-    # Estadísticas para la vista
-    total_conversaciones = conversaciones.count()
-    no_leidos = sum([
-        c.no_leidos_alumno if c.alumno == request.user else c.no_leidos_profesor
-        for c in conversaciones
-    ])
+    # Estadísticas para la vista: conteo y no leídos del usuario en un solo agregado
+    estadisticas = conversaciones.order_by().aggregate(
+        total=Count('id'),
+        no_leidos=Sum(Case(
+            When(alumno=usuario_actual, then='no_leidos_alumno'),
+            default='no_leidos_profesor',
+        )),
+    )
+    total_conversaciones = estadisticas['total']
+    no_leidos = estadisticas['no_leidos'] or 0
     
     # Paginación estable
     paginator = Paginator(conversaciones, 20)  # 20 conversaciones por página
+    paginator.count = total_conversaciones  # ya contado arriba: evita un segundo COUNT(*)
     try:
         page_number = int(request.GET.get('page', 1))
         page_obj = paginator.get_page(page_number)
@@ -133,20 +159,12 @@ def bandeja_entrada(request):
     
     mensajes_qs = Mensaje.objects.filter(
         receptor=request.user
-    ).select_related('autor', 'conversacion').order_by('-fecha_creacion')
-    
-    paginator = Paginator(mensajes_qs, 20)
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, InvalidPage):
-        page_obj = paginator.get_page(1)
+    ).select_related('autor', 'conversacion')
     
-    contexto = {
-        'page_obj': page_obj,
-        'mensajes': page_obj.object_list,
-    }
-    return render(request, 'mensajeria/bandeja_entrada.html', contexto)
+    return _render_paginado(
+        request, mensajes_qs, 20,
+        'mensajeria/bandeja_entrada.html', 'mensajeria/_filas_bandeja_entrada.html', {},
+    )
 
 
 @login_required
@@ -157,20 +175,12 @@ def mensajes_enviados(request):
 
     mensajes_qs = Mensaje.objects.filter(
         autor=request.user
-    ).select_related('receptor', 'conversacion').order_by('-fecha_creacion')
+    ).select_related('receptor', 'conversacion')
 
-    paginator = Paginator(mensajes_qs, 20)
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, InvalidPage):
-        page_obj = paginator.get_page(1)
-
-    contexto = {
-        'page_obj': page_obj,
-        'mensajes': page_obj.object_list,
-    }
-    return render(request, 'mensajeria/bandeja_enviados.html', contexto)
+    return _render_paginado(
+        request, mensajes_qs, 20,
+        'mensajeria/bandeja_enviados.html', 'mensajeria/_filas_bandeja_enviados.html', {},
+    )
 
 
 @login_required
@@ -184,7 +194,6 @@ def mensaje_detalle(request, mensaje_id):
         return HttpResponseForbidden("No puedes ver este mensaje")
 
     if request.user == mensaje.receptor:
-        mensaje.marcar_como_leido(request.user)
         mensaje.conversacion.marcar_como_leido(request.user)
 
     contexto = {
@@ -232,6 +241,41 @@ def profesor_redactar(request):
     return render(request, 'mensajeria/profesor_redactar.html', contexto)
 
 
+@login_required
+def profesor_difusion(request):
+    """Mensaje del profesor a cursos completos; las copias por correo quedan en la bandeja de salida."""
+    perfil = getattr(request.user, 'perfil', None)
+    if not perfil or perfil.tipo_usuario != 'profesor':
+        messages.error(request, 'Solo los profesores pueden acceder a esta sección.')
+        return redirect('usuarios:panel')
+
+    if request.method == 'POST':
+        form = ProfesorDifusionForm(request.POST, profesor=request.user)
+        if form.is_valid():
+            if form.cleaned_data['todos_mis_estudiantes']:
+                estudiantes = _estudiantes_de_profesor(request.user)
+            else:
+                estudiantes = _estudiantes_de_cursos([curso.id for curso in form.cleaned_data['cursos']])
+            resultado = DifusionService.enviar(
+                request.user,
+                estudiantes,
+                form.cleaned_data['asunto'],
+                form.cleaned_data['contenido'],
+                copia_correo=form.cleaned_data['copia_correo'],
+            )
+            if resultado['mensajes']:
+                aviso = f"Mensaje enviado a {resultado['mensajes']} estudiantes."
+                if resultado['correos']:
+                    aviso += f" {resultado['correos']} copias por correo en cola de envío."
+                messages.success(request, aviso)
+                return redirect('mensajeria:mensajes_enviados')
+            messages.warning(request, 'Los cursos seleccionados no tienen estudiantes activos.')
+    else:
+        form = ProfesorDifusionForm(profesor=request.user)
+
+    return render(request, 'mensajeria/profesor_difusion.html', {'form': form})
+
+
 @login_required
 def conversacion_detail(request, conversacion_id):
     """
@@ -250,25 +294,11 @@ def conversacion_detail(request, conversacion_id):
     if not conversacion.puede_acceder(request.user):
         return HttpResponseForbidden("No tienes permisos para acceder a esta conversación")
     
-    # Marcar como leído de forma atómica y actualizar mensajes del usuario
-    with transaction.atomic():
-        conversacion.marcar_como_leido(request.user)
-        conversacion.mensajes.filter(
-            receptor=request.user,
-            leido=False
-        ).update(leido=True)
+    # Avanzar la marca de lectura del usuario (un UPDATE, ninguno si no hay nada nuevo)
+    conversacion.marcar_como_leido(request.user)
     
     # Obtener mensajes con select_related para optimizar
-    mensajes = conversacion.mensajes.select_related('autor').order_by('-fecha_creacion')
-    
-    # Paginación de mensajes (50 por página)
-    paginator = Paginator(mensajes, 50)
-    try:
-        page_number = int(request.GET.get('page', 1))
-        page_obj = paginator.get_page(page_number)
-    except (ValueError, TypeError, EmptyPage, InvalidPage):
-        page_number = 1
-        page_obj = paginator.get_page(1)
+    mensajes = conversacion.mensajes.select_related('autor')
     
     # Formulario para nuevo mensaje
     form_mensaje = None
@@ -304,8 +334,6 @@ def conversacion_detail(request, conversacion_id):
     
     contexto = {
         'conversacion': conversacion,
-        'mensajes': page_obj.object_list,
-        'page_obj': page_obj,
         'mensaje_form': form_mensaje,
         'otro_participante': otro_participante,
         'contador_no_leidos': contador_no_leidos,
@@ -313,7 +341,59 @@ def conversacion_detail(request, conversacion_id):
         'es_alumno': es_alumno,
     }
     
-    return render(request, 'mensajeria/conversacion_detail.html', contexto)
+    # Paginación por cursor de mensajes (50 por página)
+    return _render_paginado(
+        request, mensajes, 50,
+        'mensajeria/conversacion_detail.html', 'mensajeria/_mensajes_conversacion.html', contexto,
+    )
+
+
+@login_required
+def mensajes_nuevos(request, conversacion_id):
+    """
+    Mensajes de la conversación posteriores a ?despues=<id>, como fragmento
+    HTML para anteponer al hilo (HTMX). Lo pide la página al recibir un
+    evento 'mensaje' o, sin tiempo real, periódicamente.
+    """
+    if not verificar_rol_mensajeria(request.user):
+        return HttpResponseForbidden("No tienes permisos")
+    
+    conversacion = get_object_or_404(
+        Conversacion.objects.select_related('alumno', 'profesor'),
+        id=conversacion_id
+    )
+    if not conversacion.puede_acceder(request.user):
+        return HttpResponseForbidden("No tienes permisos para esta conversación")
+    
+    try:
+        despues = int(request.GET.get('despues', 0))
+    except ValueError:
+        return HttpResponseBadRequest("Parámetro 'despues' inválido")
+    
+    # Acotado por id sobre el índice (conversacion, fecha_creacion): cuesta lo mismo en hilos largos
+    mensajes = list(
+        conversacion.mensajes.filter(pk__gt=despues).select_related('autor').order_by('-fecha_creacion', '-pk')[:50]
+    )
+    if any(m.receptor_id == request.user.pk and not m.leido for m in mensajes):
+        conversacion.marcar_como_leido(request.user, hasta=mensajes[0].pk)
+    
+    return render(request, 'mensajeria/_mensajes_conversacion.html', {'mensajes': mensajes})
+
+
+@login_required
+async def eventos(request):
+    """
+    Flujo Server-Sent Events con los mensajes y notificaciones nuevos del
+    usuario. Vista asíncrona: bajo ASGI cada conexión inactiva es solo una
+    corrutina esperando en la cola del broker, no un hilo.
+    """
+    if not settings.MENSAJERIA_TIEMPO_REAL:
+        return HttpResponse(status=204)  # EventSource no reintenta ante un 204
+    usuario = await request.auser()
+    respuesta = StreamingHttpResponse(EventosService.flujo(usuario.pk), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'  # nginx: no acumular el flujo
+    return respuesta
 
 
 @login_required
@@ -428,8 +508,7 @@ def marcar_leido(request, conversacion_id):
     if not conversacion.puede_acceder(request.user):
         return HttpResponseForbidden("No tienes permisos para esta conversación")
     
-    with transaction.atomic():
-        conversacion.marcar_como_leido(request.user)
+    conversacion.marcar_como_leido(request.user)
     
     return JsonResponse({'status': 'success'})
 
@@ -500,22 +579,36 @@ def mensajes_destacados(request):
         Q(contenido__icontains='urgente')
     ).select_related(
         'conversacion', 'autor'
-    ).order_by('-fecha_creacion')
+    )
     
-    # Paginación
-    paginator = Paginator(mensajes_destacados, 30)
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, InvalidPage):
-        page_obj = paginator.get_page(1)
+    return _render_paginado(
+        request, mensajes_destacados, 30,
+        'mensajeria/mensajes_destacados.html', 'mensajeria/_mensajes_destacados.html', {},
+    )
+
+
+@login_required
+def buscar_mensajes(request):
+    """
+    Búsqueda de texto completo en los mensajes de las conversaciones del
+    usuario, por relevancia y con paginación por cursor (HTMX: "Cargar más")
+    """
+    if not verificar_rol_mensajeria(request.user):
+        return redirect('usuarios:panel')
     
+    form = BusquedaMensajesForm(request.GET)
+    consulta = form.cleaned_data['q'] if form.is_valid() else ''
+    page_obj = BusquedaMensajesService.buscar(request.user, consulta, 20, request.GET.get('cursor'))
     contexto = {
-        'mensajes': page_obj.object_list,
+        'form': form,
+        'consulta': consulta,
         'page_obj': page_obj,
+        'mensajes': page_obj.object_list,
+        'parametros': urlencode({'q': consulta}),
     }
-    
-    return render(request, 'mensajeria/mensajes_destacados.html', contexto)
+    if request.htmx:
+        return render(request, 'mensajeria/_resultados_busqueda.html', contexto)
+    return render(request, 'mensajeria/buscar_mensajes.html', contexto)
 
 
 def contacto_colegio(request):
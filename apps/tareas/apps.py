@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TareasConfig(AppConfig):
     name = 'tareas'
+
+    def ready(self):
+        import tareas.signals
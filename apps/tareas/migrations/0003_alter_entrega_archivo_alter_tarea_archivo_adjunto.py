@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0002_entrega_uuid_tarea_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entrega',
+            name='archivo',
+            field=models.FileField(storage=core.storage.almacenamiento_deduplicado, upload_to='tareas/entregas/', verbose_name='Archivo Entregado'),
+        ),
+        migrations.AlterField(
+            model_name='tarea',
+            name='archivo_adjunto',
+            field=models.FileField(blank=True, null=True, storage=core.storage.almacenamiento_deduplicado, upload_to='tareas/adjuntos/', verbose_name='Archivo Adjunto'),
+        ),
+    ]
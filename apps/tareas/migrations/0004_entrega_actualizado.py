@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0003_alter_entrega_archivo_alter_tarea_archivo_adjunto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entrega',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(fields=['estudiante', 'actualizado'], name='entrega_sync_idx'),
+        ),
+    ]
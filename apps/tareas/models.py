@@ -6,6 +6,7 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from academico.models import Curso, Asignatura
+from core.storage import almacenamiento_deduplicado
 
 
 class Tarea(models.Model):
@@ -59,6 +60,7 @@ class Tarea(models.Model):
     archivo_adjunto = models.FileField(
         'Archivo Adjunto', 
         upload_to='tareas/adjuntos/', 
+        storage=almacenamiento_deduplicado,
         blank=True, 
         null=True
     )
@@ -121,7 +123,7 @@ class Entrega(models.Model):
         related_name='entregas_tareas'
     )
     
-    archivo = models.FileField('Archivo Entregado', upload_to='tareas/entregas/')
+    archivo = models.FileField('Archivo Entregado', upload_to='tareas/entregas/', storage=almacenamiento_deduplicado)
     comentario_estudiante = models.TextField('Comentario del Estudiante', blank=True)
     
     fecha_entrega = models.DateTimeField('Fecha de Entrega', auto_now_add=True)
@@ -139,12 +141,17 @@ class Entrega(models.Model):
     fecha_revision = models.DateTimeField('Fecha de Revisión', null=True, blank=True)
     
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    # Marca de cambio para la sincronización incremental de la API
+    actualizado = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = 'Entrega'
         verbose_name_plural = 'Entregas'
         unique_together = ['tarea', 'estudiante']
         ordering = ['-fecha_entrega']
+        indexes = [
+            models.Index(fields=['estudiante', 'actualizado'], name='entrega_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.estudiante.get_full_name()} - {self.tarea.titulo}"
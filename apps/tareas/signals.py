@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from core.models import RegistroEliminado
+from .models import Entrega
+
+
+@receiver(post_delete, sender=Entrega)
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Deja la lápida que la sincronización incremental de la API entrega como 'eliminados'."""
+    RegistroEliminado.registrar(instance)
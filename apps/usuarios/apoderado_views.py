@@ -11,10 +11,12 @@ from datetime import date, timedelta
 
 from .models import PerfilUsuario, Pupilo
 from .mixins import ApoderadoRequiredMixin
+from .services import PupiloSummaryService
 from academico.models import (
     Calificacion, Asistencia, InscripcionCurso, 
-    Asignatura, Curso, Anotacion
+    Asignatura, Curso, Anotacion, ResumenEstudiante
 )
+from academico.services import ResumenService
 
 
 def verificar_apoderado(view_func):
@@ -52,22 +54,21 @@ def panel_apoderado(request):
     Si tiene varios, muestra selector.
     """
     perfil = request.user.perfil
-    pupilos = Pupilo.objects.filter(apoderado=perfil).select_related(
+    pupilos = list(Pupilo.objects.filter(apoderado=perfil).select_related(
         'estudiante', 'estudiante__user'
-    )
+    ))
     
-    if not pupilos.exists():
+    if not pupilos:
         messages.info(request, 'No tienes pupilos asignados. Contacta con la administración.')
         return render(request, 'usuarios/apoderado/sin_pupilos.html')
     
     # Si solo tiene un pupilo, mostrar directamente su resumen
-    if pupilos.count() == 1:
-        pupilo = pupilos.first()
-        return _render_resumen_pupilo(request, pupilo.estudiante, perfil)
+    if len(pupilos) == 1:
+        return _render_resumen_pupilo(request, pupilos[0].estudiante, perfil)
     
-    # Si tiene varios, mostrar selector
+    # Si tiene varios, mostrar selector con curso, promedio y asistencia de cada uno
     return render(request, 'usuarios/apoderado/panel_apoderado.html', {
-        'pupilos': pupilos
+        'pupilos': PupiloSummaryService.resumir(pupilos)
     })
 
 
@@ -116,12 +117,14 @@ def _render_resumen_pupilo(request, estudiante, apoderado_perfil):
     except:
         ultimas_anotaciones = []
     
-    # Promedios por asignatura
-    promedios = Calificacion.objects.filter(
-        estudiante=user_estudiante
-    ).values('asignatura__nombre').annotate(
-        promedio=Avg('nota')
-    ).order_by('asignatura__nombre')
+    # Promedios por asignatura (todos los cursos y años, desde el resumen materializado)
+    promedios_asignatura = ResumenService.combinar(
+        ResumenEstudiante.objects.filter(estudiante=user_estudiante)
+    )['promedios_asignatura']
+    promedios = [
+        {'asignatura__nombre': asignatura.nombre, 'promedio': promedios_asignatura[asignatura.id]}
+        for asignatura in Asignatura.objects.filter(id__in=promedios_asignatura).order_by('nombre')
+    ]
     
     context = {
         'estudiante': estudiante,
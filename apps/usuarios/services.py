@@ -1,5 +1,6 @@
-from django.db.models import Avg, Count, Q
-from academico.models import Curso, InscripcionCurso, Calificacion, Asistencia, HorarioClases
+from django.db.models import Avg
+from academico.models import Curso, InscripcionCurso, Calificacion, HorarioClases, ResumenEstudiante
+from academico.services import ResumenService
 from comunicacion.models import Noticia
 
 class PanelService:
@@ -12,33 +13,21 @@ class PanelService:
         perfil = getattr(user, 'perfil', None)
         stats['promedio_general'] = perfil.promedio_general if perfil else None
         
-        # Asistencia Global (Total)
-        total_asistencias = Asistencia.objects.filter(estudiante=user).count()
-        asistencias_presente = Asistencia.objects.filter(estudiante=user, estado='presente').count()
-        stats['asistencia_porcentaje'] = round((asistencias_presente / total_asistencias * 100), 0) if total_asistencias > 0 else 0
-        
-        # Cursos inscritos (con promedio ya calculado)
-        cursos_inscritos = InscripcionCurso.objects.filter(estudiante=user, estado='activo').select_related('curso')
-        
-        # Asistencia por curso (aún calculada al vuelo, pero es rápida)
-        asistencias_por_curso = Asistencia.objects.filter(estudiante=user).values('curso').annotate(
-            total=Count('id'),
-            presentes=Count('id', filter=Q(estado='presente'))
-        )
-        asistencia_map = {}
-        for item in asistencias_por_curso:
-            if item['total'] > 0:
-                porcentaje = (item['presentes'] / item['total']) * 100
-                asistencia_map[item['curso']] = round(porcentaje, 0)
-            else:
-                asistencia_map[item['curso']] = 0
+        # Asistencia y promedios desde el resumen materializado (una sola consulta)
+        resumenes = list(ResumenEstudiante.objects.filter(estudiante=user))
+        stats['asistencia_porcentaje'] = round(ResumenService.combinar(resumenes)['porcentaje_asistencia'], 0)
 
-        # Enriquecer objetos de inscripción
+        por_curso = {}
+        for resumen in resumenes:
+            por_curso.setdefault(resumen.curso_id, []).append(resumen)
+
+        # Cursos inscritos, enriquecidos con promedio y asistencia del curso
+        cursos_inscritos = InscripcionCurso.objects.filter(estudiante=user, estado='activo').select_related('curso')
         for inscripcion in cursos_inscritos:
-            # Usar el promedio calculado por la propiedad del modelo
-            inscripcion.promedio_calculado = inscripcion.promedio_actual
-            inscripcion.asistencia_porcentaje = asistencia_map.get(inscripcion.curso.id, 0)
-            
+            totales = ResumenService.combinar(por_curso.get(inscripcion.curso_id, []))
+            inscripcion.promedio_calculado = totales['promedio']
+            inscripcion.asistencia_porcentaje = round(totales['porcentaje_asistencia'], 0)
+
         stats['cursos_inscritos'] = cursos_inscritos
         return stats
 
@@ -80,3 +69,47 @@ class PanelService:
         stats['consejos'] = Noticia.objects.filter(categoria='consejo', es_publica=True).order_by('-creado')[:5]
         
         return stats
+
+
+class PupiloSummaryService:
+    """
+    Curso actual, promedio y asistencia de todos los pupilos de un apoderado
+    con un número fijo de consultas: las inscripciones activas y los
+    resúmenes materializados (ResumenEstudiante) se leen una sola vez para
+    todos con estudiante_id__in, en vez de consultar por cada pupilo.
+
+    Uso:
+        pupilos = PupiloSummaryService.resumir(
+            Pupilo.objects.filter(apoderado=perfil).select_related('estudiante', 'estudiante__user')
+        )
+        pupilos[0].curso_actual, pupilos[0].promedio, pupilos[0].asistencia_porcentaje
+    """
+
+    @staticmethod
+    def resumir(pupilos):
+        """
+        Recibe los pupilos con estudiante y estudiante__user ya cargados y
+        retorna la lista enriquecida con curso_actual (Curso o None),
+        promedio histórico y asistencia_porcentaje (100 sin registros).
+        """
+        pupilos = list(pupilos)
+        estudiante_ids = [p.estudiante.user_id for p in pupilos]
+
+        # La primera inscripción activa de cada uno, en el orden del modelo (como .first())
+        cursos = {}
+        for inscripcion in InscripcionCurso.objects.filter(
+            estudiante_id__in=estudiante_ids, estado='activo'
+        ).select_related('curso'):
+            cursos.setdefault(inscripcion.estudiante_id, inscripcion.curso)
+
+        resumenes = {}
+        for resumen in ResumenEstudiante.objects.filter(estudiante_id__in=estudiante_ids):
+            resumenes.setdefault(resumen.estudiante_id, []).append(resumen)
+
+        for pupilo in pupilos:
+            estudiante_id = pupilo.estudiante.user_id
+            totales = ResumenService.combinar(resumenes.get(estudiante_id, []))
+            pupilo.curso_actual = cursos.get(estudiante_id)
+            pupilo.promedio = totales['promedio']
+            pupilo.asistencia_porcentaje = totales['porcentaje_asistencia'] if totales['total_asistencias'] else 100
+        return pupilos
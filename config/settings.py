@@ -138,6 +138,18 @@ DATABASES = {
 }
 
 
+# Cache
+# Por defecto en memoria del proceso (desarrollo, un solo proceso). Con varios workers
+# debe ser compartida (Redis en docker-compose.prod.yml): con LocMemCache cada proceso
+# tiene su propia caché y una invalidación solo alcanza al worker que la hizo.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='liceo-cache'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -182,6 +194,10 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Archivos privados (lotes y caché de documentos PDF): fuera de MEDIA_ROOT, que nginx sirve
+# sin autenticar. Se descargan solo a través de vistas que verifican permisos.
+ARCHIVOS_PRIVADOS_ROOT = Path(config('ARCHIVOS_PRIVADOS_ROOT', default=str(BASE_DIR / "privado")))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -287,6 +303,40 @@ INSTITUCION_INFO = {
 # Pagination Settings
 PAGINACION_POR_PAGINA = 10
 
+# Sistema de Alerta Temprana (SAT): minutos antes de regenerar el snapshot de AlertaRiesgo
+SAT_VIGENCIA_MINUTOS = config('SAT_VIGENCIA_MINUTOS', default=60, cast=int)
+
+# Lotes de documentos PDF: procesos del pool de generación (acotado por las CPUs disponibles)
+PDF_LOTE_PROCESOS = config('PDF_LOTE_PROCESOS', default=2, cast=int)
+# Lotes generándose a la vez (los demás esperan en cola) y minutos sin avance tras los que
+# un lote en proceso se da por interrumpido
+PDF_LOTE_SIMULTANEOS = config('PDF_LOTE_SIMULTANEOS', default=1, cast=int)
+PDF_LOTE_MINUTOS_SIN_AVANCE = config('PDF_LOTE_MINUTOS_SIN_AVANCE', default=15, cast=int)
+
+# Caché en disco de certificados e informes PDF (ARCHIVOS_PRIVADOS_ROOT/cache_pdf/): tamaño máximo en bytes
+PDF_CACHE_MAX_BYTES = config('PDF_CACHE_MAX_BYTES', default=200 * 1024 * 1024, cast=int)
+
+# Límites de tasa de mensajería (ver mensajeria.services.RateLimitService).
+# LimitadorVentanaDeslizante cuenta en la caché: con varios workers requiere una caché
+# compartida (Redis); sobre LocMemCache use mensajeria.services.LimitadorBaseDatos.
+MENSAJERIA_RATE_LIMIT_BACKEND = config(
+    'MENSAJERIA_RATE_LIMIT_BACKEND', default='mensajeria.services.LimitadorVentanaDeslizante'
+)
+# acción: (máximo de solicitudes, ventana en segundos)
+MENSAJERIA_RATE_LIMITS = {
+    'mensaje': (20, 60),
+    'nueva_conversacion': (10, 60 * 60),
+    'archivo': (5, 60),
+    'difusion': (10, 60 * 60),
+}
+
+# Eventos en tiempo real (SSE) de mensajería (ver mensajeria.services.EventosService).
+# El flujo necesita un servidor ASGI (p. ej. gunicorn -k uvicorn.workers.UvicornWorker
+# config.asgi:application); bajo WSGI las páginas siguen consultando periódicamente.
+MENSAJERIA_TIEMPO_REAL = config('MENSAJERIA_TIEMPO_REAL', default=False, cast=bool)
+MENSAJERIA_EVENTOS_BROKER = config('MENSAJERIA_EVENTOS_BROKER', default='mensajeria.services.BrokerLocal')
+MENSAJERIA_EVENTOS_DURACION = config('MENSAJERIA_EVENTOS_DURACION', default=300, cast=int)
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
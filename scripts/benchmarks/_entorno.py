@@ -0,0 +1,60 @@
+"""
+Utilidades comunes para los benchmarks de scripts/benchmarks.
+
+Cada benchmark corre contra una base de datos de pruebas desechable (la misma
+que crea `manage.py test`), nunca contra db.sqlite3.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@contextmanager
+def base_de_pruebas():
+    """Crea una BD de pruebas, la deja activa durante el bloque y luego la destruye."""
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def medir(funcion, repeticiones=5):
+    """
+    Ejecuta `funcion` varias veces. Retorna (consultas de la última ejecución,
+    mediana en milisegundos).
+    """
+    tiempos = []
+    consultas = 0
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas = len(ctx.captured_queries)
+    tiempos.sort()
+    return consultas, tiempos[len(tiempos) // 2]
+
+
+def reportar(titulo, filas):
+    """Imprime una tabla simple: filas = [(etiqueta, consultas, ms), ...]"""
+    print(f"\n{titulo}")
+    print(f"{'Caso':<40}{'Consultas':>12}{'ms (mediana)':>16}")
+    print('-' * 68)
+    for etiqueta, consultas, ms in filas:
+        print(f"{etiqueta:<40}{consultas:>12}{ms:>16.2f}")
@@ -0,0 +1,69 @@
+"""
+Benchmark: registro de asistencia de un curso de 45 estudiantes.
+
+Compara el camino anterior (un update_or_create por estudiante) con
+AttendanceBatchWriter (un único upsert por curso).
+
+Uso:
+    python scripts/benchmarks/bench_asistencia.py
+"""
+import datetime
+
+from _entorno import base_de_pruebas, medir, reportar
+
+ESTUDIANTES = 45
+
+
+def preparar():
+    from django.contrib.auth.models import User
+    from academico.models import Curso, InscripcionCurso
+
+    profesor = User.objects.create_user(username='bench_profesor')
+    curso = Curso.objects.create(nombre='Bench', nivel='1', letra='Z', año=2024)
+    estudiantes = []
+    for i in range(ESTUDIANTES):
+        estudiante = User.objects.create_user(username=f'bench_alumno_{i}')
+        InscripcionCurso.objects.create(estudiante=estudiante, curso=curso, año=2024)
+        estudiantes.append(estudiante)
+    return profesor, curso, estudiantes
+
+
+def main():
+    from academico.models import Asistencia
+    from academico.services import AttendanceBatchWriter
+
+    profesor, curso, estudiantes = preparar()
+    estados = ['presente', 'ausente', 'tardanza', 'justificado']
+    dia = [datetime.date(2024, 3, 1)]
+
+    def por_fila():
+        dia[0] += datetime.timedelta(days=1)
+        for i, estudiante in enumerate(estudiantes):
+            Asistencia.objects.update_or_create(
+                estudiante=estudiante, curso=curso, fecha=dia[0],
+                defaults={'estado': estados[i % 4], 'observacion': '', 'registrado_por': profesor},
+            )
+
+    def en_lote():
+        dia[0] += datetime.timedelta(days=1)
+        writer = AttendanceBatchWriter(curso, dia[0], registrado_por=profesor)
+        for i, estudiante in enumerate(estudiantes):
+            writer.agregar(estudiante, estados[i % 4])
+        writer.guardar()
+
+    def en_lote_sobrescritura():
+        writer = AttendanceBatchWriter(curso, dia[0], registrado_por=profesor)
+        for i, estudiante in enumerate(estudiantes):
+            writer.agregar(estudiante, estados[(i + 1) % 4])
+        writer.guardar()
+
+    reportar(f"Asistencia de {ESTUDIANTES} estudiantes", [
+        ('update_or_create por estudiante', *medir(por_fila)),
+        ('AttendanceBatchWriter (insert)', *medir(en_lote)),
+        ('AttendanceBatchWriter (sobrescritura)', *medir(en_lote_sobrescritura)),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
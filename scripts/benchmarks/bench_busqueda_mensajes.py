@@ -0,0 +1,97 @@
+"""
+Benchmark: búsqueda en 100.000 mensajes.
+
+Compara un filtro icontains sobre asunto/contenido (recorre todos los
+mensajes del usuario) con el índice de texto completo (FTS5 en SQLite,
+tsvector en PostgreSQL), para un profesor con 20.000 mensajes accesibles.
+
+Uso:
+    python scripts/benchmarks/bench_busqueda_mensajes.py
+"""
+import random
+
+from _entorno import base_de_pruebas, medir, reportar
+
+MENSAJES = 100_000
+CONVERSACIONES = 1000
+CONVERSACIONES_PROFESOR = 200
+POR_PAGINA = 20
+
+VOCABULARIO = (
+    'reunión apoderados prueba matemáticas lenguaje historia tarea entrega plazo justificativo '
+    'inasistencia certificado médico salida pedagógica museo horario clase profesor alumno curso '
+    'nota promedio evaluación semestre recuperación taller deporte uniforme biblioteca libro '
+    'cuaderno lápices materiales autorización firma transporte almuerzo casino enfermería '
+    'consulta duda ejercicio guía página capítulo lectura disertación grupo proyecto feria ciencias'
+).split()
+
+
+def preparar():
+    from django.contrib.auth.models import User
+    from mensajeria.models import Conversacion, Mensaje
+    from mensajeria.services import BusquedaMensajesService
+
+    azar = random.Random(42)
+    # Distribución tipo Zipf: pocas palabras muy frecuentes y una cola larga de palabras raras
+    silabas = ['ca', 'lo', 'ma', 'te', 'ri', 'sa', 'no', 'pe', 'du', 'gui', 'fer', 'tra']
+    palabras = VOCABULARIO + sorted({''.join(azar.choices(silabas, k=4)) for _ in range(5000)})
+    pesos = [1 / rango for rango in range(1, len(palabras) + 1)]
+    profesores = User.objects.bulk_create([User(username=f'bench_profesor_{i}') for i in range(5)])
+    alumnos = User.objects.bulk_create([User(username=f'bench_alumno_{i}') for i in range(CONVERSACIONES)])
+    conversaciones = Conversacion.objects.bulk_create([
+        Conversacion(alumno=alumno, profesor=profesores[i // CONVERSACIONES_PROFESOR])
+        for i, alumno in enumerate(alumnos)
+    ])
+    por_conversacion = MENSAJES // CONVERSACIONES
+    Mensaje.objects.bulk_create([
+        Mensaje(
+            conversacion=conversacion, autor=conversacion.alumno, receptor=conversacion.profesor,
+            asunto=' '.join(azar.choices(palabras, pesos, k=3)),
+            contenido=' '.join(azar.choices(palabras, pesos, k=25)),
+        )
+        for conversacion in conversaciones
+        for _ in range(por_conversacion)
+    ], batch_size=5000)
+    BusquedaMensajesService.reindexar()
+    return profesores[0], palabras
+
+
+def main():
+    from django.db.models import Q
+    from mensajeria.models import Conversacion, Mensaje
+    from mensajeria.services import BusquedaMensajesService
+
+    profesor, palabras = preparar()
+    rara = palabras[2000]
+    accesibles = Conversacion.objects.filter(Q(alumno=profesor) | Q(profesor=profesor))
+
+    def icontains(texto):
+        def ejecutar():
+            filtro = Q()
+            for palabra in texto.split():
+                filtro &= Q(asunto__icontains=palabra) | Q(contenido__icontains=palabra)
+            list(Mensaje.objects.filter(filtro, conversacion__in=accesibles).select_related('autor')[:POR_PAGINA])
+        return ejecutar
+
+    def indice(texto, pagina=1):
+        cursor = None
+        for _ in range(pagina - 1):
+            cursor = BusquedaMensajesService.buscar(profesor, texto, POR_PAGINA, cursor).siguiente
+
+        def ejecutar():
+            BusquedaMensajesService.buscar(profesor, texto, POR_PAGINA, cursor)
+        return ejecutar
+
+    reportar(f"Búsqueda en {MENSAJES} mensajes ({MENSAJES // 5} accesibles), {POR_PAGINA} resultados", [
+        (f"icontains '{rara}' (rara)", *medir(icontains(rara))),
+        (f"Índice '{rara}' (rara)", *medir(indice(rara))),
+        ("icontains 'feria ciencias'", *medir(icontains('feria ciencias'))),
+        ("Índice 'feria ciencias'", *medir(indice('feria ciencias'))),
+        ("Índice 'feria ciencias', página 5", *medir(indice('feria ciencias', 5))),
+        ("Índice 'reuniones' (muy común)", *medir(indice('reuniones'))),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: listado de conversaciones de un profesor con 500 conversaciones.
+
+Compara las estadísticas del listado antes (Count('mensajes') con JOIN,
+recorrido en Python de todas las conversaciones para sumar los no leídos y
+un segundo COUNT del Paginator) con el agregado condicional actual sobre
+no_leidos_alumno/no_leidos_profesor y total_mensajes denormalizado. También
+mide la respuesta completa de la vista.
+
+Uso:
+    python scripts/benchmarks/bench_conversaciones.py
+"""
+from _entorno import base_de_pruebas, medir, reportar
+
+CONVERSACIONES = 500
+MENSAJES_POR_CONVERSACION = 10
+POR_PAGINA = 20
+
+
+def preparar():
+    from django.contrib.auth.models import User
+    from mensajeria.models import Conversacion, Mensaje
+    from usuarios.models import PerfilUsuario
+
+    profesor = User.objects.create_user(username='bench_profesor')
+    PerfilUsuario.objects.create(user=profesor, rut='1-9', tipo_usuario='profesor')
+    alumnos = User.objects.bulk_create([User(username=f'bench_alumno_{i}') for i in range(CONVERSACIONES)])
+    conversaciones = Conversacion.objects.bulk_create([
+        Conversacion(alumno=alumno, profesor=profesor, no_leidos_profesor=i % 3,
+                     total_mensajes=MENSAJES_POR_CONVERSACION)
+        for i, alumno in enumerate(alumnos)
+    ])
+    Mensaje.objects.bulk_create([
+        Mensaje(conversacion=conversacion, autor=conversacion.alumno, receptor=profesor, contenido=f'Mensaje {j}')
+        for conversacion in conversaciones
+        for j in range(MENSAJES_POR_CONVERSACION)
+    ], batch_size=1000)
+    return profesor
+
+
+def main():
+    from django.core.paginator import Paginator
+    from django.db.models import Case, Count, Q, Sum, When
+    from django.test import Client
+    from django.urls import reverse
+    from mensajeria.models import Conversacion
+
+    profesor = preparar()
+    base = Conversacion.objects.filter(Q(alumno=profesor) | Q(profesor=profesor)).select_related(
+        'alumno', 'profesor'
+    ).order_by('-ultimo_mensaje_en', '-creado_en')
+
+    def anterior():
+        conversaciones = base.annotate(cantidad_mensajes=Count('mensajes'))
+        total = conversaciones.count()
+        no_leidos = sum(
+            c.no_leidos_alumno if c.alumno == profesor else c.no_leidos_profesor for c in conversaciones
+        )
+        pagina = Paginator(conversaciones, POR_PAGINA).get_page(1)
+        list(pagina.object_list)
+        return total, no_leidos
+
+    def actual():
+        estadisticas = base.order_by().aggregate(
+            total=Count('id'),
+            no_leidos=Sum(Case(When(alumno=profesor, then='no_leidos_alumno'), default='no_leidos_profesor')),
+        )
+        paginator = Paginator(base, POR_PAGINA)
+        paginator.count = estadisticas['total']
+        list(paginator.get_page(1).object_list)
+        return estadisticas['total'], estadisticas['no_leidos']
+
+    assert anterior() == actual()
+
+    cliente = Client()
+    cliente.force_login(profesor)
+    url = reverse('mensajeria:conversaciones_list')
+
+    def vista():
+        assert cliente.get(url).status_code == 200
+
+    reportar(f"Listado de {CONVERSACIONES} conversaciones, {POR_PAGINA} por página", [
+        ('Count + suma en Python + Paginator', *medir(anterior)),
+        ('Sum condicional + total denormalizado', *medir(actual)),
+        ('Vista completa (GET)', *medir(vista)),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: libro de calificaciones de un curso de 45 estudiantes x 12 evaluaciones.
+
+Compara el armado por estudiante (una consulta de notas por fila, promedios
+en Python) con GradebookMatrix (dos consultas y estadísticas sobre la matriz).
+
+Uso:
+    python scripts/benchmarks/bench_libro_calificaciones.py
+"""
+import datetime
+
+from _entorno import base_de_pruebas, medir, reportar
+
+ESTUDIANTES = 45
+EVALUACIONES = 12
+
+
+def preparar():
+    from django.contrib.auth.models import User
+    from academico.models import Curso, InscripcionCurso, Asignatura, Calificacion
+
+    profesor = User.objects.create_user(username='bench_profesor')
+    curso = Curso.objects.create(nombre='Bench', nivel='1', letra='Z', año=2024)
+    asignatura = Asignatura.objects.create(nombre='Bench', codigo='BEN')
+    calificaciones = []
+    for i in range(ESTUDIANTES):
+        estudiante = User.objects.create_user(username=f'bench_alumno_{i}')
+        InscripcionCurso.objects.create(estudiante=estudiante, curso=curso, año=2024)
+        for numero in range(1, EVALUACIONES + 1):
+            calificaciones.append(Calificacion(
+                estudiante=estudiante, asignatura=asignatura, curso=curso, profesor=profesor,
+                tipo_evaluacion='nota', semestre='1', fecha_evaluacion=datetime.date(2024, 4, 1),
+                numero_evaluacion=numero, nota=1 + (i * 7 + numero * 3) % 60 / 10,
+            ))
+    Calificacion.objects.bulk_create(calificaciones)
+    return curso, asignatura
+
+
+def main():
+    from academico.models import Calificacion, InscripcionCurso
+    from academico.services import GradebookMatrix
+
+    curso, asignatura = preparar()
+
+    def por_estudiante():
+        filas = []
+        for inscripcion in InscripcionCurso.objects.filter(curso=curso).select_related('estudiante'):
+            notas = [float(c.nota) for c in Calificacion.objects.filter(
+                estudiante=inscripcion.estudiante, asignatura=asignatura, curso=curso
+            ).order_by('numero_evaluacion')]
+            filas.append(sum(notas) / len(notas) if notas else None)
+        return filas
+
+    def matriz():
+        libro = GradebookMatrix.cargar(curso, asignatura)
+        libro.promedios_estudiante()
+        libro.estadisticas_evaluacion()
+        return libro.distribucion()
+
+    reportar(f"Libro de calificaciones {ESTUDIANTES}x{EVALUACIONES}", [
+        ('consulta por estudiante', *medir(por_estudiante)),
+        ('GradebookMatrix + estadísticas', *medir(matriz)),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: bandeja de entrada de un profesor con 5000 mensajes.
+
+Compara Paginator (OFFSET + COUNT(*)) con PaginadorCursor (keyset sobre
+(fecha_creacion, id)) en la primera página y en una página profunda.
+
+Uso:
+    python scripts/benchmarks/bench_paginacion_mensajes.py
+"""
+import datetime
+
+from _entorno import base_de_pruebas, medir, reportar
+
+MENSAJES = 5000
+POR_PAGINA = 20
+PAGINA_PROFUNDA = 200
+
+
+def preparar():
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from mensajeria.models import Conversacion, Mensaje
+
+    profesor = User.objects.create_user(username='bench_profesor')
+    alumno = User.objects.create_user(username='bench_alumno')
+    conversacion = Conversacion.objects.create(alumno=alumno, profesor=profesor)
+    Mensaje.objects.bulk_create([
+        Mensaje(conversacion=conversacion, autor=alumno, receptor=profesor, contenido=f'Mensaje {i}')
+        for i in range(MENSAJES)
+    ], batch_size=500)
+
+    inicio = timezone.now() - datetime.timedelta(days=365)
+    mensajes = list(Mensaje.objects.order_by('id'))
+    for i, mensaje in enumerate(mensajes):
+        mensaje.fecha_creacion = inicio + datetime.timedelta(minutes=i)
+    Mensaje.objects.bulk_update(mensajes, ['fecha_creacion'], batch_size=500)
+    return profesor
+
+
+def main():
+    from django.core.paginator import Paginator
+    from mensajeria.models import Mensaje
+    from mensajeria.services import PaginadorCursor
+
+    profesor = preparar()
+    bandeja = Mensaje.objects.filter(receptor=profesor).select_related('autor', 'conversacion')
+
+    def offset(numero):
+        def ejecutar():
+            pagina = Paginator(bandeja.order_by('-fecha_creacion'), POR_PAGINA).get_page(numero)
+            list(pagina.object_list)
+        return ejecutar
+
+    # Cursor que apunta al final de la página anterior a la profunda
+    cursor = None
+    for _ in range(PAGINA_PROFUNDA - 1):
+        cursor = PaginadorCursor(bandeja, POR_PAGINA).pagina(cursor).siguiente
+
+    def por_cursor(valor):
+        def ejecutar():
+            PaginadorCursor(bandeja, POR_PAGINA).pagina(valor)
+        return ejecutar
+
+    reportar(f"Bandeja de {MENSAJES} mensajes, {POR_PAGINA} por página", [
+        ('Paginator, página 1', *medir(offset(1))),
+        (f'Paginator, página {PAGINA_PROFUNDA}', *medir(offset(PAGINA_PROFUNDA))),
+        ('Cursor, página 1', *medir(por_cursor(None))),
+        (f'Cursor, página {PAGINA_PROFUNDA}', *medir(por_cursor(cursor))),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
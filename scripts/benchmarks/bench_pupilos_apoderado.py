@@ -0,0 +1,118 @@
+"""
+Benchmark: resumen de los pupilos de un apoderado con 1, 5 y 20 pupilos.
+
+Compara el recorrido anterior por pupilo (inscripción, Avg(nota), total de
+asistencias y presentes: 4 consultas por pupilo) con
+PupiloSummaryService, que lee inscripciones y resúmenes de todos los
+pupilos de una vez. También mide GET /api/apoderado/pupilos/ y el panel
+HTML del apoderado, y verifica que sus consultas no dependan de N.
+
+Uso:
+    python scripts/benchmarks/bench_pupilos_apoderado.py
+"""
+from _entorno import base_de_pruebas, medir, reportar
+
+CANTIDADES = (1, 5, 20)
+NOTAS_POR_PUPILO = 8
+ASISTENCIAS_POR_PUPILO = 20
+
+
+def preparar(n):
+    from datetime import date, timedelta
+    from django.contrib.auth.models import User
+    from academico.models import Asignatura, Asistencia, Calificacion, Curso, InscripcionCurso
+    from usuarios.models import PerfilUsuario, Pupilo
+
+    profesor = User.objects.get_or_create(username='bench_profesor')[0]
+    curso = Curso.objects.get_or_create(nombre='Bench', nivel='1', letra='A', año=2024)[0]
+    asignatura = Asignatura.objects.get_or_create(nombre='Bench', codigo='BEN')[0]
+
+    apoderado = User.objects.create_user(username=f'bench_apoderado_{n}')
+    perfil = PerfilUsuario.objects.create(user=apoderado, rut=f'{n}-A', tipo_usuario='apoderado')
+    for i in range(n):
+        alumno = User.objects.create_user(username=f'bench_alumno_{n}_{i}')
+        estudiante = PerfilUsuario.objects.create(user=alumno, rut=f'{n}-{i}', tipo_usuario='estudiante')
+        Pupilo.objects.create(apoderado=perfil, estudiante=estudiante, vinculo='madre')
+        InscripcionCurso.objects.create(estudiante=alumno, curso=curso, año=2024, estado='activo')
+        for j in range(NOTAS_POR_PUPILO):
+            Calificacion.objects.create(
+                estudiante=alumno, asignatura=asignatura, curso=curso, profesor=profesor, tipo_evaluacion='nota',
+                semestre='1', fecha_evaluacion=date(2024, 4, 1), numero_evaluacion=j + 1, nota=4 + j % 4,
+            )
+        for j in range(ASISTENCIAS_POR_PUPILO):
+            Asistencia.objects.create(
+                estudiante=alumno, curso=curso, fecha=date(2024, 3, 1) + timedelta(days=j),
+                estado='presente' if j % 5 else 'ausente', registrado_por=profesor,
+            )
+    return apoderado
+
+
+def main():
+    from django.db.models import Avg
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from academico.models import Asistencia, Calificacion, InscripcionCurso
+    from usuarios.models import Pupilo
+    from usuarios.services import PupiloSummaryService
+
+    filas = []
+    consultas = {'servicio': set(), 'api': set(), 'panel': set()}
+    for n in CANTIDADES:
+        apoderado = preparar(n)
+        pupilos = Pupilo.objects.filter(apoderado=apoderado.perfil).select_related('estudiante', 'estudiante__user')
+
+        def anterior():
+            resultado = []
+            for pupilo in pupilos:
+                alumno = pupilo.estudiante.user
+                inscripcion = InscripcionCurso.objects.filter(
+                    estudiante=alumno, estado='activo'
+                ).select_related('curso').first()
+                promedio = Calificacion.objects.filter(estudiante=alumno).aggregate(Avg('nota'))['nota__avg']
+                total = Asistencia.objects.filter(estudiante=alumno).count()
+                presentes = Asistencia.objects.filter(estudiante=alumno, estado='presente').count()
+                resultado.append((
+                    inscripcion.curso_id if inscripcion else None,
+                    round(promedio, 1) if promedio else None,
+                    round(presentes / total * 100, 1) if total else 100,
+                ))
+            return resultado
+
+        def actual():
+            return [
+                (p.curso_actual.id if p.curso_actual else None, p.promedio, p.asistencia_porcentaje)
+                for p in PupiloSummaryService.resumir(pupilos)
+            ]
+
+        assert [(c, float(p), a) for c, p, a in anterior()] == [(c, float(p), a) for c, p, a in actual()]
+
+        api = APIClient()
+        api.force_authenticate(apoderado)
+        navegador = Client()
+        navegador.force_login(apoderado)
+
+        def vista_api():
+            assert api.get(reverse('api:apoderado_pupilos')).status_code == 200
+
+        def vista_panel():
+            assert navegador.get(reverse('usuarios:panel_apoderado')).status_code == 200
+
+        medidas = {'servicio': medir(actual), 'api': medir(vista_api)}
+        # Con un solo pupilo el panel muestra directamente su resumen, no el selector
+        if n > 1:
+            medidas['panel'] = medir(vista_panel)
+        filas.append((f'{n} pupilos: 4 consultas por pupilo', *medir(anterior)))
+        etiquetas = {'servicio': 'PupiloSummaryService', 'api': 'GET API', 'panel': 'panel HTML'}
+        for caso, (cantidad, ms) in medidas.items():
+            filas.append((f'{n} pupilos: {etiquetas[caso]}', cantidad, ms))
+            consultas[caso].add(cantidad)
+
+    reportar('Resumen de pupilos del apoderado', filas)
+    for caso, cantidades in consultas.items():
+        assert len(cantidades) == 1, f"{caso}: las consultas dependen de la cantidad de pupilos ({cantidades})"
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
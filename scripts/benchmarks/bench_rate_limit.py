@@ -0,0 +1,37 @@
+"""
+Benchmark: verificación de límites de tasa de mensajería.
+
+Compara el backend sobre la tabla RateLimit (DELETE + COUNT + INSERT por
+solicitud) con la ventana deslizante en la caché de Django.
+
+Uso:
+    python scripts/benchmarks/bench_rate_limit.py
+"""
+from _entorno import base_de_pruebas, medir, reportar
+
+VERIFICACIONES = 100
+
+
+def main():
+    from django.contrib.auth.models import User
+    from mensajeria.services import LimitadorBaseDatos, LimitadorVentanaDeslizante
+
+    usuario = User.objects.create_user(username='bench_rate')
+    base_datos = LimitadorBaseDatos()
+    ventana = LimitadorVentanaDeslizante()
+
+    def verificar(limitador):
+        def ejecutar():
+            for _ in range(VERIFICACIONES):
+                limitador.permitir(usuario.pk, 'mensaje', 10 ** 6, 60)
+        return ejecutar
+
+    reportar(f"{VERIFICACIONES} verificaciones de límite de tasa", [
+        ('Tabla RateLimit', *medir(verificar(base_datos))),
+        ('Ventana deslizante en caché', *medir(verificar(ventana))),
+    ])
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()
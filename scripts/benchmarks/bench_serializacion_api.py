@@ -0,0 +1,114 @@
+"""
+Benchmark: serialización de 5.000 notas, asistencias y tareas para la API.
+
+Compara, para cada listado, el camino anterior (ModelSerializer de DRF
+sobre instancias del modelo y JSONRenderer) con SerializadorCompilado
+(.values(), mapas de opciones precalculados) y codificar_json. Exige que
+ambos produzcan exactamente los mismos bytes, incluidos textos con
+tildes, comillas, saltos de línea, emojis y U+2028. También mide las
+respuestas completas de los endpoints.
+
+Uso:
+    python scripts/benchmarks/bench_serializacion_api.py
+"""
+from _entorno import base_de_pruebas, medir, reportar
+
+FILAS = 5000
+TEXTOS = ['', 'Prueba de síntesis', 'Comillas "dobles" y \\ barra', 'Línea 1\nLínea 2\ttab',
+          'Ñandú 🦤 ☃', 'Separador\u2028de línea', 'Control \x01']
+
+
+def preparar():
+    from datetime import date, time, timedelta
+    from decimal import Decimal
+    from django.contrib.auth.models import User
+    from academico.models import Asignatura, Asistencia, Calificacion, Curso, InscripcionCurso
+    from tareas.models import Tarea
+    from usuarios.models import PerfilUsuario
+
+    profesor = User.objects.create_user(username='bench_profesor')
+    alumno = User.objects.create_user(username='bench_alumno')
+    PerfilUsuario.objects.create(user=alumno, rut='1-9', tipo_usuario='estudiante')
+    curso = Curso.objects.create(nombre='Bench', nivel='1', letra='A', año=2024)
+    InscripcionCurso.objects.create(estudiante=alumno, curso=curso, año=2024, estado='activo')
+    asignaturas = [Asignatura.objects.create(nombre=f'Asignatura {TEXTOS[i]}', codigo=f'B{i}') for i in range(len(TEXTOS))]
+    inicio = date.today() - timedelta(days=FILAS // 2)
+
+    tipos = [t for t, _ in Calificacion.TIPO_EVALUACION]
+    Calificacion.objects.bulk_create([
+        Calificacion(
+            estudiante=alumno, asignatura=asignaturas[i % len(asignaturas)], curso=curso, profesor=profesor,
+            tipo_evaluacion=tipos[i % len(tipos)], semestre=str(i % 2 + 1), fecha_evaluacion=inicio + timedelta(days=i),
+            numero_evaluacion=i + 1, nota=Decimal(10 + i % 61) / 10, descripcion=TEXTOS[i % len(TEXTOS)],
+        ) for i in range(FILAS)
+    ], batch_size=1000)
+    estados = [e for e, _ in Asistencia.ESTADO_CHOICES]
+    Asistencia.objects.bulk_create([
+        Asistencia(
+            estudiante=alumno, curso=curso, fecha=inicio + timedelta(days=i), estado=estados[i % len(estados)],
+            observacion=TEXTOS[i % len(TEXTOS)], registrado_por=profesor,
+        ) for i in range(FILAS)
+    ], batch_size=1000)
+    tipos = [t for t, _ in Tarea.TIPO_CHOICES]
+    Tarea.objects.bulk_create([
+        Tarea(
+            titulo=f'Tarea {i} {TEXTOS[i % len(TEXTOS)]}', descripcion=TEXTOS[(i + 1) % len(TEXTOS)] * 5,
+            tipo=tipos[i % len(tipos)], curso=curso, asignatura=asignaturas[i % len(asignaturas)], profesor=profesor,
+            fecha_entrega=inicio + timedelta(days=i), hora_limite=time(8 + i % 12, i % 60) if i % 3 else None,
+            puntaje_maximo=Decimal(i % 100) + Decimal('0.5'), estado='publicada',
+        ) for i in range(FILAS)
+    ], batch_size=1000)
+    return alumno, curso
+
+
+def main():
+    from django.urls import reverse
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+    from academico.models import Asistencia, Calificacion
+    from api.serializers import AsistenciaSerializer, CalificacionSerializer, TareaSerializer
+    from api.services import ASISTENCIAS, NOTAS, TAREAS
+    from api.utils import codificar_json, orjson
+    from tareas.models import Tarea
+
+    alumno, curso = preparar()
+    casos = [
+        ('notas', CalificacionSerializer, NOTAS,
+         Calificacion.objects.filter(estudiante=alumno).order_by('-fecha_evaluacion'), ['asignatura']),
+        ('asistencia', AsistenciaSerializer, ASISTENCIAS,
+         Asistencia.objects.filter(estudiante=alumno).order_by('-fecha'), []),
+        ('tareas', TareaSerializer, TAREAS,
+         Tarea.objects.filter(curso=curso, estado='publicada').order_by('fecha_entrega'), ['asignatura']),
+    ]
+
+    def sobre(data):
+        return {'success': True, 'data': data, 'message': 'OK', 'errors': None}
+
+    filas = []
+    for nombre, serializer_class, compilado, queryset, relacionados in casos:
+        def drf():
+            return JSONRenderer().render(sobre(serializer_class(queryset.select_related(*relacionados), many=True).data))
+
+        def rapido():
+            return codificar_json(sobre(compilado.serializar(compilado.valores(queryset))))
+
+        anterior, actual = drf(), rapido()
+        assert anterior == actual, f"{nombre}: la salida compilada difiere de DRF"
+        filas += [
+            (f'{nombre}: ModelSerializer + JSONRenderer', *medir(drf)),
+            (f'{nombre}: compilado + codificar_json', *medir(rapido)),
+        ]
+
+    cliente = APIClient()
+    cliente.force_authenticate(alumno)
+    for nombre in ('alumno_notas', 'alumno_asistencia', 'alumno_tareas', 'alumno_bootstrap'):
+        def vista(url=reverse(f'api:{nombre}')):
+            assert cliente.get(url).status_code == 200
+        filas.append((f'GET {nombre}', *medir(vista)))
+
+    reportar(f"Serialización de {FILAS} filas ({'orjson' if orjson else 'sin orjson'}), salida idéntica a DRF", filas)
+
+
+if __name__ == '__main__':
+    with base_de_pruebas():
+        main()